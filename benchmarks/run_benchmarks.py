@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""Time ganflu end to end and stage by stage, and write the results as JSON.
+
+End-to-end cases run the ``ganflu`` CLI with ``--profile`` in fixed-target and
+auto mode on ``tests/data``, ``ganflu/web/samples``, the PR8 genome repeated
+to each ``--scales`` contig count and as many synthetic contigs
+(``ganflu.scripts.synthetic``), whose auto calls are scored against the
+ground truth; they need ``miniprot`` on PATH and are recorded as skipped
+without it. Stage cases time the pure-Python steps
+(``parse_miniprot_gff3``, ``prune_gff3``, ``to_seqfeatures``,
+``add_translations``, GenBank write) in-process on the ICV miniprot fixture
+in ``tests/test_inputs`` scaled the same way, so they run anywhere.
+
+    python benchmarks/run_benchmarks.py -o bench.json --scales 10,1000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import Bio  # noqa: E402
+from Bio import SeqIO  # noqa: E402
+from Bio.SeqRecord import SeqRecord  # noqa: E402
+
+import ganflu  # noqa: E402
+from ganflu.scripts import auto_mode, gff3_prune, gff3togbk, synthetic  # noqa: E402
+
+
+SCHEMA_VERSION = 1
+DEFAULT_SCALES = (10, 1000, 100000)
+DEFAULT_REPEAT = 3
+SUITES = ("stages", "e2e")
+
+STAGE_FIXTURE_TARGET = "ICV"
+STAGE_FIXTURE_FASTA = REPO_ROOT / "tests" / "test_inputs" / "ICV" / "Ann_Arbor.fna"
+STAGE_FIXTURE_GFF3 = REPO_ROOT / "tests" / "test_inputs" / "ICV" / "Ann_Arbor_test.gff3"
+
+# Fixed target for each packaged input (None: mixed input, auto mode only).
+# Every input also runs in auto mode.
+PACKAGED_INPUTS = {
+    "tests/data/Ann_Arbor.fna": "ICV",
+    "tests/data/B_Victoria_2_87.fa": "IBV",
+    "tests/data/H1N1_H5N1_mix.fa": "IAV",
+    "tests/data/H1N1_H7N9_mix.fna": "IAV",
+    "tests/data/IAV_IBV_mix.fna": None,
+    "tests/data/PR8.fasta": "IAV",
+    "tests/data/swine_Oklahoma_1334.fna": "IDV",
+    "ganflu/web/samples/IAV_PR8.fasta": "IAV",
+    "ganflu/web/samples/IBV_B_Victoria_2_1987.fa": "IBV",
+    "ganflu/web/samples/ICV_Ann_Arbor_1_1950.fna": "ICV",
+    "ganflu/web/samples/IDV_swine_Oklahoma_1334_2011.fna": "IDV",
+}
+# Scaled end-to-end inputs: PR8 for fixed IAV runs, all four samples for auto.
+SCALED_FIXED_SAMPLE = ("ganflu/web/samples/IAV_PR8.fasta", "IAV")
+
+GFF3_ID_RE = re.compile(r"\b(ID|Parent)=([^;]+)")
+
+
+def environment_metadata() -> dict:
+    """Describe the interpreter, machine and checkout the results came from."""
+    metadata = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+        "ganflu": ganflu.__version__,
+        "biopython": Bio.__version__,
+        "git_commit": None,
+        "git_dirty": None,
+        "miniprot": None,
+    }
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    else:
+        metadata["git_commit"] = commit.stdout.strip()
+        metadata["git_dirty"] = bool(status.stdout.strip())
+    miniprot = shutil.which("miniprot")
+    if miniprot:
+        result = subprocess.run([miniprot, "--version"], capture_output=True, text=True, check=False)
+        metadata["miniprot"] = {"path": miniprot, "version": result.stdout.strip() or None}
+    return metadata
+
+
+def scale_records(records: list[SeqRecord], contigs: int) -> list[SeqRecord]:
+    """Repeat records cyclically up to ``contigs``, with unique ``<id>_<copy>`` IDs."""
+    if not records:
+        raise ValueError("Cannot scale an empty record list")
+    scaled = []
+    for index in range(contigs):
+        record = records[index % len(records)]
+        copy = index // len(records)
+        record_id = f"{record.id}_{copy}"
+        scaled.append(SeqRecord(record.seq, id=record_id, name=record_id, description=""))
+    return scaled
+
+
+def _gff3_seqid(line: str) -> str | None:
+    fields = line.rstrip("\n").split("\t")
+    if line.startswith("##PAF\t"):
+        return fields[6] if len(fields) > 6 else None
+    if line.startswith("#") or len(fields) < 9:
+        return None
+    return fields[0]
+
+
+def scale_gff3(lines: list[str], contig_ids: list[str], copies: int) -> list[str]:
+    """Repeat per-contig GFF3 blocks for scaled contigs, mirroring :func:`scale_records`.
+
+    ``contig_ids`` are the source contig IDs in FASTA order; rows and ##PAF
+    lines are renamed to ``<id>_<copy>`` and their ID/Parent values made
+    unique per copy.
+    """
+    header = [line for line in lines if line.startswith("##") and not line.startswith("##PAF\t")]
+    blocks = defaultdict(list)
+    for line in lines:
+        seqid = _gff3_seqid(line)
+        if seqid is not None:
+            blocks[seqid].append(line)
+    scaled = list(header)
+    for index in range(copies):
+        source_id = contig_ids[index % len(contig_ids)]
+        copy = index // len(contig_ids)
+        new_id = f"{source_id}_{copy}"
+        for line in blocks.get(source_id, []):
+            fields = line.rstrip("\n").split("\t")
+            if line.startswith("##PAF\t"):
+                fields[6] = new_id
+            else:
+                fields[0] = new_id
+                fields[8] = GFF3_ID_RE.sub(
+                    lambda match: f"{match.group(1)}={match.group(2)}_{copy}", fields[8]
+                )
+            scaled.append("\t".join(fields) + "\n")
+    return scaled
+
+
+def write_scaled_fasta(sources: list[Path], contigs: int, path: Path) -> Path:
+    records = [record for source in sources for record in SeqIO.parse(str(source), "fasta")]
+    SeqIO.write(scale_records(records, contigs), str(path), "fasta")
+    return path
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "median_seconds": statistics.median(samples),
+        "min_seconds": min(samples),
+        "max_seconds": max(samples),
+    }
+
+
+def time_repeated(function, repeat: int, setup=None) -> list[float]:
+    """Wall times of ``function(setup())`` over ``repeat`` runs; setup is not timed."""
+    samples = []
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        function(argument)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def stage_result(name: str, case: str, contigs: int, samples: list[float]) -> dict:
+    return {
+        "id": f"stage:{name}:{case}",
+        "suite": "stages",
+        "name": name,
+        "case": case,
+        "contigs": contigs,
+        "status": "ok",
+        "samples": samples,
+        **summarize(samples),
+    }
+
+
+def run_stage_benchmarks(scales, repeat: int, work_dir: Path) -> list[dict]:
+    """Time each pure-Python stage on the ICV fixture scaled to each contig count."""
+    reference = auto_mode.load_reference_bundle(
+        STAGE_FIXTURE_TARGET, None, logging.getLogger("ganflu.benchmarks")
+    )
+    antigen_list = list(reference.config.get("serotype", {}).keys())
+    slip_list = [key for key, value in reference.gene_configs.items() if value.get("ribosomal_slippage")]
+    annotations = {"molecule_type": reference.config["annotations"]["molecule_type"]}
+    thresholds = auto_mode.AutoThresholds()
+    source_records = list(SeqIO.parse(str(STAGE_FIXTURE_FASTA), "fasta"))
+    gff3_lines = STAGE_FIXTURE_GFF3.read_text(encoding="utf-8").splitlines(keepends=True)
+
+    results = []
+    for contigs in scales:
+        case = f"{STAGE_FIXTURE_TARGET}_x{contigs}"
+        records = scale_records(source_records, contigs)
+        records_by_id = {record.id: record for record in records}
+        gff3_path = work_dir / f"{case}.gff3"
+        gff3_path.write_text(
+            "".join(scale_gff3(gff3_lines, [record.id for record in source_records], contigs)),
+            encoding="utf-8",
+        )
+        features, _ = gff3togbk.read_gff3(str(gff3_path))
+
+        def seqfeatures():
+            return gff3togbk.to_seqfeatures(
+                features, defaultdict(dict), antigen_list, slip_list, reference.gene_configs
+            )
+
+        def annotated_records():
+            features_by_contig = seqfeatures()
+            return [
+                SeqRecord(
+                    record.seq,
+                    id=record.id,
+                    name=record.id,
+                    description="",
+                    annotations=dict(annotations),
+                    features=features_by_contig.get(record.id, []),
+                )
+                for record in records
+            ]
+
+        def translated_records():
+            return [gff3togbk.add_translations(record) for record in annotated_records()]
+
+        def write_genbank(out_records):
+            with open(work_dir / f"{case}.gbk", "w", encoding="utf-8") as handle:
+                SeqIO.write(out_records, handle, "genbank")
+
+        stages = (
+            (
+                "parse_miniprot_gff3",
+                lambda _: auto_mode.parse_miniprot_gff3(str(gff3_path), reference, records_by_id, thresholds),
+                None,
+            ),
+            (
+                "prune_gff3",
+                lambda _: gff3_prune.prune_gff3(
+                    gff3_path,
+                    work_dir / f"{case}.pruned.gff3",
+                    protein_lengths=reference.protein_lengths,
+                    antigen_names=antigen_list,
+                ),
+                None,
+            ),
+            ("to_seqfeatures", lambda _: seqfeatures(), None),
+            (
+                "add_translations",
+                lambda out_records: [gff3togbk.add_translations(record) for record in out_records],
+                annotated_records,
+            ),
+            ("genbank_write", write_genbank, translated_records),
+        )
+        for name, function, setup in stages:
+            results.append(stage_result(name, case, contigs, time_repeated(function, repeat, setup)))
+    return results
+
+
+def e2e_cases(scales, work_dir: Path) -> list[dict]:
+    """Inputs, targets and contig counts for the end-to-end runs."""
+    cases = []
+    for relative_path, target in PACKAGED_INPUTS.items():
+        path = REPO_ROOT / relative_path
+        contigs = sum(1 for _ in SeqIO.parse(str(path), "fasta"))
+        for mode_target in ([target] if target else []) + ["auto"]:
+            cases.append({"input": path, "case": relative_path, "target": mode_target, "contigs": contigs})
+    fixed_sample, fixed_target = SCALED_FIXED_SAMPLE
+    for contigs in scales:
+        fixed_input = write_scaled_fasta(
+            [REPO_ROOT / fixed_sample], contigs, work_dir / f"{fixed_target}_x{contigs}.fasta"
+        )
+        mixed_input = work_dir / f"synthetic_x{contigs}.fasta"
+        synthetic.write_synthetic(contigs, mixed_input)
+        cases.append(
+            {"input": fixed_input, "case": fixed_input.stem, "target": fixed_target, "contigs": contigs}
+        )
+        cases.append(
+            {
+                "input": mixed_input,
+                "case": mixed_input.stem,
+                "target": "auto",
+                "contigs": contigs,
+                "truth": mixed_input.with_suffix(".truth.tsv"),
+            }
+        )
+    return cases
+
+
+def run_e2e_benchmarks(scales, repeat: int, work_dir: Path) -> list[dict]:
+    """Run the CLI with --profile per case; per-stage samples come from the profile JSON."""
+    miniprot = shutil.which("miniprot")
+    results = []
+    for case in e2e_cases(scales, work_dir):
+        result = {
+            "id": f"e2e:{case['target']}:{case['case']}",
+            "suite": "e2e",
+            "name": "auto" if case["target"] == "auto" else "fixed",
+            "case": case["case"],
+            "target": case["target"],
+            "contigs": case["contigs"],
+        }
+        if miniprot is None:
+            results.append({**result, "status": "skipped", "reason": "miniprot is not on PATH"})
+            continue
+        samples = []
+        stage_samples = defaultdict(list)
+        for run in range(repeat):
+            out_stem = work_dir / "e2e" / f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', result['id'])}.{run}"
+            command = [
+                sys.executable, "-m", "ganflu.ganflu",
+                "-i", str(case["input"]),
+                "-o", str(out_stem),
+                "-t", case["target"],
+                "--profile",
+            ]
+            start = time.perf_counter()
+            completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=False)
+            elapsed = time.perf_counter() - start
+            if completed.returncode != 0:
+                result.update(status="failed", reason=completed.stderr.strip()[-2000:])
+                break
+            samples.append(elapsed)
+            profile = json.loads(Path(f"{out_stem}.profile.json").read_text(encoding="utf-8"))
+            for stage in profile["stages"]:
+                stage_samples[stage["stage"]].append(stage["wall_seconds"])
+        else:
+            if "truth" in case:
+                result["accuracy"] = synthetic.compare_with_truth(
+                    synthetic.read_tsv_rows(case["truth"]), synthetic.read_tsv_rows(f"{out_stem}.auto.tsv")
+                )
+            result.update(
+                status="ok",
+                samples=samples,
+                **summarize(samples),
+                stages={
+                    stage: {"samples": values, **summarize(values)} for stage, values in stage_samples.items()
+                },
+            )
+        results.append(result)
+    return results
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, repeat: int = DEFAULT_REPEAT, suites=SUITES, work_dir=None) -> dict:
+    """Run the selected suites and return the JSON-ready report."""
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    scales = [int(scale) for scale in scales]
+    with tempfile.TemporaryDirectory(prefix="ganflu-bench-") as tmpdir:
+        root = Path(work_dir) if work_dir else Path(tmpdir)
+        root.mkdir(parents=True, exist_ok=True)
+        results = []
+        if "stages" in suites:
+            results.extend(run_stage_benchmarks(scales, repeat, root))
+        if "e2e" in suites:
+            (root / "e2e").mkdir(exist_ok=True)
+            results.extend(run_e2e_benchmarks(scales, repeat, root))
+    return {
+        "schema": SCHEMA_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment_metadata(),
+        "settings": {"scales": scales, "repeat": repeat, "suites": list(suites)},
+        "results": results,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'median':>10} {'min':>10}  benchmark"]
+    for result in report["results"]:
+        if result["status"] == "ok":
+            lines.append(f"{result['median_seconds']:>9.4f}s {result['min_seconds']:>9.4f}s  {result['id']}")
+        else:
+            lines.append(f"{result['status']:>21}  {result['id']}")
+    return "\n".join(lines)
+
+
+def _parse_scales(value: str) -> list[int]:
+    try:
+        scales = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid contig counts: {value!r}") from None
+    if not scales or any(scale < 1 for scale in scales):
+        raise argparse.ArgumentTypeError("contig counts must be positive integers")
+    return scales
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ganflu end to end and per pure-Python stage.")
+    parser.add_argument(
+        "-o", "--output", type=Path, default=None, help="Write the JSON report here (default: stdout)"
+    )
+    parser.add_argument(
+        "--scales",
+        type=_parse_scales,
+        default=list(DEFAULT_SCALES),
+        help="Comma-separated contig counts for scaled inputs (default: 10,1000,100000)",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per benchmark (default: 3)")
+    parser.add_argument(
+        "--suite",
+        dest="suites",
+        action="append",
+        choices=SUITES,
+        default=None,
+        help="Run only this suite; repeat for several (default: all)",
+    )
+    parser.add_argument("--work-dir", type=Path, default=None, help="Keep scaled inputs and outputs here")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scales, args.repeat, args.suites or SUITES, args.work_dir)
+    text = json.dumps(report, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+    print(format_report(report), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,18 +6,19 @@ import sys
 import logging
 import argparse
 import time
-import functools
-import http.server
-import webbrowser
-import tempfile
-from importlib import resources
+import shutil
 from . import __version__
-from .launchers.miniprot import MiniprotCommandLine
-from .scripts import auto_mode, gff3_prune, gff3togbk, validate_reference_files
+
+# Subcommand modules are imported where they are used, so `ganflu --version`,
+# `--help` and `ganflu gui` (WebAssembly backend) do not load Biopython/NumPy.
+# tests/test_import_time.py keeps it that way.
 
 SUPPORTED_TARGETS = ["IAV", "IBV", "ICV", "IDV"]
 CLI_TARGETS = SUPPORTED_TARGETS + ["auto"]
 GUI_COMMAND = "gui"
+SERVE_COMMAND = "serve"
+MERGE_COMMAND = "merge"
+GUI_BACKENDS = ["auto", "native", "wasm"]
 
 def _version():
     """
@@ -54,9 +55,13 @@ def setup_logging(log_file, verbose=False):
     return logger
 
 def resolve_isolate(isolate, output_stem):
+    from .scripts import gff3togbk
+
     return (isolate or "").strip() or gff3togbk.get_output_id_prefix(output_stem)
 
 def get_webapp_dir():
+    from importlib import resources
+
     web_dir = resources.files("ganflu").joinpath("web")
     index_path = web_dir.joinpath("index.html")
     if not index_path.is_file():
@@ -75,6 +80,9 @@ def _get_gui_args(raw_args=None) -> argparse.Namespace:
     parser.add_argument("--port", default=0, type=int, help="Port to bind (default: 0, auto-select a free port)")
     parser.add_argument("--no-port-fallback", dest="port_fallback", action="store_false", help="Fail instead of trying the next port when an explicit --port is busy")
     parser.add_argument("--open-browser", action="store_true", help="Open the web app URL in the default browser")
+    parser.add_argument("--backend", choices=GUI_BACKENDS, default="auto", help="Backend for the web app: native runs the local miniprot binary and annotates on this host, wasm runs both in the browser (default: auto, native when miniprot is on PATH)")
+    parser.add_argument("--threads", default=None, type=lambda value: is_positive_integer("--threads", value), help="Threads shared by native miniprot scans (default: number of CPUs)")
+    parser.add_argument("-d", "--db_dir", dest="db_dir", default=None, help="Data path for native scans (optional; default: ganflu/db)")
     parser.add_argument("-v", "--version", action="version", version=_version())
     args = parser.parse_args(raw_args)
     args.command = GUI_COMMAND
@@ -83,7 +91,22 @@ def _get_gui_args(raw_args=None) -> argparse.Namespace:
 def _get_args() -> argparse.Namespace:
     if len(sys.argv) > 1 and sys.argv[1] == GUI_COMMAND:
         return _get_gui_args(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == SERVE_COMMAND:
+        return _get_serve_args(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == MERGE_COMMAND:
+        return _get_merge_args(sys.argv[2:])
+
+    parser = _build_parser()
+    if len(sys.argv) == 1:
+        parser.print_help(sys.stderr)
+        sys.exit(1)
+    
+    args = parser.parse_args()
+    args.command = "annotate"
 
+    return args 
+
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description=f"ganflu v{_version()}: Influenza virus genome annotation",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -91,11 +114,15 @@ def _get_args() -> argparse.Namespace:
             "Subcommands:\n"
             "  ganflu gui              Launch the browser-based ganflu Web app\n"
             "  ganflu gui --help       Show ganflu Web app options\n"
+            "  ganflu serve            Run a local annotation job server with warm references\n"
+            "  ganflu serve --help     Show annotation job server options\n"
+            "  ganflu merge            Combine the outputs of --shard runs\n"
+            "  ganflu merge --help     Show merge options\n"
         ),
     )
     
     # Input/Output options
-    parser.add_argument("-i", "--input", required=True, type=str, help="Input FASTA file")
+    parser.add_argument("-i", "--input", required=True, type=str, help="Input FASTA file (plain, gzip/BGZF, or zstd with the zstandard package)")
     parser.add_argument("-o", "--output", dest="output", default=None, type=str, help="basename for Output GenBank file name (default: <input>)")
     parser.add_argument("-t", "--target", dest="target", required=True, help="Target virus", choices=CLI_TARGETS)
     parser.add_argument("-d", "--db_dir", dest="db_dir", help="Data path (optional; default: ganflu/db)", default=None)
@@ -110,23 +137,100 @@ def _get_args() -> argparse.Namespace:
     parser.add_argument("--auto-min-margin", dest="auto_min_margin", default=0.10, type=float, help="Minimum score margin between best and second-best target in auto mode")
     parser.add_argument("--auto-complete-aa-coverage", dest="auto_complete_aa_coverage", default=0.90, type=float, help="Reference amino-acid coverage required to call an auto hit complete")
     parser.add_argument("--auto-write-rejected", dest="auto_write_rejected", action="store_true", help="Write rejected/review contigs to <output>.auto.rejected.fasta")
+    parser.add_argument("--subtype-panel", dest="subtype_panel", default=None, help="Expanded HA/NA protein panel for second-stage subtyping of contigs called HA or NA (default: subtype_panel_faa from the reference TOML, if set; auto mode: IAV only)")
+    parser.add_argument("--gzip-output", dest="gzip_output", action="store_true", help="gzip-compress GenBank, CDS/protein FASTA and rejected FASTA outputs (.gz; uses pigz when available)")
+    parser.add_argument("--profile", action="store_true", help="Record wall time, CPU time and peak Python memory (tracemalloc) per stage in <output>.profile.json (auto mode: also in the summary JSON)")
+    parser.add_argument("--profile-cprofile-dir", dest="profile_cprofile_dir", default=None, help="With --profile, also dump cProfile stats for each top-level stage into this directory")
+    parser.add_argument("--trace", dest="trace", default=None, help="Write a Chrome Trace Event timeline of the run's stages and output writers to this JSON file (open in chrome://tracing or Perfetto)")
+    parser.add_argument("--results-db", dest="results_db", default=None, help="SQLite database to append run metadata, contig calls, CDS features and stage timings to (created if missing)")
     parser.add_argument("--auto-report-prefix", dest="auto_report_prefix", default=None, help="Output prefix for auto TSV/summary reports (default: <output>)")
+    parser.add_argument("--threads", default=None, type=lambda value: is_positive_integer("--threads", value), help="Threads for each miniprot run, including the subtype panel search (default: miniprot's default)")
+    parser.add_argument("--miniprot-bin", dest="miniprot_bin", default="miniprot", help="miniprot executable to run (default: miniprot on PATH)")
+    parser.add_argument("--shard", dest="shard", default=None, type=_parse_shard, help="Annotate only shard i of N (e.g. 3/16; 1-based) of the input records, split by a stable hash of the record ID; combine the shards with `ganflu merge`")
     parser.add_argument("-v", "--version", action="version", version=_version())
-    
-    if len(sys.argv) == 1:
-        parser.print_help(sys.stderr)
-        sys.exit(1)
-    
-    args = parser.parse_args()
-    args.command = "annotate"
+    return parser
 
-    return args 
+def _get_serve_args(raw_args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="ganflu serve",
+        description=f"ganflu v{_version()}: run annotation jobs in a long-lived process with preloaded references",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Host/interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", default=8765, type=int, help="Port to bind (default: 8765; 0 selects a free port)")
+    parser.add_argument("--unix-socket", dest="unix_socket", default=None, help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--jobs-dir", dest="jobs_dir", default="ganflu_jobs", help="Directory for per-job inputs and results (default: ./ganflu_jobs)")
+    parser.add_argument("--workers", default=2, type=lambda value: is_positive_integer("--workers", value), help="Number of concurrent annotation jobs (default: 2)")
+    parser.add_argument("--targets", default=",".join(SUPPORTED_TARGETS), help="Comma-separated reference bundles to preload (default: IAV,IBV,ICV,IDV)")
+    parser.add_argument("-d", "--db_dir", dest="db_dir", default=None, help="Data path (optional; default: ganflu/db)")
+    parser.add_argument("--results-db", dest="results_db", default=None, help="SQLite database that every job appends its results to")
+    parser.add_argument("--job-ttl", dest="job_ttl", default=24 * 60 * 60, type=lambda value: is_positive_integer("--job-ttl", value), help="Seconds to keep a finished job and its directory (default: 86400)")
+    parser.add_argument("--max-jobs", dest="max_jobs", default=1000, type=lambda value: is_positive_integer("--max-jobs", value), help="Finished jobs to keep; the oldest are deleted first (default: 1000)")
+    parser.add_argument("--log-file", dest="log_file", default=None, help="Server log file path (default: <jobs-dir>/serve.log)")
+    parser.add_argument("--verbose", action="store_true", help="Show debug logs in the terminal")
+    parser.add_argument("-v", "--version", action="version", version=_version())
+    args = parser.parse_args(raw_args)
+    args.command = SERVE_COMMAND
+    return args
 
-def bind_gui_server(host, port, web_dir, port_fallback=True):
-    handler = functools.partial(
-        http.server.SimpleHTTPRequestHandler,
-        directory=str(web_dir),
+def _get_merge_args(raw_args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="ganflu merge",
+        description=f"ganflu v{_version()}: combine the outputs of ganflu --shard runs into the outputs of one run",
     )
+    parser.add_argument("shards", nargs="+", help="Output stems of the shard runs (or their .shard.json manifests)")
+    parser.add_argument("-i", "--input", required=True, help="The input FASTA the shards were split from")
+    parser.add_argument("-o", "--output", required=True, help="basename for the merged outputs")
+    parser.add_argument("-d", "--db_dir", dest="db_dir", default=None, help="Data path (optional; default: ganflu/db)")
+    parser.add_argument("--isolate", dest="isolate", default=None, help="isolate name (default: output stem prefix)")
+    parser.add_argument("--preserve_original_id", "--preserve-original-id", dest="preserve_original_id", action="store_true", help="Preserve original FASTA record IDs in GenBank output")
+    parser.add_argument("--gzip-output", dest="gzip_output", action="store_true", help="gzip-compress GenBank, CDS/protein FASTA and rejected FASTA outputs")
+    parser.add_argument("--log-file", dest="log_file", default=None, help="Log file path (default: <output>.merge.log)")
+    parser.add_argument("--verbose", action="store_true", help="Show debug logs in the terminal")
+    parser.add_argument("-v", "--version", action="version", version=_version())
+    args = parser.parse_args(raw_args)
+    args.command = MERGE_COMMAND
+    return args
+
+def _parse_shard(value):
+    from .scripts.shards import Shard
+
+    try:
+        return Shard.parse(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+def write_shard_input(args, out_stem, work_dir, logger):
+    """Write this shard's records to a temporary FASTA; returns (path, shard records, input records)."""
+    import tempfile
+
+    from .scripts import shards
+
+    with tempfile.NamedTemporaryFile(
+        suffix=".fasta",
+        prefix=f"{os.path.basename(out_stem)}.shard{args.shard.index}of{args.shard.count}.",
+        dir=work_dir,
+        delete=False,
+    ) as handle:
+        shard_fasta = handle.name
+    shard_contigs, total_contigs = shards.write_shard_fasta(args.input, shard_fasta, args.shard)
+    logger.info(f"Shard {args.shard}: {shard_contigs} of {total_contigs} input record(s)")
+    args.input = shard_fasta
+    return shard_fasta, shard_contigs, total_contigs
+
+def bind_gui_server(host, port, web_dir, port_fallback=True, scan_service=None):
+    import http.server
+
+    from . import static_server
+
+    if scan_service is None:
+        handler = static_server.make_static_handler(web_dir)
+    else:
+        # ganflu.serve imports the annotation pipeline; only the native backend needs it.
+        from . import serve
+
+        handler = static_server.make_static_handler(
+            web_dir, serve.GuiRequestHandler, scan_service=scan_service
+        )
     current_port = int(port)
     last_error = None
     for _ in range(100 if port_fallback else 1):
@@ -146,19 +250,40 @@ def get_server_url(server):
         display_host = f"[{display_host}]"
     return f"http://{display_host}:{port}/"
 
+def create_native_scan_service(args):
+    if args.backend == "wasm":
+        return None
+    if args.backend == "auto" and shutil.which("miniprot") is None:
+        return None
+    from . import serve
+
+    return serve.NativeScanService(
+        targets=SUPPORTED_TARGETS,
+        threads=args.threads,
+        db_dir=args.db_dir,
+    )
+
 def run_gui(args) -> int:
     web_dir = get_webapp_dir()
+    scan_service = create_native_scan_service(args)
     server = bind_gui_server(
         args.host,
         args.port,
         web_dir,
         port_fallback=args.port_fallback,
+        scan_service=scan_service,
     )
     url = get_server_url(server)
     print(f"Serving ganflu Web from {web_dir}")
+    if scan_service is None:
+        print("Backend: WebAssembly and Pyodide (in the browser)")
+    else:
+        print(f"Backend: native {scan_service.miniprot_path} ({scan_service.threads} threads), native annotation")
     print(f"Open {url}")
     print("Press Ctrl+C to stop.")
     if args.open_browser:
+        import webbrowser
+
         webbrowser.open(url)
     try:
         server.serve_forever()
@@ -168,19 +293,93 @@ def run_gui(args) -> int:
         server.server_close()
     return 0
 
+def run_serve(args) -> int:
+    jobs_dir = os.path.abspath(args.jobs_dir)
+    os.makedirs(jobs_dir, exist_ok=True)
+    log_file = os.path.abspath(args.log_file) if args.log_file else os.path.join(jobs_dir, "serve.log")
+    logger = setup_logging(log_file, args.verbose)
+    logger.info(f"ganflu v{_version()} serve started")
+    from . import serve
+    from .scripts import auto_mode
+
+    service = serve.AnnotationService(
+        arg_parser=_build_parser(),
+        jobs_dir=jobs_dir,
+        targets=auto_mode.parse_auto_targets(args.targets),
+        db_dir=args.db_dir,
+        max_workers=args.workers,
+        results_db=args.results_db,
+        job_ttl=args.job_ttl,
+        max_jobs=args.max_jobs,
+        logger=logger,
+    )
+    server = serve.bind_job_server(service, args.host, args.port, args.unix_socket)
+    address = args.unix_socket or get_server_url(server)
+    logger.info(f"Accepting annotation jobs on {address}")
+    print("Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping ganflu serve.")
+    finally:
+        server.server_close()
+        service.shutdown()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+    return 0
+
+def run_merge(args) -> int:
+    from .scripts import shards
+
+    start_time = time.time()
+    out_stem = os.path.abspath(args.output)
+    os.makedirs(os.path.dirname(out_stem), exist_ok=True)
+    log_file = os.path.abspath(args.log_file) if args.log_file else f"{out_stem}.merge.log"
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    logger = setup_logging(log_file, args.verbose)
+    logger.info(f"ganflu v{_version()} merge started")
+    logger.info(f"Input FASTA: {os.path.abspath(args.input)}")
+    logger.info(f"Output stem: {out_stem}")
+    shard_stems = [
+        os.path.abspath(stem.removesuffix(shards.SHARD_MANIFEST_SUFFIX)) for stem in args.shards
+    ]
+    try:
+        shards.merge_shards(
+            shard_stems,
+            args.input,
+            out_stem,
+            isolate=resolve_isolate(args.isolate, out_stem),
+            preserve_original_id=args.preserve_original_id,
+            db_dir=args.db_dir,
+            gzip_output=args.gzip_output,
+            logger=logger,
+        )
+    except Exception:
+        logger.exception(f"ganflu merge failed after {time.time() - start_time:.2f} seconds")
+        raise
+    logger.info(f"ganflu merge completed in {time.time() - start_time:.2f} seconds")
+    return 0
+
 def main():
     start_time = time.time()
     args = _get_args()
 
     if getattr(args, "command", None) == GUI_COMMAND:
         return run_gui(args)
+    if getattr(args, "command", None) == SERVE_COMMAND:
+        return run_serve(args)
+    if getattr(args, "command", None) == MERGE_COMMAND:
+        return run_merge(args)
+
+    from .scripts import auto_mode, compression, fixed_mode, shards
+    from .scripts.profiling import StageProfiler, StageTimer, TraceRecorder
 
     input_fasta = args.input
     if args.output:
         out_stem = os.path.abspath(args.output)
     else:
         input_dir = os.path.dirname(os.path.abspath(input_fasta))
-        input_stem = os.path.splitext(os.path.basename(input_fasta))[0]
+        input_stem = os.path.splitext(os.path.basename(compression.strip_compression_suffix(input_fasta)))[0]
         out_stem = os.path.join(input_dir, input_stem)
     # workdir is the directory where the output files will be saved
     work_dir = os.path.dirname(out_stem)
@@ -200,84 +399,57 @@ def main():
     logger.info(f"Target: {args.target}")
 
     target = args.target
-    if target == "auto":
-        try:
-            auto_mode.run_auto(args, out_stem, work_dir, logger)
-            logger.info(f"ganflu auto mode completed in {time.time() - start_time:.2f} seconds")
-        except Exception:
-            logger.exception(f"ganflu auto mode failed after {time.time() - start_time:.2f} seconds")
-            raise
-        return 0
-
-    if args.db_dir:
-        ref_dir = os.path.abspath(args.db_dir)
+    tracer = TraceRecorder() if args.trace else None
+    if args.profile:
+        timer = StageProfiler(cprofile_dir=args.profile_cprofile_dir, tracer=tracer)
     else:
-        db_path_traversable = resources.files('ganflu').joinpath(f'db/{args.target}')
-        ref_dir = db_path_traversable.resolve()
-
-    logger.info(f"Reference directory: {ref_dir}")
-    ref_toml = validate_reference_files.validate_reference_files(target=args.target, db_dir=args.db_dir, logger=logger)
-    ref_faa = os.path.join(ref_dir, ref_toml["metadata"]["prot_faa"])
-    logger.info(f"Reference protein FASTA: {ref_faa}")
-
-    gff3_file = f"{out_stem}.gff3"
-    gbk_file = f"{out_stem}.gbk"
-    cds_fna_file = f"{out_stem}.cds.fna"
-    faa_file = f"{out_stem}.faa"
-    raw_gff3_file = None
+        timer = StageTimer(tracer)
+    shard_fasta = None
     try:
-        logger.info("Running miniprot")
-        with tempfile.NamedTemporaryFile(
-            mode="w",
-            suffix=".raw.gff3",
-            prefix=f"{os.path.basename(out_stem)}.",
-            dir=work_dir,
-            delete=False,
-        ) as raw_gff3:
-            raw_gff3_file = raw_gff3.name
-        miniprot = MiniprotCommandLine(
-            input=input_fasta, work_dir=work_dir, output=raw_gff3_file,
-            prot_faa=ref_faa, miniprot_bin="miniprot", stderr_filename="miniprot.stderr", kmer_size=15,
-            max_secondary_alignments=gff3_prune.RELAXED_MAX_SECONDARY_ALIGNMENTS,
-            secondary_to_primary_ratio=gff3_prune.RELAXED_SECONDARY_TO_PRIMARY_RATIO,
-            output_score_ratio=gff3_prune.RELAXED_OUTPUT_SCORE_RATIO,
-            )
-        miniprot.run_piped_commands()
-        logger.info("Pruning miniprot GFF3")
-        prune_result = gff3_prune.prune_gff3(
-            raw_gff3_file,
-            gff3_file,
-            prot_faa=ref_faa,
-            antigen_names=ref_toml.get("serotype", {}).keys(),
-        )
-        logger.info(
-            f"Pruned GFF3 output: {gff3_file} "
-            f"({prune_result.selected_parent_count} parent alignment(s))"
-        )
-        try:
-            os.remove(raw_gff3_file)
-            raw_gff3_file = None
-        except OSError:
-            logger.debug(f"Could not remove temporary raw GFF3: {raw_gff3_file}", exc_info=True)
-
-        logger.info("Converting GFF3 to GenBank")
-        gff3togbk_args = [
-            "-g", gff3_file,
-            "-o", gbk_file,
-            "-i", input_fasta,
-            "--toml", os.path.join(ref_dir, f'{target}.toml'),
-            "--isolate", args.isolate,
-            "--cds-fna", cds_fna_file,
-            "--faa", faa_file,
-        ]
-        if args.preserve_original_id:
-            gff3togbk_args.append("--preserve_original_id")
-        gff3togbk.main(gff3togbk_args)
-        logger.info(f"GenBank output: {gbk_file}")
-        logger.info(f"ganflu completed in {time.time() - start_time:.2f} seconds")
-    except Exception:
-        logger.exception(f"ganflu failed after {time.time() - start_time:.2f} seconds")
-        raise
+        with timer.span("ganflu.main", category="run", target=target):
+            if args.shard:
+                with timer.stage("shard"):
+                    shard_fasta, shard_contigs, total_contigs = write_shard_input(args, out_stem, work_dir, logger)
+            if args.shard and shard_contigs == 0:
+                logger.warning(f"Shard {args.shard} holds no records; nothing to annotate")
+            elif target == "auto":
+                try:
+                    with timer.span("run_auto", category="run"):
+                        auto_mode.run_auto(args, out_stem, work_dir, logger, timer=timer)
+                    logger.info(f"ganflu auto mode completed in {time.time() - start_time:.2f} seconds")
+                except Exception:
+                    logger.exception(f"ganflu auto mode failed after {time.time() - start_time:.2f} seconds")
+                    raise
+            else:
+                try:
+                    with timer.span("run_fixed", category="run"):
+                        fixed_mode.run_fixed(args, out_stem, work_dir, logger, timer=timer)
+                    logger.info(f"ganflu completed in {time.time() - start_time:.2f} seconds")
+                except Exception:
+                    logger.exception(f"ganflu failed after {time.time() - start_time:.2f} seconds")
+                    raise
+            if args.shard:
+                manifest = shards.write_shard_manifest(
+                    out_stem,
+                    args.shard,
+                    input_fasta=input_fasta,
+                    target=args.target,
+                    contigs=shard_contigs,
+                    total=total_contigs,
+                    report_stem=args.auto_report_prefix,
+                )
+                logger.info(f"Shard manifest: {manifest}")
+    finally:
+        if shard_fasta is not None and os.path.exists(shard_fasta):
+            os.remove(shard_fasta)
+        if args.profile:
+            profile_file = f"{out_stem}.profile.json"
+            timer.write_json(profile_file)
+            timer.close()
+            logger.info(f"Profile output: {profile_file}")
+        if tracer is not None:
+            tracer.write_json(args.trace)
+            logger.info(f"Trace output: {os.path.abspath(args.trace)}")
 
     return 0
 
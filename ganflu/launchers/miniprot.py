@@ -25,6 +25,7 @@ class MiniprotCommandLine(CommandLineTool):
         max_secondary_alignments=None,
         secondary_to_primary_ratio=None,
         output_score_ratio=None,
+        threads=None,
     ):
         super().__init__(miniprot_bin, stderr_filename, work_dir)
         self.miniprot_bin = miniprot_bin
@@ -36,10 +37,13 @@ class MiniprotCommandLine(CommandLineTool):
         self.max_secondary_alignments = max_secondary_alignments
         self.secondary_to_primary_ratio = secondary_to_primary_ratio
         self.output_score_ratio = output_score_ratio
+        self.threads = threads
         #miniprot -J 15 --gff A_duck_Japan_AQ-HE29-22_2017_H7N9.fa IAV_proteome_consensus.faa >A_duck_Japan_AQ-HE29-22_2017_H7N9.gff3
     def run_piped_commands(self):
         stderr_path = os.path.join(self.work_dir, self.stderr_file_name)
         cmdline = [self.bin_path, '-P', self.prefix, '--gff', '-J', self.kmer_size]
+        if self.threads is not None:
+            cmdline.extend(['-t', str(self.threads)])
         if self.max_secondary_alignments is not None:
             cmdline.extend(['-N', str(self.max_secondary_alignments)])
         if self.output_score_ratio is not None:
@@ -6,8 +6,9 @@ from __future__ import annotations
 import csv
 import json
 import os
+import time
 from collections import Counter, defaultdict
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from importlib import resources
 from pathlib import Path
 
@@ -15,8 +16,8 @@ from Bio import SeqIO
 from Bio.SeqFeature import CompoundLocation, FeatureLocation, SeqFeature
 from Bio.SeqRecord import SeqRecord
 
-from ganflu.launchers.miniprot import MiniprotCommandLine
-from ganflu.scripts import gff3_prune, gff3togbk, validate_reference_files
+from ganflu.scripts import compression, gff3_prune, gff3togbk, subtype_panel, validate_reference_files
+from ganflu.scripts.profiling import StageProfiler, StageTimer
 
 
 DEFAULT_AUTO_TARGETS = ("IAV", "IBV", "ICV", "IDV")
@@ -98,6 +99,7 @@ class ReferenceBundle:
     gene_configs: dict
     protein_lengths: dict[str, int]
     protein_terminal_stops: dict[str, bool] = field(default_factory=dict)
+    subtype_panel_faa: str | None = None
 
 
 @dataclass
@@ -147,6 +149,13 @@ class CandidateHit:
         return f"{self.query_start}-{self.query_end}"
 
 
+@dataclass
+class MiniprotScan:
+    paf_by_key: dict[tuple[str, str, int, int], dict[str, int]]
+    mrna_rows: list[dict]
+    cds_by_parent: dict[str, list[CdsRow]]
+
+
 @dataclass
 class AutoCall:
     contig_id: str
@@ -210,6 +219,7 @@ def load_reference_bundle(target: str, db_dir: str | None, logger) -> ReferenceB
         gene_configs=ref_toml.get("genes", {}),
         protein_lengths=protein_lengths,
         protein_terminal_stops=protein_terminal_stops,
+        subtype_panel_faa=subtype_panel.resolve_subtype_panel(ref_dir, ref_toml),
     )
 
 
@@ -374,12 +384,7 @@ def collect_candidate_flags(
     return list(dict.fromkeys(flags))
 
 
-def parse_miniprot_gff3(
-    gff3_path: str,
-    reference: ReferenceBundle,
-    contigs_by_id: dict[str, SeqRecord],
-    thresholds: AutoThresholds,
-) -> list[CandidateHit]:
+def read_miniprot_gff3(gff3_path: str) -> MiniprotScan:
     paf_by_key = {}
     mrna_rows = []
     cds_by_parent = defaultdict(list)
@@ -423,9 +428,19 @@ def parse_miniprot_gff3(
                 cds_by_parent[parent_id].append(
                     CdsRow(start=int(start), end=int(end), strand=strand)
                 )
+    return MiniprotScan(paf_by_key=paf_by_key, mrna_rows=mrna_rows, cds_by_parent=cds_by_parent)
+
 
+def build_candidate_hits(
+    scan: MiniprotScan,
+    reference: ReferenceBundle,
+    contigs_by_id: dict[str, SeqRecord],
+    thresholds: AutoThresholds,
+) -> list[CandidateHit]:
+    paf_by_key = scan.paf_by_key
+    cds_by_parent = scan.cds_by_parent
     candidates = []
-    for row in mrna_rows:
+    for row in scan.mrna_rows:
         contig_record = contigs_by_id.get(row["contig_id"])
         if contig_record is None:
             continue
@@ -510,6 +525,20 @@ def parse_miniprot_gff3(
     return candidates
 
 
+def parse_miniprot_gff3(
+    gff3_path: str,
+    reference: ReferenceBundle,
+    contigs_by_id: dict[str, SeqRecord],
+    thresholds: AutoThresholds,
+) -> list[CandidateHit]:
+    return build_candidate_hits(
+        read_miniprot_gff3(gff3_path),
+        reference,
+        contigs_by_id,
+        thresholds,
+    )
+
+
 def is_ribosomal_slippage_fragment(candidate: CandidateHit, reference: ReferenceBundle) -> bool:
     gene_name = product_gene_name(candidate.product)
     gene_config = reference.gene_configs.get(gene_name, {})
@@ -888,12 +917,32 @@ def auto_call_to_row(call: AutoCall) -> dict[str, str | int]:
     }
 
 
+def auto_call_from_row(row: dict[str, str]) -> AutoCall:
+    """Rebuild the fields of an :class:`AutoCall` that ``build_summary`` reads from a TSV row."""
+    return AutoCall(
+        contig_id=row["contig_id"],
+        length=int(row["length"]),
+        call=row["call"],
+        target=row["target"],
+        segment=row["segment"],
+        status=row["status"],
+        qc_result=row["qc_result"],
+        flags=[] if row["flags"] == "-" else row["flags"].split(";"),
+        confidence=row["confidence"],
+        notes=[] if row["notes"] == "-" else row["notes"].split(";"),
+    )
+
+
 def write_auto_tsv(calls: list[AutoCall], path: str) -> None:
+    write_auto_tsv_rows([auto_call_to_row(call) for call in calls], path)
+
+
+def write_auto_tsv_rows(rows: list[dict], path: str) -> None:
     with open(path, "w", encoding="utf-8", newline="") as handle:
         writer = csv.DictWriter(handle, fieldnames=TSV_COLUMNS, delimiter="\t")
         writer.writeheader()
-        for call in calls:
-            writer.writerow(auto_call_to_row(call))
+        for row in rows:
+            writer.writerow(row)
 
 
 def make_accepted_segments(calls: list[AutoCall]) -> dict[str, dict[str, str]]:
@@ -944,6 +993,34 @@ def write_target_fasta(
         )
 
 
+def build_gff3togbk_args(
+    *,
+    gff3: str,
+    gbk: str,
+    input_fasta: str,
+    reference: ReferenceBundle,
+    isolate: str,
+    cds_fna: str,
+    faa: str,
+    preserve_original_id: bool,
+    subtype_tsv: str | None = None,
+) -> list[str]:
+    args = [
+        "-g", gff3,
+        "-o", gbk,
+        "-i", input_fasta,
+        "--toml", reference.toml_path,
+        "--isolate", isolate,
+        "--cds-fna", cds_fna,
+        "--faa", faa,
+    ]
+    if preserve_original_id:
+        args.append("--preserve_original_id")
+    if subtype_tsv:
+        args.extend(["--subtype-calls", subtype_tsv])
+    return args
+
+
 def run_annotation_for_targets(
     *,
     contigs: list[SeqRecord],
@@ -955,7 +1032,13 @@ def run_annotation_for_targets(
     isolate: str,
     preserve_original_id: bool,
     logger,
+    records_by_target: dict[str, list[SeqRecord]] | None = None,
+    output_suffix: str = "",
+    timer: StageTimer | None = None,
+    miniprot_bin: str = "miniprot",
+    threads: int | None = None,
 ) -> dict[str, str]:
+    timer = timer or StageTimer()
     outputs = {}
     for target in sorted(accepted_by_target):
         accepted_segments = accepted_by_target[target]
@@ -967,38 +1050,63 @@ def run_annotation_for_targets(
             auto_work_dir, f"{Path(output_stem).name}.{target}.accepted.fasta"
         )
         target_gff3 = f"{target_stem}.gff3"
-        target_gbk = f"{target_stem}.gbk"
-        target_cds = f"{target_stem}.cds.fna"
-        target_faa = f"{target_stem}.faa"
+        target_gbk = f"{target_stem}.gbk{output_suffix}"
+        target_cds = f"{target_stem}.cds.fna{output_suffix}"
+        target_faa = f"{target_stem}.faa{output_suffix}"
 
         logger.info(
             f"Annotating {len(accepted_segments)} accepted contig(s) as {target}"
         )
-        write_target_fasta(contigs, accepted_segments, target_fasta)
-        filter_gff3_for_target(
-            scan_gff3_by_target[target],
-            target_gff3,
-            accepted_segments,
-            reference,
+        with timer.span(f"write_target_fasta.{target}"):
+            write_target_fasta(contigs, accepted_segments, target_fasta)
+        with timer.stage(f"prune.{target}"):
+            filter_gff3_for_target(
+                scan_gff3_by_target[target],
+                target_gff3,
+                accepted_segments,
+                reference,
+            )
+        subtype_tsv = None
+        if reference.subtype_panel_faa:
+            with timer.stage(f"subtype.{target}"):
+                subtype_calls = subtype_panel.run_subtype_search(
+                    input_fasta=target_fasta,
+                    antigen_contigs=subtype_panel.antigen_contigs_from_segments(
+                        accepted_segments, reference.config
+                    ),
+                    panel_faa=reference.subtype_panel_faa,
+                    work_dir=auto_work_dir,
+                    stem=f"{Path(output_stem).name}.{target}",
+                    logger=logger,
+                    miniprot_bin=miniprot_bin,
+                    threads=threads,
+                )
+            subtype_tsv = f"{target_stem}.subtype.tsv"
+            with timer.span(f"write_subtype_tsv.{target}"):
+                subtype_panel.write_subtype_tsv(subtype_calls, subtype_tsv)
+
+        gff3togbk_args = build_gff3togbk_args(
+            gff3=target_gff3,
+            gbk=target_gbk,
+            input_fasta=target_fasta,
+            reference=reference,
+            isolate=isolate,
+            cds_fna=target_cds,
+            faa=target_faa,
+            preserve_original_id=preserve_original_id,
+            subtype_tsv=subtype_tsv,
         )
-
-        gff3togbk_args = [
-            "-g", target_gff3,
-            "-o", target_gbk,
-            "-i", target_fasta,
-            "--toml", reference.toml_path,
-            "--isolate", isolate,
-            "--cds-fna", target_cds,
-            "--faa", target_faa,
-        ]
-        if preserve_original_id:
-            gff3togbk_args.append("--preserve_original_id")
-        gff3togbk.main(gff3togbk_args)
+        with timer.stage(f"gff3togbk.{target}"):
+            records = gff3togbk.main(gff3togbk_args, profiler=timer)
+        if records_by_target is not None:
+            records_by_target[target] = records
 
         outputs[f"{target}.gff3"] = target_gff3
         outputs[f"{target}.gbk"] = target_gbk
         outputs[f"{target}.cds_fna"] = target_cds
         outputs[f"{target}.faa"] = target_faa
+        if subtype_tsv:
+            outputs[f"{target}.subtype_tsv"] = subtype_tsv
     return outputs
 
 
@@ -1012,7 +1120,7 @@ def write_rejected_fasta(
         for call in calls
         if call.call == "reject"
     }
-    with open(output_path, "w", encoding="utf-8") as handle:
+    with compression.open_output(output_path) as handle:
         SeqIO.write(
             [record for record in contigs if record.id in rejected_ids],
             handle,
@@ -1115,10 +1223,25 @@ def log_auto_summary(calls: list[AutoCall], logger) -> None:
         logger.warning("No contigs were accepted for annotation")
 
 
-def run_auto(args, output_stem: str, work_dir: str, logger) -> dict:
+def run_auto(
+    args,
+    output_stem: str,
+    work_dir: str,
+    logger,
+    timer: StageTimer | None = None,
+    references: dict[str, ReferenceBundle] | None = None,
+) -> dict:
+    # The browser wheel leaves out ganflu.launchers; only native runs need it.
+    from ganflu.launchers.miniprot import MiniprotCommandLine
+
+    start_time = time.time()
+    timer = timer or StageTimer()
     thresholds = AutoThresholds.from_args(args)
     targets = parse_auto_targets(args.auto_targets)
     report_stem = os.path.abspath(args.auto_report_prefix) if args.auto_report_prefix else output_stem
+    output_suffix = compression.GZIP_OUTPUT_SUFFIX if getattr(args, "gzip_output", False) else ""
+    miniprot_bin = getattr(args, "miniprot_bin", None) or "miniprot"
+    threads = getattr(args, "threads", None)
     auto_work_dir = f"{report_stem}.auto.work"
     os.makedirs(auto_work_dir, exist_ok=True)
 
@@ -1127,82 +1250,105 @@ def run_auto(args, output_stem: str, work_dir: str, logger) -> dict:
     logger.info(f"Auto thresholds: {thresholds.as_dict()}")
     logger.info(f"Auto work directory: {auto_work_dir}")
 
-    contigs = list(SeqIO.parse(args.input, "fasta"))
+    with compression.open_text(args.input) as handle:
+        contigs = list(SeqIO.parse(handle, "fasta"))
     if not contigs:
         raise ValueError("Input FASTA contains no records")
     contigs_by_id = {record.id: record for record in contigs}
     if len(contigs_by_id) != len(contigs):
         raise ValueError("Input FASTA contains duplicate record IDs, which auto mode cannot disambiguate")
 
-    references = {
-        target: load_reference_bundle(target, args.db_dir, logger)
-        for target in targets
-    }
+    preloaded = references or {}
+    with timer.stage("load_references"):
+        references = {
+            target: preloaded.get(target) or load_reference_bundle(target, args.db_dir, logger)
+            for target in targets
+        }
+    if args.subtype_panel and "IAV" in references:
+        references["IAV"] = replace(
+            references["IAV"], subtype_panel_faa=os.path.abspath(args.subtype_panel)
+        )
 
     scan_gff3_by_target = {}
     candidates_by_contig = defaultdict(list)
-    for target in targets:
-        reference = references[target]
-        scan_gff3 = os.path.join(auto_work_dir, f"{Path(report_stem).name}.{target}.scan.gff3")
-        scan_gff3_by_target[target] = scan_gff3
-        logger.info(f"Running miniprot auto scan for {target}")
-        miniprot = MiniprotCommandLine(
-            input=args.input,
-            work_dir=auto_work_dir,
-            output=scan_gff3,
-            prot_faa=reference.prot_faa,
-            miniprot_bin="miniprot",
-            stderr_filename=f"{target}.miniprot.stderr",
-            kmer_size=15,
-            prefix=MINIPROT_PREFIXES.get(target, "MP"),
-            max_secondary_alignments=gff3_prune.RELAXED_MAX_SECONDARY_ALIGNMENTS,
-            secondary_to_primary_ratio=gff3_prune.RELAXED_SECONDARY_TO_PRIMARY_RATIO,
-            output_score_ratio=gff3_prune.RELAXED_OUTPUT_SCORE_RATIO,
-        )
-        miniprot.run_piped_commands()
-        candidates = parse_miniprot_gff3(
-            scan_gff3,
-            reference,
-            contigs_by_id,
-            thresholds,
-        )
-        logger.info(f"{target} auto scan candidates: {len(candidates)}")
-        for candidate in candidates:
-            logger.debug(
-                "Auto candidate %s %s %s %s identity=%.4f coverage=%.4f score=%.4f flags=%s",
-                candidate.contig_id,
-                candidate.target,
-                candidate.segment,
-                candidate.product,
-                candidate.identity,
-                candidate.aa_coverage,
-                candidate.normalized_score,
-                ";".join(candidate.flags) or "-",
+    with compression.miniprot_input(args.input, auto_work_dir) as miniprot_fasta:
+        for target in targets:
+            reference = references[target]
+            scan_gff3 = os.path.join(auto_work_dir, f"{Path(report_stem).name}.{target}.scan.gff3")
+            scan_gff3_by_target[target] = scan_gff3
+            logger.info(f"Running miniprot auto scan for {target}")
+            miniprot = MiniprotCommandLine(
+                input=miniprot_fasta,
+                work_dir=auto_work_dir,
+                output=scan_gff3,
+                prot_faa=reference.prot_faa,
+                miniprot_bin=miniprot_bin,
+                stderr_filename=f"{target}.miniprot.stderr",
+                kmer_size=15,
+                prefix=MINIPROT_PREFIXES.get(target, "MP"),
+                max_secondary_alignments=gff3_prune.RELAXED_MAX_SECONDARY_ALIGNMENTS,
+                secondary_to_primary_ratio=gff3_prune.RELAXED_SECONDARY_TO_PRIMARY_RATIO,
+                output_score_ratio=gff3_prune.RELAXED_OUTPUT_SCORE_RATIO,
+                threads=threads,
             )
-            candidates_by_contig[candidate.contig_id].append(candidate)
-
-    calls = classify_contigs(contigs, candidates_by_contig, thresholds)
-    accepted_by_target = make_accepted_segments(calls)
-    outputs = run_annotation_for_targets(
-        contigs=contigs,
-        accepted_by_target=accepted_by_target,
-        scan_gff3_by_target=scan_gff3_by_target,
-        references=references,
-        output_stem=output_stem,
-        auto_work_dir=auto_work_dir,
-        isolate=args.isolate,
-        preserve_original_id=args.preserve_original_id,
-        logger=logger,
-    )
+            with timer.stage(f"miniprot_scan.{target}"):
+                miniprot.run_piped_commands()
+            with timer.stage(f"parse_gff3.{target}"):
+                scan = read_miniprot_gff3(scan_gff3)
+            with timer.stage(f"candidate_qc.{target}"):
+                candidates = build_candidate_hits(
+                    scan,
+                    reference,
+                    contigs_by_id,
+                    thresholds,
+                )
+            logger.info(f"{target} auto scan candidates: {len(candidates)}")
+            for candidate in candidates:
+                logger.debug(
+                    "Auto candidate %s %s %s %s identity=%.4f coverage=%.4f score=%.4f flags=%s",
+                    candidate.contig_id,
+                    candidate.target,
+                    candidate.segment,
+                    candidate.product,
+                    candidate.identity,
+                    candidate.aa_coverage,
+                    candidate.normalized_score,
+                    ";".join(candidate.flags) or "-",
+                )
+                candidates_by_contig[candidate.contig_id].append(candidate)
+
+    with timer.stage("classify"):
+        calls = classify_contigs(contigs, candidates_by_contig, thresholds)
+        accepted_by_target = make_accepted_segments(calls)
+    records_by_target = {}
+    with timer.stage("annotate"):
+        outputs = run_annotation_for_targets(
+            contigs=contigs,
+            accepted_by_target=accepted_by_target,
+            scan_gff3_by_target=scan_gff3_by_target,
+            references=references,
+            output_stem=output_stem,
+            auto_work_dir=auto_work_dir,
+            isolate=args.isolate,
+            preserve_original_id=args.preserve_original_id,
+            logger=logger,
+            records_by_target=records_by_target,
+            output_suffix=output_suffix,
+            timer=timer,
+            miniprot_bin=miniprot_bin,
+            threads=threads,
+        )
 
     tsv_path = f"{report_stem}.auto.tsv"
     summary_path = f"{report_stem}.auto.summary.json"
-    write_auto_tsv(calls, tsv_path)
+    with timer.span("write_auto_tsv"):
+        write_auto_tsv(calls, tsv_path)
     outputs["auto.tsv"] = tsv_path
 
     if args.auto_write_rejected:
-        rejected_path = f"{report_stem}.auto.rejected.fasta"
-        write_rejected_fasta(contigs, calls, rejected_path)
+        rejected_path = f"{report_stem}.auto.rejected.fasta{output_suffix}"
+        with timer.span("write_rejected_fasta"):
+            write_rejected_fasta(contigs, calls, rejected_path)
         outputs["auto.rejected_fasta"] = rejected_path
 
     outputs["auto.summary_json"] = summary_path
@@ -1214,7 +1360,39 @@ def run_auto(args, output_stem: str, work_dir: str, logger) -> dict:
         calls=calls,
         outputs=outputs,
     )
-    write_summary_json(summary, summary_path)
+    if isinstance(timer, StageProfiler):
+        summary["profile"] = timer.as_dict()
+    with timer.span("write_summary_json"):
+        write_summary_json(summary, summary_path)
+
+    if getattr(args, "results_db", None):
+        # Pyodide unvendors sqlite3; only runs with --results-db need it.
+        from ganflu.scripts import results_db
+
+        feature_rows = []
+        for target, records in records_by_target.items():
+            feature_rows.extend(
+                results_db.build_feature_rows(
+                    records,
+                    target=target,
+                    segment_keys=references[target].segment_keys,
+                )
+            )
+        with timer.span("write_results_db"):
+            run_id = results_db.write_run(
+                args.results_db,
+                mode="auto",
+                target=",".join(targets),
+                input_path=args.input,
+                output_stem=output_stem,
+                isolate=args.isolate,
+                elapsed_seconds=time.time() - start_time,
+                summary=summary,
+                call_rows=results_db.build_call_rows(calls, contigs_by_id, feature_rows),
+                feature_rows=feature_rows,
+                stage_timings=timer.as_list(),
+            )
+        logger.info(f"Results database: {os.path.abspath(args.results_db)} (run {run_id})")
 
     log_auto_summary(calls, logger)
     logger.info(f"Auto TSV output: {tsv_path}")
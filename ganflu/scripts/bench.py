@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Store benchmark reports and compare a new report against a stored baseline.
+
+Reports are the JSON written by ``benchmarks/run_benchmarks.py``. Every
+benchmark and every profiled stage of an end-to-end run is compared by its
+median. A change counts only when it is larger than the relative threshold,
+the noise of the samples (scaled median absolute deviation) times a factor,
+and an absolute floor, whichever is largest.
+
+    ganflu-bench save bench.json --name baseline
+    ganflu-bench compare new.json --baseline baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import shutil
+import statistics
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+SUPPORTED_SCHEMAS = (1,)
+DEFAULT_STORE = ".ganflu-bench"
+DEFAULT_BASELINE = "baseline"
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_NOISE_FACTOR = 3.0
+DEFAULT_MIN_DELTA = 0.005
+# Scales the median absolute deviation to a standard deviation for normal noise.
+MAD_SCALE = 1.4826
+# Environment fields that make timings from two reports hard to compare.
+ENVIRONMENT_KEYS = ("python", "implementation", "machine", "processor", "cpu_count", "miniprot")
+NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+EXIT_REGRESSION = 1
+EXIT_ERROR = 2
+
+
+@dataclass
+class Comparison:
+    benchmark: str
+    status: str
+    baseline_median: float | None = None
+    new_median: float | None = None
+    allowed_delta: float | None = None
+
+    @property
+    def delta(self) -> float | None:
+        if self.baseline_median is None or self.new_median is None:
+            return None
+        return self.new_median - self.baseline_median
+
+    @property
+    def relative_change(self) -> float | None:
+        if self.delta is None or not self.baseline_median:
+            return None
+        return self.delta / self.baseline_median
+
+
+def load_report(path: str | Path) -> dict:
+    with open(path, encoding="utf-8") as handle:
+        report = json.load(handle)
+    if not isinstance(report, dict) or report.get("schema") not in SUPPORTED_SCHEMAS:
+        raise ValueError(f"{path} is not a ganflu benchmark report (schema {SUPPORTED_SCHEMAS})")
+    return report
+
+
+def report_samples(report: dict) -> dict[str, list[float]]:
+    """Timing samples per benchmark id; profiled e2e stages are keyed ``<id>:<stage>``."""
+    samples = {}
+    for result in report.get("results", []):
+        if result.get("status") != "ok":
+            continue
+        samples[result["id"]] = [float(value) for value in result["samples"]]
+        for stage, timings in result.get("stages", {}).items():
+            samples[f"{result['id']}:{stage}"] = [float(value) for value in timings["samples"]]
+    return samples
+
+
+def noise(samples: list[float]) -> float:
+    """Scaled median absolute deviation; zero for a single sample."""
+    if len(samples) < 2:
+        return 0.0
+    median = statistics.median(samples)
+    return MAD_SCALE * statistics.median(abs(value - median) for value in samples)
+
+
+def compare_reports(
+    baseline: dict,
+    new: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    noise_factor: float = DEFAULT_NOISE_FACTOR,
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> list[Comparison]:
+    """Classify each benchmark as regression, improvement, unchanged, new or missing."""
+    baseline_samples = report_samples(baseline)
+    new_samples = report_samples(new)
+    comparisons = []
+    for benchmark in sorted(baseline_samples.keys() | new_samples.keys()):
+        before = baseline_samples.get(benchmark)
+        after = new_samples.get(benchmark)
+        if after is None:
+            comparisons.append(Comparison(benchmark, "missing", baseline_median=statistics.median(before)))
+            continue
+        if before is None:
+            comparisons.append(Comparison(benchmark, "new", new_median=statistics.median(after)))
+            continue
+        baseline_median = statistics.median(before)
+        new_median = statistics.median(after)
+        allowed = max(
+            threshold * baseline_median,
+            noise_factor * max(noise(before), noise(after)),
+            min_delta,
+        )
+        if new_median - baseline_median > allowed:
+            status = "regression"
+        elif baseline_median - new_median > allowed:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        comparisons.append(Comparison(benchmark, status, baseline_median, new_median, allowed))
+    return comparisons
+
+
+def environment_differences(baseline: dict, new: dict) -> list[str]:
+    before = baseline.get("environment", {})
+    after = new.get("environment", {})
+    return [
+        f"{key}: {before.get(key)!r} -> {after.get(key)!r}"
+        for key in ENVIRONMENT_KEYS
+        if before.get(key) != after.get(key)
+    ]
+
+
+def _seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value:.4f}s"
+
+
+def format_comparisons(comparisons: list[Comparison], show_all: bool = False) -> str:
+    shown = [
+        comparison
+        for comparison in comparisons
+        if show_all or comparison.status in {"regression", "improvement"}
+    ]
+    lines = [f"{'status':<12} {'baseline':>10} {'new':>10} {'change':>8} {'allowed':>10}  benchmark"]
+    for comparison in shown:
+        change = comparison.relative_change
+        lines.append(
+            f"{comparison.status:<12} {_seconds(comparison.baseline_median):>10} "
+            f"{_seconds(comparison.new_median):>10} {'-' if change is None else f'{change:+.1%}':>8} "
+            f"{_seconds(comparison.allowed_delta):>10}  {comparison.benchmark}"
+        )
+    counts = {}
+    for comparison in comparisons:
+        counts[comparison.status] = counts.get(comparison.status, 0) + 1
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    lines.append(summary or "no benchmarks")
+    return "\n".join(lines)
+
+
+def _baseline_name(value: str) -> str:
+    if not NAME_RE.match(value):
+        raise argparse.ArgumentTypeError(f"invalid baseline name: {value!r}")
+    return value
+
+
+def stored_path(store: str | Path, name: str) -> Path:
+    return Path(store) / f"{name}.json"
+
+
+def resolve_baseline(store: str | Path, baseline: str) -> Path:
+    """A stored baseline name, or a path to a report file."""
+    if NAME_RE.match(baseline) and stored_path(store, baseline).is_file():
+        return stored_path(store, baseline)
+    if Path(baseline).is_file():
+        return Path(baseline)
+    raise FileNotFoundError(f"No stored baseline {baseline!r} in {store} and no such file")
+
+
+def save_report(report_path: str | Path, store: str | Path, name: str) -> Path:
+    load_report(report_path)
+    destination = stored_path(store, name)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(report_path, destination)
+    return destination
+
+
+def list_reports(store: str | Path) -> list[str]:
+    lines = []
+    for path in sorted(Path(store).glob("*.json")):
+        try:
+            report = load_report(path)
+        except (OSError, ValueError):
+            continue
+        environment = report.get("environment", {})
+        commit = (environment.get("git_commit") or "-")[:12]
+        lines.append(
+            f"{path.stem}\t{report.get('created', '-')}\tganflu {environment.get('ganflu', '-')}\t{commit}"
+        )
+    return lines
+
+
+def parse_arguments(raw_args=None):
+    parser = argparse.ArgumentParser(
+        prog="ganflu-bench", description="Store ganflu benchmark reports and compare them against a baseline."
+    )
+    parser.add_argument(
+        "--store", default=DEFAULT_STORE, help=f"Directory of stored reports (default: {DEFAULT_STORE})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    save = subparsers.add_parser("save", help="Store a report under a name")
+    save.add_argument("report", help="Benchmark report JSON")
+    save.add_argument(
+        "--name", type=_baseline_name, default=DEFAULT_BASELINE, help=f"Name (default: {DEFAULT_BASELINE})"
+    )
+
+    subparsers.add_parser("list", help="List stored reports")
+
+    compare = subparsers.add_parser("compare", help="Compare a report against a stored baseline")
+    compare.add_argument("report", help="New benchmark report JSON")
+    compare.add_argument(
+        "--baseline",
+        default=DEFAULT_BASELINE,
+        help=f"Stored baseline name or report path (default: {DEFAULT_BASELINE})",
+    )
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Relative change that counts (default: {DEFAULT_THRESHOLD})",
+    )
+    compare.add_argument(
+        "--noise-factor",
+        type=float,
+        default=DEFAULT_NOISE_FACTOR,
+        help=f"Multiple of the sample noise that counts (default: {DEFAULT_NOISE_FACTOR})",
+    )
+    compare.add_argument(
+        "--min-delta",
+        type=float,
+        default=DEFAULT_MIN_DELTA,
+        help=f"Smallest change in seconds that counts (default: {DEFAULT_MIN_DELTA})",
+    )
+    compare.add_argument("--all", action="store_true", help="Also list unchanged, new and missing benchmarks")
+    compare.add_argument(
+        "--save", type=_baseline_name, default=None, help="Store the new report under this name afterwards"
+    )
+    return parser.parse_args(raw_args)
+
+
+def main(raw_args=None) -> int:
+    args = parse_arguments(raw_args)
+    try:
+        if args.command == "save":
+            print(f"Saved {save_report(args.report, args.store, args.name)}")
+            return 0
+        if args.command == "list":
+            for line in list_reports(args.store):
+                print(line)
+            return 0
+        baseline_path = resolve_baseline(args.store, args.baseline)
+        baseline = load_report(baseline_path)
+        new = load_report(args.report)
+    except (OSError, ValueError) as error:
+        print(f"ganflu-bench: error: {error}", file=sys.stderr)
+        return EXIT_ERROR
+
+    differences = environment_differences(baseline, new)
+    if differences:
+        print(f"warning: environments differ ({'; '.join(differences)})", file=sys.stderr)
+    comparisons = compare_reports(baseline, new, args.threshold, args.noise_factor, args.min_delta)
+    print(f"baseline: {baseline_path}")
+    print(format_comparisons(comparisons, show_all=args.all))
+    if args.save:
+        save_report(args.report, args.store, args.save)
+    if any(comparison.status == "regression" for comparison in comparisons):
+        return EXIT_REGRESSION
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
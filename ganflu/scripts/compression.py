@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from __future__ import annotations
+
+import gzip
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger()
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSED_SUFFIXES = (".gz", ".bgz", ".zst")
+GZIP_OUTPUT_SUFFIX = ".gz"
+
+
+def detect_compression(path) -> str | None:
+    """Return "gzip", "bgzf", "zstd" or None from the file's magic bytes."""
+    with open(path, "rb") as handle:
+        header = handle.read(18)
+    if header.startswith(ZSTD_MAGIC):
+        return "zstd"
+    if header.startswith(GZIP_MAGIC):
+        # BGZF is gzip with an FEXTRA "BC" subfield in every block header.
+        if len(header) >= 14 and header[3] & 0x04 and header[12:14] == b"BC":
+            return "bgzf"
+        return "gzip"
+    return None
+
+
+def strip_compression_suffix(path: str) -> str:
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def require_zstandard():
+    if zstandard is None:
+        raise RuntimeError(
+            "Reading zstd-compressed input requires the 'zstandard' package "
+            "(pip install zstandard)"
+        )
+    return zstandard
+
+
+def open_text(path):
+    """Open plain, gzip/BGZF or zstd text for reading."""
+    compression = detect_compression(path)
+    if compression in {"gzip", "bgzf"}:
+        return gzip.open(path, "rt", encoding="utf-8")
+    if compression == "zstd":
+        reader = require_zstandard().ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+@contextmanager
+def open_output(path: str):
+    """Open a text output, gzip-compressing it when the path ends in .gz.
+
+    pigz is used when it is on PATH; otherwise the stdlib gzip module.
+    """
+    if not path.endswith(GZIP_OUTPUT_SUFFIX):
+        with open(path, "w", encoding="utf-8") as handle:
+            yield handle
+        return
+
+    pigz = shutil.which("pigz")
+    if pigz is None:
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            yield handle
+        return
+
+    with open(path, "wb") as raw_output:
+        proc = subprocess.Popen(
+            [pigz, "-c", "-p", str(os.cpu_count() or 1)],
+            stdin=subprocess.PIPE,
+            stdout=raw_output,
+        )
+        handle = io.TextIOWrapper(proc.stdin, encoding="utf-8")
+        try:
+            yield handle
+        finally:
+            handle.close()
+            returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"pigz failed with exit code {returncode} while writing {path}")
+
+
+@contextmanager
+def miniprot_input(path: str, work_dir: str):
+    """Yield a FASTA path miniprot can read.
+
+    miniprot reads plain and gzip/BGZF FASTA through zlib, so those are passed
+    through unchanged. zstd input is decompressed to a temporary file in
+    work_dir for the duration of the block.
+    """
+    if detect_compression(path) != "zstd":
+        yield path
+        return
+
+    decompressor = require_zstandard().ZstdDecompressor()
+    with tempfile.NamedTemporaryFile(
+        suffix=".fasta",
+        prefix=f"{os.path.basename(strip_compression_suffix(path))}.",
+        dir=work_dir,
+        delete=False,
+    ) as output:
+        temp_path = output.name
+        with open(path, "rb") as source:
+            decompressor.copy_stream(source, output)
+    logger.debug(f"Decompressed zstd input for miniprot: {temp_path}")
+    try:
+        yield temp_path
+    finally:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            logger.debug(f"Could not remove temporary FASTA: {temp_path}", exc_info=True)
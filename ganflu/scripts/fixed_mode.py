@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+
+from ganflu.launchers.miniprot import MiniprotCommandLine
+from ganflu.scripts import auto_mode, compression, gff3_prune, gff3togbk, subtype_panel
+from ganflu.scripts.profiling import StageTimer
+
+
+def run_fixed(
+    args,
+    output_stem: str,
+    work_dir: str,
+    logger,
+    timer: StageTimer | None = None,
+    reference: auto_mode.ReferenceBundle | None = None,
+) -> dict[str, str]:
+    start_time = time.time()
+    timer = timer or StageTimer()
+    target = args.target
+    input_fasta = args.input
+    if reference is None:
+        with timer.stage("load_references"):
+            reference = auto_mode.load_reference_bundle(target, args.db_dir, logger)
+    ref_toml = reference.config
+    logger.info(f"Reference directory: {reference.ref_dir}")
+    logger.info(f"Reference protein FASTA: {reference.prot_faa}")
+
+    gff3_file = f"{output_stem}.gff3"
+    output_suffix = compression.GZIP_OUTPUT_SUFFIX if getattr(args, "gzip_output", False) else ""
+    miniprot_bin = getattr(args, "miniprot_bin", None) or "miniprot"
+    threads = getattr(args, "threads", None)
+    gbk_file = f"{output_stem}.gbk{output_suffix}"
+    cds_fna_file = f"{output_stem}.cds.fna{output_suffix}"
+    faa_file = f"{output_stem}.faa{output_suffix}"
+    outputs = {}
+
+    logger.info("Running miniprot")
+    with tempfile.NamedTemporaryFile(
+        mode="w",
+        suffix=".raw.gff3",
+        prefix=f"{os.path.basename(output_stem)}.",
+        dir=work_dir,
+        delete=False,
+    ) as raw_gff3:
+        raw_gff3_file = raw_gff3.name
+    with timer.stage("miniprot"), compression.miniprot_input(input_fasta, work_dir) as miniprot_fasta:
+        miniprot = MiniprotCommandLine(
+            input=miniprot_fasta, work_dir=work_dir, output=raw_gff3_file,
+            prot_faa=reference.prot_faa, miniprot_bin=miniprot_bin, stderr_filename="miniprot.stderr", kmer_size=15,
+            max_secondary_alignments=gff3_prune.RELAXED_MAX_SECONDARY_ALIGNMENTS,
+            secondary_to_primary_ratio=gff3_prune.RELAXED_SECONDARY_TO_PRIMARY_RATIO,
+            output_score_ratio=gff3_prune.RELAXED_OUTPUT_SCORE_RATIO,
+            threads=threads,
+            )
+        miniprot.run_piped_commands()
+    logger.info("Pruning miniprot GFF3")
+    with timer.stage("prune"):
+        prune_result = gff3_prune.prune_gff3(
+            raw_gff3_file,
+            gff3_file,
+            protein_lengths=reference.protein_lengths,
+            antigen_names=ref_toml.get("serotype", {}).keys(),
+        )
+    logger.info(
+        f"Pruned GFF3 output: {gff3_file} "
+        f"({prune_result.selected_parent_count} parent alignment(s))"
+    )
+    outputs["gff3"] = gff3_file
+    try:
+        os.remove(raw_gff3_file)
+    except OSError:
+        logger.debug(f"Could not remove temporary raw GFF3: {raw_gff3_file}", exc_info=True)
+
+    panel_faa = reference.subtype_panel_faa
+    if getattr(args, "subtype_panel", None):
+        panel_faa = os.path.abspath(args.subtype_panel)
+    subtype_tsv_file = None
+    if panel_faa:
+        antigen_contigs = subtype_panel.antigen_contigs_from_gff3(
+            gff3_file,
+            ref_toml.get("serotype", {}).keys(),
+        )
+        with timer.stage("subtype"), tempfile.TemporaryDirectory(
+            prefix=f"{os.path.basename(output_stem)}.subtype.",
+            dir=work_dir,
+        ) as subtype_work_dir:
+            subtype_calls = subtype_panel.run_subtype_search(
+                input_fasta=input_fasta,
+                antigen_contigs=antigen_contigs,
+                panel_faa=panel_faa,
+                work_dir=subtype_work_dir,
+                stem=os.path.basename(output_stem),
+                logger=logger,
+                miniprot_bin=miniprot_bin,
+                threads=threads,
+            )
+        subtype_tsv_file = f"{output_stem}.subtype.tsv"
+        with timer.span("write_subtype_tsv"):
+            subtype_panel.write_subtype_tsv(subtype_calls, subtype_tsv_file)
+        outputs["subtype_tsv"] = subtype_tsv_file
+        logger.info(f"Subtype TSV output: {subtype_tsv_file}")
+
+    logger.info("Converting GFF3 to GenBank")
+    gff3togbk_args = auto_mode.build_gff3togbk_args(
+        gff3=gff3_file,
+        gbk=gbk_file,
+        input_fasta=input_fasta,
+        reference=reference,
+        isolate=args.isolate,
+        cds_fna=cds_fna_file,
+        faa=faa_file,
+        preserve_original_id=args.preserve_original_id,
+        subtype_tsv=subtype_tsv_file,
+    )
+    with timer.stage("gff3togbk"):
+        records = gff3togbk.main(gff3togbk_args, profiler=timer)
+    outputs["gbk"] = gbk_file
+    outputs["cds_fna"] = cds_fna_file
+    outputs["faa"] = faa_file
+    logger.info(f"GenBank output: {gbk_file}")
+
+    if getattr(args, "results_db", None):
+        # Pyodide unvendors sqlite3; only runs with --results-db need it.
+        from ganflu.scripts import results_db
+
+        with timer.span("write_results_db"):
+            run_id = results_db.write_run(
+                args.results_db,
+                mode="fixed",
+                target=target,
+                input_path=input_fasta,
+                output_stem=output_stem,
+                isolate=args.isolate,
+                elapsed_seconds=time.time() - start_time,
+                feature_rows=results_db.build_feature_rows(
+                    records,
+                    target=target,
+                    segment_keys=reference.segment_keys,
+                ),
+                stage_timings=timer.as_list(),
+            )
+        logger.info(f"Results database: {os.path.abspath(args.results_db)} (run {run_id})")
+    return outputs
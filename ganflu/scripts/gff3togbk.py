@@ -11,6 +11,7 @@ except ModuleNotFoundError:  # pragma: no cover - Python 3.10 fallback
     tomllib = None
     import toml
 from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
 from Bio import SeqIO
 from Bio.Seq import Seq
@@ -18,21 +19,22 @@ from Bio.SeqRecord import SeqRecord
 from Bio.Data import CodonTable
 from Bio.SeqFeature import SeqFeature, FeatureLocation, CompoundLocation
 
+from ganflu.scripts import compression, profiling, subtype_panel
+
 logger = logging.getLogger()
-handler = logging.StreamHandler(sys.stdout)
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
 def parse_arguments(raw_args=None):
     parser = argparse.ArgumentParser(description="")
-    parser.add_argument("-i", "--input", required=True, help="Input FASTA file")
+    parser.add_argument("-i", "--input", required=True, help="Input FASTA file (plain, gzip/BGZF or zstd)")
     parser.add_argument("-g", "--gff", required=True, help="Input GFF3 file")
     parser.add_argument("-t", "--toml", required=True, help="Input TOML file")
-    parser.add_argument("-o", "--output", required=True, help="Output GenBank file")
+    parser.add_argument("-o", "--output", required=True, help="Output GenBank file (gzip-compressed if it ends in .gz)")
     parser.add_argument("-s", "--isolate", required=True, help="Isolate name")
     parser.add_argument("--preserve_original_id", "--preserve-original-id", dest="preserve_original_id", action="store_true", help="Preserve original FASTA record IDs in GenBank output")
     parser.add_argument("--cds-fna", dest="cds_fna", default=None, help="Output CDS nucleotide FASTA file (default: <output stem>.cds.fna)")
     parser.add_argument("--faa", dest="faa", default=None, help="Output amino acid FASTA file (default: <output stem>.faa)")
+    parser.add_argument("--subtype-calls", dest="subtype_calls", default=None, help="Second-stage subtype TSV; overrides the HA/NA subtype notes from the GFF3 hits")
     if raw_args is None and len(sys.argv) == 1:
         parser.print_help(sys.stderr)
         sys.exit(1)
@@ -130,10 +132,97 @@ class GFF3Parser:
             seqfeatures.append(seqfeature)
         return seqfeatures
 
-def get_gff_features(file_path):
+@dataclass
+class FeatureMetric:
+    """Alignment metrics of one miniprot mRNA hit, as read from the GFF3."""
+
+    seqid: str
+    product: str
+    start: int
+    end: int
+    strand: str
+    score: float | None
+    identity: float
+    target_start: int
+    target_end: int
+    target_length: int | None = None
+    raw_score: float | None = None
+
+
+@dataclass
+class GenbankConversion:
+    """Records written by the converter plus the GFF3 metrics they came from.
+
+    ``source_ids[i]`` is the input FASTA ID of ``records[i]``, and
+    ``feature_metrics`` maps each input ID to its mRNA hits, so callers can
+    summarise a run without parsing the GenBank or GFF3 output again.
+    """
+
+    records: list = field(default_factory=list)
+    source_ids: list = field(default_factory=list)
+    feature_metrics: dict = field(default_factory=dict)
+
+
+def _paf_metric_key(line):
+    fields = line.rstrip("\n").split("\t")
+    if len(fields) < 7:
+        return None, None
+    try:
+        key = (fields[6], fields[1], int(fields[3]) + 1, int(fields[4]))
+        target_length = int(fields[2])
+    except ValueError:
+        return None, None
+    raw_score = None
+    for tag in fields[13:]:
+        parts = tag.split(":", 2)
+        if len(parts) == 3 and parts[0] == "AS":
+            try:
+                raw_score = float(parts[2])
+            except ValueError:
+                pass
+    return key, (target_length, raw_score)
+
+
+def _feature_metric(feature):
+    attrs = parse_gff3_attributes(feature.attributes)
+    target = attrs.get("Target", "").split()
+    if not target:
+        return None
+    try:
+        target_start = int(target[1]) if len(target) > 1 else 1
+        target_end = int(target[2]) if len(target) > 2 else target_start
+        identity = float(attrs.get("Identity", 0.0))
+    except ValueError:
+        return None
+    return FeatureMetric(
+        seqid=feature.seqid,
+        product=target[0],
+        start=feature.start,
+        end=feature.end,
+        strand=feature.strand,
+        score=feature.score,
+        identity=identity,
+        target_start=target_start,
+        target_end=target_end,
+    )
+
+
+def read_gff3(file_path):
+    """Return the GFF3 features and the per-contig mRNA metrics in one pass.
+
+    Metrics take the reference length and alignment score from the matching
+    ``##PAF`` comment that miniprot writes before each hit.
+    """
     features = []
-    with open(file_path, 'r') as file:    
+    metrics = defaultdict(list)
+    paf_meta = {}
+    with open(file_path, 'r') as file:
         for line in file:
+            if line.startswith('##PAF\t'):
+                key, value = _paf_metric_key(line)
+                if key is not None:
+                    paf_meta[key] = value
+                continue
             if line.startswith('#'):
                 continue
             columns = line.strip().split('\t')
@@ -141,6 +230,23 @@ def get_gff_features(file_path):
                 raise ValueError('GFF3 line does not have 9 columns')
             feature = GFF3Feature(*columns)
             features.append(feature)
+            if feature.type != "mRNA":
+                continue
+            metric = _feature_metric(feature)
+            if metric is None:
+                continue
+            target_length, raw_score = paf_meta.get(
+                (metric.seqid, metric.product, metric.target_start, metric.target_end),
+                (None, None),
+            )
+            metric.target_length = target_length
+            metric.raw_score = raw_score
+            metrics[metric.seqid].append(metric)
+    return features, dict(metrics)
+
+
+def get_gff_features(file_path):
+    features, _ = read_gff3(file_path)
     return features
 
 
@@ -250,12 +356,13 @@ def get_segment_key(contig_id, features_in_contig, segment_keys):
     raise KeyError(f"Could not infer segment from predicted CDS products for FASTA record ID '{contig_id}'. Products: {predicted_products}. Expected one of: {expected_segments}")
 
 def get_output_id_prefix(output_path):
-    prefix = os.path.splitext(os.path.basename(output_path))[0]
+    prefix = os.path.splitext(os.path.basename(compression.strip_compression_suffix(output_path)))[0]
     return "".join(char if char.isalnum() or char in "_-" else "_" for char in prefix)
 
 def get_fasta_output_paths(output_path, cds_fna=None, faa=None):
-    stem, _ = os.path.splitext(output_path)
-    return cds_fna or f"{stem}.cds.fna", faa or f"{stem}.faa"
+    suffix = compression.GZIP_OUTPUT_SUFFIX if output_path.endswith(compression.GZIP_OUTPUT_SUFFIX) else ""
+    stem, _ = os.path.splitext(compression.strip_compression_suffix(output_path))
+    return cds_fna or f"{stem}.cds.fna{suffix}", faa or f"{stem}.faa{suffix}"
 
 def format_record_id(prefix, segment_key, segment_counts, segment_seen):
     if segment_counts[segment_key] == 1:
@@ -322,6 +429,18 @@ def to_seqfeatures(gff3_features, antigen_dict, antigen_list, slip_list, gene_co
             )
     return {key: list(seqfeatures[key].values()) for key in seqfeatures}
 
+def apply_subtype_calls(seq_features, subtype_calls, antigen_list):
+    for contig_id, call in subtype_calls.items():
+        if call.antigen not in antigen_list:
+            continue
+        for feature in seq_features.get(contig_id, []):
+            if get_first_qualifier(feature, "gene") != call.antigen:
+                continue
+            notes = [note for note in ensure_note_list(feature) if not note.startswith("subtype: ")]
+            notes.append(f"subtype: {call.subtype}")
+            feature.qualifiers["note"] = notes
+    return seq_features
+
 def add_translations(seq_record):
     for feature in seq_record.features:
         ensure_note_list(feature)
@@ -348,6 +467,12 @@ def get_first_qualifier(feature, key, default=""):
         return value[0] if value else default
     return value
 
+def get_feature_subtype(feature):
+    for note in qualifier_values(feature.qualifiers.get("note")):
+        if note.startswith("subtype: "):
+            return note.split(": ", 1)[1]
+    return ""
+
 def sanitize_fasta_id(value):
     value = str(value) if value else "unknown"
     return "".join(char if char.isalnum() or char in "._-" else "_" for char in value)
@@ -400,28 +525,62 @@ def build_cds_fasta_records(seq_records):
 
 def write_cds_fasta_files(seq_records, cds_fna_path, faa_path):
     cds_records, aa_records = build_cds_fasta_records(seq_records)
-    with open(cds_fna_path, "w") as handle:
+    with compression.open_output(cds_fna_path) as handle:
         SeqIO.write(cds_records, handle, "fasta")
-    with open(faa_path, "w") as handle:
+    with compression.open_output(faa_path) as handle:
         SeqIO.write(aa_records, handle, "fasta")
     return len(cds_records), len(aa_records)
 
 
+def build_and_write_records(args, seq_records, seq_features, config, annotations, serotype):
+    out_records = []
+    record_segments = []
+    for record in seq_records:
+        contig_id = record.id
+        features_in_contig = seq_features.get(contig_id, [])
+        segment_key = get_segment_key(contig_id, features_in_contig, config["segments"].keys())
+        record_segments.append((record, features_in_contig, segment_key))
+
+    segment_counts = defaultdict(int)
+    for _, _, segment_key in record_segments:
+        segment_counts[segment_key] += 1
+    segment_seen = defaultdict(int)
+    id_prefix = get_output_id_prefix(args.output)
+    for record, features_in_contig, segment_key in record_segments:
+        contig_id = record.id
+        contig_seq = record.seq
+        record_id = contig_id if args.preserve_original_id else format_record_id(id_prefix, segment_key, segment_counts, segment_seen)
+        
+        description = config["segments"][segment_key]["description"].format(organism=annotations["organism"], subtype=serotype)
+        out_record = SeqRecord(contig_seq, id=record_id, description = description, name=record_id, annotations=annotations, features=features_in_contig)
+        out_record = add_translations(out_record)
+        out_records.append(out_record)
+
+    with compression.open_output(args.output) as handle:
+        SeqIO.write(out_records, handle, 'genbank')
+    return out_records
 
-def main(raw_args=None):
+
+def convert(raw_args=None, profiler=None):
+    """Run the conversion and return a :class:`GenbankConversion`."""
     args = parse_arguments(raw_args)
+    profiler = profiler or profiling.StageTimer()
     isolate = args.isolate
     
     antigen_dict = defaultdict(dict)
-    gff_features = get_gff_features(args.gff)
-    config = load_toml_file(args.toml)
-    
-    seq_records = [record for record in SeqIO.parse(args.input, "fasta")]
-    antigen_list = list(config.get("serotype", {}).keys())
-    # To store the keys of a nested dictionary whose value for "ribosomal_slippage" is true, i.e. ribosomal slippage is present in the gene:
-    gene_configs = config.get("genes", {})
-    slip_list = [key for key, value in gene_configs.items() if value.get("ribosomal_slippage")]
-    seq_features = to_seqfeatures(gff_features, antigen_dict, antigen_list, slip_list, gene_configs)
+    with profiler.stage("parse"):
+        gff_features, feature_metrics = read_gff3(args.gff)
+        config = load_toml_file(args.toml)
+
+        with compression.open_text(args.input) as handle:
+            seq_records = [record for record in SeqIO.parse(handle, "fasta")]
+        antigen_list = list(config.get("serotype", {}).keys())
+        # To store the keys of a nested dictionary whose value for "ribosomal_slippage" is true, i.e. ribosomal slippage is present in the gene:
+        gene_configs = config.get("genes", {})
+        slip_list = [key for key, value in gene_configs.items() if value.get("ribosomal_slippage")]
+        seq_features = to_seqfeatures(gff_features, antigen_dict, antigen_list, slip_list, gene_configs)
+        if args.subtype_calls:
+            apply_subtype_calls(seq_features, subtype_panel.read_subtype_tsv(args.subtype_calls), antigen_list)
     antigen_dict = defaultdict(list)
     for key in seq_features.keys():
         for feature in seq_features[key]:
@@ -459,35 +618,18 @@ def main(raw_args=None):
     annotations["organism"] = annotations["source"]
     annotations["date"] = datetime.now().strftime("%d-%b-%Y").upper()
     try:
-        out_records = []
-        record_segments = []
-        for record in seq_records:
-            contig_id = record.id
-            features_in_contig = seq_features.get(contig_id, [])
-            segment_key = get_segment_key(contig_id, features_in_contig, config["segments"].keys())
-            record_segments.append((record, features_in_contig, segment_key))
-
-        segment_counts = defaultdict(int)
-        for _, _, segment_key in record_segments:
-            segment_counts[segment_key] += 1
-        segment_seen = defaultdict(int)
-        id_prefix = get_output_id_prefix(args.output)
-        for record, features_in_contig, segment_key in record_segments:
-            contig_id = record.id
-            contig_seq = record.seq
-            record_id = contig_id if args.preserve_original_id else format_record_id(id_prefix, segment_key, segment_counts, segment_seen)
-            
-            description = config["segments"][segment_key]["description"].format(organism=annotations["organism"], subtype=serotype)
-            out_record = SeqRecord(contig_seq, id=record_id, description = description, name=record_id, annotations=annotations, features=features_in_contig)
-            out_record = add_translations(out_record)
-            out_records.append(out_record)
-
-        with open(args.output, 'w') as handle:  
-            SeqIO.write(out_records, handle, 'genbank')
-        cds_fna_path, faa_path = get_fasta_output_paths(args.output, args.cds_fna, args.faa)
-        cds_count, aa_count = write_cds_fasta_files(out_records, cds_fna_path, faa_path)
+        with profiler.stage("genbank"):
+            out_records = build_and_write_records(args, seq_records, seq_features, config, annotations, serotype)
+        with profiler.stage("fasta_export"):
+            cds_fna_path, faa_path = get_fasta_output_paths(args.output, args.cds_fna, args.faa)
+            cds_count, aa_count = write_cds_fasta_files(out_records, cds_fna_path, faa_path)
         logger.info(f"CDS nucleotide FASTA output: {cds_fna_path} ({cds_count} records)")
         logger.info(f"Amino acid FASTA output: {faa_path} ({aa_count} records)")
+        return GenbankConversion(
+            records=out_records,
+            source_ids=[record.id for record in seq_records],
+            feature_metrics=feature_metrics,
+        )
 
     except FileNotFoundError as e:
         logger.error(f"File not found: {e}")
@@ -496,5 +638,13 @@ def main(raw_args=None):
         logger.error(f"An error occurred: {e}")
         raise
 
+
+def main(raw_args=None, profiler=None):
+    return convert(raw_args, profiler).records
+
+
 if __name__ == "__main__":
+    # Only the standalone script configures logging; importing the module
+    # leaves it to the caller.
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     main()
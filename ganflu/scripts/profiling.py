@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class TraceRecorder:
+    """Collect spans in Chrome Trace Event format (chrome://tracing, Perfetto).
+
+    Spans are complete ("X") events on the recording process and thread, so
+    stages that run in other threads or processes get their own lanes.
+    """
+
+    def __init__(self, process_name: str = "ganflu"):
+        self.process_name = process_name
+        self.origin = time.perf_counter()
+        self.events = []
+        self.thread_names = {}
+        self.lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, end: float, category: str = "stage", args=None) -> None:
+        """Record a span from two ``time.perf_counter()`` readings."""
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 3),
+            "dur": round((end - start) * 1e6, 3),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.thread_names.setdefault((event["pid"], event["tid"]), threading.current_thread().name)
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter(), category, args)
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.process_name}}
+            for pid in sorted({pid for pid, _ in thread_names})
+        ]
+        metadata.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+            for (pid, tid), thread_name in sorted(thread_names.items())
+        )
+        return {
+            "traceEvents": metadata + sorted(events, key=lambda event: (event["ts"], -event["dur"])),
+            "displayTimeUnit": "ms",
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.as_dict(), handle)
+            handle.write("\n")
+
+
+class StageTimer:
+    """Record wall time per named stage; nested stages are named "outer/inner".
+
+    With a ``tracer``, every stage is also recorded as a trace span, and
+    :meth:`span` adds trace-only spans (output writers, whole runs) that are
+    left out of the stage list.
+    """
+
+    def __init__(self, tracer: TraceRecorder | None = None):
+        self.stages = []
+        self.active = []
+        self.tracer = tracer
+
+    @contextmanager
+    def stage(self, name: str):
+        self.active.append(name)
+        full_name = "/".join(self.active)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.stages.append({"stage": full_name, "wall_seconds": end - start})
+            if self.tracer is not None:
+                self.tracer.add_span(name, start, end, args={"stage": full_name})
+            self.active.pop()
+
+    @contextmanager
+    def span(self, name: str, category: str = "write", **args):
+        if self.tracer is None:
+            yield
+            return
+        with self.tracer.span(name, category, **args):
+            yield
+
+    def as_list(self) -> list[dict]:
+        return [dict(stage) for stage in self.stages]
+
+
+class StageProfiler(StageTimer):
+    """StageTimer that also records CPU time, peak traced memory and cProfile dumps.
+
+    Peak memory is tracemalloc's peak of Python allocations during the stage,
+    including any nested stages. cProfile cannot nest, so stats are dumped only
+    for the outermost profiled stage.
+    """
+
+    def __init__(
+        self, *, memory: bool = True, cprofile_dir: str | None = None, tracer: TraceRecorder | None = None
+    ):
+        super().__init__(tracer)
+        self.memory = memory
+        self.cprofile_dir = cprofile_dir
+        self.started_tracemalloc = False
+        self.peaks = []
+        self.cprofile_active = False
+        if cprofile_dir:
+            os.makedirs(cprofile_dir, exist_ok=True)
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+    def profile_path(self, name: str) -> str:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        return os.path.join(self.cprofile_dir, f"{len(self.stages):03d}_{safe_name}.prof")
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.memory:
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self.peaks.append(0)
+        profiler = None
+        if self.cprofile_dir and not self.cprofile_active:
+            profiler = cProfile.Profile()
+            self.cprofile_active = True
+        self.active.append(name)
+        full_name = "/".join(self.active)
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self.cprofile_active = False
+            end_wall = time.perf_counter()
+            record = {
+                "stage": full_name,
+                "wall_seconds": end_wall - start_wall,
+                "cpu_seconds": time.process_time() - start_cpu,
+            }
+            if self.memory:
+                peak = max(self.peaks.pop(), tracemalloc.get_traced_memory()[1])
+                record["peak_memory_bytes"] = peak
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+                tracemalloc.reset_peak()
+            if profiler is not None:
+                record["cprofile"] = self.profile_path(full_name)
+                profiler.dump_stats(record["cprofile"])
+            self.stages.append(record)
+            if self.tracer is not None:
+                self.tracer.add_span(name, start_wall, end_wall, args=dict(record))
+            self.active.pop()
+
+    def as_dict(self) -> dict:
+        return {
+            "memory": "tracemalloc" if self.memory else None,
+            "cprofile_dir": os.path.abspath(self.cprofile_dir) if self.cprofile_dir else None,
+            "stages": self.as_list(),
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.as_dict(), handle, indent=2)
+            handle.write("\n")
+
+    def close(self) -> None:
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
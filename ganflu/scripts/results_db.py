@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from ganflu import __version__
+from ganflu.scripts import gff3togbk
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    ganflu_version TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    target TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    output_stem TEXT NOT NULL,
+    isolate TEXT,
+    elapsed_seconds REAL,
+    summary_json TEXT
+);
+CREATE TABLE IF NOT EXISTS calls (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    contig_id TEXT NOT NULL,
+    contig_hash TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    call TEXT NOT NULL,
+    target TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    subtype TEXT NOT NULL,
+    status TEXT NOT NULL,
+    qc_result TEXT NOT NULL,
+    flags TEXT NOT NULL,
+    confidence TEXT NOT NULL,
+    best_product TEXT NOT NULL,
+    best_identity REAL NOT NULL,
+    best_aa_coverage REAL NOT NULL,
+    best_score REAL NOT NULL,
+    second_target TEXT NOT NULL,
+    second_score REAL NOT NULL,
+    score_margin REAL NOT NULL,
+    notes TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS features (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    record_id TEXT NOT NULL,
+    contig_hash TEXT NOT NULL,
+    target TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    subtype TEXT NOT NULL,
+    feature_type TEXT NOT NULL,
+    gene TEXT NOT NULL,
+    product TEXT NOT NULL,
+    location TEXT NOT NULL,
+    qc_flags TEXT NOT NULL,
+    translation TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stage_timings (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    wall_seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_contig_hash_idx ON calls(contig_hash);
+CREATE INDEX IF NOT EXISTS calls_target_segment_idx ON calls(target, segment);
+CREATE INDEX IF NOT EXISTS calls_subtype_idx ON calls(subtype);
+CREATE INDEX IF NOT EXISTS features_contig_hash_idx ON features(contig_hash);
+CREATE INDEX IF NOT EXISTS features_target_segment_idx ON features(target, segment);
+CREATE INDEX IF NOT EXISTS features_subtype_idx ON features(subtype);
+CREATE INDEX IF NOT EXISTS stage_timings_run_idx ON stage_timings(run_id);
+"""
+
+CALL_COLUMNS = [
+    "contig_id",
+    "contig_hash",
+    "length",
+    "call",
+    "target",
+    "segment",
+    "subtype",
+    "status",
+    "qc_result",
+    "flags",
+    "confidence",
+    "best_product",
+    "best_identity",
+    "best_aa_coverage",
+    "best_score",
+    "second_target",
+    "second_score",
+    "score_margin",
+    "notes",
+]
+FEATURE_COLUMNS = [
+    "record_id",
+    "contig_hash",
+    "target",
+    "segment",
+    "subtype",
+    "feature_type",
+    "gene",
+    "product",
+    "location",
+    "qc_flags",
+    "translation",
+]
+FEATURE_NOTE_FLAGS = {
+    "nonfunctional due to mutation": "internal_stop",
+    "start codon not found": "missing_start",
+    "stop codon not found": "missing_stop",
+}
+
+
+def sequence_hash(seq) -> str:
+    return hashlib.sha256(str(seq).upper().encode("ascii", errors="replace")).hexdigest()
+
+
+def feature_qc_flags(feature) -> list[str]:
+    flags = []
+    for note in gff3togbk.qualifier_values(feature.qualifiers.get("note")):
+        for text, flag in FEATURE_NOTE_FLAGS.items():
+            if text in note:
+                flags.append(flag)
+    if "ribosomal_slippage" in feature.qualifiers:
+        flags.append("ribosomal_slippage")
+    return list(dict.fromkeys(flags))
+
+
+def build_feature_rows(records, *, target: str, segment_keys) -> list[dict]:
+    rows = []
+    for record in records:
+        try:
+            segment = gff3togbk.get_segment_key(record.id, record.features, segment_keys)
+        except KeyError:
+            segment = "-"
+        contig_hash = sequence_hash(record.seq)
+        for feature in record.features:
+            if feature.type not in {"CDS", "misc_feature"}:
+                continue
+            flags = feature_qc_flags(feature)
+            rows.append(
+                {
+                    "record_id": record.id,
+                    "contig_hash": contig_hash,
+                    "target": target,
+                    "segment": segment,
+                    "subtype": gff3togbk.get_feature_subtype(feature) or "-",
+                    "feature_type": feature.type,
+                    "gene": gff3togbk.get_first_qualifier(feature, "gene"),
+                    "product": gff3togbk.get_first_qualifier(feature, "product"),
+                    "location": str(feature.location),
+                    "qc_flags": ";".join(flags) if flags else "-",
+                    "translation": str(gff3togbk.get_first_qualifier(feature, "translation")),
+                }
+            )
+    return rows
+
+
+def build_call_rows(calls, contigs_by_id, feature_rows=()) -> list[dict]:
+    subtype_by_hash = {}
+    for row in feature_rows:
+        if row["subtype"] != "-":
+            subtype_by_hash.setdefault(row["contig_hash"], row["subtype"])
+    rows = []
+    for call in calls:
+        best = call.best_hit
+        contig = contigs_by_id.get(call.contig_id)
+        contig_hash = sequence_hash(contig.seq) if contig is not None else "-"
+        rows.append(
+            {
+                "contig_id": call.contig_id,
+                "contig_hash": contig_hash,
+                "length": call.length,
+                "call": call.call,
+                "target": call.target,
+                "segment": call.segment,
+                "subtype": subtype_by_hash.get(contig_hash, "-"),
+                "status": call.status,
+                "qc_result": call.qc_result,
+                "flags": ";".join(call.flags) if call.flags else "-",
+                "confidence": call.confidence,
+                "best_product": best.product if best else "-",
+                "best_identity": best.identity if best else 0.0,
+                "best_aa_coverage": best.aa_coverage if best else 0.0,
+                "best_score": best.normalized_score if best else 0.0,
+                "second_target": call.second_target,
+                "second_score": call.second_score,
+                "score_margin": call.score_margin,
+                "notes": ";".join(call.notes) if call.notes else "-",
+            }
+        )
+    return rows
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(db_dir, exist_ok=True)
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _insert_rows(connection, table, columns, run_id, rows) -> None:
+    if not rows:
+        return
+    placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+    connection.executemany(
+        f"INSERT INTO {table} (run_id, {', '.join(columns)}) VALUES ({placeholders})",
+        [(run_id, *[row[column] for column in columns]) for row in rows],
+    )
+
+
+def write_run(
+    db_path: str,
+    *,
+    mode: str,
+    target: str,
+    input_path: str,
+    output_stem: str,
+    isolate: str | None = None,
+    elapsed_seconds: float | None = None,
+    summary: dict | None = None,
+    call_rows=(),
+    feature_rows=(),
+    stage_timings=(),
+) -> int:
+    connection = connect(db_path)
+    try:
+        with connection:
+            cursor = connection.execute(
+                "INSERT INTO runs (created_at, ganflu_version, mode, target, input_path, "
+                "output_stem, isolate, elapsed_seconds, summary_json) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    __version__,
+                    mode,
+                    target,
+                    os.path.abspath(input_path),
+                    os.path.abspath(output_stem),
+                    isolate,
+                    elapsed_seconds,
+                    json.dumps(summary, sort_keys=True) if summary is not None else None,
+                ),
+            )
+            run_id = cursor.lastrowid
+            _insert_rows(connection, "calls", CALL_COLUMNS, run_id, list(call_rows))
+            _insert_rows(connection, "features", FEATURE_COLUMNS, run_id, list(feature_rows))
+            _insert_rows(
+                connection,
+                "stage_timings",
+                ["stage", "wall_seconds"],
+                run_id,
+                list(stage_timings),
+            )
+    finally:
+        connection.close()
+    return run_id
@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Split an input FASTA into deterministic shards and merge the shard outputs.
+
+``ganflu --shard i/N`` annotates only the records whose ID hashes to shard
+``i`` (1-based) of ``N`` and writes ``<output>.shard.json`` next to the
+outputs. ``ganflu merge`` reads the shard reports and GFF3 files together with
+the original input FASTA and writes the outputs a single run over the whole
+input would have written: records in input order, GenBank record IDs
+numbered by ``format_record_id`` over all records, and the auto TSV/summary
+recomputed from every call. Miniprot is not run again.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+
+from Bio import SeqIO
+
+from ganflu import __version__
+from ganflu.scripts import auto_mode, compression, gff3togbk, subtype_panel
+
+SHARD_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+SHARD_MANIFEST_SUFFIX = ".shard.json"
+GFF3_HEADER = "##gff-version 3\n"
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard ``index`` (1-based) of ``count``."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, value: str) -> Shard:
+        match = SHARD_RE.match(str(value))
+        if not match:
+            raise ValueError(f"Shard must look like i/N (for example 1/8), got {value!r}")
+        index, count = int(match.group(1)), int(match.group(2))
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Shard index must be between 1 and N, got {value!r}")
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def contains(self, record_id: str) -> bool:
+        return shard_index(record_id, self.count) == self.index
+
+
+def shard_index(record_id: str, count: int) -> int:
+    """1-based shard of a record ID; stable across runs, machines and Python versions."""
+    digest = hashlib.blake2b(record_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count + 1
+
+
+def write_shard_fasta(input_fasta: str, output_fasta: str, shard: Shard) -> tuple[int, int]:
+    """Stream the records of ``shard`` to ``output_fasta``; return (shard records, input records)."""
+    total = 0
+
+    def shard_records(handle):
+        nonlocal total
+        for record in SeqIO.parse(handle, "fasta"):
+            total += 1
+            if shard.contains(record.id):
+                yield record
+
+    with compression.open_text(input_fasta) as handle:
+        kept = SeqIO.write(shard_records(handle), output_fasta, "fasta")
+    return kept, total
+
+
+def shard_manifest_path(output_stem: str) -> str:
+    return f"{output_stem}{SHARD_MANIFEST_SUFFIX}"
+
+
+def write_shard_manifest(
+    output_stem: str,
+    shard: Shard,
+    *,
+    input_fasta: str,
+    target: str,
+    contigs: int,
+    total: int,
+    report_stem: str | None = None,
+) -> str:
+    """Record what the shard run covered; ``report_stem`` is where its auto TSV/summary went."""
+    manifest = {
+        "ganflu": __version__,
+        "shard": str(shard),
+        "index": shard.index,
+        "count": shard.count,
+        "target": target,
+        "input": os.path.abspath(input_fasta),
+        "input_contigs": contigs,
+        "total_contigs": total,
+        "report_stem": os.path.abspath(report_stem or output_stem),
+    }
+    path = shard_manifest_path(output_stem)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+    return path
+
+
+def read_shard_manifests(shard_stems: list[str]) -> list[tuple[str, dict]]:
+    """(stem, manifest) sorted by shard index; every shard of the run must be present once."""
+    shards = []
+    for stem in shard_stems:
+        path = shard_manifest_path(stem)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Shard manifest not found: {path}")
+        with open(path, encoding="utf-8") as handle:
+            shards.append((stem, json.load(handle)))
+    shards.sort(key=lambda item: item[1]["index"])
+    first = shards[0][1]
+    for stem, manifest in shards:
+        for key in ("count", "target", "total_contigs"):
+            if manifest[key] != first[key]:
+                raise ValueError(f"Shard {stem} has {key}={manifest[key]!r}, expected {first[key]!r}")
+    indices = [manifest["index"] for _, manifest in shards]
+    if indices != list(range(1, first["count"] + 1)):
+        raise ValueError(f"Expected shards 1..{first['count']} once each, got {indices}")
+    contigs = sum(manifest["input_contigs"] for _, manifest in shards)
+    if contigs != first["total_contigs"]:
+        raise ValueError(f"Shards hold {contigs} contigs but the input had {first['total_contigs']}")
+    return shards
+
+
+def merge_gff3(paths: list[str], output_gff3: str) -> None:
+    with open(output_gff3, "w", encoding="utf-8") as output:
+        output.write(GFF3_HEADER)
+        for path in paths:
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    if not line.startswith("##gff-version"):
+                        output.write(line)
+
+
+def merge_subtype_tsv(paths: list[str], output_tsv: str, order: dict[str, int]) -> None:
+    calls = {}
+    for path in paths:
+        calls.update(subtype_panel.read_subtype_tsv(path))
+    subtype_panel.write_subtype_tsv(
+        dict(sorted(calls.items(), key=lambda item: order[item[0]])), output_tsv
+    )
+
+
+def _existing(paths) -> list[str]:
+    return [path for path in paths if os.path.isfile(path)]
+
+
+def _read_input(input_fasta: str, keep) -> tuple[dict[str, int], list]:
+    """Input order of every record ID, and the records ``keep(record_id)`` selects."""
+    order = {}
+    records = []
+    with compression.open_text(input_fasta) as handle:
+        for record in SeqIO.parse(handle, "fasta"):
+            order[record.id] = len(order)
+            if keep(record.id):
+                records.append(record)
+    return order, records
+
+
+def _read_auto_rows(report_stems: list[str]) -> dict[str, dict]:
+    rows_by_id = {}
+    for report_stem in report_stems:
+        with open(f"{report_stem}.auto.tsv", encoding="utf-8", newline="") as handle:
+            for row in csv.DictReader(handle, delimiter="\t"):
+                if row["contig_id"] in rows_by_id:
+                    raise ValueError(f"Contig {row['contig_id']} appears in more than one shard")
+                rows_by_id[row["contig_id"]] = row
+    return rows_by_id
+
+
+def merge_auto_shards(
+    shards: list[tuple[str, dict]],
+    input_fasta: str,
+    output_stem: str,
+    *,
+    isolate: str,
+    preserve_original_id: bool,
+    db_dir: str | None,
+    gzip_output: bool,
+    logger,
+) -> dict:
+    """Merge auto-mode shards; returns the recomputed summary."""
+    non_empty = [(stem, manifest) for stem, manifest in shards if manifest["input_contigs"]]
+    stems = [stem for stem, _ in non_empty]
+    report_stems = [manifest.get("report_stem", stem) for stem, manifest in non_empty]
+    summaries = []
+    for report_stem in report_stems:
+        with open(f"{report_stem}.auto.summary.json", encoding="utf-8") as handle:
+            summaries.append(json.load(handle))
+    if not summaries:
+        raise ValueError("All shards are empty")
+    for report_stem, summary in zip(report_stems, summaries):
+        for key in ("targets_scanned", "thresholds"):
+            if summary[key] != summaries[0][key]:
+                raise ValueError(f"Shard {report_stem} was run with different {key}: {summary[key]!r}")
+    rows_by_id = _read_auto_rows(report_stems)
+    write_rejected = bool(_existing(
+        path
+        for report_stem in report_stems
+        for path in (f"{report_stem}.auto.rejected.fasta", f"{report_stem}.auto.rejected.fasta.gz")
+    ))
+    accepted_ids = {
+        contig_id for contig_id, row in rows_by_id.items() if row["call"] == "accept" or write_rejected
+    }
+    order, contigs = _read_input(input_fasta, accepted_ids.__contains__)
+    missing = [contig_id for contig_id in order if contig_id not in rows_by_id]
+    unknown = [contig_id for contig_id in rows_by_id if contig_id not in order]
+    if missing or unknown:
+        raise ValueError(
+            f"Shard reports do not match {input_fasta}: {len(missing)} input contig(s) without a call, "
+            f"{len(unknown)} call(s) for contigs not in the input"
+        )
+    rows = sorted(rows_by_id.values(), key=lambda row: order[row["contig_id"]])
+    calls = [auto_mode.auto_call_from_row(row) for row in rows]
+    accepted_by_target = auto_mode.make_accepted_segments(calls)
+    output_suffix = compression.GZIP_OUTPUT_SUFFIX if gzip_output else ""
+
+    outputs = {}
+    with tempfile.TemporaryDirectory(
+        prefix=f"{os.path.basename(output_stem)}.merge.", dir=os.path.dirname(output_stem)
+    ) as work_dir:
+        for target in sorted(accepted_by_target):
+            accepted_segments = accepted_by_target[target]
+            if not accepted_segments:
+                continue
+            reference = auto_mode.load_reference_bundle(target, db_dir, logger)
+            target_stem = f"{output_stem}.{target}"
+            target_fasta = os.path.join(work_dir, f"{os.path.basename(output_stem)}.{target}.accepted.fasta")
+            auto_mode.write_target_fasta(contigs, accepted_segments, target_fasta)
+            target_gff3 = f"{target_stem}.gff3"
+            merge_gff3(_existing(f"{stem}.{target}.gff3" for stem in stems), target_gff3)
+            subtype_tsvs = _existing(f"{stem}.{target}.subtype.tsv" for stem in stems)
+            subtype_tsv = None
+            if subtype_tsvs:
+                subtype_tsv = f"{target_stem}.subtype.tsv"
+                merge_subtype_tsv(subtype_tsvs, subtype_tsv, order)
+            logger.info(f"Annotating {len(accepted_segments)} accepted contig(s) as {target}")
+            gff3togbk.main(
+                auto_mode.build_gff3togbk_args(
+                    gff3=target_gff3,
+                    gbk=f"{target_stem}.gbk{output_suffix}",
+                    input_fasta=target_fasta,
+                    reference=reference,
+                    isolate=isolate,
+                    cds_fna=f"{target_stem}.cds.fna{output_suffix}",
+                    faa=f"{target_stem}.faa{output_suffix}",
+                    preserve_original_id=preserve_original_id,
+                    subtype_tsv=subtype_tsv,
+                )
+            )
+            outputs[f"{target}.gff3"] = target_gff3
+            outputs[f"{target}.gbk"] = f"{target_stem}.gbk{output_suffix}"
+            outputs[f"{target}.cds_fna"] = f"{target_stem}.cds.fna{output_suffix}"
+            outputs[f"{target}.faa"] = f"{target_stem}.faa{output_suffix}"
+            if subtype_tsv:
+                outputs[f"{target}.subtype_tsv"] = subtype_tsv
+
+    tsv_path = f"{output_stem}.auto.tsv"
+    auto_mode.write_auto_tsv_rows(rows, tsv_path)
+    outputs["auto.tsv"] = tsv_path
+    if write_rejected:
+        rejected_path = f"{output_stem}.auto.rejected.fasta{output_suffix}"
+        auto_mode.write_rejected_fasta(contigs, calls, rejected_path)
+        outputs["auto.rejected_fasta"] = rejected_path
+    summary_path = f"{output_stem}.auto.summary.json"
+    outputs["auto.summary_json"] = summary_path
+    summary = auto_mode.build_summary(
+        input_fasta=input_fasta,
+        output_stem=output_stem,
+        targets=summaries[0]["targets_scanned"],
+        thresholds=auto_mode.AutoThresholds(**summaries[0]["thresholds"]),
+        calls=calls,
+        outputs=outputs,
+    )
+    auto_mode.write_summary_json(summary, summary_path)
+    auto_mode.log_auto_summary(calls, logger)
+    logger.info(f"Auto TSV output: {tsv_path}")
+    logger.info(f"Auto summary JSON output: {summary_path}")
+    return summary
+
+
+def merge_fixed_shards(
+    shards: list[tuple[str, dict]],
+    input_fasta: str,
+    output_stem: str,
+    *,
+    isolate: str,
+    preserve_original_id: bool,
+    db_dir: str | None,
+    gzip_output: bool,
+    logger,
+) -> dict[str, str]:
+    """Merge fixed-target shards by converting the merged GFF3 against the whole input."""
+    target = shards[0][1]["target"]
+    stems = [stem for stem, manifest in shards if manifest["input_contigs"]]
+    reference = auto_mode.load_reference_bundle(target, db_dir, logger)
+    output_suffix = compression.GZIP_OUTPUT_SUFFIX if gzip_output else ""
+    outputs = {"gff3": f"{output_stem}.gff3"}
+    merge_gff3([f"{stem}.gff3" for stem in stems], outputs["gff3"])
+    subtype_tsvs = _existing(f"{stem}.subtype.tsv" for stem in stems)
+    if subtype_tsvs:
+        order, _ = _read_input(input_fasta, lambda record_id: False)
+        outputs["subtype_tsv"] = f"{output_stem}.subtype.tsv"
+        merge_subtype_tsv(subtype_tsvs, outputs["subtype_tsv"], order)
+    outputs.update(
+        gbk=f"{output_stem}.gbk{output_suffix}",
+        cds_fna=f"{output_stem}.cds.fna{output_suffix}",
+        faa=f"{output_stem}.faa{output_suffix}",
+    )
+    gff3togbk.main(
+        auto_mode.build_gff3togbk_args(
+            gff3=outputs["gff3"],
+            gbk=outputs["gbk"],
+            input_fasta=input_fasta,
+            reference=reference,
+            isolate=isolate,
+            cds_fna=outputs["cds_fna"],
+            faa=outputs["faa"],
+            preserve_original_id=preserve_original_id,
+            subtype_tsv=outputs.get("subtype_tsv"),
+        )
+    )
+    logger.info(f"GenBank output: {outputs['gbk']}")
+    return outputs
+
+
+def merge_shards(
+    shard_stems: list[str],
+    input_fasta: str,
+    output_stem: str,
+    *,
+    isolate: str,
+    preserve_original_id: bool = False,
+    db_dir: str | None = None,
+    gzip_output: bool = False,
+    logger,
+):
+    shards = read_shard_manifests(shard_stems)
+    logger.info(f"Merging {len(shards)} shard(s) of {shards[0][1]['total_contigs']} contig(s)")
+    merge = merge_auto_shards if shards[0][1]["target"] == "auto" else merge_fixed_shards
+    return merge(
+        shards,
+        input_fasta,
+        output_stem,
+        isolate=isolate,
+        preserve_original_id=preserve_original_id,
+        db_dir=db_dir,
+        gzip_output=gzip_output,
+        logger=logger,
+    )
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from __future__ import annotations
+
+import csv
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from Bio import SeqIO
+
+from ganflu.scripts import compression, gff3_prune
+
+
+SUBTYPE_PANEL_PREFIX = "MPST"
+SUBTYPE_TSV_COLUMNS = [
+    "contig_id",
+    "antigen",
+    "subtype",
+    "identity",
+    "aa_coverage",
+    "panel_product",
+]
+
+
+@dataclass
+class SubtypeCall:
+    contig_id: str
+    antigen: str
+    subtype: str
+    identity: float
+    aa_coverage: float
+    panel_product: str
+
+
+def product_subtype(product: str) -> str:
+    parts = product.split("_")
+    return parts[1] if len(parts) > 1 else ""
+
+
+def resolve_subtype_panel(ref_dir: str, config: dict, override: str | None = None) -> str | None:
+    if override:
+        return os.path.abspath(override)
+    panel_faa = config.get("metadata", {}).get("subtype_panel_faa")
+    if not panel_faa:
+        return None
+    return os.path.join(str(ref_dir), panel_faa)
+
+
+def antigen_by_segment(config: dict) -> dict[str, str]:
+    return {
+        value.get("segment", antigen): antigen
+        for antigen, value in config.get("serotype", {}).items()
+    }
+
+
+def antigen_contigs_from_segments(accepted_segments: dict[str, str], config: dict) -> dict[str, str]:
+    antigens = antigen_by_segment(config)
+    return {
+        contig_id: antigens[segment]
+        for contig_id, segment in accepted_segments.items()
+        if segment in antigens
+    }
+
+
+def antigen_contigs_from_gff3(gff3_path: str | Path, antigen_names) -> dict[str, str]:
+    antigen_names = set(antigen_names or ())
+    rows, paf_rows_by_key = gff3_prune.read_gff3_rows(gff3_path)
+    antigen_contigs = {}
+    for parent in gff3_prune.collect_parent_alignments(rows, paf_rows_by_key):
+        if parent.product_name in antigen_names:
+            antigen_contigs.setdefault(parent.seqid, parent.product_name)
+    return antigen_contigs
+
+
+def select_subtype_calls(
+    panel_gff3: str | Path,
+    antigen_contigs: dict[str, str],
+    protein_lengths: dict[str, int] | None = None,
+) -> dict[str, SubtypeCall]:
+    rows, paf_rows_by_key = gff3_prune.read_gff3_rows(panel_gff3)
+    parents = gff3_prune.collect_parent_alignments(rows, paf_rows_by_key, protein_lengths)
+    best_by_contig = {}
+    for parent in parents:
+        if antigen_contigs.get(parent.seqid) != parent.product_name:
+            continue
+        if not product_subtype(parent.product):
+            continue
+        best_by_contig[parent.seqid] = gff3_prune.choose_best(best_by_contig.get(parent.seqid), parent)
+
+    return {
+        contig_id: SubtypeCall(
+            contig_id=contig_id,
+            antigen=parent.product_name,
+            subtype=product_subtype(parent.product),
+            identity=parent.identity,
+            aa_coverage=parent.aa_coverage,
+            panel_product=parent.product,
+        )
+        for contig_id, parent in best_by_contig.items()
+    }
+
+
+def write_antigen_fasta(input_fasta: str, antigen_contigs: dict[str, str], output_fasta: str) -> int:
+    with compression.open_text(input_fasta) as handle:
+        records = [
+            record
+            for record in SeqIO.parse(handle, "fasta")
+            if record.id in antigen_contigs
+        ]
+    with open(output_fasta, "w", encoding="utf-8") as handle:
+        SeqIO.write(records, handle, "fasta")
+    return len(records)
+
+
+def run_subtype_search(
+    *,
+    input_fasta: str,
+    antigen_contigs: dict[str, str],
+    panel_faa: str,
+    work_dir: str,
+    stem: str,
+    logger,
+    miniprot_bin: str = "miniprot",
+    threads: int | None = None,
+) -> dict[str, SubtypeCall]:
+    # The browser wheel leaves out ganflu.launchers; only native runs need it.
+    from ganflu.launchers.miniprot import MiniprotCommandLine
+
+    if not antigen_contigs:
+        logger.info("No HA/NA contigs for second-stage subtyping")
+        return {}
+    if not os.path.isfile(panel_faa):
+        raise FileNotFoundError(f"Subtype panel FASTA not found: {panel_faa}")
+
+    subset_fasta = os.path.join(work_dir, f"{stem}.subtype.fasta")
+    panel_gff3 = os.path.join(work_dir, f"{stem}.subtype.gff3")
+    contig_count = write_antigen_fasta(input_fasta, antigen_contigs, subset_fasta)
+    logger.info(f"Running second-stage subtyping for {contig_count} contig(s) against {panel_faa}")
+    miniprot = MiniprotCommandLine(
+        input=subset_fasta,
+        work_dir=work_dir,
+        output=panel_gff3,
+        prot_faa=panel_faa,
+        miniprot_bin=miniprot_bin,
+        stderr_filename=f"{stem}.subtype.miniprot.stderr",
+        kmer_size=15,
+        prefix=SUBTYPE_PANEL_PREFIX,
+        max_secondary_alignments=gff3_prune.RELAXED_MAX_SECONDARY_ALIGNMENTS,
+        secondary_to_primary_ratio=gff3_prune.RELAXED_SECONDARY_TO_PRIMARY_RATIO,
+        output_score_ratio=gff3_prune.RELAXED_OUTPUT_SCORE_RATIO,
+        threads=threads,
+    )
+    miniprot.run_piped_commands()
+    calls = select_subtype_calls(
+        panel_gff3,
+        antigen_contigs,
+        gff3_prune.load_protein_lengths(panel_faa),
+    )
+    for call in calls.values():
+        logger.debug(
+            "Subtype call %s %s %s identity=%.4f coverage=%.4f panel=%s",
+            call.contig_id,
+            call.antigen,
+            call.subtype,
+            call.identity,
+            call.aa_coverage,
+            call.panel_product,
+        )
+    logger.info(f"Second-stage subtype calls: {len(calls)}")
+    return calls
+
+
+def write_subtype_tsv(calls: dict[str, SubtypeCall], path: str) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=SUBTYPE_TSV_COLUMNS, delimiter="\t")
+        writer.writeheader()
+        for call in calls.values():
+            writer.writerow(
+                {
+                    "contig_id": call.contig_id,
+                    "antigen": call.antigen,
+                    "subtype": call.subtype,
+                    "identity": f"{call.identity:.4f}",
+                    "aa_coverage": f"{call.aa_coverage:.4f}",
+                    "panel_product": call.panel_product,
+                }
+            )
+
+
+def read_subtype_tsv(path: str) -> dict[str, SubtypeCall]:
+    calls = {}
+    with open(path, "r", encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle, delimiter="\t"):
+            calls[row["contig_id"]] = SubtypeCall(
+                contig_id=row["contig_id"],
+                antigen=row["antigen"],
+                subtype=row["subtype"],
+                identity=gff3_prune.parse_float(row.get("identity")),
+                aa_coverage=gff3_prune.parse_float(row.get("aa_coverage")),
+                panel_product=row.get("panel_product", ""),
+            )
+    return calls
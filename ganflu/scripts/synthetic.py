@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Synthetic influenza contigs with a ground-truth table, for scale and accuracy tests.
+
+Contigs are derived from the packaged consensus proteomes (reverse-translated
+with random codons and a few amino-acid changes) and from the sample genomes
+under ``ganflu/web/samples`` (synonymous codon changes in the main ORF). On
+top of those come truncated segments, frameshifts, internal stops, chimeric
+concatenations and non-influenza background. The truth TSV uses the auto
+mode ``TSV_COLUMNS``; only the columns a variant determines are filled, the
+rest are left empty.
+
+    python -m ganflu.scripts.synthetic -n 1000 --seed 1 -o synthetic.fasta
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import random
+import sys
+from dataclasses import dataclass
+from importlib import resources
+from pathlib import Path
+
+from Bio import SeqIO
+from Bio.Data import CodonTable
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+from ganflu.scripts import auto_mode
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEED = 1
+DEFAULT_TARGET_WEIGHTS = {"IAV": 0.45, "IBV": 0.35, "ICV": 0.1, "IDV": 0.1}
+KIND_WEIGHTS = {
+    "isolate": 0.2,
+    "reverse_translated": 0.4,
+    "truncated": 0.1,
+    "frameshift": 0.08,
+    "internal_stop": 0.08,
+    "chimeric": 0.06,
+    "background": 0.08,
+}
+# Expected auto-mode values per variant kind; isolate status depends on how
+# close the real genome is to the consensus, so it is left open.
+KIND_TRUTH = {
+    "isolate": {"call": "accept", "status": ""},
+    "reverse_translated": {"call": "accept", "status": "complete", "qc_result": "pass"},
+    "truncated": {"call": "accept", "status": "partial", "flags": "partial_coverage"},
+    "frameshift": {"call": "accept", "status": "frameshift", "qc_result": "fail", "flags": "frameshift"},
+    "internal_stop": {
+        "call": "accept",
+        "status": "nonfunctional",
+        "qc_result": "fail",
+        "flags": "internal_stop;nonfunctional",
+    },
+    "chimeric": {
+        "call": "reject",
+        "status": "chimeric",
+        "qc_result": "fail",
+        "flags": "possible_chimeric_contig",
+    },
+    "background": {"call": "reject", "target": "-", "segment": "-", "status": "no_hit", "qc_result": "fail"},
+}
+# Segment of each record in the packaged sample genomes.
+SAMPLE_SEGMENTS = {
+    "IAV": ("IAV_PR8.fasta", {
+        "NC_002023.1": "PB2", "NC_002021.1": "PB1", "NC_002022.1": "PA", "NC_002017.1": "HA",
+        "NC_002019.1": "NP", "NC_002018.1": "NA", "NC_002016.1": "M", "NC_002020.1": "NS",
+    }),
+    "IBV": ("IBV_B_Victoria_2_1987.fa", {
+        "JN600475.1": "PB1", "JN600474.1": "PB2", "JN600476.1": "PA", "M58428.1": "HA",
+        "JN600477.1": "NP", "AB036870.1": "NA", "JN600478.1": "M", "JN600479.1": "NS",
+    }),
+    "ICV": ("ICV_Ann_Arbor_1_1950.fna", {
+        "NC_006307.2": "PB2", "NC_006308.2": "PB1", "NC_006309.2": "P3", "NC_006310.2": "HEF",
+        "NC_006311.1": "NP", "NC_006312.2": "M", "NC_006306.2": "NS",
+    }),
+    "IDV": ("IDV_swine_Oklahoma_1334_2011.fna", {
+        "NC_036616.1": "PB2", "NC_036615.1": "PB1", "NC_036619.1": "P3", "NC_036618.1": "HEF",
+        "NC_036617.1": "NP", "NC_036620.1": "M", "NC_036621.1": "NS",
+    }),
+}
+
+STANDARD_TABLE = CodonTable.unambiguous_dna_by_id[1]
+CODONS_BY_AA = {
+    aa: sorted(codon for codon, coded in STANDARD_TABLE.forward_table.items() if coded == aa)
+    for aa in set(STANDARD_TABLE.forward_table.values())
+}
+AMINO_ACIDS = sorted(CODONS_BY_AA)
+STOP_CODONS = sorted(STANDARD_TABLE.stop_codons)
+NUCLEOTIDES = "ACGT"
+
+MAX_AA_SUBSTITUTION_RATE = 0.08
+MAX_SYNONYMOUS_RATE = 0.3
+UTR_SUBSTITUTION_RATE = 0.03
+TRUNCATED_KEEP_RANGE = (0.45, 0.8)
+BACKGROUND_LENGTH_RANGE = (500, 3000)
+# Truth columns scored by compare_with_truth.
+TRUTH_COLUMNS = ("call", "target", "segment", "status", "flags")
+
+
+@dataclass
+class SegmentSource:
+    """A coding sequence with flanks; ``cds_start``/``cds_end`` are 0-based, end exclusive."""
+
+    target: str
+    segment: str
+    product: str
+    sequence: str
+    cds_start: int
+    cds_end: int
+    origin: str
+
+
+@dataclass
+class SyntheticContig:
+    record: SeqRecord
+    truth: dict[str, str | int]
+
+
+def _random_bases(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(NUCLEOTIDES) for _ in range(length))
+
+
+def reverse_translate(protein: str, rng: random.Random, aa_substitution_rate: float = 0.0) -> str:
+    """Random-codon CDS for ``protein`` with a stop codon; X and substituted residues are random."""
+    codons = []
+    for index, aa in enumerate(protein.rstrip("*")):
+        if aa not in CODONS_BY_AA or (index > 0 and rng.random() < aa_substitution_rate):
+            aa = rng.choice([other for other in AMINO_ACIDS if other != aa])
+        codons.append(rng.choice(CODONS_BY_AA[aa]))
+    codons.append(rng.choice(STOP_CODONS))
+    return "".join(codons)
+
+
+def longest_orf(sequence: str) -> tuple[int, int]:
+    """0-based start and exclusive end (stop codon included) of the longest forward ATG ORF."""
+    best = (0, 0)
+    for frame in range(3):
+        start = None
+        for index in range(frame, len(sequence) - 2, 3):
+            codon = sequence[index:index + 3]
+            if start is None and codon == "ATG":
+                start = index
+            elif start is not None and codon in STANDARD_TABLE.stop_codons:
+                if index + 3 - start > best[1] - best[0]:
+                    best = (start, index + 3)
+                start = None
+    return best
+
+
+def mutate_synonymous(sequence: str, cds_start: int, cds_end: int, rng: random.Random, rate: float) -> str:
+    """Swap codons for synonyms inside the CDS and substitute bases outside it."""
+    bases = list(sequence)
+    for index in range(cds_start, cds_end - 3, 3):
+        aa = STANDARD_TABLE.forward_table.get(sequence[index:index + 3])
+        if aa is not None and rng.random() < rate:
+            bases[index:index + 3] = rng.choice(CODONS_BY_AA[aa])
+    for index in [*range(cds_start), *range(cds_end, len(sequence))]:
+        if rng.random() < UTR_SUBSTITUTION_RATE:
+            bases[index] = rng.choice([base for base in NUCLEOTIDES if base != bases[index]])
+    return "".join(bases)
+
+
+def load_proteome_sources(target: str) -> list[tuple[str, str, str]]:
+    """(segment, product, protein) for the main product of each segment; every HA/NA subtype for IAV."""
+    reference = auto_mode.load_reference_bundle(target, None, logger)
+    antigens = set(reference.config.get("serotype", {}))
+    by_segment = {}
+    for record in SeqIO.parse(reference.prot_faa, "fasta"):
+        segment = auto_mode.get_product_segment(record.id, reference.segment_keys)
+        if segment is None or "fragment" in record.id:
+            continue
+        by_segment.setdefault(segment, []).append((record.id, str(record.seq)))
+    sources = []
+    for segment in reference.segment_keys:
+        proteins = by_segment.get(segment, [])
+        if segment not in antigens:
+            proteins = sorted(proteins, key=lambda item: len(item[1]), reverse=True)[:1]
+        sources.extend((segment, product, protein) for product, protein in proteins)
+    return sources
+
+
+def load_sample_sources(target: str, sample_dir: Path | None = None) -> list[tuple[str, str, int, int, str]]:
+    """(segment, sequence, ORF start, ORF end, record ID) for each packaged sample segment."""
+    file_name, segments = SAMPLE_SEGMENTS[target]
+    root = Path(sample_dir) if sample_dir else Path(str(resources.files("ganflu").joinpath("web", "samples")))
+    sources = []
+    for record in SeqIO.parse(str(root / file_name), "fasta"):
+        sequence = str(record.seq).upper().replace("U", "T")
+        start, end = longest_orf(sequence)
+        sources.append((segments[record.id], sequence, start, end, record.id))
+    return sources
+
+
+class SyntheticGenerator:
+    """Draw synthetic contigs; the same seed, targets and kinds give the same contigs."""
+
+    def __init__(self, seed: int = DEFAULT_SEED, targets=None, kinds=None, sample_dir: Path | None = None):
+        self.rng = random.Random(seed)
+        self.targets = list(targets or DEFAULT_TARGET_WEIGHTS)
+        unknown = [target for target in self.targets if target not in DEFAULT_TARGET_WEIGHTS]
+        if unknown:
+            raise ValueError(f"Unsupported synthetic target(s): {', '.join(unknown)}")
+        self.kinds = list(kinds or KIND_WEIGHTS)
+        unknown = [kind for kind in self.kinds if kind not in KIND_WEIGHTS]
+        if unknown:
+            raise ValueError(f"Unsupported synthetic kind(s): {', '.join(unknown)}")
+        self.proteomes = {target: load_proteome_sources(target) for target in self.targets}
+        self.samples = {target: load_sample_sources(target, sample_dir) for target in self.targets}
+
+    def _pick_target(self) -> str:
+        return self.rng.choices(self.targets, [DEFAULT_TARGET_WEIGHTS[target] for target in self.targets])[0]
+
+    def _reverse_translated(self, target: str, exclude_segment: str | None = None) -> SegmentSource:
+        choices = [source for source in self.proteomes[target] if source[0] != exclude_segment]
+        segment, product, protein = self.rng.choice(choices)
+        rate = self.rng.uniform(0.0, MAX_AA_SUBSTITUTION_RATE)
+        cds = reverse_translate(protein, self.rng, rate)
+        left = _random_bases(self.rng, self.rng.randint(20, 60))
+        right = _random_bases(self.rng, self.rng.randint(20, 60))
+        return SegmentSource(
+            target, segment, product, left + cds + right, len(left), len(left) + len(cds),
+            f"proteome:{product};aa_substitution_rate={rate:.3f}",
+        )
+
+    def _isolate(self, target: str) -> SegmentSource:
+        segment, sequence, start, end, record_id = self.rng.choice(self.samples[target])
+        rate = self.rng.uniform(0.0, MAX_SYNONYMOUS_RATE)
+        return SegmentSource(
+            target, segment, "", mutate_synonymous(sequence, start, end, self.rng, rate), start, end,
+            f"sample:{record_id};synonymous_rate={rate:.3f}",
+        )
+
+    def _variant(self, kind: str) -> tuple[str, SegmentSource | None, str]:
+        if kind == "background":
+            length = self.rng.randint(*BACKGROUND_LENGTH_RANGE)
+            return _random_bases(self.rng, length), None, "random sequence"
+        target = self._pick_target()
+        if kind == "isolate":
+            source = self._isolate(target)
+            return source.sequence, source, source.origin
+        source = self._reverse_translated(target)
+        sequence = source.sequence
+        cds_length = source.cds_end - source.cds_start
+        if kind == "reverse_translated":
+            return sequence, source, source.origin
+        if kind == "truncated":
+            keep = int(cds_length * self.rng.uniform(*TRUNCATED_KEEP_RANGE))
+            offset = self.rng.randint(0, cds_length - keep)
+            start = source.cds_start + offset
+            return sequence[start:start + keep], source, f"{source.origin};kept_cds={offset}+{keep}"
+        # Edits go in the middle of the CDS so both sides still align.
+        codon = source.cds_start + 3 * self.rng.randint(cds_length // 9, 2 * cds_length // 9)
+        if kind == "frameshift":
+            if self.rng.random() < 0.5:
+                edited = sequence[:codon] + self.rng.choice(NUCLEOTIDES) + sequence[codon:]
+                return edited, source, f"{source.origin};insertion={codon}"
+            return sequence[:codon] + sequence[codon + 1:], source, f"{source.origin};deletion={codon}"
+        if kind == "internal_stop":
+            edited = sequence[:codon] + self.rng.choice(STOP_CODONS) + sequence[codon + 3:]
+            return edited, source, f"{source.origin};stop_codon={codon}"
+        other = self._reverse_translated(target, exclude_segment=source.segment)
+        return sequence + other.sequence, source, f"{source.origin}+{other.origin}"
+
+    def contig(self, index: int) -> SyntheticContig:
+        kind = self.rng.choices(self.kinds, [KIND_WEIGHTS[kind] for kind in self.kinds])[0]
+        sequence, source, origin = self._variant(kind)
+        contig_id = f"syn{index:06d}"
+        truth = {column: "" for column in auto_mode.TSV_COLUMNS}
+        truth.update(contig_id=contig_id, length=len(sequence), notes=f"synthetic:{kind};{origin}")
+        if source is not None:
+            truth.update(target=source.target, segment=source.segment, best_product=source.product)
+        if kind == "chimeric":
+            truth.update(segment="", best_product="")
+        truth.update(KIND_TRUTH[kind])
+        record = SeqRecord(Seq(sequence), id=contig_id, name=contig_id, description=f"synthetic {kind}")
+        return SyntheticContig(record, truth)
+
+    def generate(self, count: int) -> list[SyntheticContig]:
+        return [self.contig(index) for index in range(1, count + 1)]
+
+
+def write_truth_tsv(contigs: list[SyntheticContig], path: str | Path) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=auto_mode.TSV_COLUMNS, delimiter="\t")
+        writer.writeheader()
+        for contig in contigs:
+            writer.writerow(contig.truth)
+
+
+def read_tsv_rows(path: str | Path) -> list[dict[str, str]]:
+    with open(path, encoding="utf-8", newline="") as handle:
+        return list(csv.DictReader(handle, delimiter="\t"))
+
+
+def compare_with_truth(truth_rows, observed_rows, columns=TRUTH_COLUMNS) -> dict[str, dict[str, int]]:
+    """Count, per column, truth values that were checked and matched by an auto TSV.
+
+    Empty truth values are not checked. Expected flags must all be present in
+    the observed flags, which may list more.
+    """
+    observed_by_id = {row["contig_id"]: row for row in observed_rows}
+    counts = {column: {"checked": 0, "matched": 0} for column in columns}
+    for truth in truth_rows:
+        observed = observed_by_id.get(truth["contig_id"], {})
+        for column in columns:
+            expected = str(truth.get(column, ""))
+            if not expected:
+                continue
+            counts[column]["checked"] += 1
+            value = observed.get(column, "")
+            if column == "flags":
+                matched = set(expected.split(";")) <= set(value.split(";"))
+            else:
+                matched = value == expected
+            counts[column]["matched"] += int(matched)
+    return counts
+
+
+def write_synthetic(
+    count: int,
+    fasta_path: str | Path,
+    truth_path: str | Path | None = None,
+    *,
+    seed: int = DEFAULT_SEED,
+    targets=None,
+    kinds=None,
+) -> list[SyntheticContig]:
+    """Write ``count`` contigs and their truth TSV (default: ``<fasta stem>.truth.tsv``)."""
+    fasta_path = Path(fasta_path)
+    truth_path = Path(truth_path) if truth_path else fasta_path.with_suffix(".truth.tsv")
+    contigs = SyntheticGenerator(seed, targets, kinds).generate(count)
+    SeqIO.write([contig.record for contig in contigs], str(fasta_path), "fasta")
+    write_truth_tsv(contigs, truth_path)
+    return contigs
+
+
+def _comma_list(value: str) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def parse_arguments(raw_args=None):
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic influenza contigs and a ground-truth TSV in the auto report layout."
+    )
+    parser.add_argument("-n", "--contigs", type=int, required=True, help="Number of contigs to generate")
+    parser.add_argument("-o", "--output", required=True, help="Output FASTA file")
+    parser.add_argument("--truth", default=None, help="Ground-truth TSV (default: <output stem>.truth.tsv)")
+    parser.add_argument(
+        "--seed", type=int, default=DEFAULT_SEED, help=f"Random seed (default: {DEFAULT_SEED})"
+    )
+    parser.add_argument(
+        "--targets",
+        type=lambda value: [target.upper() for target in _comma_list(value)],
+        default=None,
+        help="Comma-separated targets to draw from (default: IAV,IBV,ICV,IDV)",
+    )
+    parser.add_argument(
+        "--kinds",
+        type=_comma_list,
+        default=None,
+        help=f"Comma-separated variant kinds (default: {','.join(KIND_WEIGHTS)})",
+    )
+    if raw_args is None and len(sys.argv) == 1:
+        parser.print_help(sys.stderr)
+        sys.exit(1)
+    args = parser.parse_args(raw_args)
+    if args.contigs < 1:
+        parser.error("--contigs must be at least 1")
+    return args
+
+
+def main(raw_args=None):
+    args = parse_arguments(raw_args)
+    contigs = write_synthetic(
+        args.contigs, args.output, args.truth, seed=args.seed, targets=args.targets, kinds=args.kinds
+    )
+    logger.info(f"Wrote {len(contigs)} synthetic contigs to {args.output}")
+    return contigs
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
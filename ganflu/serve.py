@@ -0,0 +1,633 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from __future__ import annotations
+
+import functools
+import http.server
+import json
+import logging
+import os
+import re
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from importlib import resources
+from urllib.parse import parse_qs, urlsplit
+
+from ganflu import static_server, web_helpers
+from ganflu.launchers.miniprot import MiniprotCommandLine
+from ganflu.scripts import auto_mode, fixed_mode, gff3_prune, gff3togbk
+from ganflu.scripts.profiling import StageTimer
+
+
+JOB_PARAMS = {
+    "target",
+    "isolate",
+    "preserve_original_id",
+    "auto_targets",
+    "auto_min_identity",
+    "auto_min_aa_coverage",
+    "auto_min_score",
+    "auto_min_margin",
+    "auto_complete_aa_coverage",
+    "auto_write_rejected",
+    "subtype_panel",
+    "gzip_output",
+}
+BOOLEAN_JOB_PARAMS = {"preserve_original_id", "auto_write_rejected", "gzip_output"}
+FLOAT_JOB_PARAMS = {
+    "auto_min_identity",
+    "auto_min_aa_coverage",
+    "auto_min_score",
+    "auto_min_margin",
+    "auto_complete_aa_coverage",
+}
+MAX_REQUEST_BYTES = 256 * 1024 * 1024
+# Finished jobs, and their directories, are deleted after a day or beyond
+# the newest 1000, whichever comes first.
+DEFAULT_JOB_TTL = 24 * 60 * 60
+DEFAULT_MAX_JOBS = 1000
+JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+SCAN_PARAMS = {
+    "targets",
+    "prefix",
+    "max_secondary_alignments",
+    "output_score_ratio",
+    "secondary_to_primary_ratio",
+}
+ANNOTATE_PARAMS = {
+    "target",
+    "fasta",
+    "gff3",
+    "isolate",
+    "output_stem",
+    "preserve_original_id",
+    "hit_settings",
+}
+GUI_API_PREFIX = "/api/"
+
+
+@dataclass
+class AnnotationJob:
+    job_id: str
+    name: str
+    target: str
+    job_dir: str
+    params: dict
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    outputs: dict[str, str] = field(default_factory=dict)
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def as_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "name": self.name,
+            "target": self.target,
+            "status": self.status,
+            "result_dir": self.job_dir,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "outputs": {key: os.path.basename(path) for key, path in self.outputs.items()},
+            "files": self.files(),
+        }
+
+    def files(self) -> list[str]:
+        if not os.path.isdir(self.job_dir):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self.job_dir)
+            if os.path.isfile(os.path.join(self.job_dir, name))
+        )
+
+
+def parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"1", "true", "yes", "on"}
+
+
+def normalize_job_params(params: dict) -> dict:
+    unknown = sorted(set(params) - JOB_PARAMS - {"name"})
+    if unknown:
+        raise ValueError(f"Unsupported job parameter(s): {', '.join(unknown)}")
+    normalized = {}
+    for key, value in params.items():
+        if key in BOOLEAN_JOB_PARAMS:
+            normalized[key] = parse_bool(value)
+        elif key in FLOAT_JOB_PARAMS:
+            normalized[key] = float(value)
+        elif value is not None:
+            normalized[key] = str(value)
+    return normalized
+
+
+def normalize_scan_params(params: dict) -> dict:
+    unknown = sorted(set(params) - SCAN_PARAMS)
+    if unknown:
+        raise ValueError(f"Unsupported scan parameter(s): {', '.join(unknown)}")
+    try:
+        max_secondary_alignments = int(
+            params.get("max_secondary_alignments", gff3_prune.RELAXED_MAX_SECONDARY_ALIGNMENTS)
+        )
+        output_score_ratio = float(
+            params.get("output_score_ratio", gff3_prune.RELAXED_OUTPUT_SCORE_RATIO)
+        )
+        secondary_to_primary_ratio = float(
+            params.get("secondary_to_primary_ratio", gff3_prune.RELAXED_SECONDARY_TO_PRIMARY_RATIO)
+        )
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid scan parameter: {exc}") from exc
+    if max_secondary_alignments < 1:
+        raise ValueError("max_secondary_alignments must be a positive integer")
+    return {
+        "targets": auto_mode.parse_auto_targets(params.get("targets")),
+        "prefix": str(params.get("prefix") or "").strip() or None,
+        "max_secondary_alignments": max_secondary_alignments,
+        "output_score_ratio": output_score_ratio,
+        "secondary_to_primary_ratio": secondary_to_primary_ratio,
+    }
+
+
+def send_json_response(handler, status: int, payload: dict) -> None:
+    body = json.dumps(payload, indent=2, sort_keys=True).encode("utf-8")
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Cache-Control", "no-store")
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+class AnnotationService:
+    """Run annotation jobs in a warm process with preloaded reference bundles."""
+
+    def __init__(
+        self,
+        *,
+        arg_parser,
+        jobs_dir: str,
+        targets,
+        db_dir: str | None = None,
+        max_workers: int = 1,
+        results_db: str | None = None,
+        job_ttl: float | None = DEFAULT_JOB_TTL,
+        max_jobs: int | None = DEFAULT_MAX_JOBS,
+        logger=None,
+    ):
+        self.arg_parser = arg_parser
+        self.jobs_dir = os.path.abspath(jobs_dir)
+        self.db_dir = db_dir
+        self.db_root = os.path.realpath(db_dir or str(resources.files("ganflu").joinpath("db")))
+        self.job_ttl = job_ttl
+        self.max_jobs = max_jobs
+        self.results_db = results_db
+        self.logger = logger or logging.getLogger()
+        self.jobs: dict[str, AnnotationJob] = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self.references = {
+            target: auto_mode.load_reference_bundle(target, db_dir, self.logger)
+            for target in targets
+        }
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="ganflu-job",
+        )
+        self.logger.info(
+            f"Loaded reference bundles: {', '.join(self.references) or 'none'}"
+        )
+
+    def resolve_subtype_panel(self, path: str) -> str:
+        """A panel FASTA under the reference data directory; clients cannot point at other files."""
+        panel = os.path.realpath(os.path.join(self.db_root, path))
+        if os.path.commonpath([panel, self.db_root]) != self.db_root:
+            raise ValueError("subtype_panel must be a file under the reference data directory")
+        if not os.path.isfile(panel):
+            raise ValueError(f"Subtype panel not found under the reference data directory: {path}")
+        return panel
+
+    def prune_jobs(self, now: float | None = None) -> list[str]:
+        """Forget finished jobs past the TTL or beyond max_jobs and delete their directories."""
+        now = time.time() if now is None else now
+        with self.lock:
+            finished = sorted(
+                (job for job in self.jobs.values() if job.done.is_set()),
+                key=lambda job: job.finished_at or 0,
+            )
+            expired = [
+                job for job in finished
+                if self.job_ttl is not None and now - (job.finished_at or 0) > self.job_ttl
+            ]
+            if self.max_jobs is not None:
+                excess = len(self.jobs) - len(expired) - self.max_jobs
+                remaining = [job for job in finished if job not in expired]
+                expired.extend(remaining[:max(0, excess)])
+            for job in expired:
+                del self.jobs[job.job_id]
+            known = set(self.jobs)
+        removed = [job.job_dir for job in expired]
+        if self.job_ttl is not None:
+            # Job directories left behind by an earlier daemon.
+            for name in os.listdir(self.jobs_dir):
+                path = os.path.join(self.jobs_dir, name)
+                if (
+                    JOB_ID_RE.match(name)
+                    and name not in known
+                    and path not in removed
+                    and os.path.isdir(path)
+                    and now - os.path.getmtime(path) > self.job_ttl
+                ):
+                    removed.append(path)
+        for path in removed:
+            shutil.rmtree(path, ignore_errors=True)
+        if removed:
+            self.logger.info(f"Removed {len(removed)} expired job directories")
+        return removed
+
+    def submit(self, fasta_text: str, params: dict) -> AnnotationJob:
+        self.prune_jobs()
+        params = normalize_job_params(params)
+        if "subtype_panel" in params:
+            params["subtype_panel"] = self.resolve_subtype_panel(params["subtype_panel"])
+        target = params.get("target")
+        if not target:
+            raise ValueError("Job parameter 'target' is required")
+        if not fasta_text.lstrip().startswith(">"):
+            raise ValueError("Job input must be FASTA text starting with '>'")
+        job_id = uuid.uuid4().hex
+        name = gff3togbk.get_output_id_prefix(params.pop("name", "") or "input") or "input"
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        job = AnnotationJob(job_id=job_id, name=name, target=target, job_dir=job_dir, params=params)
+        # Parse up front so a bad target is reported to the client, not the job log.
+        self.build_job_args(job)
+        os.makedirs(job_dir)
+        with open(os.path.join(job_dir, f"{name}.input.fasta"), "w", encoding="utf-8") as handle:
+            handle.write(fasta_text)
+        with self.lock:
+            self.jobs[job_id] = job
+        self.executor.submit(self.run_job, job)
+        self.logger.info(f"Queued job {job_id} ({target}, {name})")
+        return job
+
+    def get(self, job_id: str) -> AnnotationJob | None:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def build_job_args(self, job: AnnotationJob):
+        input_fasta = os.path.join(job.job_dir, f"{job.name}.input.fasta")
+        try:
+            args = self.arg_parser.parse_args(["-i", input_fasta, "-t", job.target])
+        except SystemExit as exc:
+            raise ValueError(f"Unsupported target: {job.target}") from exc
+        for key, value in job.params.items():
+            setattr(args, key, value)
+        args.db_dir = self.db_dir
+        args.results_db = self.results_db
+        args.isolate = (args.isolate or "").strip() or job.name
+        return args
+
+    def run_job(self, job: AnnotationJob) -> None:
+        # Unregistered logger so finished jobs do not accumulate in the logging manager.
+        job_logger = logging.Logger(f"ganflu.serve.{job.job_id}", logging.DEBUG)
+        job_logger.parent = self.logger
+        handler = logging.FileHandler(os.path.join(job.job_dir, f"{job.name}.log"), encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        # Modules such as gff3togbk log to the root logger, so the job log sits
+        # there and keeps every record from this worker thread, the job
+        # logger's included (they propagate through self.logger).
+        thread_id = threading.get_ident()
+        handler.addFilter(lambda record: record.thread == thread_id)
+        root_logger = logging.getLogger()
+        root_logger.addHandler(handler)
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            args = self.build_job_args(job)
+            output_stem = os.path.join(job.job_dir, job.name)
+            timer = StageTimer()
+            if args.target == "auto":
+                summary = auto_mode.run_auto(
+                    args, output_stem, job.job_dir, job_logger,
+                    timer=timer, references=self.references,
+                )
+                job.outputs = dict(summary["outputs"])
+            else:
+                job.outputs = fixed_mode.run_fixed(
+                    args, output_stem, job.job_dir, job_logger,
+                    timer=timer, reference=self.references.get(args.target),
+                )
+            job.status = "done"
+        except Exception as exc:
+            job_logger.exception(f"Job {job.job_id} failed")
+            job.status = "failed"
+            job.error = str(exc)
+        finally:
+            job.finished_at = time.time()
+            root_logger.removeHandler(handler)
+            handler.close()
+            job.done.set()
+            self.logger.info(
+                f"Job {job.job_id} {job.status} in {job.finished_at - job.started_at:.2f} seconds"
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+
+
+class AnnotationRequestHandler(http.server.BaseHTTPRequestHandler):
+    """JSON job API: POST /jobs, GET /jobs/<id>, GET /jobs/<id>/files/<name>."""
+
+    server_version = "ganflu-serve"
+
+    def __init__(self, *args, service: AnnotationService, **kwargs):
+        self.service = service
+        super().__init__(*args, **kwargs)
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) pair.
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format, *args):
+        self.service.logger.debug(f"{self.address_string()} - {format % args}")
+
+    def send_json(self, status: int, payload: dict) -> None:
+        send_json_response(self, status, payload)
+
+    def do_GET(self):
+        parts = [part for part in urlsplit(self.path).path.split("/") if part]
+        if parts == ["health"]:
+            return self.send_json(200, {"status": "ok", "targets": sorted(self.service.references)})
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self.send_json(404, {"error": "Not found"})
+        job = self.service.get(parts[1])
+        if job is None:
+            return self.send_json(404, {"error": f"Unknown job: {parts[1]}"})
+        if len(parts) == 2:
+            return self.send_json(200, job.as_dict())
+        if len(parts) == 4 and parts[2] == "files" and parts[3] in job.files():
+            return self.send_file(os.path.join(job.job_dir, parts[3]))
+        return self.send_json(404, {"error": "Not found"})
+
+    def send_file(self, path: str) -> None:
+        with open(path, "rb") as handle:
+            body = handle.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            return self.send_json(404, {"error": "Not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_REQUEST_BYTES:
+            return self.send_json(400, {"error": "Request body must contain FASTA input"})
+        body = self.rfile.read(length)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            # UnicodeDecodeError and JSONDecodeError are ValueErrors, so they become a 400.
+            body = body.decode("utf-8")
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                payload = json.loads(body)
+                fasta_text = payload.pop("fasta", "")
+                params.update(payload)
+            else:
+                fasta_text = body
+            wait = parse_bool(params.pop("wait", False))
+            job = self.service.submit(fasta_text, params)
+        except ValueError as exc:
+            return self.send_json(400, {"error": str(exc)})
+        if wait:
+            job.done.wait()
+            return self.send_json(200 if job.status == "done" else 500, job.as_dict())
+        return self.send_json(202, job.as_dict())
+
+
+class NativeScanService:
+    """Run the web app's miniprot scans and annotation natively.
+
+    Scans use the local multi-threaded miniprot binary. Annotation calls the
+    same ganflu.web_helpers functions the page runs in Pyodide, so native
+    and WebAssembly runs produce the same results.
+    """
+
+    def __init__(
+        self,
+        *,
+        targets,
+        threads: int | None = None,
+        db_dir: str | None = None,
+        work_dir: str | None = None,
+        miniprot_bin: str = "miniprot",
+        logger=None,
+    ):
+        self.miniprot_bin = miniprot_bin
+        self.miniprot_path = shutil.which(miniprot_bin)
+        if self.miniprot_path is None:
+            raise RuntimeError(f"{miniprot_bin} was not found on PATH")
+        self.threads = threads or os.cpu_count() or 1
+        self.work_dir = work_dir
+        self.logger = logger or logging.getLogger()
+        self.references = {
+            target: auto_mode.load_reference_bundle(target, db_dir, self.logger)
+            for target in targets
+        }
+        # web_helpers writes every run to one fixed work directory and sets
+        # the root log level for the run, so annotations run one at a time.
+        self.annotate_lock = threading.Lock()
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "backend": "native",
+            "miniprot": self.miniprot_path,
+            "threads": self.threads,
+            "targets": sorted(self.references),
+        }
+
+    def scan(self, fasta_bytes: bytes, params: dict) -> dict[str, str]:
+        options = normalize_scan_params(params)
+        targets = options["targets"]
+        missing = [target for target in targets if target not in self.references]
+        if missing:
+            raise ValueError(f"Reference bundle not loaded: {', '.join(missing)}")
+        if not fasta_bytes.lstrip().startswith(b">"):
+            raise ValueError("Scan input must be FASTA text starting with '>'")
+        # Concurrent scans share the thread budget instead of oversubscribing it.
+        threads = max(1, self.threads // len(targets))
+        with tempfile.TemporaryDirectory(prefix="ganflu-gui-", dir=self.work_dir) as work_dir:
+            input_fasta = os.path.join(work_dir, "input.fasta")
+            with open(input_fasta, "wb") as handle:
+                handle.write(fasta_bytes)
+            with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="ganflu-scan") as executor:
+                futures = {
+                    target: executor.submit(
+                        self.run_miniprot, target, input_fasta, work_dir, options, threads
+                    )
+                    for target in targets
+                }
+                return {target: future.result() for target, future in futures.items()}
+
+    def annotate(self, payload: dict) -> dict:
+        """Annotate scan GFF3 like the page's Pyodide worker; outputs come back as text."""
+        if not isinstance(payload, dict):
+            raise ValueError("Annotate request must be a JSON object")
+        unknown = sorted(set(payload) - ANNOTATE_PARAMS)
+        if unknown:
+            raise ValueError(f"Unsupported annotate parameter(s): {', '.join(unknown)}")
+        fasta = payload.get("fasta")
+        if not isinstance(fasta, str) or not fasta.lstrip().startswith(">"):
+            raise ValueError("fasta must be FASTA text starting with '>'")
+        gff3_by_target = payload.get("gff3")
+        if not isinstance(gff3_by_target, dict) or not all(
+            isinstance(text, str) for text in gff3_by_target.values()
+        ):
+            raise ValueError("gff3 must map targets to scan GFF3 text")
+        target = str(payload.get("target") or "").strip().upper()
+        if target != "AUTO" and target not in gff3_by_target:
+            raise ValueError(f"gff3 has no scan for target {target or '(none)'}")
+        isolate = str(payload.get("isolate") or "")
+        output_stem = str(payload.get("output_stem") or "ganflu")
+        preserve_original_id = parse_bool(payload.get("preserve_original_id", False))
+        hit_settings_json = json.dumps(payload.get("hit_settings") or {})
+        with (
+            self.annotate_lock,
+            tempfile.TemporaryDirectory(prefix="ganflu-gui-", dir=self.work_dir) as work_dir,
+        ):
+            input_fasta = os.path.join(work_dir, "input.fasta")
+            with open(input_fasta, "w", encoding="utf-8") as handle:
+                handle.write(fasta)
+            gff3_paths = {}
+            for name, text in gff3_by_target.items():
+                gff3_paths[name] = os.path.join(work_dir, f"{os.path.basename(str(name))}.scan.gff3")
+                with open(gff3_paths[name], "w", encoding="utf-8") as handle:
+                    handle.write(text)
+            if target == "AUTO":
+                result_json = web_helpers.run_ganflu_auto_web_files(
+                    input_fasta,
+                    json.dumps(gff3_paths),
+                    isolate,
+                    output_stem,
+                    preserve_original_id,
+                    hit_settings_json,
+                )
+            else:
+                result_json = web_helpers.run_ganflu_web_files(
+                    input_fasta,
+                    gff3_paths[target],
+                    target,
+                    isolate,
+                    output_stem,
+                    preserve_original_id,
+                    hit_settings_json,
+                )
+            result = json.loads(result_json)
+            outputs = {}
+            for name, path in (result.pop("output_paths", None) or {}).items():
+                with open(path, encoding="utf-8") as handle:
+                    outputs[name] = handle.read()
+        if "error" not in result:
+            result["outputs"] = outputs
+        return result
+
+    def run_miniprot(self, target: str, input_fasta: str, work_dir: str, options: dict, threads: int) -> str:
+        output = os.path.join(work_dir, f"{target}.scan.gff3")
+        miniprot = MiniprotCommandLine(
+            input=input_fasta,
+            work_dir=work_dir,
+            output=output,
+            prot_faa=self.references[target].prot_faa,
+            miniprot_bin=self.miniprot_bin,
+            stderr_filename=f"{target}.miniprot.stderr",
+            kmer_size=15,
+            prefix=options["prefix"] or auto_mode.MINIPROT_PREFIXES.get(target, "MP"),
+            max_secondary_alignments=options["max_secondary_alignments"],
+            secondary_to_primary_ratio=options["secondary_to_primary_ratio"],
+            output_score_ratio=options["output_score_ratio"],
+            threads=threads,
+        )
+        miniprot.run_piped_commands()
+        with open(output, encoding="utf-8") as handle:
+            return handle.read()
+
+
+class GuiRequestHandler(static_server.StaticAssetHandler):
+    """`ganflu gui` handler: the static web app plus the native backend API.
+
+    GET /api/health reports the backend; POST /api/scan takes FASTA as the
+    request body and scan options in the query string and returns
+    {"gff3": {target: text}}. POST /api/annotate takes a JSON object with the
+    FASTA, the scan GFF3 per target and the run options, and returns the
+    summary, log and output files the Pyodide worker would.
+    """
+
+    def __init__(self, *args, scan_service: NativeScanService, **kwargs):
+        self.scan_service = scan_service
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if not path.startswith(GUI_API_PREFIX):
+            return super().do_GET()
+        if path == f"{GUI_API_PREFIX}health":
+            return send_json_response(self, 200, self.scan_service.health())
+        return send_json_response(self, 404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path not in {f"{GUI_API_PREFIX}scan", f"{GUI_API_PREFIX}annotate"}:
+            return send_json_response(self, 404, {"error": "Not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_REQUEST_BYTES:
+            return send_json_response(self, 400, {"error": "Request body must contain FASTA input"})
+        body = self.rfile.read(length)
+        if url.path == f"{GUI_API_PREFIX}annotate":
+            return self.annotate(body)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            gff3_by_target = self.scan_service.scan(body, params)
+        except ValueError as exc:
+            return send_json_response(self, 400, {"error": str(exc)})
+        except RuntimeError as exc:
+            self.scan_service.logger.exception("Native miniprot scan failed")
+            return send_json_response(self, 500, {"error": str(exc)})
+        return send_json_response(self, 200, {"gff3": gff3_by_target})
+
+    def annotate(self, body: bytes) -> None:
+        try:
+            # UnicodeDecodeError and JSONDecodeError are ValueErrors, so both are a 400.
+            result = self.scan_service.annotate(json.loads(body.decode("utf-8")))
+        except ValueError as exc:
+            return send_json_response(self, 400, {"error": str(exc)})
+        # The helpers report their own failures, with the traceback and run log.
+        return send_json_response(self, 500 if "error" in result else 200, result)
+
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def bind_job_server(service: AnnotationService, host: str = "127.0.0.1", port: int = 0, unix_socket: str | None = None):
+    handler = functools.partial(AnnotationRequestHandler, service=service)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return UnixHTTPServer(unix_socket, handler)
+    return http.server.ThreadingHTTPServer((host, int(port)), handler)
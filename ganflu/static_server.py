@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from __future__ import annotations
+
+import email.utils
+import functools
+import hashlib
+import http.server
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+
+HEADERS_FILE_NAME = "_headers"
+# Server preference when the client accepts several encodings.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Paths that embed a version in the URL and can be cached for good.
+IMMUTABLE_PREFIXES = ("/vendor/",)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+EXTRA_MIME_TYPES = {
+    ".fa": "text/plain",
+    ".fasta": "text/plain",
+    ".fna": "text/plain",
+    ".js": "text/javascript",
+    ".json": "application/json",
+    ".mjs": "text/javascript",
+    ".wasm": "application/wasm",
+    ".whl": "application/zip",
+}
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+@dataclass
+class HeaderRule:
+    pattern: re.Pattern[str]
+    headers: list[tuple[str, str]] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def _compile_path_pattern(pattern: str) -> re.Pattern[str]:
+    # Cloudflare Pages syntax: "*" is a splat, ":name" matches one segment.
+    parts = re.split(r"(\*|:[A-Za-z_]\w*)", pattern)
+    regex = "".join(
+        ".*" if part == "*" else "[^/]+" if part.startswith(":") else re.escape(part)
+        for part in parts
+    )
+    return re.compile(f"^{regex}$")
+
+
+def parse_headers_file(path) -> list[HeaderRule]:
+    """Parse a Cloudflare Pages style _headers file."""
+    rules = []
+    current = None
+    for raw_line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if not raw_line[:1].isspace():
+            current = HeaderRule(_compile_path_pattern(line))
+            rules.append(current)
+            continue
+        if current is None:
+            continue
+        if line.startswith("!"):
+            current.removed.append(line[1:].strip().lower())
+            continue
+        name, separator, value = line.partition(":")
+        if separator:
+            current.headers.append((name.strip(), value.strip()))
+    return rules
+
+
+def apply_header_rules(rules, url_path: str, headers: dict[str, tuple[str, str]]) -> None:
+    """Apply matching rules in order; rule values replace built-in defaults."""
+    set_by_rule = set()
+    for rule in rules:
+        if not rule.pattern.match(url_path):
+            continue
+        for name, value in rule.headers:
+            key = name.lower()
+            if key in set_by_rule:
+                value = f"{headers[key][1]}, {value}"
+            headers[key] = (name, value)
+            set_by_rule.add(key)
+        for key in rule.removed:
+            headers.pop(key, None)
+            set_by_rule.discard(key)
+
+
+def parse_accept_encoding(value: str | None) -> set[str]:
+    accepted = set()
+    for item in (value or "").split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, raw = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(token)
+    return accepted
+
+
+def parse_byte_range(value: str, size: int) -> tuple[int, int] | None:
+    """Return an inclusive (start, end) range, or None to ignore the header."""
+    match = RANGE_RE.match(value.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix_length = int(last)
+        if suffix_length == 0 or size == 0:
+            raise RangeNotSatisfiable(value)
+        return max(size - suffix_length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(value)
+    return start, min(end, size - 1)
+
+
+class ETagCache:
+    """Content-hash ETags, recomputed only when size or mtime changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, path: str, stat_result: os.stat_result) -> str:
+        signature = (stat_result.st_size, stat_result.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        digest = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()[:32]}"'
+        with self._lock:
+            self._entries[path] = (signature, etag)
+        return etag
+
+
+class _LimitedReader:
+    def __init__(self, handle, length: int):
+        self._handle = handle
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._handle.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def _etag_matches(header_value: str, etag: str) -> bool:
+    candidates = [item.strip() for item in header_value.split(",")]
+    if "*" in candidates:
+        return True
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _parse_http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+    if parsed is None:
+        return None
+    return parsed.timestamp()
+
+
+class StaticAssetHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler for the ganflu web app.
+
+    Adds precompressed .br/.gz siblings, content-hash ETags, conditional
+    requests, single byte ranges and the Cache-Control rules from _headers on
+    top of SimpleHTTPRequestHandler.
+    """
+
+    extensions_map = {**http.server.SimpleHTTPRequestHandler.extensions_map, **EXTRA_MIME_TYPES}
+    etag_cache = ETagCache()
+
+    def __init__(self, *args, header_rules=(), **kwargs):
+        self.header_rules = list(header_rules)
+        super().__init__(*args, **kwargs)
+
+    def send_head(self):
+        url_path = unquote(urlsplit(self.path).path)
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index_path = os.path.join(path, "index.html")
+            if not url_path.endswith("/") or not os.path.isfile(index_path):
+                return super().send_head()
+            path = index_path
+            url_path = f"{url_path}index.html"
+        if url_path.endswith("/") or not os.path.isfile(path):
+            self.send_error(http.HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        range_header = self.headers.get("Range")
+        encoding, served_path, has_variants = self._select_encoding(path, allow=range_header is None)
+        try:
+            handle = open(served_path, "rb")
+        except OSError:
+            self.send_error(http.HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        try:
+            stat_result = os.fstat(handle.fileno())
+            etag = self.etag_cache.get(served_path, stat_result)
+            headers = self._response_headers(url_path, etag, stat_result, encoding, has_variants)
+
+            if self._is_not_modified(etag, stat_result):
+                handle.close()
+                self.send_response(http.HTTPStatus.NOT_MODIFIED)
+                for name, value in headers.values():
+                    self.send_header(name, value)
+                self.end_headers()
+                return None
+
+            size = stat_result.st_size
+            start, end = 0, size - 1
+            status = http.HTTPStatus.OK
+            if range_header and self._if_range_matches(etag, stat_result):
+                try:
+                    byte_range = parse_byte_range(range_header, size)
+                except RangeNotSatisfiable:
+                    handle.close()
+                    self.send_response(http.HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return None
+                if byte_range is not None:
+                    start, end = byte_range
+                    status = http.HTTPStatus.PARTIAL_CONTENT
+
+            self.send_response(status)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Length", str(max(end - start + 1, 0)))
+            if status == http.HTTPStatus.PARTIAL_CONTENT:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            for name, value in headers.values():
+                self.send_header(name, value)
+            self.end_headers()
+            handle.seek(start)
+            return _LimitedReader(handle, max(end - start + 1, 0))
+        except Exception:
+            handle.close()
+            raise
+
+    def _select_encoding(self, path: str, allow: bool) -> tuple[str | None, str, bool]:
+        variants = [
+            (encoding, path + suffix)
+            for encoding, suffix in PRECOMPRESSED_ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+        if allow and variants:
+            accepted = parse_accept_encoding(self.headers.get("Accept-Encoding"))
+            for encoding, variant_path in variants:
+                if encoding in accepted:
+                    return encoding, variant_path, True
+        return None, path, bool(variants)
+
+    def _response_headers(self, url_path, etag, stat_result, encoding, has_variants):
+        cache_control = (
+            IMMUTABLE_CACHE_CONTROL
+            if url_path.startswith(IMMUTABLE_PREFIXES)
+            else REVALIDATE_CACHE_CONTROL
+        )
+        headers = {
+            "accept-ranges": ("Accept-Ranges", "bytes"),
+            "etag": ("ETag", etag),
+            "last-modified": ("Last-Modified", self.date_time_string(stat_result.st_mtime)),
+            "cache-control": ("Cache-Control", cache_control),
+        }
+        if encoding:
+            headers["content-encoding"] = ("Content-Encoding", encoding)
+        if has_variants:
+            headers["vary"] = ("Vary", "Accept-Encoding")
+        apply_header_rules(self.header_rules, url_path, headers)
+        return headers
+
+    def _is_not_modified(self, etag: str, stat_result: os.stat_result) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, etag)
+        since = _parse_http_date(self.headers.get("If-Modified-Since"))
+        return since is not None and int(stat_result.st_mtime) <= since
+
+    def _if_range_matches(self, etag: str, stat_result: os.stat_result) -> bool:
+        if_range = self.headers.get("If-Range")
+        if not if_range:
+            return True
+        if if_range.startswith(('"', "W/")):
+            return if_range == etag
+        since = _parse_http_date(if_range)
+        return since is not None and int(stat_result.st_mtime) <= since
+
+
+def make_static_handler(web_dir, handler_class=StaticAssetHandler, **handler_kwargs):
+    web_dir = Path(str(web_dir))
+    headers_path = web_dir / HEADERS_FILE_NAME
+    rules = parse_headers_file(headers_path) if headers_path.is_file() else []
+    return functools.partial(
+        handler_class, directory=str(web_dir), header_rules=rules, **handler_kwargs
+    )
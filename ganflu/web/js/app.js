@@ -1,5 +1,12 @@
-import { createMiniprotManager } from './app/miniprot.js';
+import { createMiniprotManager, getMiniprotPoolSize } from './app/miniprot.js';
+import { createNativeBackendClient } from './app/native-backend.js';
 import { createPyodideManager } from './app/pyodide.js';
+import { createResultCache, makeCacheKey, sha256Hex } from './app/result-cache.js';
+import { registerAssetCache } from './app/service-worker.js';
+import { isCancelledError } from './app/worker-rpc.js';
+import { BATCH_STATUS_LABELS, mergeTsvTables, runBatchPipeline } from './app/batch.js';
+import { readFastaStream, scanFastaBytes } from './app/fasta-stream.js';
+import { ASSET_MANIFEST_VERSION, GANFLU_WHEEL_NAME } from './config.js';
 
 const $ = (selector) => document.querySelector(selector);
 
@@ -49,6 +56,7 @@ const SAMPLE_PROFILES = {
 const state = {
   outputs: {},
   resultSummary: null,
+  batch: null,
   running: false,
   downloadSelection: DOWNLOAD_ALL_VALUE,
   selectedTargetTab: '',
@@ -84,11 +92,14 @@ const elements = {
   runButton: $('#run-button'),
   status: $('#status'),
   runSummary: $('#run-summary'),
+  batchQueue: $('#batch-queue'),
+  workOverlayBatch: $('#work-overlay-batch'),
   downloadSelect: $('#download-select'),
   downloadButton: $('#download-button'),
   workOverlay: $('#work-overlay'),
   workOverlayTitle: $('#work-overlay-title'),
   workOverlayMessage: $('#work-overlay-message'),
+  cancelButton: $('#cancel-button'),
   advancedRunDetails: $('#advanced-run-details'),
   advancedRunBody: $('#advanced-run-body'),
   sampleTabs: document.querySelectorAll('[data-sample-key]'),
@@ -111,6 +122,7 @@ const getStatusTone = (message) => {
   const normalized = String(message || '').toLowerCase();
   if (!normalized || normalized === 'idle') return 'idle';
   if (normalized.includes('error')) return 'error';
+  if (normalized.includes('cancelled')) return 'idle';
   if (normalized.includes('completed') || normalized.includes('loaded')) return 'success';
   return 'working';
 };
@@ -178,10 +190,34 @@ const escapeHtml = (value) =>
     "'": '&#39;'
   })[char]);
 
+const inputEncoder = new TextEncoder();
+
+const formatMegabytes = (bytes) => `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+
+// FASTA input is handled as UTF-8 bytes so it can be handed to the workers
+// without building extra JS string copies. Files are streamed in chunks and
+// checked (header, IDs, duplicates) while they are read.
+const readFastaFile = async (file, label = '') => {
+  const labelPrefix = label ? `${label}: ` : '';
+  let reportedPercent = -1;
+  const input = await readFastaStream(file, {
+    onProgress: ({ loaded, total, records }) => {
+      const percent = total ? Math.floor((loaded / total) * 100) : 100;
+      if (percent === reportedPercent) return;
+      reportedPercent = percent;
+      setStatus(`${labelPrefix}Reading input ${formatMegabytes(loaded)} / ${formatMegabytes(total)} (${records} records)`);
+    }
+  });
+  if (!input.records) throw new Error('FASTA input is empty.');
+  return input;
+};
+
 const readInputFasta = async () => {
   const file = elements.fastaFile.files?.[0];
-  if (file) return { text: await file.text(), name: file.name };
-  return { text: elements.fastaText.value, name: elements.outputStem.value || 'ganflu.fasta' };
+  if (file) return { ...(await readFastaFile(file)), name: file.name };
+  const input = scanFastaBytes(inputEncoder.encode(elements.fastaText.value));
+  if (!input.records) throw new Error('FASTA input is empty.');
+  return { ...input, name: elements.outputStem.value || 'ganflu.fasta' };
 };
 
 const downloadBlobFile = (filename, blob) => {
@@ -204,8 +240,10 @@ const outputMimeType = (name) => {
   return 'text/plain;charset=utf-8';
 };
 
-const downloadTextFile = (filename, text) => {
-  downloadBlobFile(filename, new Blob([String(text ?? '')], { type: outputMimeType(filename) }));
+const toOutputBlobPart = (data) => (data instanceof Uint8Array ? data : String(data ?? ''));
+
+const downloadTextFile = (filename, data) => {
+  downloadBlobFile(filename, new Blob([toOutputBlobPart(data)], { type: outputMimeType(filename) }));
 };
 
 const zipEncoder = new TextEncoder();
@@ -289,7 +327,7 @@ const createZipBlob = (files) => {
   files.forEach(({ name, text }) => {
     const filename = uniquifyZipPath(name, usedNames);
     const nameBytes = zipEncoder.encode(filename);
-    const dataBytes = zipEncoder.encode(String(text ?? ''));
+    const dataBytes = text instanceof Uint8Array ? text : zipEncoder.encode(String(text ?? ''));
     const checksum = crc32(dataBytes);
     const local = makeZipHeader(30 + nameBytes.length);
     local.view.setUint32(0, 0x04034b50, true);
@@ -345,6 +383,7 @@ const createZipBlob = (files) => {
 };
 
 const getResultArchiveName = () => {
+  if (state.batch) return `${BATCH_STEM}.results.zip`;
   const stem = state.resultSummary?.run?.output_stem ||
     state.resultSummary?.output_stem ||
     elements.outputStem.value ||
@@ -981,38 +1020,39 @@ const copySequence = async (button) => {
 };
 
 const pyodideManager = createPyodideManager({ onStatus: setStatus });
-const miniprotManager = createMiniprotManager({ onStatus: setStatus });
-
-const getReferencePayload = async (target) => {
-  const pyodide = await pyodideManager.init();
-  pyodide.globals.set('GANFLU_TARGET', target);
-  const payload = JSON.parse(pyodide.runPython('get_ganflu_reference_json(GANFLU_TARGET)'));
-  if (payload.error) throw new Error(payload.error);
-  return payload;
-};
-
-const runGff3ToOutputs = async ({
-  fastaText,
-  gff3Text,
-  target,
-  isolate,
-  outputStem,
-  preserveOriginalId,
-  hitSettings
-}) => {
-  const pyodide = await pyodideManager.init();
-  pyodide.globals.set('GANFLU_INPUT_FASTA', fastaText);
-  pyodide.globals.set('GANFLU_GFF3_TEXT', gff3Text);
-  pyodide.globals.set('GANFLU_TARGET', target);
-  pyodide.globals.set('GANFLU_ISOLATE', isolate);
-  pyodide.globals.set('GANFLU_OUTPUT_STEM', outputStem);
-  pyodide.globals.set('GANFLU_PRESERVE_ORIGINAL_ID', Boolean(preserveOriginalId));
-  pyodide.globals.set('GANFLU_HIT_SETTINGS_JSON', JSON.stringify(hitSettings || {}));
-  setStatus('Converting GFF3 to GenBank');
-  const result = JSON.parse(
-    pyodide.runPython(
-      'run_ganflu_web(GANFLU_INPUT_FASTA, GANFLU_GFF3_TEXT, GANFLU_TARGET, GANFLU_ISOLATE, GANFLU_OUTPUT_STEM, GANFLU_PRESERVE_ORIGINAL_ID, GANFLU_HIT_SETTINGS_JSON)'
-    )
+const miniprotManager = createMiniprotManager({
+  onStatus: setStatus,
+  poolSize: getMiniprotPoolSize(AUTO_TARGETS.length)
+});
+const nativeBackend = createNativeBackendClient({ onStatus: setStatus });
+
+// Reference payloads are static per target, so batch runs fetch them once.
+const referenceCache = new Map();
+
+const getReferencePayload = (target) => {
+  if (!referenceCache.has(target)) {
+    const pending = pyodideManager.getReferencePayload(target).then((payload) => {
+      if (payload.error) throw new Error(payload.error);
+      return payload;
+    });
+    pending.catch(() => referenceCache.delete(target));
+    referenceCache.set(target, pending);
+  }
+  return referenceCache.get(target);
+};
+
+// Reference data is split per target; fetch it as soon as a target is picked
+// if Python is already loaded, instead of at the start of the next run.
+const prefetchTargetData = () => {
+  const value = elements.target.value;
+  const targets = value === 'auto' ? AUTO_TARGETS : [value];
+  pyodideManager.loadTargetData(targets).catch(() => {});
+};
+
+const runGff3ToOutputs = async (params) => {
+  const result = await pyodideManager.runGff3ToOutputs(
+    params,
+    [params.fastaBytes.buffer, params.gff3Bytes.buffer]
   );
   if (result.error) {
     const detail = result.error.traceback || result.error.message || 'ganflu failed';
@@ -1021,26 +1061,10 @@ const runGff3ToOutputs = async ({
   return result;
 };
 
-const runAutoGff3ToOutputs = async ({
-  fastaText,
-  gff3ByTarget,
-  isolate,
-  outputStem,
-  preserveOriginalId,
-  hitSettings
-}) => {
-  const pyodide = await pyodideManager.init();
-  pyodide.globals.set('GANFLU_INPUT_FASTA', fastaText);
-  pyodide.globals.set('GANFLU_AUTO_GFF3_JSON', JSON.stringify(gff3ByTarget));
-  pyodide.globals.set('GANFLU_ISOLATE', isolate);
-  pyodide.globals.set('GANFLU_OUTPUT_STEM', outputStem);
-  pyodide.globals.set('GANFLU_PRESERVE_ORIGINAL_ID', Boolean(preserveOriginalId));
-  pyodide.globals.set('GANFLU_HIT_SETTINGS_JSON', JSON.stringify(hitSettings || {}));
-  setStatus('Classifying contigs');
-  const result = JSON.parse(
-    pyodide.runPython(
-      'run_ganflu_auto_web(GANFLU_INPUT_FASTA, GANFLU_AUTO_GFF3_JSON, GANFLU_ISOLATE, GANFLU_OUTPUT_STEM, GANFLU_PRESERVE_ORIGINAL_ID, GANFLU_HIT_SETTINGS_JSON)'
-    )
+const runAutoGff3ToOutputs = async (params) => {
+  const result = await pyodideManager.runAutoGff3ToOutputs(
+    params,
+    [params.fastaBytes.buffer, ...Object.values(params.gff3ByTarget).map((bytes) => bytes.buffer)]
   );
   if (result.error) {
     const detail = result.error.traceback || result.error.message || 'ganflu auto mode failed';
@@ -1049,6 +1073,247 @@ const runAutoGff3ToOutputs = async ({
   return result;
 };
 
+const cancelRun = () => {
+  if (!state.running) return;
+  setStatus('Cancelling');
+  nativeBackend.cancel();
+  miniprotManager.cancel();
+  pyodideManager.cancel();
+};
+
+// With `ganflu gui` on a host that has miniprot, all targets are scanned by the
+// native binary in one request; otherwise the WebAssembly worker pool is used.
+const runNativeMiniprotScans = async ({ fastaBytes, target, hitSettings, labelPrefix }) => {
+  const targets = target === 'auto' ? AUTO_TARGETS : [target];
+  const gff3ByTarget = await nativeBackend.scan({
+    fastaBytes,
+    targets,
+    prefix: target === 'auto' ? '' : 'MP',
+    bestN: hitSettings.maxSecondaryAlignments,
+    outputScoreRatio: hitSettings.outputScoreRatio,
+    secondaryToPrimaryRatio: hitSettings.secondaryToPrimaryRatio,
+    statusLabel: `${labelPrefix}Running native Miniprot`
+  });
+  return target === 'auto' ? { gff3ByTarget } : { gff3Bytes: gff3ByTarget[target] };
+};
+
+const runMiniprotScans = async ({ fastaBytes, target, hitSettings, label = '' }) => {
+  const labelPrefix = label ? `${label}: ` : '';
+  if (await nativeBackend.detect()) {
+    return runNativeMiniprotScans({ fastaBytes, target, hitSettings, labelPrefix });
+  }
+  const miniprotOptions = {
+    genomeFasta: fastaBytes,
+    intronOpenPenalty: 15,
+    bestN: hitSettings.maxSecondaryAlignments,
+    outputScoreRatio: hitSettings.outputScoreRatio,
+    secondaryToPrimaryRatio: hitSettings.secondaryToPrimaryRatio
+  };
+  if (target !== 'auto') {
+    const reference = await getReferencePayload(target);
+    const gff3Bytes = await miniprotManager.run({
+      ...miniprotOptions,
+      proteinFasta: reference.protein_fasta,
+      prefix: 'MP',
+      statusLabel: `${labelPrefix}Running Miniprot`
+    });
+    return { gff3Bytes };
+  }
+  let finishedScans = 0;
+  const scanTarget = async (autoTarget) => {
+    const reference = await getReferencePayload(autoTarget);
+    const gff3Bytes = await miniprotManager.run({
+      ...miniprotOptions,
+      proteinFasta: reference.protein_fasta,
+      prefix: AUTO_PREFIXES[autoTarget] || 'MP',
+      statusLabel: `${labelPrefix}Running Miniprot (${autoTarget})`
+    });
+    finishedScans += 1;
+    setStatus(`${labelPrefix}Miniprot finished ${finishedScans}/${AUTO_TARGETS.length}`);
+    return [autoTarget, gff3Bytes];
+  };
+  let gff3Entries;
+  try {
+    gff3Entries = await Promise.all(AUTO_TARGETS.map(scanTarget));
+  } catch (error) {
+    // Stop the scans that are still running before reporting the failure.
+    miniprotManager.cancel();
+    throw error;
+  }
+  return { gff3ByTarget: Object.fromEntries(gff3Entries) };
+};
+
+// `ganflu gui` annotates with the same helpers in CPython; Pyodide is only
+// loaded when there is no native backend.
+const annotateScan = async ({ fastaBytes, target, scan, ...options }) => {
+  if (await nativeBackend.detect()) {
+    return nativeBackend.annotate({
+      fastaBytes,
+      target,
+      gff3Bytes: scan.gff3Bytes,
+      gff3ByTarget: scan.gff3ByTarget,
+      ...options
+    });
+  }
+  return target === 'auto'
+    ? runAutoGff3ToOutputs({ fastaBytes, gff3ByTarget: scan.gff3ByTarget, ...options })
+    : runGff3ToOutputs({ fastaBytes, gff3Bytes: scan.gff3Bytes, target, ...options });
+};
+
+// The asset manifest version hashes the wheel and the ganflu-db/<target>.zip
+// reference archives, so any change to either starts a fresh cache.
+const RESULT_CACHE_NAMESPACE = `${GANFLU_WHEEL_NAME}:${ASSET_MANIFEST_VERSION}`;
+const resultCache = createResultCache();
+
+const scanCacheSettings = (hitSettings) => ({
+  maxSecondaryAlignments: hitSettings.maxSecondaryAlignments,
+  outputScoreRatio: hitSettings.outputScoreRatio,
+  secondaryToPrimaryRatio: hitSettings.secondaryToPrimaryRatio
+});
+
+// Looks up the final result first, then the Miniprot scan, and runs only the
+// missing stages. Changing output options (isolate, stem, original IDs, QC
+// thresholds) therefore re-runs annotation but not Miniprot.
+const scanWithCache = async ({ fastaBytes, target, hitSettings, annotateOptions, label = '' }) => {
+  const labelPrefix = label ? `${label}: ` : '';
+  const inputHash = await sha256Hex(fastaBytes);
+  const resultKey = await makeCacheKey(
+    ['result', RESULT_CACHE_NAMESPACE, inputHash, target, hitSettings, annotateOptions]
+  );
+  const cachedResult = await resultCache.get(resultKey);
+  if (cachedResult) {
+    setStatus(`${labelPrefix}Using cached results`);
+    return { cachedResult };
+  }
+  const scanKey = await makeCacheKey(
+    ['scan', RESULT_CACHE_NAMESPACE, inputHash, target, scanCacheSettings(hitSettings)]
+  );
+  let scan = await resultCache.get(scanKey);
+  if (scan) {
+    setStatus(`${labelPrefix}Using cached Miniprot results`);
+  } else {
+    scan = await runMiniprotScans({ fastaBytes, target, hitSettings, label });
+    // put() copies the scan synchronously, before annotation transfers it.
+    resultCache.put(scanKey, scan);
+  }
+  return { ...scan, resultKey };
+};
+
+const annotateWithCache = async ({ scan, ...params }) => {
+  if (scan.cachedResult) return scan.cachedResult;
+  const result = await annotateScan({ scan, ...params });
+  resultCache.put(scan.resultKey, result);
+  return result;
+};
+
+const BATCH_STEM = 'ganflu-batch';
+const batchDecoder = new TextDecoder();
+
+const makeUniqueStem = (stem, usedStems) => {
+  let candidate = stem;
+  let suffix = 2;
+  while (usedStems.has(candidate)) {
+    candidate = `${stem}_${suffix}`;
+    suffix += 1;
+  }
+  usedStems.add(candidate);
+  return candidate;
+};
+
+const formatBatchDetail = (item) => {
+  if (item.status === 'error') return item.error;
+  if (item.status !== 'done') return '';
+  const counts = item.summary?.run?.counts || {};
+  const annotated = counts.annotated_contigs ?? counts.accepted;
+  return annotated === undefined ? '' : `${annotated}/${counts.input_contigs ?? '-'} contigs annotated`;
+};
+
+const renderBatchQueue = () => {
+  const items = state.batch?.items || [];
+  const html = items.map((item, index) => {
+    const detail = formatBatchDetail(item);
+    return `
+      <li class="batch-item" data-status="${escapeHtml(item.status)}">
+        <button type="button" data-batch-index="${index}" ${item.summary ? '' : 'disabled'}
+          title="Show the run summary for ${escapeHtml(item.name)}.">${escapeHtml(item.name)}</button>
+        <span>${escapeHtml(BATCH_STATUS_LABELS[item.status] || item.status)}${detail ? ` - ${escapeHtml(detail)}` : ''}</span>
+      </li>`;
+  }).join('');
+  [elements.batchQueue, elements.workOverlayBatch].forEach((element) => {
+    if (!element) return;
+    element.hidden = !items.length;
+    element.innerHTML = html;
+  });
+};
+
+const runBatch = async (files, { target, hitSettings, preserveOriginalId }) => {
+  const usedStems = new Set();
+  const items = files.map((file, index) => ({
+    file,
+    index,
+    name: file.name,
+    stem: makeUniqueStem(makeSafeStem(file.name), usedStems),
+    status: 'queued',
+    summary: null,
+    error: ''
+  }));
+  state.batch = { items };
+  renderBatchQueue();
+
+  const tsvTables = [];
+  await runBatchPipeline({
+    items,
+    scan: async (item) => {
+      const { bytes: fastaBytes } = await readFastaFile(item.file, `${item.index + 1}/${items.length} ${item.name}`);
+      item.fastaBytes = fastaBytes;
+      return scanWithCache({
+        fastaBytes,
+        target,
+        hitSettings,
+        annotateOptions: { isolate: item.stem, outputStem: item.stem, preserveOriginalId },
+        label: `${item.index + 1}/${items.length} ${item.name}`
+      });
+    },
+    annotate: async (item, scan) => {
+      const { fastaBytes } = item;
+      item.fastaBytes = null;
+      setStatus(`${item.index + 1}/${items.length} ${item.name}: Annotating`);
+      const result = await annotateWithCache({
+        fastaBytes,
+        target,
+        scan,
+        isolate: item.stem,
+        outputStem: item.stem,
+        preserveOriginalId,
+        hitSettings
+      });
+      item.summary = result.summary || null;
+      Object.entries(result.outputs || {}).forEach(([name, data]) => {
+        state.outputs[`${item.stem}/${name}`] = data;
+        if (name.endsWith('.auto.tsv') || name.endsWith('.hits.tsv')) {
+          tsvTables.push({ label: item.name, text: batchDecoder.decode(data) });
+        }
+      });
+      return result;
+    },
+    onUpdate: renderBatchQueue
+  });
+
+  const mergedTsv = mergeTsvTables(tsvTables);
+  if (mergedTsv) {
+    state.outputs[`${BATCH_STEM}.${target === 'auto' ? 'auto' : 'hits'}.tsv`] = mergedTsv;
+  }
+  renderResults();
+  const failed = items.filter((item) => item.status === 'error');
+  elements.logText.textContent = items
+    .map((item) => `${item.name}: ${item.status === 'error' ? `error - ${item.error}` : 'done'}`)
+    .join('\n');
+  if (failed.length) elements.advancedRunDetails.hidden = false;
+  setStatus(failed.length
+    ? `Completed with errors (${failed.length}/${items.length} files failed)`
+    : `Completed ${items.length} files`);
+};
+
 elements.form.addEventListener('submit', async (event) => {
   event.preventDefault();
   if (state.running) return;
@@ -1058,66 +1323,42 @@ elements.form.addEventListener('submit', async (event) => {
   elements.logText.textContent = '';
   state.outputs = {};
   state.resultSummary = null;
+  state.batch = null;
   state.downloadSelection = DOWNLOAD_ALL_VALUE;
   state.selectedTargetTab = '';
+  renderBatchQueue();
   renderResults();
 
   try {
     const target = elements.target.value;
+    const hitSettings = getHitSettings();
+    const preserveOriginalId = elements.preserveOriginalId.checked;
+    const batchFiles = Array.from(elements.fastaFile.files || []);
+    if (batchFiles.length > 1) {
+      await runBatch(batchFiles, { target, hitSettings, preserveOriginalId });
+      return;
+    }
 
-    const { text: fastaText, name } = await readInputFasta();
-    if (!fastaText.trim()) throw new Error('FASTA input is empty.');
+    const { bytes: fastaBytes, name } = await readInputFasta();
 
     const outputStem = makeSafeStem(elements.outputStem.value, makeSafeStem(name));
     const isolate = elements.isolate.value.trim() || outputStem;
-    const hitSettings = getHitSettings();
-    let result;
-    if (target === 'auto') {
-      const gff3ByTarget = {};
-      for (const autoTarget of AUTO_TARGETS) {
-        const reference = await getReferencePayload(autoTarget);
-        gff3ByTarget[autoTarget] = await miniprotManager.run({
-          genomeFasta: fastaText,
-          proteinFasta: reference.protein_fasta,
-          prefix: AUTO_PREFIXES[autoTarget] || 'MP',
-          intronOpenPenalty: 15,
-          bestN: hitSettings.maxSecondaryAlignments,
-          outputScoreRatio: hitSettings.outputScoreRatio,
-          secondaryToPrimaryRatio: hitSettings.secondaryToPrimaryRatio,
-          statusLabel: `Running Miniprot (${autoTarget})`
-        });
-      }
-      result = await runAutoGff3ToOutputs({
-        fastaText,
-        gff3ByTarget,
-        isolate,
-        outputStem,
-        preserveOriginalId: elements.preserveOriginalId.checked,
-        hitSettings
-      });
-      state.outputs = result.outputs || {};
-    } else {
-      const reference = await getReferencePayload(target);
-      const gff3Text = await miniprotManager.run({
-        genomeFasta: fastaText,
-        proteinFasta: reference.protein_fasta,
-        prefix: 'MP',
-        intronOpenPenalty: 15,
-        bestN: hitSettings.maxSecondaryAlignments,
-        outputScoreRatio: hitSettings.outputScoreRatio,
-        secondaryToPrimaryRatio: hitSettings.secondaryToPrimaryRatio
-      });
-      result = await runGff3ToOutputs({
-        fastaText,
-        gff3Text,
-        target,
-        isolate,
-        outputStem,
-        preserveOriginalId: elements.preserveOriginalId.checked,
-        hitSettings
-      });
-      state.outputs = result.outputs || {};
-    }
+    const scan = await scanWithCache({
+      fastaBytes,
+      target,
+      hitSettings,
+      annotateOptions: { isolate, outputStem, preserveOriginalId }
+    });
+    const result = await annotateWithCache({
+      fastaBytes,
+      target,
+      scan,
+      isolate,
+      outputStem,
+      preserveOriginalId,
+      hitSettings
+    });
+    state.outputs = result.outputs || {};
     state.resultSummary = result.summary || null;
     renderResults();
     if (!elements.logText.textContent) {
@@ -1125,6 +1366,12 @@ elements.form.addEventListener('submit', async (event) => {
     }
     setStatus('Completed');
   } catch (error) {
+    if (isCancelledError(error)) {
+      elements.logText.textContent = 'Run cancelled.';
+      renderResults();
+      setStatus('Cancelled');
+      return;
+    }
     const message = error?.message ? String(error.message) : String(error || 'Unknown error');
     elements.advancedRunDetails.hidden = false;
     elements.advancedRunBody.innerHTML = '';
@@ -1135,6 +1382,17 @@ elements.form.addEventListener('submit', async (event) => {
   }
 });
 
+elements.batchQueue?.addEventListener('click', (event) => {
+  const button = event.target.closest('button[data-batch-index]');
+  const item = state.batch?.items?.[Number(button?.dataset.batchIndex)];
+  if (!item?.summary) return;
+  state.resultSummary = item.summary;
+  state.selectedTargetTab = '';
+  renderResults();
+});
+
+elements.cancelButton?.addEventListener('click', cancelRun);
+
 elements.downloadButton.addEventListener('click', () => {
   try {
     downloadSelectedResult();
@@ -1195,7 +1453,10 @@ elements.fastaFile.addEventListener('change', () => {
 });
 
 elements.fastaText.addEventListener('input', markSampleInputDirty);
-elements.target.addEventListener('change', markSampleInputDirty);
+elements.target.addEventListener('change', () => {
+  markSampleInputDirty();
+  prefetchTargetData();
+});
 elements.outputStem.addEventListener('input', markSampleInputDirty);
 elements.isolate.addEventListener('input', markSampleInputDirty);
 elements.preserveOriginalId.addEventListener('change', markSampleInputDirty);
@@ -1207,3 +1468,4 @@ elements.target.value = 'IAV';
 setStatus('Idle');
 renderResults();
 renderSampleTabs();
+registerAssetCache();
@@ -0,0 +1,65 @@
+import { isCancelledError } from './worker-rpc.js';
+
+export const BATCH_STATUS_LABELS = {
+  queued: 'Queued',
+  scanning: 'Running Miniprot',
+  annotating: 'Annotating',
+  done: 'Done',
+  error: 'Error'
+};
+
+const errorMessage = (error) => {
+  const message = error?.message ? String(error.message) : String(error || 'Unknown error');
+  return message.trim().split('\n').pop() || message;
+};
+
+// Runs every item through scan -> annotate. The miniprot scan of the next
+// file overlaps with the Pyodide annotation of the current one, so both
+// worker types stay busy. A failing file is marked and skipped; cancellation
+// aborts the whole batch.
+export const runBatchPipeline = async ({ items, scan, annotate, onUpdate = () => {} }) => {
+  const update = (item, status, error = '') => {
+    item.status = status;
+    item.error = error;
+    onUpdate(item);
+  };
+  const startScan = (item) => {
+    update(item, 'scanning');
+    return scan(item).then((scanned) => ({ scanned }), (error) => ({ error }));
+  };
+
+  let nextScan = items.length ? startScan(items[0]) : null;
+  for (let index = 0; index < items.length; index += 1) {
+    const item = items[index];
+    const { scanned, error } = await nextScan;
+    nextScan = index + 1 < items.length ? startScan(items[index + 1]) : null;
+    if (error) {
+      if (isCancelledError(error)) throw error;
+      update(item, 'error', errorMessage(error));
+      continue;
+    }
+    update(item, 'annotating');
+    try {
+      item.result = await annotate(item, scanned);
+      update(item, 'done');
+    } catch (annotateError) {
+      if (isCancelledError(annotateError)) throw annotateError;
+      update(item, 'error', errorMessage(annotateError));
+    }
+  }
+  return items;
+};
+
+// Concatenates per-file TSV reports under one header, prefixed by a column
+// naming the source file.
+export const mergeTsvTables = (tables, column = 'input_file') => {
+  let header = null;
+  const rows = [];
+  tables.forEach(({ label, text }) => {
+    const lines = String(text || '').split(/\r?\n/).filter(Boolean);
+    if (!lines.length) return;
+    if (header === null) header = `${column}\t${lines[0]}`;
+    lines.slice(1).forEach((line) => rows.push(`${label}\t${line}`));
+  });
+  return header === null ? '' : `${[header, ...rows].join('\n')}\n`;
+};
@@ -0,0 +1,150 @@
+// Incremental FASTA checks shared by file and pasted input. The scanner sees
+// the bytes once, as they arrive, so malformed input fails before the rest of
+// a large file is read, and no JS string copy of the sequence is ever built.
+
+const GT = 0x3e;
+const LF = 0x0a;
+const CR = 0x0d;
+const UTF8_BOM = [0xef, 0xbb, 0xbf];
+const MAX_HEADER_BYTES = 64 * 1024;
+
+const isSpace = (byte) => byte === 0x20 || (byte >= 0x09 && byte <= 0x0d);
+
+const headerDecoder = new TextDecoder();
+
+// Mirrors Bio.SeqIO: the record ID is the header up to the first whitespace.
+const headerId = (bytes) => headerDecoder.decode(bytes).trim().split(/\s+/, 1)[0] || '';
+
+export const createFastaScanner = () => {
+  const firstRecordById = new Map();
+  let records = 0;
+  let residues = 0;
+  let bomOffset = 0;
+  let seenContent = false;
+  let atLineStart = true;
+  let header = null;
+  let headerLength = 0;
+
+  const finishHeader = () => {
+    const bytes = new Uint8Array(headerLength);
+    let position = 0;
+    header.forEach((part) => {
+      bytes.set(part, position);
+      position += part.length;
+    });
+    header = null;
+    headerLength = 0;
+    records += 1;
+    const id = headerId(bytes);
+    if (!id) throw new Error(`FASTA record ${records} has an empty ID.`);
+    if (firstRecordById.has(id)) {
+      throw new Error(
+        `Input FASTA contains duplicate record IDs: '${id}' (records ${firstRecordById.get(id)} and ${records}).`
+      );
+    }
+    firstRecordById.set(id, records);
+  };
+
+  const appendHeader = (chunk, start, end) => {
+    headerLength += end - start;
+    if (headerLength > MAX_HEADER_BYTES) {
+      throw new Error(`FASTA header of record ${records + 1} is longer than ${MAX_HEADER_BYTES} bytes.`);
+    }
+    if (end > start) header.push(chunk.slice(start, end));
+  };
+
+  const push = (chunk) => {
+    let index = 0;
+    // Skip a UTF-8 BOM at the very start of the input, even across chunks.
+    while (bomOffset < UTF8_BOM.length && index < chunk.length) {
+      if (chunk[index] !== UTF8_BOM[bomOffset]) {
+        bomOffset = UTF8_BOM.length;
+        break;
+      }
+      index += 1;
+      bomOffset += 1;
+    }
+    while (index < chunk.length) {
+      if (header) {
+        const newline = chunk.indexOf(LF, index);
+        const end = newline === -1 ? chunk.length : newline;
+        appendHeader(chunk, index, end);
+        if (newline === -1) return;
+        finishHeader();
+        atLineStart = true;
+        index = newline + 1;
+        continue;
+      }
+      const byte = chunk[index];
+      if (atLineStart && byte === GT) {
+        seenContent = true;
+        header = [];
+        index += 1;
+        continue;
+      }
+      if (byte === LF || byte === CR) {
+        atLineStart = byte === LF;
+      } else if (!isSpace(byte)) {
+        if (!seenContent) throw new Error("FASTA input must start with a '>' header line.");
+        residues += 1;
+        atLineStart = false;
+      }
+      index += 1;
+    }
+  };
+
+  const finish = () => {
+    if (header) finishHeader();
+    return { records, residues };
+  };
+
+  return {
+    push,
+    finish,
+    get records() {
+      return records;
+    },
+    get residues() {
+      return residues;
+    }
+  };
+};
+
+const skipBom = (bytes) => (
+  bytes[0] === UTF8_BOM[0] && bytes[1] === UTF8_BOM[1] && bytes[2] === UTF8_BOM[2] ? bytes.subarray(3) : bytes
+);
+
+export const scanFastaBytes = (bytes) => {
+  const scanner = createFastaScanner();
+  scanner.push(bytes);
+  return { bytes: skipBom(bytes), ...scanner.finish() };
+};
+
+// Reads a File through File.stream() into one preallocated buffer while the
+// scanner validates each chunk. Peak memory is the file size plus one chunk,
+// and the returned bytes can be transferred to a worker without copying.
+export const readFastaStream = async (file, { onProgress = () => {} } = {}) => {
+  const total = file.size;
+  const buffer = new Uint8Array(total);
+  const scanner = createFastaScanner();
+  const reader = file.stream().getReader();
+  let loaded = 0;
+  try {
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      if (loaded + value.length > total) {
+        throw new Error(`${file.name} changed while it was being read.`);
+      }
+      scanner.push(value);
+      buffer.set(value, loaded);
+      loaded += value.length;
+      onProgress({ loaded, total, records: scanner.records });
+    }
+  } catch (error) {
+    reader.cancel().catch(() => {});
+    throw error;
+  }
+  const counts = scanner.finish();
+  return { bytes: skipBom(buffer.subarray(0, loaded)), ...counts };
+};
@@ -0,0 +1,31 @@
+import { createGanfluMiniprot } from '../../wasm/miniprot/miniprot-ganflu.js';
+import { serveWorkerMethods, withTransfer } from './worker-rpc.js';
+
+let runtimePromise = null;
+
+const getRuntime = (postStatus) => {
+  if (!runtimePromise) {
+    postStatus('Loading Miniprot WebAssembly');
+    runtimePromise = createGanfluMiniprot().then((runtime) => {
+      postStatus('Miniprot ready');
+      return runtime;
+    }).catch((error) => {
+      runtimePromise = null;
+      throw error;
+    });
+  }
+  return runtimePromise;
+};
+
+serveWorkerMethods({
+  init: async (_params, { postStatus }) => {
+    await getRuntime(postStatus);
+    return true;
+  },
+
+  run: async (options, { postStatus }) => {
+    const runtime = await getRuntime(postStatus);
+    const gff3Bytes = runtime.run({ ...options, returnBytes: true });
+    return withTransfer(gff3Bytes, [gff3Bytes.buffer]);
+  }
+});
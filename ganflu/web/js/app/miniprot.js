@@ -1,17 +1,52 @@
-import { createGanfluMiniprot } from '../../wasm/miniprot/miniprot-ganflu.js';
+import { createCancelledError, createWorkerClient } from './worker-rpc.js';
 
-export const createMiniprotManager = ({ onStatus = () => {} } = {}) => {
-  let runtimePromise = null;
+// One worker per core, but never more than there are jobs to run at once.
+export const getMiniprotPoolSize = (maxJobs = Infinity) => {
+  const cores = Number(globalThis.navigator?.hardwareConcurrency) || 1;
+  return Math.max(1, Math.min(cores, maxJobs));
+};
+
+export const createMiniprotManager = ({ onStatus = () => {}, poolSize = 1 } = {}) => {
+  const clients = [];
+  const idle = [];
+  const waiting = [];
+
+  const createClient = () => {
+    const client = createWorkerClient({
+      url: new URL('./miniprot-worker.js', import.meta.url),
+      name: `ganflu-miniprot-${clients.length + 1}`,
+      onStatus
+    });
+    clients.push(client);
+    return client;
+  };
+
+  const acquire = () => new Promise((resolve, reject) => {
+    if (idle.length) {
+      resolve(idle.pop());
+    } else if (clients.length < poolSize) {
+      resolve(createClient());
+    } else {
+      waiting.push({ resolve, reject });
+    }
+  });
+
+  const release = (client) => {
+    const next = waiting.shift();
+    if (next) {
+      next.resolve(client);
+    } else {
+      idle.push(client);
+    }
+  };
 
   const init = async () => {
-    if (runtimePromise) return runtimePromise;
-    runtimePromise = (async () => {
-      onStatus('Loading Miniprot WebAssembly');
-      const runtime = await createGanfluMiniprot();
-      onStatus('Miniprot ready');
-      return runtime;
-    })();
-    return runtimePromise;
+    const client = await acquire();
+    try {
+      await client.call('init');
+    } finally {
+      release(client);
+    }
   };
 
   const run = async ({
@@ -24,21 +59,32 @@ export const createMiniprotManager = ({ onStatus = () => {} } = {}) => {
     secondaryToPrimaryRatio = 0.1,
     statusLabel = 'Running Miniprot'
   }) => {
-    const runtime = await init();
-    onStatus(statusLabel);
-    return runtime.run({
-      genomeFasta,
-      proteinFasta,
-      prefix,
-      intronOpenPenalty,
-      bestN,
-      outputScoreRatio,
-      secondaryToPrimaryRatio
-    });
+    const client = await acquire();
+    try {
+      await client.call('init');
+      onStatus(statusLabel);
+      return await client.call('run', {
+        genomeFasta,
+        proteinFasta,
+        prefix,
+        intronOpenPenalty,
+        bestN,
+        outputScoreRatio,
+        secondaryToPrimaryRatio
+      });
+    } finally {
+      release(client);
+    }
+  };
+
+  const cancel = () => {
+    waiting.splice(0).forEach(({ reject }) => reject(createCancelledError()));
+    clients.forEach((client) => client.terminate());
   };
 
   return {
     init,
-    run
+    run,
+    cancel
   };
 };
@@ -0,0 +1,145 @@
+import { createCancelledError } from './worker-rpc.js';
+
+// `ganflu gui` exposes api/health, api/scan and api/annotate when the local
+// miniprot binary is available. Static hosting has none of them (or answers
+// with the SPA page), so anything other than a native health report means
+// "use WebAssembly and Pyodide".
+const HEALTH_PATH = 'api/health';
+const SCAN_PATH = 'api/scan';
+const ANNOTATE_PATH = 'api/annotate';
+
+const apiUrl = (path) => new URL(path, window.location.href);
+
+export const detectNativeBackend = async () => {
+  if (!/^https?:$/.test(window.location.protocol)) return null;
+  try {
+    const response = await fetch(apiUrl(HEALTH_PATH), { cache: 'no-store' });
+    if (!response.ok || !String(response.headers.get('Content-Type') || '').includes('json')) {
+      return null;
+    }
+    const health = await response.json();
+    return health?.backend === 'native' ? health : null;
+  } catch (error) {
+    return null;
+  }
+};
+
+// Native failures carry either a message or, from the annotate helpers, an
+// error object with the Python traceback, the same as the Pyodide worker.
+const responseError = (payload, fallback) => {
+  const error = payload.error;
+  if (error && typeof error === 'object') return error.traceback || error.message || fallback;
+  return error || fallback;
+};
+
+export const createNativeBackendClient = ({ onStatus = () => {} } = {}) => {
+  let detected = null;
+  const controllers = new Set();
+  const encoder = new TextEncoder();
+  const decoder = new TextDecoder();
+
+  const detect = () => {
+    if (!detected) detected = detectNativeBackend();
+    return detected;
+  };
+
+  const post = async (url, init, { failure, cancelled }) => {
+    const controller = new AbortController();
+    controllers.add(controller);
+    try {
+      const response = await fetch(url, { ...init, method: 'POST', signal: controller.signal });
+      const payload = await response.json().catch(() => ({}));
+      if (!response.ok) {
+        throw new Error(responseError(payload, `${failure} (${response.status})`));
+      }
+      return payload;
+    } catch (error) {
+      if (controller.signal.aborted) throw createCancelledError(cancelled);
+      throw error;
+    } finally {
+      controllers.delete(controller);
+    }
+  };
+
+  // Returns {target: Uint8Array} with the scan GFF3 for every requested target.
+  const scan = async ({
+    fastaBytes,
+    targets,
+    prefix = '',
+    bestN,
+    outputScoreRatio,
+    secondaryToPrimaryRatio,
+    statusLabel = 'Running native Miniprot'
+  }) => {
+    const health = await detect();
+    if (!health) throw new Error('Native Miniprot backend is not available');
+    const url = apiUrl(SCAN_PATH);
+    url.searchParams.set('targets', targets.join(','));
+    if (prefix) url.searchParams.set('prefix', prefix);
+    if (bestN !== undefined) url.searchParams.set('max_secondary_alignments', String(bestN));
+    if (outputScoreRatio !== undefined) url.searchParams.set('output_score_ratio', String(outputScoreRatio));
+    if (secondaryToPrimaryRatio !== undefined) {
+      url.searchParams.set('secondary_to_primary_ratio', String(secondaryToPrimaryRatio));
+    }
+
+    onStatus(`${statusLabel} (${health.threads} threads)`);
+    const payload = await post(
+      url,
+      { headers: { 'Content-Type': 'text/plain' }, body: fastaBytes },
+      { failure: 'Native Miniprot failed', cancelled: 'Native Miniprot scan was cancelled' }
+    );
+    return Object.fromEntries(
+      Object.entries(payload.gff3 || {}).map(([target, text]) => [target, encoder.encode(text)])
+    );
+  };
+
+  // Same result shape as the Pyodide worker: {summary, log, outputs: {name: Uint8Array}}.
+  const annotate = async ({
+    fastaBytes,
+    target,
+    gff3Bytes,
+    gff3ByTarget,
+    isolate,
+    outputStem,
+    preserveOriginalId,
+    hitSettings,
+    statusLabel = 'Annotating natively'
+  }) => {
+    if (!(await detect())) throw new Error('Native annotation backend is not available');
+    const scans = target === 'auto' ? gff3ByTarget : { [target]: gff3Bytes };
+    onStatus(statusLabel);
+    const payload = await post(
+      apiUrl(ANNOTATE_PATH),
+      {
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          target,
+          fasta: decoder.decode(fastaBytes),
+          gff3: Object.fromEntries(
+            Object.entries(scans || {}).map(([scanTarget, bytes]) => [scanTarget, decoder.decode(bytes)])
+          ),
+          isolate,
+          output_stem: outputStem,
+          preserve_original_id: Boolean(preserveOriginalId),
+          hit_settings: hitSettings || {}
+        })
+      },
+      { failure: 'Native annotation failed', cancelled: 'Native annotation was cancelled' }
+    );
+    return {
+      summary: payload.summary,
+      log: payload.log,
+      outputs: Object.fromEntries(
+        Object.entries(payload.outputs || {}).map(([name, text]) => [name, encoder.encode(text)])
+      )
+    };
+  };
+
+  // The server finishes any request already running; the page stops waiting.
+  const cancel = () => {
+    controllers.forEach((controller) => controller.abort());
+    controllers.clear();
+  };
+
+  return { detect, scan, annotate, cancel };
+};
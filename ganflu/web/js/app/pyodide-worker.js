@@ -0,0 +1,228 @@
+import {
+  GANFLU_DB_ARCHIVE_DIR,
+  GANFLU_WHEEL_NAME,
+  PYODIDE_INDEX_URL,
+  PYODIDE_LOCAL_WHEELS
+} from '../config.js';
+import { serveWorkerMethods, withTransfer } from './worker-rpc.js';
+
+let pyodidePromise = null;
+let baseUrl = self.location.href;
+let ganfluPackageDir = null;
+const targetDataPromises = new Map();
+
+const resolveAssetUrl = (path) => new URL(path, baseUrl).toString();
+
+const ensureAsset = async (path, label) => {
+  const url = resolveAssetUrl(path);
+  const response = await fetch(url, { method: 'HEAD', cache: 'no-store' });
+  if (!response.ok) {
+    throw new Error(`Missing packaged asset: ${label} (${response.status})`);
+  }
+  return url;
+};
+
+const formatKiB = (bytes) => `${(bytes / 1024).toFixed(1)} KiB`;
+
+// Logs how long each component took to install, so slow ones stand out.
+const timed = async (label, task) => {
+  const started = performance.now();
+  const size = await task();
+  const elapsed = Math.round(performance.now() - started);
+  const detail = typeof size === 'number' ? ` (${formatKiB(size)})` : '';
+  console.info(`ganflu: installed ${label}${detail} in ${elapsed} ms`);
+};
+
+const fetchAsset = async (path) => {
+  const response = await fetch(resolveAssetUrl(path));
+  if (!response.ok) {
+    throw new Error(`Missing packaged asset: ${path} (${response.status})`);
+  }
+  return response.arrayBuffer();
+};
+
+const loadRuntime = async (postStatus) => {
+  postStatus('Loading Python runtime');
+  const pyodideIndexUrl = resolveAssetUrl(PYODIDE_INDEX_URL);
+  const { loadPyodide } = await import(new URL('pyodide.mjs', pyodideIndexUrl).toString());
+  const pyodide = await loadPyodide({
+    indexURL: pyodideIndexUrl,
+    packageBaseUrl: pyodideIndexUrl
+  });
+
+  postStatus('Loading Python installer');
+  await timed('micropip', () => pyodide.loadPackage('micropip'));
+  const micropip = pyodide.pyimport('micropip');
+
+  postStatus('Installing Python dependencies');
+  const dependencyUrls = await Promise.all(
+    PYODIDE_LOCAL_WHEELS.map((path) => ensureAsset(path, path))
+  );
+  await timed('Python dependencies', () => micropip.install(dependencyUrls));
+
+  postStatus('Installing ganflu');
+  const wheelUrl = await ensureAsset(GANFLU_WHEEL_NAME, GANFLU_WHEEL_NAME);
+  pyodide.globals.set('GANFLU_BROWSER_WHEEL_URL', wheelUrl);
+  try {
+    await timed(GANFLU_WHEEL_NAME, () => pyodide.runPythonAsync(`
+import micropip
+await micropip.install(GANFLU_BROWSER_WHEEL_URL, deps=False)
+`));
+  } finally {
+    pyodide.globals.delete('GANFLU_BROWSER_WHEEL_URL');
+  }
+  // The wheel ships bytecode for the Pyodide Python, so this import does not
+  // compile anything in the browser.
+  await timed('ganflu.web_helpers import', () => {
+    pyodide.runPython('from ganflu import web_helpers');
+  });
+  ganfluPackageDir = pyodide.runPython('import os, ganflu; os.path.dirname(ganflu.__file__)');
+  postStatus('Python ready');
+  return pyodide;
+};
+
+const getPyodide = (postStatus) => {
+  if (!pyodidePromise) {
+    pyodidePromise = loadRuntime(postStatus).catch((error) => {
+      pyodidePromise = null;
+      throw error;
+    });
+  }
+  return pyodidePromise;
+};
+
+// The wheel carries no reference data; db/<target> is unpacked into the
+// installed package the first time a run uses that target.
+const ensureTargetData = (pyodide, targets, postStatus) => Promise.all(targets.map((target) => {
+  if (!targetDataPromises.has(target)) {
+    const pending = timed(`${target} reference data`, async () => {
+      postStatus(`Loading ${target} reference data`);
+      const archive = await fetchAsset(`${GANFLU_DB_ARCHIVE_DIR}${target}.zip`);
+      pyodide.unpackArchive(archive, 'zip', { extractDir: ganfluPackageDir });
+      return archive.byteLength;
+    });
+    pending.catch(() => targetDataPromises.delete(target));
+    targetDataPromises.set(target, pending);
+  }
+  return targetDataPromises.get(target);
+}));
+
+const INPUT_DIR = '/tmp/ganflu-web-input';
+
+const runJson = (pyodide, globals, code) => {
+  Object.entries(globals).forEach(([key, value]) => pyodide.globals.set(key, value));
+  try {
+    return JSON.parse(pyodide.runPython(code));
+  } finally {
+    Object.keys(globals).forEach((key) => pyodide.globals.delete(key));
+  }
+};
+
+const resetInputDir = (pyodide) => {
+  pyodide.FS.mkdirTree(INPUT_DIR);
+  pyodide.FS.readdir(INPUT_DIR)
+    .filter((name) => name !== '.' && name !== '..')
+    .forEach((name) => pyodide.FS.unlink(`${INPUT_DIR}/${name}`));
+};
+
+// Payloads arrive as transferred bytes and go straight into MEMFS; Python
+// reads them by path instead of receiving JS strings.
+const writeInput = (pyodide, name, bytes) => {
+  const path = `${INPUT_DIR}/${name}`;
+  pyodide.FS.writeFile(path, bytes);
+  return path;
+};
+
+const collectOutputs = (pyodide, result) => {
+  if (result.error) return result;
+  const outputs = {};
+  const transfer = [];
+  Object.entries(result.output_paths || {}).forEach(([name, path]) => {
+    const bytes = pyodide.FS.readFile(path);
+    outputs[name] = bytes;
+    transfer.push(bytes.buffer);
+  });
+  return withTransfer({ summary: result.summary, log: result.log, outputs }, transfer);
+};
+
+serveWorkerMethods({
+  init: async (params, { postStatus }) => {
+    if (params.baseUrl) baseUrl = params.baseUrl;
+    await getPyodide(postStatus);
+    return true;
+  },
+
+  loadTargetData: async ({ targets }, { postStatus }) => {
+    const pyodide = await getPyodide(postStatus);
+    await ensureTargetData(pyodide, targets, postStatus);
+    return true;
+  },
+
+  getReferencePayload: async ({ target }, { postStatus }) => {
+    const pyodide = await getPyodide(postStatus);
+    await ensureTargetData(pyodide, [target], postStatus);
+    return runJson(pyodide, { GANFLU_TARGET: target }, 'web_helpers.get_ganflu_reference_json(GANFLU_TARGET)');
+  },
+
+  runGff3ToOutputs: async ({
+    fastaBytes,
+    gff3Bytes,
+    target,
+    isolate,
+    outputStem,
+    preserveOriginalId,
+    hitSettings
+  }, { postStatus }) => {
+    const pyodide = await getPyodide(postStatus);
+    await ensureTargetData(pyodide, [target], postStatus);
+    postStatus('Converting GFF3 to GenBank');
+    resetInputDir(pyodide);
+    const result = runJson(
+      pyodide,
+      {
+        GANFLU_INPUT_PATH: writeInput(pyodide, 'input.fasta', fastaBytes),
+        GANFLU_GFF3_PATH: writeInput(pyodide, 'scan.gff3', gff3Bytes),
+        GANFLU_TARGET: target,
+        GANFLU_ISOLATE: isolate,
+        GANFLU_OUTPUT_STEM: outputStem,
+        GANFLU_PRESERVE_ORIGINAL_ID: Boolean(preserveOriginalId),
+        GANFLU_HIT_SETTINGS_JSON: JSON.stringify(hitSettings || {})
+      },
+      'web_helpers.run_ganflu_web_files(GANFLU_INPUT_PATH, GANFLU_GFF3_PATH, GANFLU_TARGET, GANFLU_ISOLATE, GANFLU_OUTPUT_STEM, GANFLU_PRESERVE_ORIGINAL_ID, GANFLU_HIT_SETTINGS_JSON)'
+    );
+    return collectOutputs(pyodide, result);
+  },
+
+  runAutoGff3ToOutputs: async ({
+    fastaBytes,
+    gff3ByTarget,
+    isolate,
+    outputStem,
+    preserveOriginalId,
+    hitSettings
+  }, { postStatus }) => {
+    const pyodide = await getPyodide(postStatus);
+    await ensureTargetData(pyodide, Object.keys(gff3ByTarget), postStatus);
+    postStatus('Classifying contigs');
+    resetInputDir(pyodide);
+    const gff3Paths = Object.fromEntries(
+      Object.entries(gff3ByTarget).map(([target, bytes]) => [
+        target,
+        writeInput(pyodide, `${target}.scan.gff3`, bytes)
+      ])
+    );
+    const result = runJson(
+      pyodide,
+      {
+        GANFLU_INPUT_PATH: writeInput(pyodide, 'input.fasta', fastaBytes),
+        GANFLU_AUTO_GFF3_PATHS_JSON: JSON.stringify(gff3Paths),
+        GANFLU_ISOLATE: isolate,
+        GANFLU_OUTPUT_STEM: outputStem,
+        GANFLU_PRESERVE_ORIGINAL_ID: Boolean(preserveOriginalId),
+        GANFLU_HIT_SETTINGS_JSON: JSON.stringify(hitSettings || {})
+      },
+      'web_helpers.run_ganflu_auto_web_files(GANFLU_INPUT_PATH, GANFLU_AUTO_GFF3_PATHS_JSON, GANFLU_ISOLATE, GANFLU_OUTPUT_STEM, GANFLU_PRESERVE_ORIGINAL_ID, GANFLU_HIT_SETTINGS_JSON)'
+    );
+    return collectOutputs(pyodide, result);
+  }
+});
@@ -1,67 +1,42 @@
-import {
-  GANFLU_WHEEL_NAME,
-  PYODIDE_INDEX_URL,
-  PYODIDE_LOCAL_WHEELS
-} from '../config.js';
-import { PYTHON_HELPERS } from './python-helpers.js';
-
-const resolveAssetUrl = (path) => new URL(path, window.location.href).toString();
-
-const ensureAsset = async (path, label) => {
-  const url = resolveAssetUrl(path);
-  const response = await fetch(url, { method: 'HEAD', cache: 'no-store' });
-  if (!response.ok) {
-    throw new Error(`Missing packaged asset: ${label} (${response.status})`);
-  }
-  return url;
-};
+import { createWorkerClient } from './worker-rpc.js';
 
 export const createPyodideManager = ({ onStatus = () => {} } = {}) => {
-  let pyodidePromise = null;
-  let pyodide = null;
-
-  const init = async () => {
-    if (pyodidePromise) return pyodidePromise;
-    pyodidePromise = (async () => {
-      onStatus('Loading Python runtime');
-      const pyodideIndexUrl = resolveAssetUrl(PYODIDE_INDEX_URL);
-      pyodide = await loadPyodide({
-        indexURL: pyodideIndexUrl,
-        packageBaseUrl: pyodideIndexUrl
+  const client = createWorkerClient({
+    url: new URL('./pyodide-worker.js', import.meta.url),
+    name: 'ganflu-pyodide',
+    onStatus
+  });
+  let initPromise = null;
+
+  const init = () => {
+    if (!initPromise) {
+      initPromise = client.call('init', { baseUrl: window.location.href }).catch((error) => {
+        initPromise = null;
+        throw error;
       });
+    }
+    return initPromise;
+  };
 
-      onStatus('Loading Python installer');
-      await pyodide.loadPackage('micropip');
-      const micropip = pyodide.pyimport('micropip');
-
-      onStatus('Installing Python dependencies');
-      const dependencyUrls = await Promise.all(
-        PYODIDE_LOCAL_WHEELS.map((path) => ensureAsset(path, path))
-      );
-      await micropip.install(dependencyUrls);
-
-      onStatus('Installing ganflu');
-      const wheelUrl = await ensureAsset(GANFLU_WHEEL_NAME, GANFLU_WHEEL_NAME);
-      pyodide.globals.set('GANFLU_BROWSER_WHEEL_URL', wheelUrl);
-      try {
-        await pyodide.runPythonAsync(`
-import micropip
-await micropip.install(GANFLU_BROWSER_WHEEL_URL, deps=False)
-`);
-      } finally {
-        pyodide.globals.delete('GANFLU_BROWSER_WHEEL_URL');
-      }
-      await pyodide.runPythonAsync(PYTHON_HELPERS);
-      onStatus('Python ready');
-      return pyodide;
-    })();
-    return pyodidePromise;
+  const call = async (method, params, transfer = []) => {
+    await init();
+    return client.call(method, params, transfer);
   };
 
-  const getPyodide = () => pyodide;
+  // Pyodide cannot be interrupted from the page without cross-origin
+  // isolation, so cancelling drops the worker and the next run reloads it.
+  const cancel = () => {
+    initPromise = null;
+    client.terminate();
+  };
 
   return {
     init,
-    getPyodide
+    // Prefetches reference data once the runtime is loading; never starts it.
+    loadTargetData: (targets) => (initPromise ? call('loadTargetData', { targets }) : Promise.resolve(false)),
+    getReferencePayload: (target) => call('getReferencePayload', { target }),
+    runGff3ToOutputs: (params, transfer) => call('runGff3ToOutputs', params, transfer),
+    runAutoGff3ToOutputs: (params, transfer) => call('runAutoGff3ToOutputs', params, transfer),
+    cancel
   };
 };
@@ -0,0 +1,157 @@
+// Best-effort IndexedDB cache for Miniprot scans and annotation results.
+// Entries are keyed by content hashes and evicted least-recently-used first
+// once their estimated size exceeds the budget. Any IndexedDB failure
+// (private browsing, quota, blocked upgrade) degrades to a cache miss.
+
+const DB_NAME = 'ganflu-results';
+const DB_VERSION = 1;
+const STORE_NAME = 'entries';
+const LAST_USED_INDEX = 'lastUsed';
+export const RESULT_CACHE_MAX_BYTES = 200 * 1024 * 1024;
+
+const keyEncoder = new TextEncoder();
+
+const toHex = (buffer) => Array.from(new Uint8Array(buffer))
+  .map((byte) => byte.toString(16).padStart(2, '0'))
+  .join('');
+
+export const sha256Hex = async (bytes) => toHex(await crypto.subtle.digest('SHA-256', bytes));
+
+// Object keys are sorted so equal settings always produce the same key.
+const stableStringify = (value) => {
+  if (Array.isArray(value)) return `[${value.map(stableStringify).join(',')}]`;
+  if (value && typeof value === 'object') {
+    return `{${Object.keys(value).sort()
+      .map((key) => `${JSON.stringify(key)}:${stableStringify(value[key])}`)
+      .join(',')}}`;
+  }
+  return JSON.stringify(value ?? null);
+};
+
+export const makeCacheKey = (parts) => sha256Hex(keyEncoder.encode(stableStringify(parts)));
+
+export const estimateCacheSize = (value) => {
+  if (ArrayBuffer.isView(value)) return value.byteLength;
+  if (value instanceof ArrayBuffer) return value.byteLength;
+  if (typeof value === 'string') return value.length * 2;
+  if (Array.isArray(value)) return value.reduce((total, item) => total + estimateCacheSize(item), 0);
+  if (value && typeof value === 'object') {
+    return Object.entries(value).reduce(
+      (total, [key, item]) => total + key.length * 2 + estimateCacheSize(item),
+      0
+    );
+  }
+  return 8;
+};
+
+const requestResult = (request) => new Promise((resolve, reject) => {
+  request.onsuccess = () => resolve(request.result);
+  request.onerror = () => reject(request.error);
+});
+
+const transactionDone = (transaction) => new Promise((resolve, reject) => {
+  transaction.oncomplete = () => resolve();
+  transaction.onerror = () => reject(transaction.error);
+  transaction.onabort = () => reject(transaction.error);
+});
+
+export const createResultCache = ({ maxBytes = RESULT_CACHE_MAX_BYTES, indexedDB = globalThis.indexedDB } = {}) => {
+  let dbPromise = null;
+
+  const openDb = () => {
+    if (!dbPromise) {
+      dbPromise = new Promise((resolve) => {
+        if (!indexedDB) {
+          resolve(null);
+          return;
+        }
+        const request = indexedDB.open(DB_NAME, DB_VERSION);
+        request.onupgradeneeded = () => {
+          const store = request.result.createObjectStore(STORE_NAME, { keyPath: 'key' });
+          store.createIndex(LAST_USED_INDEX, LAST_USED_INDEX);
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => resolve(null);
+        request.onblocked = () => resolve(null);
+      }).catch(() => null);
+    }
+    return dbPromise;
+  };
+
+  const warn = (error) => console.warn('ganflu result cache:', error);
+
+  const get = async (key) => {
+    try {
+      const db = await openDb();
+      if (!db) return null;
+      const transaction = db.transaction(STORE_NAME, 'readwrite');
+      const store = transaction.objectStore(STORE_NAME);
+      const entry = await requestResult(store.get(key));
+      if (!entry) return null;
+      entry.lastUsed = Date.now();
+      store.put(entry);
+      await transactionDone(transaction);
+      return entry.value;
+    } catch (error) {
+      warn(error);
+      return null;
+    }
+  };
+
+  // Walks entries newest first and deletes everything past the budget.
+  const evict = async (db) => {
+    const transaction = db.transaction(STORE_NAME, 'readwrite');
+    const cursorRequest = transaction.objectStore(STORE_NAME).index(LAST_USED_INDEX).openCursor(null, 'prev');
+    let total = 0;
+    cursorRequest.onsuccess = () => {
+      const cursor = cursorRequest.result;
+      if (!cursor) return;
+      total += cursor.value.size || 0;
+      if (total > maxBytes) cursor.delete();
+      cursor.continue();
+    };
+    await transactionDone(transaction);
+  };
+
+  // The value is cloned before the first await, so callers may transfer or
+  // detach its buffers (e.g. to a worker) as soon as put() returns.
+  const put = (key, value) => {
+    let entry;
+    try {
+      const copy = structuredClone(value);
+      entry = { key, value: copy, size: estimateCacheSize(copy), lastUsed: Date.now() };
+    } catch (error) {
+      warn(error);
+      return Promise.resolve(false);
+    }
+    if (entry.size > maxBytes) return Promise.resolve(false);
+    return (async () => {
+      try {
+        const db = await openDb();
+        if (!db) return false;
+        const transaction = db.transaction(STORE_NAME, 'readwrite');
+        transaction.objectStore(STORE_NAME).put(entry);
+        await transactionDone(transaction);
+        await evict(db);
+        return true;
+      } catch (error) {
+        warn(error);
+        return false;
+      }
+    })();
+  };
+
+  const clear = async () => {
+    try {
+      const db = await openDb();
+      if (!db) return;
+      const transaction = db.transaction(STORE_NAME, 'readwrite');
+      transaction.objectStore(STORE_NAME).clear();
+      await transactionDone(transaction);
+    } catch (error) {
+      warn(error);
+    }
+  };
+
+  return { get, put, clear };
+};
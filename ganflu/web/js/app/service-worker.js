@@ -0,0 +1,15 @@
+import { ASSET_MANIFEST_VERSION } from '../config.js';
+
+export const registerAssetCache = async () => {
+  if (!ASSET_MANIFEST_VERSION || !('serviceWorker' in navigator) || !window.isSecureContext) {
+    return null;
+  }
+  const url = new URL('../../sw.js', import.meta.url);
+  url.searchParams.set('v', ASSET_MANIFEST_VERSION);
+  try {
+    return await navigator.serviceWorker.register(url, { updateViaCache: 'none' });
+  } catch (error) {
+    console.warn('ganflu asset cache is unavailable:', error);
+    return null;
+  }
+};
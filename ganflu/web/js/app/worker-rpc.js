@@ -0,0 +1,117 @@
+// Minimal request/response protocol between the page and ganflu workers.
+//
+// page -> worker: { id, type: 'call', method, params }
+// worker -> page: { type: 'status', message }
+//                 { id, type: 'result', value }
+//                 { id, type: 'error', error: { name, message, stack } }
+//
+// Handlers may return withTransfer(value, buffers) to move ArrayBuffers to
+// the page instead of copying them. Cancellation terminates the worker; the
+// next call starts a fresh one.
+
+export const CANCELLED_ERROR_NAME = 'GanfluCancelled';
+
+export const createCancelledError = (message = 'Run cancelled') => {
+  const error = new Error(message);
+  error.name = CANCELLED_ERROR_NAME;
+  return error;
+};
+
+export const isCancelledError = (error) => error?.name === CANCELLED_ERROR_NAME;
+
+const TRANSFER = Symbol('transfer');
+
+export const withTransfer = (value, transfer) => ({ [TRANSFER]: transfer, value });
+
+const toError = (payload = {}) => {
+  const error = new Error(payload.message || 'Worker call failed');
+  error.name = payload.name || 'Error';
+  if (payload.stack) error.stack = payload.stack;
+  return error;
+};
+
+export const createWorkerClient = ({ url, name, onStatus = () => {} }) => {
+  let worker = null;
+  let nextId = 1;
+  const pending = new Map();
+
+  const rejectPending = (error) => {
+    pending.forEach(({ reject }) => reject(error));
+    pending.clear();
+  };
+
+  const ensureWorker = () => {
+    if (worker) return worker;
+    worker = new Worker(url, { type: 'module', name });
+    worker.addEventListener('message', (event) => {
+      const message = event.data || {};
+      if (message.type === 'status') {
+        onStatus(message.message);
+        return;
+      }
+      const entry = pending.get(message.id);
+      if (!entry) return;
+      pending.delete(message.id);
+      if (message.type === 'result') {
+        entry.resolve(message.value);
+      } else {
+        entry.reject(toError(message.error));
+      }
+    });
+    worker.addEventListener('error', (event) => {
+      event.preventDefault();
+      worker?.terminate();
+      worker = null;
+      rejectPending(new Error(event.message || `${name} worker failed to start`));
+    });
+    return worker;
+  };
+
+  const call = (method, params = {}, transfer = []) => new Promise((resolve, reject) => {
+    const id = nextId;
+    nextId += 1;
+    pending.set(id, { resolve, reject });
+    ensureWorker().postMessage({ id, type: 'call', method, params }, transfer);
+  });
+
+  const terminate = (message) => {
+    if (worker) {
+      worker.terminate();
+      worker = null;
+    }
+    rejectPending(createCancelledError(message));
+  };
+
+  return {
+    call,
+    terminate
+  };
+};
+
+export const serveWorkerMethods = (methods) => {
+  const postStatus = (message) => self.postMessage({ type: 'status', message });
+  self.addEventListener('message', async (event) => {
+    const { id, type, method, params } = event.data || {};
+    if (type !== 'call') return;
+    try {
+      const handler = methods[method];
+      if (!handler) throw new Error(`Unknown worker method: ${method}`);
+      const result = await handler(params || {}, { postStatus });
+      if (result && result[TRANSFER]) {
+        self.postMessage({ id, type: 'result', value: result.value }, result[TRANSFER]);
+      } else {
+        self.postMessage({ id, type: 'result', value: result });
+      }
+    } catch (error) {
+      self.postMessage({
+        id,
+        type: 'error',
+        error: {
+          name: error?.name || 'Error',
+          message: error?.message ? String(error.message) : String(error),
+          stack: error?.stack || ''
+        }
+      });
+    }
+  });
+};
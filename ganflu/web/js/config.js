@@ -1,4 +1,8 @@
 export const GANFLU_WHEEL_NAME = "ganflu-0.1.0-py3-none-any.whl";
+// Per-target reference data (<target>.zip), fetched the first time a run needs it.
+export const GANFLU_DB_ARCHIVE_DIR = "./ganflu-db/";
+// Set by tools/prepare_browser_wheel.py; empty disables the Service Worker.
+export const ASSET_MANIFEST_VERSION = "f11cb76ade42fcd2";
 export const PYODIDE_INDEX_URL = "./vendor/pyodide/v0.29.0/full/";
 export const PYODIDE_LOCAL_WHEELS = [
   "./vendor/pyodide-wheels/numpy-2.2.5-cp313-cp313-pyodide_2025_0_wasm32.whl",
@@ -0,0 +1,114 @@
+// Precaches ganflu's versioned runtime assets and serves them from Cache
+// Storage. The asset list and content hashes come from asset-manifest.json,
+// written by tools/prepare_browser_wheel.py; the page registers this script
+// as sw.js?v=<manifest version>, so every manifest change installs a new
+// worker that only downloads assets whose hash changed.
+
+const CACHE_NAME = 'ganflu-assets';
+const HASH_PARAM = 'ganflu-hash';
+const MANIFEST_VERSION = new URL(self.location.href).searchParams.get('v') || '';
+const SCOPE_URL = new URL('./', self.location.href);
+const MANIFEST_URL = new URL('./asset-manifest.json', SCOPE_URL);
+const PRECACHED_PATH_RE = /^(ganflu-[^/]+\.whl|ganflu-db\/|vendor\/|wasm\/)/;
+
+const withParam = (url, key, value) => {
+  const result = new URL(url);
+  result.searchParams.set(key, value);
+  return result.href;
+};
+
+const MANIFEST_KEY = withParam(MANIFEST_URL, 'v', MANIFEST_VERSION);
+
+const toHex = (buffer) => Array.from(new Uint8Array(buffer))
+  .map((byte) => byte.toString(16).padStart(2, '0'))
+  .join('');
+
+const indexManifest = (manifest) => new Map(
+  Object.entries(manifest.assets || {}).map(([path, hash]) => {
+    const url = new URL(path, SCOPE_URL).href;
+    return [url, withParam(url, HASH_PARAM, hash)];
+  })
+);
+
+let manifestIndexPromise = null;
+
+const getManifestIndex = () => {
+  if (!manifestIndexPromise) {
+    manifestIndexPromise = caches.open(CACHE_NAME)
+      .then((cache) => cache.match(MANIFEST_KEY))
+      .then((response) => (response ? response.json() : { assets: {} }))
+      .then(indexManifest)
+      .catch(() => new Map());
+  }
+  return manifestIndexPromise;
+};
+
+const precacheAsset = async (cache, url, key, hash) => {
+  if (await cache.match(key)) return;
+  const response = await fetch(url, { cache: 'no-store' });
+  if (!response.ok) {
+    throw new Error(`Could not precache ${url} (${response.status})`);
+  }
+  const body = await response.arrayBuffer();
+  const digest = toHex(await crypto.subtle.digest('SHA-256', body)).slice(0, hash.length);
+  if (digest !== hash) {
+    throw new Error(`Content hash mismatch for ${url}`);
+  }
+  const headers = new Headers();
+  const contentType = response.headers.get('Content-Type');
+  if (contentType) headers.set('Content-Type', contentType);
+  await cache.put(key, new Response(body, { headers }));
+};
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    const response = await fetch(MANIFEST_URL, { cache: 'no-store' });
+    if (!response.ok) {
+      throw new Error(`Could not load ${MANIFEST_URL.pathname} (${response.status})`);
+    }
+    const manifest = await response.clone().json();
+    if (manifest.version !== MANIFEST_VERSION) {
+      throw new Error(`Asset manifest ${manifest.version} does not match ${MANIFEST_VERSION}`);
+    }
+    const cache = await caches.open(CACHE_NAME);
+    const index = indexManifest(manifest);
+    await Promise.all(
+      Object.entries(manifest.assets).map(([path, hash]) => {
+        const url = new URL(path, SCOPE_URL).href;
+        return precacheAsset(cache, url, index.get(url), hash);
+      })
+    );
+    await cache.put(MANIFEST_KEY, response);
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const index = await getManifestIndex();
+    const keep = new Set([MANIFEST_KEY, ...index.values()]);
+    const cache = await caches.open(CACHE_NAME);
+    const keys = await cache.keys();
+    await Promise.all(keys.filter((request) => !keep.has(request.url)).map((request) => cache.delete(request)));
+    await self.clients.claim();
+  })());
+});
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  if (request.method !== 'GET' && request.method !== 'HEAD') return;
+  const url = new URL(request.url);
+  if (url.origin !== SCOPE_URL.origin || !url.href.startsWith(SCOPE_URL.href)) return;
+  if (!PRECACHED_PATH_RE.test(url.href.slice(SCOPE_URL.href.length))) return;
+  url.search = '';
+  url.hash = '';
+
+  event.respondWith((async () => {
+    const key = (await getManifestIndex()).get(url.href);
+    const cached = key ? await (await caches.open(CACHE_NAME)).match(key) : undefined;
+    if (!cached) return fetch(request);
+    if (request.method === 'HEAD') {
+      return new Response(null, { status: 200, headers: cached.headers });
+    }
+    return cached;
+  })());
+});
@@ -17,12 +17,13 @@ const copyToWasm = (module, bytes) => {
   return { ptr, len: bytes.length };
 };
 
-const readWasmText = (module, ptr, len) => {
-  if (!ptr || !len) return '';
-  const bytes = new Uint8Array(module.HEAPU8.buffer, ptr, len).slice();
-  return decoder.decode(bytes);
+const readWasmBytes = (module, ptr, len) => {
+  if (!ptr || !len) return new Uint8Array(0);
+  return new Uint8Array(module.HEAPU8.buffer, ptr, len).slice();
 };
 
+const readWasmText = (module, ptr, len) => decoder.decode(readWasmBytes(module, ptr, len));
+
 const hasOwn = (object, key) => Object.prototype.hasOwnProperty.call(object, key);
 
 const pickOption = (options, keys, fallback) => {
@@ -46,7 +47,8 @@ export const createGanfluMiniprot = async (moduleOptions = {}) => {
     const {
       genomeFasta,
       proteinFasta,
-      prefix = 'MP'
+      prefix = 'MP',
+      returnBytes = false
     } = options;
     const intronOpenPenalty = toInteger(pickOption(options, ['intronOpenPenalty', 'J', '-J'], 15), 15);
     const bestN = toInteger(pickOption(options, ['bestN', 'N', '-N'], 30), 30);
@@ -81,11 +83,11 @@ export const createGanfluMiniprot = async (moduleOptions = {}) => {
       const len = exitCode === 0
         ? module._miniprot_ganflu_result_len()
         : module._miniprot_ganflu_error_len();
-      const text = readWasmText(module, ptr, len);
       if (exitCode !== 0) {
+        const text = readWasmText(module, ptr, len);
         throw new Error(text || `miniprot exited with code ${exitCode}`);
       }
-      return text;
+      return returnBytes ? readWasmBytes(module, ptr, len) : readWasmText(module, ptr, len);
     } finally {
       allocations.forEach(({ ptr, len }) => module._miniprot_web_dealloc(ptr, len));
       module._miniprot_ganflu_clear();
@@ -1,4 +1,16 @@
-export const PYTHON_HELPERS = `
+#!/usr/bin/env python
+# coding: utf-8
+"""Entry points used by the browser app's Pyodide worker.
+
+The worker imports this module from the ganflu wheel and calls
+``get_ganflu_reference_json``, ``run_ganflu_web_files`` and
+``run_ganflu_auto_web_files``. Results are returned as JSON strings. The
+module only needs the standard library, Biopython and ganflu, so the same
+code runs under regular CPython for tests and profiling.
+"""
+
+from __future__ import annotations
+
 import contextlib
 import glob
 import io
@@ -11,16 +23,20 @@ from collections import Counter, defaultdict
 from importlib import resources
 try:
     import tomllib
-except ModuleNotFoundError:
+except ModuleNotFoundError:  # pragma: no cover - Python 3.10 fallback
     tomllib = None
     import toml
 
 from Bio import SeqIO
 from ganflu.scripts import auto_mode, gff3togbk
 
+
 SUPPORTED_TARGETS = {"IAV", "IBV", "ICV", "IDV"}
+WEB_WORK_DIR = "/tmp/ganflu-web"
+WEB_INPUT_DIR = "/tmp/ganflu-web-input"
 AUTO_TARGETS = ("IAV", "IBV", "ICV", "IDV")
 STOP_CODONS = {"TAA", "TAG", "TGA"}
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 WEB_HIT_SETTING_DEFAULTS = {
     "min_identity": 0.70,
     "min_aa_coverage": 0.35,
@@ -42,19 +58,23 @@ WEB_HIT_SETTING_ALIASES = {
     "secondary_to_primary_ratio": ("secondary_to_primary_ratio", "secondaryToPrimaryRatio"),
 }
 
+
 def _safe_stem(value):
     value = str(value or "ganflu").strip()
     value = re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("._")
     return value or "ganflu"
 
+
 def _read_resource_text(path):
     return path.read_text(encoding="utf-8")
 
+
 def _load_toml_text(text):
     if tomllib is not None:
         return tomllib.loads(text)
     return toml.loads(text)
 
+
 def _load_hit_settings(value=None):
     if value is None:
         return {}
@@ -72,12 +92,14 @@ def _load_hit_settings(value=None):
         raise ValueError("Hit settings must be a JSON object.")
     return loaded
 
+
 def _raw_hit_setting(raw_settings, name):
     for key in WEB_HIT_SETTING_ALIASES[name]:
         if key in raw_settings and raw_settings[key] not in (None, ""):
             return raw_settings[key]
     return WEB_HIT_SETTING_DEFAULTS[name]
 
+
 def _coerce_float_setting(name, value, min_value=0.0, max_value=1.0):
     try:
         number = float(value)
@@ -87,6 +109,7 @@ def _coerce_float_setting(name, value, min_value=0.0, max_value=1.0):
         raise ValueError(f"{name.replace('_', ' ')} must be between {min_value} and {max_value}")
     return number
 
+
 def _coerce_int_setting(name, value, min_value=1):
     if isinstance(value, bool):
         raise ValueError(f"{name.replace('_', ' ')} must be a whole number")
@@ -101,6 +124,7 @@ def _coerce_int_setting(name, value, min_value=1):
         raise ValueError(f"{name.replace('_', ' ')} must be at least {min_value}")
     return integer
 
+
 def _normalize_hit_settings(value=None):
     raw_settings = _load_hit_settings(value)
     return {
@@ -114,6 +138,7 @@ def _normalize_hit_settings(value=None):
         "secondary_to_primary_ratio": _coerce_float_setting("secondary_to_primary_ratio", _raw_hit_setting(raw_settings, "secondary_to_primary_ratio")),
     }
 
+
 def _thresholds_from_hit_settings(settings):
     return auto_mode.AutoThresholds(
         min_identity=settings["min_identity"],
@@ -123,6 +148,7 @@ def _thresholds_from_hit_settings(settings):
         complete_aa_coverage=settings["complete_aa_coverage"],
     )
 
+
 def _miniprot_settings_for_summary(settings):
     return {
         "max_secondary_alignments": settings["max_secondary_alignments"],
@@ -130,9 +156,11 @@ def _miniprot_settings_for_summary(settings):
         "secondary_to_primary_ratio": settings["secondary_to_primary_ratio"],
     }
 
+
 def _resource_join(root, relative_path):
     return root.joinpath(*str(relative_path).split("/"))
 
+
 def get_ganflu_reference_json(target):
     target = str(target or "").upper()
     if target not in SUPPORTED_TARGETS:
@@ -151,8 +179,8 @@ def get_ganflu_reference_json(target):
     except Exception:
         return json.dumps({"error": traceback.format_exc()})
 
-def _count_genbank_outputs(gbk_path):
-    records = list(SeqIO.parse(gbk_path, "genbank"))
+
+def _count_genbank_outputs(records):
     cds_count = sum(1 for record in records for feature in record.features if feature.type == "CDS")
     return {
         "record_count": len(records),
@@ -160,6 +188,7 @@ def _count_genbank_outputs(gbk_path):
         "record_ids": [record.id for record in records],
     }
 
+
 def _fixed_target_output_segments(calls):
     accepted_segments = {}
     for call in calls:
@@ -168,30 +197,39 @@ def _fixed_target_output_segments(calls):
             accepted_segments[call.contig_id] = best.segment
     return accepted_segments
 
+
 def _join_log(stdout_buf, stderr_buf):
-    return chr(10).join(
+    return "\n".join(
         part for part in [stdout_buf.getvalue().strip(), stderr_buf.getvalue().strip()] if part
     )
 
-def _summary_parse_attributes(attributes):
-    if not attributes or attributes == ".":
-        return {}
-    parsed = {}
-    for item in str(attributes).split(";"):
-        if not item:
-            continue
-        if "=" not in item:
-            continue
-        key, value = item.split("=", 1)
-        parsed[key] = value
-    return parsed
-
-def _summary_parse_target(value):
-    parts = str(value or "").split()
-    product = parts[0] if parts else ""
-    start = int(parts[1]) if len(parts) > 1 else 1
-    end = int(parts[2]) if len(parts) > 2 else start
-    return product, start, end
+
+def _attach_log_capture(buffer):
+    """Copy INFO and above from the root logger into ``buffer`` for one run.
+
+    gff3togbk logs to the root logger, which has no handlers of its own in
+    Pyodide, so the run adds one and lowers the root level if needed.
+    """
+    root_logger = logging.getLogger()
+    handler = logging.StreamHandler(buffer)
+    handler.setLevel(logging.INFO)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    previous_level = root_logger.level
+    root_logger.addHandler(handler)
+    if root_logger.getEffectiveLevel() > logging.INFO:
+        root_logger.setLevel(logging.INFO)
+    return handler, previous_level
+
+
+def _detach_log_capture(log_capture):
+    if log_capture is None:
+        return
+    handler, previous_level = log_capture
+    root_logger = logging.getLogger()
+    root_logger.removeHandler(handler)
+    root_logger.setLevel(previous_level)
+    handler.close()
+
 
 def _summary_float(value, default=0.0):
     try:
@@ -201,21 +239,6 @@ def _summary_float(value, default=0.0):
     except (TypeError, ValueError):
         return default
 
-def _summary_int(value, default=0):
-    try:
-        if value in (None, "", "."):
-            return default
-        return int(value)
-    except (TypeError, ValueError):
-        return default
-
-def _parse_paf_tags(fields):
-    tags = {}
-    for field in fields:
-        parts = field.split(":", 2)
-        if len(parts) == 3:
-            tags[parts[0]] = parts[2]
-    return tags
 
 def _feature_metric_keys(product):
     product = str(product or "")
@@ -224,87 +247,42 @@ def _feature_metric_keys(product):
         keys.append(product.split("_", 1)[0])
     return [key for key in dict.fromkeys(keys) if key]
 
-def _reference_terminal_stop_map(target):
-    target = str(target or "").upper()
-    if target not in SUPPORTED_TARGETS:
-        return {}
-    target_root = resources.files("ganflu").joinpath("db", target)
-    toml_text = _read_resource_text(target_root.joinpath(f"{target}.toml"))
-    config = _load_toml_text(toml_text)
-    prot_text = _read_resource_text(_resource_join(target_root, config["metadata"]["prot_faa"]))
-    return {
-        record.id: str(record.seq).endswith("*")
-        for record in SeqIO.parse(io.StringIO(prot_text), "fasta")
-    }
 
-def _parse_gff3_feature_metrics(gff3_text, target=None):
-    paf_meta = {}
+def _feature_metrics_by_key(conversion, reference):
+    terminal_stops = reference.protein_terminal_stops if reference else {}
     metrics = defaultdict(list)
-    terminal_stops = _reference_terminal_stop_map(target)
-    for line in str(gff3_text or "").splitlines():
-        if not line.strip():
-            continue
-        if line.startswith(f"##PAF{chr(9)}"):
-            fields = line.split(chr(9))
-            if len(fields) < 7:
-                continue
-            try:
-                product = fields[1]
-                target_length = int(fields[2])
-                target_start = int(fields[3]) + 1
-                target_end = int(fields[4])
-                contig_id = fields[6]
-            except (TypeError, ValueError, IndexError):
-                continue
-            tags = _parse_paf_tags(fields[13:])
-            paf_meta[(contig_id, product, target_start, target_end)] = {
-                "target_length": target_length,
-                "raw_score": _summary_float(tags.get("AS")),
+    for seqid, hits in conversion.feature_metrics.items():
+        for hit in hits:
+            target_length = hit.target_length or hit.target_end
+            aa_coverage = 0.0
+            if target_length:
+                aa_coverage = max(0, hit.target_end - hit.target_start + 1) / target_length
+            target_range = f"{hit.target_start}-{hit.target_end}/{target_length}" if target_length else "-"
+            metric = {
+                "product": hit.product,
+                "reference": {
+                    "product": hit.product,
+                    "target_range": target_range,
+                    "target_start": hit.target_start,
+                    "target_end": hit.target_end,
+                    "target_length": target_length,
+                    "terminal_stop": terminal_stops.get(hit.product, False),
+                },
+                "metrics": {
+                    "identity": hit.identity,
+                    "aa_coverage": aa_coverage,
+                    "score": hit.identity * aa_coverage,
+                },
+                "query_range": f"{hit.start}-{hit.end}",
+                "target_range": target_range,
+                "strand": hit.strand or ".",
+                "raw_score": _summary_float(hit.score, hit.raw_score or 0.0),
             }
-            continue
-        if line.startswith("#"):
-            continue
-
-        columns = line.split(chr(9))
-        if len(columns) != 9:
-            continue
-        seqid, _, feature_type, start, end, score, strand, _, attributes = columns
-        attrs = _summary_parse_attributes(attributes)
-        if feature_type != "mRNA" or "Target" not in attrs:
-            continue
-
-        product, target_start, target_end = _summary_parse_target(attrs["Target"])
-        paf = paf_meta.get((seqid, product, target_start, target_end), {})
-        target_length = paf.get("target_length") or target_end
-        aa_coverage = 0.0
-        if target_length:
-            aa_coverage = max(0, target_end - target_start + 1) / target_length
-        identity = _summary_float(attrs.get("Identity"))
-        normalized_score = identity * aa_coverage
-        metric = {
-            "product": product,
-            "reference": {
-                "product": product,
-                "target_range": f"{target_start}-{target_end}/{target_length}" if target_length else "-",
-                "target_start": target_start,
-                "target_end": target_end,
-                "target_length": target_length,
-                "terminal_stop": terminal_stops.get(product, False),
-            },
-            "metrics": {
-                "identity": identity,
-                "aa_coverage": aa_coverage,
-                "score": normalized_score,
-            },
-            "query_range": f"{_summary_int(start)}-{_summary_int(end)}",
-            "target_range": f"{target_start}-{target_end}/{target_length}" if target_length else "-",
-            "strand": strand or ".",
-            "raw_score": _summary_float(score, paf.get("raw_score", 0.0)),
-        }
-        for key in _feature_metric_keys(product):
-            metrics[(seqid, key)].append(metric)
+            for key in _feature_metric_keys(hit.product):
+                metrics[(seqid, key)].append(metric)
     return metrics
 
+
 def _first_qualifier(feature, key, default=""):
     value = feature.qualifiers.get(key, default)
     if isinstance(value, list):
@@ -313,6 +291,7 @@ def _first_qualifier(feature, key, default=""):
         return default
     return value
 
+
 def _qualifier_list(feature, key):
     value = feature.qualifiers.get(key, [])
     if value in (None, ""):
@@ -321,6 +300,7 @@ def _qualifier_list(feature, key):
         return [str(item) for item in value if str(item)]
     return [str(value)]
 
+
 def _strand_symbol(strand):
     if strand == 1:
         return "+"
@@ -328,6 +308,7 @@ def _strand_symbol(strand):
         return "-"
     return "."
 
+
 def _feature_location_dict(feature):
     location = feature.location
     parts = list(getattr(location, "parts", [location]))
@@ -356,6 +337,7 @@ def _feature_location_dict(feature):
         "strand": _strand_symbol(strand),
     }
 
+
 def _feature_sequence_dict(record, feature):
     cds_nt = ""
     aa = ""
@@ -370,10 +352,12 @@ def _feature_sequence_dict(record, feature):
     aa = str(translation or "")
     return {"cds_nt": cds_nt, "aa": aa}
 
+
 def _sequence_has_terminal_stop(sequence):
     sequence = str(sequence or "").upper().replace("U", "T")
     return len(sequence) >= 3 and len(sequence) % 3 == 0 and sequence[-3:] in STOP_CODONS
 
+
 def _feature_expects_terminal_stop(metric):
     reference = metric.get("reference", {}) if metric else {}
     target_length = reference.get("target_length") or 0
@@ -384,17 +368,20 @@ def _feature_expects_terminal_stop(metric):
         return target_end >= target_length
     return True
 
+
 def _feature_qc_flags(sequences, metric):
     flags = []
     if _feature_expects_terminal_stop(metric) and not _sequence_has_terminal_stop(sequences.get("cds_nt")):
         flags.append("missing_stop")
     return flags
 
+
 def _sanitize_summary_id(value):
     value = str(value or "feature")
     cleaned = "".join(char if char.isalnum() or char in "._-" else "_" for char in value)
     return cleaned.strip("._") or "feature"
 
+
 def _best_metric_for_feature(metrics_by_key, input_id, feature):
     gene = str(_first_qualifier(feature, "gene") or "")
     product = str(_first_qualifier(feature, "product") or "")
@@ -413,6 +400,7 @@ def _best_metric_for_feature(metrics_by_key, input_id, feature):
         ),
     )
 
+
 def _candidate_hit_dict(hit):
     if not hit:
         return None
@@ -427,18 +415,18 @@ def _candidate_hit_dict(hit):
         "strand": hit.strand,
     }
 
-def _build_genbank_feature_data(gbk_path, calls, filtered_gff3_text, target, accepted_input_ids=None):
-    records = list(SeqIO.parse(gbk_path, "genbank"))
+
+def _has_flag_qualifier(feature, key):
+    # Biopython writes nothing for an empty list, so only the qualifiers that
+    # reach the GenBank file count as flags.
+    return key in feature.qualifiers and feature.qualifiers[key] != []
+
+
+def _build_genbank_feature_data(conversion, calls, reference):
     calls_by_id = {call.contig_id: call for call in calls}
-    if accepted_input_ids is None:
-        accepted_input_ids = [
-            call.contig_id
-            for call in calls
-            if call.call == "accept" and call.target == target
-        ]
-    metrics_by_key = _parse_gff3_feature_metrics(filtered_gff3_text, target)
+    metrics_by_key = _feature_metrics_by_key(conversion, reference)
     feature_data = {}
-    for input_id, record in zip(accepted_input_ids, records):
+    for input_id, record in zip(conversion.source_ids, conversion.records):
         call = calls_by_id.get(input_id)
         feature_summaries = []
         seen = defaultdict(int)
@@ -455,7 +443,7 @@ def _build_genbank_feature_data(gbk_path, calls, filtered_gff3_text, target, acc
             seen[base_id] += 1
             feature_id = base_id if seen[base_id] == 1 else f"{base_id}_{seen[base_id]}"
             notes = _qualifier_list(feature, "note")
-            if "ribosomal_slippage" in feature.qualifiers:
+            if _has_flag_qualifier(feature, "ribosomal_slippage"):
                 notes.append("ribosomal slippage")
             sequences = _feature_sequence_dict(record, feature)
             flags = _feature_qc_flags(sequences, metric)
@@ -492,6 +480,7 @@ def _build_genbank_feature_data(gbk_path, calls, filtered_gff3_text, target, acc
         }
     return feature_data
 
+
 def _build_contig_summaries(calls, feature_data_by_input):
     contigs = []
     for call in calls:
@@ -525,6 +514,7 @@ def _build_contig_summaries(calls, feature_data_by_input):
         )
     return contigs
 
+
 def _download_kind(name):
     lowered = str(name).lower()
     if lowered.endswith(".summary.json"):
@@ -543,12 +533,14 @@ def _download_kind(name):
         return "log"
     return "output"
 
+
 def _download_target(name):
     for target in AUTO_TARGETS:
         if f".{target}." in str(name):
             return target
     return ""
 
+
 def _build_download_manifest(outputs):
     order = {
         "summary_json": 0,
@@ -572,6 +564,7 @@ def _build_download_manifest(outputs):
         )
     return sorted(downloads, key=lambda item: (order.get(item["kind"], 99), item["name"]))
 
+
 def _run_counts_for_summary(calls, annotated_contigs):
     call_counts = Counter(call.call for call in calls)
     qc_counts = Counter(call.qc_result for call in calls)
@@ -584,32 +577,83 @@ def _run_counts_for_summary(calls, annotated_contigs):
         "failed": qc_counts.get("fail", 0),
     }
 
+
+def _reset_work_dir(work_dir):
+    os.makedirs(work_dir, exist_ok=True)
+    for old_path in glob.glob(os.path.join(work_dir, "*")):
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+
+
+def _file_has_text(path):
+    try:
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 16), b""):
+                if chunk.strip():
+                    return True
+    except (OSError, TypeError):
+        return False
+    return False
+
+
+def _write_input_text(name, text):
+    os.makedirs(WEB_INPUT_DIR, exist_ok=True)
+    path = os.path.join(WEB_INPUT_DIR, name)
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(str(text or ""))
+    return path
+
+
+def _write_output_text(path, text):
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    return path
+
+
+def _with_output_texts(result_json):
+    result = json.loads(result_json)
+    output_paths = result.pop("output_paths", None)
+    if output_paths is not None:
+        result["outputs"] = {name: _read_text_file(path) for name, path in output_paths.items()}
+    return json.dumps(result)
+
+
 def run_ganflu_web(input_fasta, gff3_text, target, isolate, output_stem="ganflu", preserve_original_id=False, hit_settings_json=None):
+    stem = _safe_stem(output_stem)
+    return _with_output_texts(
+        run_ganflu_web_files(
+            _write_input_text(f"{stem}.fasta", input_fasta),
+            _write_input_text(f"{stem}.scan.gff3", gff3_text),
+            target,
+            isolate,
+            output_stem,
+            preserve_original_id,
+            hit_settings_json,
+        )
+    )
+
+
+def run_ganflu_web_files(input_path, scan_gff3_path, target, isolate, output_stem="ganflu", preserve_original_id=False, hit_settings_json=None):
     target = str(target or "").upper()
     stdout_buf = io.StringIO()
     stderr_buf = io.StringIO()
-    original_streams = []
+    log_capture = None
     try:
         if target not in SUPPORTED_TARGETS:
             raise ValueError(f"Unsupported target: {target}")
-        if not str(input_fasta or "").strip():
+        if not _file_has_text(input_path):
             raise ValueError("Input FASTA is empty.")
-        if not str(gff3_text or "").strip():
+        if not _file_has_text(scan_gff3_path):
             raise ValueError("Miniprot GFF3 output is empty.")
         isolate_value = str(isolate or "").strip() or _safe_stem(output_stem)
 
-        work_dir = "/tmp/ganflu-web"
-        os.makedirs(work_dir, exist_ok=True)
-        for old_path in glob.glob(os.path.join(work_dir, "*")):
-            try:
-                os.remove(old_path)
-            except OSError:
-                pass
+        work_dir = WEB_WORK_DIR
+        _reset_work_dir(work_dir)
 
         stem = _safe_stem(output_stem)
-        input_path = os.path.join(work_dir, f"{stem}.fasta")
-        raw_input_path = os.path.join(work_dir, f"{stem}.input.fasta")
-        scan_gff3_path = os.path.join(work_dir, f"{stem}.scan.gff3")
+        accepted_fasta_path = os.path.join(work_dir, f"{stem}.fasta")
         gff3_path = os.path.join(work_dir, f"{stem}.gff3")
         toml_path = os.path.join(work_dir, f"{target}.toml")
         gbk_path = os.path.join(work_dir, f"{stem}.gbk")
@@ -617,14 +661,10 @@ def run_ganflu_web(input_fasta, gff3_text, target, isolate, output_stem="ganflu"
         faa_path = os.path.join(work_dir, f"{stem}.faa")
 
         target_root = resources.files("ganflu").joinpath("db", target)
-        with open(raw_input_path, "w", encoding="utf-8") as handle:
-            handle.write(str(input_fasta))
-        with open(scan_gff3_path, "w", encoding="utf-8") as handle:
-            handle.write(str(gff3_text))
         with open(toml_path, "w", encoding="utf-8") as handle:
             handle.write(_read_resource_text(target_root.joinpath(f"{target}.toml")))
 
-        contigs = list(SeqIO.parse(io.StringIO(str(input_fasta)), "fasta"))
+        contigs = list(SeqIO.parse(input_path, "fasta"))
         if not contigs:
             raise ValueError("Input FASTA contains no records.")
         contigs_by_id = {record.id: record for record in contigs}
@@ -653,7 +693,7 @@ def run_ganflu_web(input_fasta, gff3_text, target, isolate, output_stem="ganflu"
         if not accepted_segments:
             raise ValueError(f"No segment-compatible miniprot hits were found for target {target}.")
 
-        auto_mode.write_target_fasta(contigs, accepted_segments, input_path)
+        auto_mode.write_target_fasta(contigs, accepted_segments, accepted_fasta_path)
         auto_mode.filter_gff3_for_target(
             scan_gff3_path,
             gff3_path,
@@ -663,14 +703,10 @@ def run_ganflu_web(input_fasta, gff3_text, target, isolate, output_stem="ganflu"
         hit_tsv_path = os.path.join(work_dir, f"{stem}.hits.tsv")
         auto_mode.write_auto_tsv(calls, hit_tsv_path)
 
-        root_logger = logging.getLogger()
-        for handler in root_logger.handlers:
-            if isinstance(handler, logging.StreamHandler):
-                original_streams.append((handler, handler.stream))
-                handler.setStream(stdout_buf)
+        log_capture = _attach_log_capture(stdout_buf)
 
         args = [
-            "-i", input_path,
+            "-i", accepted_fasta_path,
             "-g", gff3_path,
             "--toml", toml_path,
             "-o", gbk_path,
@@ -682,16 +718,9 @@ def run_ganflu_web(input_fasta, gff3_text, target, isolate, output_stem="ganflu"
             args.append("--preserve_original_id")
 
         with contextlib.redirect_stdout(stdout_buf), contextlib.redirect_stderr(stderr_buf):
-            gff3togbk.main(args)
-
-        with open(gbk_path, "r", encoding="utf-8") as handle:
-            gbk_text = handle.read()
-        with open(cds_path, "r", encoding="utf-8") as handle:
-            cds_text = handle.read()
-        with open(faa_path, "r", encoding="utf-8") as handle:
-            faa_text = handle.read()
+            conversion = gff3togbk.convert(args)
+
         filtered_gff3_text = _read_text_file(gff3_path)
-        hit_tsv_text = _read_text_file(hit_tsv_path)
         log_text = _join_log(stdout_buf, stderr_buf)
 
         output_names = {
@@ -707,17 +736,11 @@ def run_ganflu_web(input_fasta, gff3_text, target, isolate, output_stem="ganflu"
         status_counts = Counter(call.status for call in calls)
         qc_counts = Counter(call.qc_result for call in calls)
         segment_counts = Counter(accepted_segments.values())
-        feature_data = _build_genbank_feature_data(
-            gbk_path,
-            calls,
-            filtered_gff3_text,
-            target,
-            accepted_input_ids=list(accepted_segments),
-        )
+        feature_data = _build_genbank_feature_data(conversion, calls, reference)
         contig_summaries = _build_contig_summaries(calls, feature_data)
         run_counts = _run_counts_for_summary(calls, len(accepted_segments))
         summary = {
-            **_count_genbank_outputs(gbk_path),
+            **_count_genbank_outputs(conversion.records),
             "schema_version": 1,
             "mode": "target",
             "target": target,
@@ -751,19 +774,21 @@ def run_ganflu_web(input_fasta, gff3_text, target, isolate, output_stem="ganflu"
                 "messages": log_text,
             },
         }
-        summary_text = json.dumps(summary, indent=2, sort_keys=True) + chr(10)
+        summary_text = json.dumps(summary, indent=2, sort_keys=True) + "\n"
         return json.dumps(
             {
                 "summary": summary,
                 "log": log_text,
-                "outputs": {
-                    f"{stem}.gff3": filtered_gff3_text,
-                    f"{stem}.gbk": gbk_text,
-                    f"{stem}.cds.fna": cds_text,
-                    f"{stem}.faa": faa_text,
-                    f"{stem}.hits.tsv": hit_tsv_text,
-                    f"{stem}.summary.json": summary_text,
-                    f"{stem}.log": log_text,
+                "output_paths": {
+                    f"{stem}.gff3": gff3_path,
+                    f"{stem}.gbk": gbk_path,
+                    f"{stem}.cds.fna": cds_path,
+                    f"{stem}.faa": faa_path,
+                    f"{stem}.hits.tsv": hit_tsv_path,
+                    f"{stem}.summary.json": _write_output_text(
+                        os.path.join(work_dir, f"{stem}.summary.json"), summary_text
+                    ),
+                    f"{stem}.log": _write_output_text(os.path.join(work_dir, f"{stem}.log"), log_text),
                 },
             }
         )
@@ -779,8 +804,8 @@ def run_ganflu_web(input_fasta, gff3_text, target, isolate, output_stem="ganflu"
             }
         )
     finally:
-        for handler, stream in original_streams:
-            handler.setStream(stream)
+        _detach_log_capture(log_capture)
+
 
 def _load_web_reference_bundle(target, work_dir):
     target = str(target or "").upper()
@@ -811,57 +836,69 @@ def _load_web_reference_bundle(target, work_dir):
         protein_terminal_stops=protein_terminal_stops,
     )
 
+
 def _read_text_file(path):
     with open(path, "r", encoding="utf-8") as handle:
         return handle.read()
 
+
 def run_ganflu_auto_web(input_fasta, gff3_by_target_json, isolate, output_stem="ganflu", preserve_original_id=False, hit_settings_json=None):
+    if isinstance(gff3_by_target_json, str):
+        gff3_by_target = json.loads(gff3_by_target_json)
+    else:
+        gff3_by_target = dict(gff3_by_target_json or {})
+    stem = _safe_stem(output_stem)
+    gff3_paths = {
+        target: _write_input_text(f"{stem}.{target}.scan.gff3", gff3_by_target[target])
+        for target in AUTO_TARGETS
+        if str(gff3_by_target.get(target, "")).strip()
+    }
+    return _with_output_texts(
+        run_ganflu_auto_web_files(
+            _write_input_text(f"{stem}.fasta", input_fasta),
+            json.dumps(gff3_paths),
+            isolate,
+            output_stem,
+            preserve_original_id,
+            hit_settings_json,
+        )
+    )
+
+
+def run_ganflu_auto_web_files(input_path, gff3_paths_json, isolate, output_stem="ganflu", preserve_original_id=False, hit_settings_json=None):
     stdout_buf = io.StringIO()
     stderr_buf = io.StringIO()
-    original_streams = []
+    log_capture = None
     try:
-        if not str(input_fasta or "").strip():
+        if not _file_has_text(input_path):
             raise ValueError("Input FASTA is empty.")
         isolate_value = str(isolate or "").strip() or _safe_stem(output_stem)
 
-        if isinstance(gff3_by_target_json, str):
-            gff3_by_target = json.loads(gff3_by_target_json)
+        if isinstance(gff3_paths_json, str):
+            gff3_paths = json.loads(gff3_paths_json)
         else:
-            gff3_by_target = dict(gff3_by_target_json or {})
+            gff3_paths = dict(gff3_paths_json or {})
 
         targets = [
             target
             for target in AUTO_TARGETS
-            if str(gff3_by_target.get(target, "")).strip()
+            if _file_has_text(gff3_paths.get(target))
         ]
         if not targets:
             raise ValueError("No auto GFF3 payloads were provided.")
 
-        work_dir = "/tmp/ganflu-web"
-        os.makedirs(work_dir, exist_ok=True)
-        for old_path in glob.glob(os.path.join(work_dir, "*")):
-            try:
-                os.remove(old_path)
-            except OSError:
-                pass
+        work_dir = WEB_WORK_DIR
+        _reset_work_dir(work_dir)
 
         stem = _safe_stem(output_stem)
-        input_path = os.path.join(work_dir, f"{stem}.fasta")
-        with open(input_path, "w", encoding="utf-8") as handle:
-            handle.write(str(input_fasta))
-
-        contigs = list(SeqIO.parse(io.StringIO(str(input_fasta)), "fasta"))
+        contigs = list(SeqIO.parse(input_path, "fasta"))
         if not contigs:
             raise ValueError("Input FASTA contains no records.")
         contigs_by_id = {record.id: record for record in contigs}
         if len(contigs_by_id) != len(contigs):
             raise ValueError("Input FASTA contains duplicate record IDs.")
 
-        root_logger = logging.getLogger()
-        for handler in root_logger.handlers:
-            if isinstance(handler, logging.StreamHandler):
-                original_streams.append((handler, handler.stream))
-                handler.setStream(stdout_buf)
+        log_capture = _attach_log_capture(stdout_buf)
 
         hit_settings = _normalize_hit_settings(hit_settings_json)
         thresholds = _thresholds_from_hit_settings(hit_settings)
@@ -871,10 +908,8 @@ def run_ganflu_auto_web(input_fasta, gff3_by_target_json, isolate, output_stem="
 
         for target in targets:
             references[target] = _load_web_reference_bundle(target, work_dir)
-            scan_gff3 = os.path.join(work_dir, f"{stem}.{target}.scan.gff3")
+            scan_gff3 = gff3_paths[target]
             scan_gff3_by_target[target] = scan_gff3
-            with open(scan_gff3, "w", encoding="utf-8") as handle:
-                handle.write(str(gff3_by_target[target]))
             candidates = auto_mode.parse_miniprot_gff3(
                 scan_gff3,
                 references[target],
@@ -920,28 +955,21 @@ def run_ganflu_auto_web(input_fasta, gff3_by_target_json, isolate, output_stem="
                 args.append("--preserve_original_id")
 
             with contextlib.redirect_stdout(stdout_buf), contextlib.redirect_stderr(stderr_buf):
-                gff3togbk.main(args)
+                conversion = gff3togbk.convert(args)
 
-            target_gff3_text = _read_text_file(target_gff3)
-            outputs[f"{stem}.{target}.gff3"] = target_gff3_text
-            outputs[f"{stem}.{target}.gbk"] = _read_text_file(target_gbk)
-            outputs[f"{stem}.{target}.cds.fna"] = _read_text_file(target_cds)
-            outputs[f"{stem}.{target}.faa"] = _read_text_file(target_faa)
+            outputs[f"{stem}.{target}.gff3"] = target_gff3
+            outputs[f"{stem}.{target}.gbk"] = target_gbk
+            outputs[f"{stem}.{target}.cds.fna"] = target_cds
+            outputs[f"{stem}.{target}.faa"] = target_faa
             feature_data_by_input.update(
-                _build_genbank_feature_data(
-                    target_gbk,
-                    calls,
-                    target_gff3_text,
-                    target,
-                    accepted_input_ids=list(accepted_segments),
-                )
+                _build_genbank_feature_data(conversion, calls, references[target])
             )
 
         auto_tsv_path = os.path.join(work_dir, f"{stem}.auto.tsv")
         auto_mode.write_auto_tsv(calls, auto_tsv_path)
-        outputs[f"{stem}.auto.tsv"] = _read_text_file(auto_tsv_path)
+        outputs[f"{stem}.auto.tsv"] = auto_tsv_path
         log_text = _join_log(stdout_buf, stderr_buf)
-        outputs[f"{stem}.auto.log"] = log_text
+        outputs[f"{stem}.auto.log"] = _write_output_text(os.path.join(work_dir, f"{stem}.auto.log"), log_text)
 
         summary_outputs = {name: name for name in outputs}
         summary_outputs[f"{stem}.auto.summary.json"] = f"{stem}.auto.summary.json"
@@ -971,14 +999,16 @@ def run_ganflu_auto_web(input_fasta, gff3_by_target_json, isolate, output_stem="
             "miniprot": _miniprot_settings_for_summary(hit_settings),
             "messages": log_text,
         }
-        summary_text = json.dumps(summary, indent=2, sort_keys=True) + chr(10)
-        outputs[f"{stem}.auto.summary.json"] = summary_text
+        summary_text = json.dumps(summary, indent=2, sort_keys=True) + "\n"
+        outputs[f"{stem}.auto.summary.json"] = _write_output_text(
+            os.path.join(work_dir, f"{stem}.auto.summary.json"), summary_text
+        )
 
         return json.dumps(
             {
                 "summary": summary,
                 "log": log_text,
-                "outputs": outputs,
+                "output_paths": outputs,
             }
         )
     except Exception as exc:
@@ -993,6 +1023,4 @@ def run_ganflu_auto_web(input_fasta, gff3_by_target_json, isolate, output_stem="
             }
         )
     finally:
-        for handler, stream in original_streams:
-            handler.setStream(stream)
-`;
+        _detach_log_capture(log_capture)
@@ -16,8 +16,11 @@ BASE_PACKAGE_DATA = [
 WEB_PACKAGE_DATA = [
     "web/_headers",
     "web/*.html",
+    "web/*.js",
+    "web/*.json",
     "web/*.svg",
     "web/*.whl",
+    "web/ganflu-db/*.zip",
     "web/samples/*.fa",
     "web/samples/*.fasta",
     "web/samples/*.fna",
@@ -35,6 +38,10 @@ WEB_PACKAGE_DATA = [
     "web/wasm/miniprot/*.js",
     "web/wasm/miniprot/dist/*.mjs",
     "web/wasm/miniprot/dist/*.wasm",
+    "web/vendor/pyodide/v0.29.0/full/*.br",
+    "web/vendor/pyodide/v0.29.0/full/*.gz",
+    "web/wasm/miniprot/dist/*.br",
+    "web/wasm/miniprot/dist/*.gz",
 ]
 
 
@@ -60,6 +67,7 @@ setup(
         "biopython",
         "toml",
     ],
+    extras_require={"zstd": ["zstandard"]},
     include_package_data=False,
     package_data={"ganflu": get_package_data()},
     python_requires=">=3.10",
@@ -70,5 +78,10 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/satoshikawato/ganflu/",
     license="MIT",
-    entry_points={"console_scripts": ["ganflu = ganflu.ganflu:main"]},
+    entry_points={
+        "console_scripts": [
+            "ganflu = ganflu.ganflu:main",
+            "ganflu-bench = ganflu.scripts.bench:main",
+        ]
+    },
 )
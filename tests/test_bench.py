@@ -0,0 +1,105 @@
+import json
+
+from ganflu.scripts import bench
+
+
+def make_report(samples_by_id, stages=None, cpu_count=8):
+    results = []
+    for benchmark_id, samples in samples_by_id.items():
+        result = {"id": benchmark_id, "status": "ok", "samples": samples}
+        if stages and benchmark_id in stages:
+            result["stages"] = {stage: {"samples": values} for stage, values in stages[benchmark_id].items()}
+        results.append(result)
+    results.append({"id": "e2e:auto:skipped", "status": "skipped"})
+    return {
+        "schema": 1,
+        "created": "2026-01-01T00:00:00+00:00",
+        "environment": {"python": "3.11.0", "cpu_count": cpu_count, "ganflu": "0.1.0", "git_commit": "abc"},
+        "results": results,
+    }
+
+
+def write_report(path, report):
+    path.write_text(json.dumps(report), encoding="utf-8")
+    return path
+
+
+def test_compare_reports_uses_medians_and_noise_aware_thresholds():
+    baseline = make_report(
+        {
+            "stage:parse:ICV_x10": [1.0, 1.01, 0.99],
+            "stage:prune:ICV_x10": [1.0, 1.01, 0.99],
+            "stage:noisy:ICV_x10": [1.0, 1.5, 0.6],
+            "stage:tiny:ICV_x10": [0.001, 0.001, 0.001],
+            "stage:gone:ICV_x10": [1.0],
+            "e2e:IAV:IAV_x10": [2.0, 2.0, 2.0],
+        },
+        stages={"e2e:IAV:IAV_x10": {"annotate": [1.0, 1.0, 1.0]}},
+    )
+    new = make_report(
+        {
+            "stage:parse:ICV_x10": [1.3, 1.31, 5.0],
+            "stage:prune:ICV_x10": [0.7, 0.71, 0.69],
+            "stage:noisy:ICV_x10": [1.3, 0.9, 1.8],
+            "stage:tiny:ICV_x10": [0.003, 0.003, 0.003],
+            "stage:added:ICV_x10": [1.0],
+            "e2e:IAV:IAV_x10": [2.05, 2.05, 2.05],
+        },
+        stages={"e2e:IAV:IAV_x10": {"annotate": [1.5, 1.5, 1.5]}},
+    )
+
+    comparisons = {comparison.benchmark: comparison for comparison in bench.compare_reports(baseline, new)}
+
+    assert comparisons["stage:parse:ICV_x10"].status == "regression"
+    assert comparisons["stage:parse:ICV_x10"].new_median == 1.31
+    assert comparisons["stage:prune:ICV_x10"].status == "improvement"
+    assert comparisons["stage:noisy:ICV_x10"].status == "unchanged"
+    assert comparisons["stage:tiny:ICV_x10"].status == "unchanged"
+    assert comparisons["stage:gone:ICV_x10"].status == "missing"
+    assert comparisons["stage:added:ICV_x10"].status == "new"
+    assert comparisons["e2e:IAV:IAV_x10"].status == "unchanged"
+    assert comparisons["e2e:IAV:IAV_x10:annotate"].status == "regression"
+    assert "e2e:auto:skipped" not in comparisons
+
+
+def test_compare_command_stores_baseline_and_exits_non_zero_on_regression(tmp_path, capsys):
+    store = tmp_path / "store"
+    baseline = write_report(tmp_path / "baseline.json", make_report({"stage:parse:ICV_x10": [1.0, 1.0, 1.0]}))
+    faster = write_report(tmp_path / "faster.json", make_report({"stage:parse:ICV_x10": [0.5, 0.5, 0.5]}))
+    slower = write_report(
+        tmp_path / "slower.json", make_report({"stage:parse:ICV_x10": [2.0, 2.0, 2.0]}, cpu_count=4)
+    )
+
+    assert bench.main(["--store", str(store), "save", str(baseline)]) == 0
+    assert (store / "baseline.json").is_file()
+
+    assert bench.main(["--store", str(store), "compare", str(faster), "--save", "faster"]) == 0
+    output = capsys.readouterr().out
+    assert "improvement" in output
+    assert "-50.0%" in output
+    assert (store / "faster.json").is_file()
+
+    assert bench.main(["--store", str(store), "compare", str(slower)]) == bench.EXIT_REGRESSION
+    captured = capsys.readouterr()
+    assert "regression" in captured.out
+    assert "+100.0%" in captured.out
+    assert "cpu_count: 8 -> 4" in captured.err
+
+    assert bench.main(["--store", str(store), "compare", str(slower), "--baseline", "faster"]) == 1
+    assert bench.main(["--store", str(store), "compare", str(slower), "--baseline", str(slower)]) == 0
+    capsys.readouterr()
+
+    assert bench.main(["--store", str(store), "list"]) == 0
+    listed = capsys.readouterr().out.splitlines()
+    assert [line.split("\t")[0] for line in listed] == ["baseline", "faster"]
+
+
+def test_compare_command_reports_missing_baseline_and_invalid_reports(tmp_path, capsys):
+    report = write_report(tmp_path / "new.json", make_report({"stage:parse:ICV_x10": [1.0]}))
+    invalid = tmp_path / "invalid.json"
+    invalid.write_text(json.dumps({"results": []}), encoding="utf-8")
+
+    assert bench.main(["--store", str(tmp_path / "empty"), "compare", str(report)]) == bench.EXIT_ERROR
+    assert "No stored baseline" in capsys.readouterr().err
+    assert bench.main(["--store", str(tmp_path), "save", str(invalid)]) == bench.EXIT_ERROR
+    assert "not a ganflu benchmark report" in capsys.readouterr().err
@@ -0,0 +1,69 @@
+import json
+import shutil
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+
+from Bio import SeqIO
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_run_benchmarks_module():
+    module_path = REPO_ROOT / "benchmarks" / "run_benchmarks.py"
+    spec = spec_from_file_location("run_benchmarks", module_path)
+    assert spec is not None
+    assert spec.loader is not None
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_scaled_gff3_matches_scaled_contigs():
+    module = load_run_benchmarks_module()
+    records = list(SeqIO.parse(str(module.STAGE_FIXTURE_FASTA), "fasta"))
+    lines = module.STAGE_FIXTURE_GFF3.read_text(encoding="utf-8").splitlines(keepends=True)
+
+    scaled_records = module.scale_records(records, 10)
+    scaled_lines = module.scale_gff3(lines, [record.id for record in records], 10)
+
+    assert [record.id for record in scaled_records][6:8] == [f"{records[6].id}_0", f"{records[0].id}_1"]
+    assert len({record.id for record in scaled_records}) == 10
+    scaled_ids = {record.id for record in scaled_records}
+    rows = [line.split("\t") for line in scaled_lines if not line.startswith("#")]
+    paf_rows = [line.split("\t") for line in scaled_lines if line.startswith("##PAF\t")]
+    assert {row[0] for row in rows} == scaled_ids
+    assert {row[6] for row in paf_rows} <= scaled_ids
+    mrna_ids = [row[8].split(";")[0] for row in rows if row[2] == "mRNA"]
+    assert len(mrna_ids) == len(set(mrna_ids))
+
+
+def test_stage_benchmarks_report_is_json_with_environment(tmp_path, monkeypatch):
+    module = load_run_benchmarks_module()
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+
+    report = module.run_benchmarks(scales=[7], repeat=2, work_dir=tmp_path)
+
+    assert report["schema"] == module.SCHEMA_VERSION
+    assert report["settings"] == {"scales": [7], "repeat": 2, "suites": ["stages", "e2e"]}
+    assert report["environment"]["ganflu"]
+    assert report["environment"]["python"]
+    stage_results = [result for result in report["results"] if result["suite"] == "stages"]
+    assert [result["name"] for result in stage_results] == [
+        "parse_miniprot_gff3",
+        "prune_gff3",
+        "to_seqfeatures",
+        "add_translations",
+        "genbank_write",
+    ]
+    for result in stage_results:
+        assert result["id"] == f"stage:{result['name']}:ICV_x7"
+        assert len(result["samples"]) == 2
+        assert result["min_seconds"] <= result["median_seconds"] <= result["max_seconds"]
+    assert (tmp_path / "ICV_x7.gbk").read_text(encoding="utf-8").count("LOCUS") == 7
+
+    e2e_results = [result for result in report["results"] if result["suite"] == "e2e"]
+    assert {result["status"] for result in e2e_results} == {"skipped"}
+    assert "e2e:IAV:IAV_x7" in {result["id"] for result in e2e_results}
+    assert "e2e:auto:synthetic_x7" in {result["id"] for result in e2e_results}
+    json.dumps(report)
@@ -0,0 +1,85 @@
+import gzip
+
+import pytest
+from Bio import SeqIO, bgzf
+
+from ganflu.scripts import compression, gff3togbk
+
+
+FASTA_TEXT = ">c1\nATGAAATAA\n>c2\nATGCCCTAA\n"
+
+
+def write_inputs(tmp_path):
+    plain = tmp_path / "in.fa"
+    plain.write_text(FASTA_TEXT, encoding="utf-8")
+    gz = tmp_path / "in.fa.gz"
+    with gzip.open(gz, "wt", encoding="utf-8") as handle:
+        handle.write(FASTA_TEXT)
+    bgz = tmp_path / "in.fa.bgz"
+    with bgzf.BgzfWriter(str(bgz), "wb") as handle:
+        handle.write(FASTA_TEXT.encode("utf-8"))
+    return plain, gz, bgz
+
+
+def test_detect_compression_uses_magic_bytes(tmp_path):
+    plain, gz, bgz = write_inputs(tmp_path)
+    misnamed = tmp_path / "misnamed.fa"
+    misnamed.write_bytes(gz.read_bytes())
+
+    assert compression.detect_compression(plain) is None
+    assert compression.detect_compression(gz) == "gzip"
+    assert compression.detect_compression(bgz) == "bgzf"
+    assert compression.detect_compression(misnamed) == "gzip"
+    for path in (plain, gz, bgz, misnamed):
+        with compression.open_text(path) as handle:
+            assert [record.id for record in SeqIO.parse(handle, "fasta")] == ["c1", "c2"]
+
+
+def test_zstd_input_is_read_and_staged_for_miniprot(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    zst = tmp_path / "in.fa.zst"
+    zst.write_bytes(zstandard.ZstdCompressor().compress(FASTA_TEXT.encode("utf-8")))
+
+    assert compression.detect_compression(zst) == "zstd"
+    with compression.open_text(zst) as handle:
+        assert handle.read() == FASTA_TEXT
+    with compression.miniprot_input(str(zst), str(tmp_path)) as staged:
+        assert staged != str(zst)
+        with open(staged, encoding="utf-8") as handle:
+            assert handle.read() == FASTA_TEXT
+    assert not (tmp_path / staged).exists()
+
+
+def test_miniprot_input_passes_gzip_through(tmp_path):
+    _, gz, bgz = write_inputs(tmp_path)
+
+    for path in (gz, bgz):
+        with compression.miniprot_input(str(path), str(tmp_path)) as staged:
+            assert staged == str(path)
+
+
+@pytest.mark.parametrize("use_pigz", [False, True])
+def test_open_output_gzips_dot_gz_paths(tmp_path, monkeypatch, use_pigz):
+    if use_pigz and compression.shutil.which("pigz") is None:
+        pytest.skip("pigz is not installed")
+    if not use_pigz:
+        monkeypatch.setattr(compression.shutil, "which", lambda name: None)
+    output = tmp_path / "out.faa.gz"
+
+    with compression.open_output(str(output)) as handle:
+        handle.write(FASTA_TEXT)
+
+    with gzip.open(output, "rt", encoding="utf-8") as handle:
+        assert handle.read() == FASTA_TEXT
+
+
+def test_output_paths_ignore_compression_suffix():
+    assert gff3togbk.get_output_id_prefix("/tmp/sample.gbk.gz") == "sample"
+    assert gff3togbk.get_fasta_output_paths("/tmp/sample.gbk.gz") == (
+        "/tmp/sample.cds.fna.gz",
+        "/tmp/sample.faa.gz",
+    )
+    assert gff3togbk.get_fasta_output_paths("/tmp/sample.gbk") == (
+        "/tmp/sample.cds.fna",
+        "/tmp/sample.faa",
+    )
@@ -12,7 +12,7 @@ from Bio.SeqRecord import SeqRecord
 
 import ganflu
 from ganflu import ganflu as ganflu_cli
-from ganflu.scripts import auto_mode, gff3togbk
+from ganflu.scripts import auto_mode, gff3togbk, profiling
 from ganflu.scripts.gff3togbk import add_translations
 
 
@@ -450,6 +450,7 @@ def test_gff3togbk_uses_gene_metadata_for_cds_qualifiers(tmp_path):
         encoding="utf-8",
     )
 
+    timer = profiling.StageTimer()
     gff3togbk.main(
         [
             "-i",
@@ -462,9 +463,11 @@ def test_gff3togbk_uses_gene_metadata_for_cds_qualifiers(tmp_path):
             str(output),
             "--isolate",
             "A/Test/1/2026",
-        ]
+        ],
+        profiler=timer,
     )
 
+    assert [stage["stage"] for stage in timer.as_list()] == ["parse", "genbank", "fasta_export"]
     record = SeqIO.read(output, "genbank")
     cds = next(feature for feature in record.features if feature.type == "CDS")
     assert cds.qualifiers["gene"] == ["PB2"]
@@ -673,3 +676,61 @@ def test_cli_mixed_iav_auto_smoke(tmp_path, input_file, stem, expected_serotype,
     assert summary["by_target"]["IAV"]["accepted"] == 16
     assert summary["by_status"] == expected_statuses
     assert_mixed_iav_genbank(tmp_path / f"{stem}.IAV.gbk", expected_serotype)
+
+
+def test_cli_trace_writes_run_and_stage_spans(tmp_path, monkeypatch):
+    def fake_run_auto(args, output_stem, work_dir, logger, timer):
+        with timer.stage("classify"):
+            pass
+        with timer.span("write_auto_tsv"):
+            pass
+        return {}
+
+    trace_path = tmp_path / "run.trace.json"
+    monkeypatch.setattr(auto_mode, "run_auto", fake_run_auto)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["ganflu", "-i", str(DATA_DIR / "PR8.fasta"), "-o", str(tmp_path / "PR8"), "-t", "auto",
+         "--trace", str(trace_path)],
+    )
+
+    assert ganflu_cli.main() == 0
+
+    events = json.loads(trace_path.read_text(encoding="utf-8"))["traceEvents"]
+    assert [event["name"] for event in events if event["ph"] == "X"] == [
+        "ganflu.main", "run_auto", "classify", "write_auto_tsv"
+    ]
+    assert {event["name"] for event in events if event["ph"] == "M"} == {"process_name", "thread_name"}
+
+
+@pytest.mark.parametrize("target", ["IAV", "auto"])
+def test_cli_threads_and_miniprot_bin_reach_every_miniprot_run(tmp_path, monkeypatch, target):
+    from ganflu.launchers import miniprot
+    from ganflu.scripts import fixed_mode
+
+    launched = []
+
+    class StopRun(Exception):
+        pass
+
+    class RecordingMiniprot:
+        def __init__(self, **kwargs):
+            launched.append(kwargs)
+
+        def run_piped_commands(self):
+            raise StopRun
+
+    monkeypatch.setattr(miniprot, "MiniprotCommandLine", RecordingMiniprot)
+    monkeypatch.setattr(fixed_mode, "MiniprotCommandLine", RecordingMiniprot)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["ganflu", "-i", str(DATA_DIR / "PR8.fasta"), "-o", str(tmp_path / "PR8"), "-t", target,
+         "--threads", "3", "--miniprot-bin", "/opt/miniprot/bin/miniprot"],
+    )
+
+    with pytest.raises(StopRun):
+        ganflu_cli.main()
+
+    assert [(call["miniprot_bin"], call["threads"]) for call in launched] == [("/opt/miniprot/bin/miniprot", 3)]
@@ -154,3 +154,38 @@ def test_gff3togbk_aggregates_mixed_iav_serotype_from_ha_na_notes(
         gene = cds.qualifiers["gene"][0]
         notes = note_values(cds)
         assert any(note.startswith(f"subtype: {gene[0]}") for note in notes)
+
+
+def test_convert_returns_records_and_gff3_metrics(tmp_path):
+    fasta = tmp_path / "ha.fa"
+    gff3 = tmp_path / "ha.gff3"
+    toml = tmp_path / "IAV.toml"
+    output = tmp_path / "ha.gbk"
+    fasta.write_text(">contig_1\nATGAAATAA\n", encoding="utf-8")
+    gff3.write_text(
+        "\n".join(
+            [
+                "##gff-version 3",
+                "##PAF\tHA_H1\t566\t0\t3\t+\tcontig_1\t9\t0\t9\t9\t9\t0\tAS:i:42\tms:i:40",
+                "contig_1\tminiprot\tmRNA\t1\t9\t40\t+\t.\tID=MP1;Rank=1;Identity=0.9900;Target=HA_H1 1 3",
+                "contig_1\tminiprot\tCDS\t1\t9\t40\t+\t0\tParent=MP1;Rank=1;Identity=0.9900;Target=HA_H1 1 3",
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    write_toml(toml)
+
+    conversion = gff3togbk.convert(
+        ["-i", str(fasta), "-g", str(gff3), "--toml", str(toml), "-o", str(output), "--isolate", "A/test/1/2026"]
+    )
+
+    assert conversion.source_ids == ["contig_1"]
+    assert [record.id for record in conversion.records] == ["ha_HA"]
+    assert [record.id for record in SeqIO.parse(output, "genbank")] == ["ha_HA"]
+    (metric,) = conversion.feature_metrics["contig_1"]
+    assert metric.product == "HA_H1"
+    assert (metric.start, metric.end, metric.strand) == (1, 9, "+")
+    assert metric.identity == 0.99
+    assert (metric.target_start, metric.target_end, metric.target_length) == (1, 3, 566)
+    assert metric.raw_score == 42.0
@@ -0,0 +1,87 @@
+import logging
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Modules that only annotation runs and native scans need.
+HEAVY_MODULES = ("Bio", "numpy", "ganflu.serve", "ganflu.scripts.auto_mode", "ganflu.scripts.gff3togbk")
+# Generous enough for slow CI machines; importing Biopython alone is well above it.
+IMPORT_BUDGET_US = 100_000
+
+
+def import_times(code: str) -> dict[str, int]:
+    """Cumulative import time in microseconds per module, from ``python -X importtime``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert completed.returncode == 0, completed.stderr
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def heavy_imports(times: dict[str, int]) -> list[str]:
+    return sorted(
+        name for name in times if any(name == heavy or name.startswith(f"{heavy}.") for heavy in HEAVY_MODULES)
+    )
+
+
+@pytest.mark.parametrize("argument", ["--version", "--help"])
+def test_cli_version_and_help_skip_the_pipeline_imports(argument):
+    times = import_times(
+        "import sys\n"
+        f"sys.argv = ['ganflu', {argument!r}]\n"
+        "from ganflu import ganflu\n"
+        "try:\n"
+        "    ganflu.main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    )
+
+    assert heavy_imports(times) == []
+    assert times["ganflu.ganflu"] < IMPORT_BUDGET_US
+
+
+def test_gui_with_wasm_backend_skips_the_pipeline_imports():
+    times = import_times(
+        "from ganflu import ganflu\n"
+        "args = ganflu._get_gui_args(['--backend', 'wasm'])\n"
+        "server = ganflu.bind_gui_server(\n"
+        "    args.host, args.port, ganflu.get_webapp_dir(), scan_service=ganflu.create_native_scan_service(args)\n"
+        ")\n"
+        "server.server_close()\n"
+    )
+
+    assert "ganflu.static_server" in times
+    assert heavy_imports(times) == []
+
+
+def test_importing_gff3togbk_leaves_logging_unconfigured():
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import logging\n"
+            "import ganflu.scripts.gff3togbk\n"
+            "root = logging.getLogger()\n"
+            "print(len(root.handlers), root.level)\n",
+        ],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert completed.stdout.split() == ["0", str(logging.WARNING)]
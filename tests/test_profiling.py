@@ -0,0 +1,95 @@
+import json
+import threading
+import tracemalloc
+
+from ganflu.scripts.profiling import StageProfiler, StageTimer, TraceRecorder
+
+
+def test_stage_timer_names_nested_stages():
+    timer = StageTimer()
+
+    with timer.stage("annotate"):
+        with timer.stage("genbank"):
+            pass
+
+    assert [stage["stage"] for stage in timer.as_list()] == ["annotate/genbank", "annotate"]
+
+
+def test_stage_profiler_records_cpu_memory_and_outer_cprofile(tmp_path):
+    profiler = StageProfiler(cprofile_dir=str(tmp_path / "cprofile"))
+    try:
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                buffer = bytearray(4 * 1024 * 1024)
+                del buffer
+        profile_json = tmp_path / "run.profile.json"
+        profiler.write_json(str(profile_json))
+    finally:
+        profiler.close()
+
+    stages = {stage["stage"]: stage for stage in json.loads(profile_json.read_text())["stages"]}
+    assert set(stages) == {"outer", "outer/inner"}
+    assert stages["outer/inner"]["peak_memory_bytes"] >= 4 * 1024 * 1024
+    assert stages["outer"]["peak_memory_bytes"] >= stages["outer/inner"]["peak_memory_bytes"]
+    assert stages["outer"]["cpu_seconds"] >= 0
+    assert "cprofile" not in stages["outer/inner"]
+    assert (tmp_path / "cprofile").joinpath(stages["outer"]["cprofile"]).is_file()
+    assert not tracemalloc.is_tracing()
+
+
+def test_trace_recorder_writes_chrome_trace_events_with_thread_lanes(tmp_path):
+    tracer = TraceRecorder()
+    timer = StageTimer(tracer)
+
+    with timer.span("ganflu.main", category="run", target="auto"):
+        with timer.stage("annotate"):
+            with timer.stage("genbank"):
+                pass
+        worker = threading.Thread(
+            target=lambda: tracer.add_span("miniprot_scan.IBV", tracer.origin, tracer.origin), name="scan"
+        )
+        worker.start()
+        worker.join()
+        with timer.span("write_auto_tsv"):
+            pass
+    trace_json = tmp_path / "run.trace.json"
+    tracer.write_json(str(trace_json))
+
+    events = json.loads(trace_json.read_text())["traceEvents"]
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert set(spans) == {"ganflu.main", "annotate", "genbank", "miniprot_scan.IBV", "write_auto_tsv"}
+    assert spans["genbank"]["args"] == {"stage": "annotate/genbank"}
+    assert spans["ganflu.main"]["cat"] == "run"
+    assert spans["ganflu.main"]["args"] == {"target": "auto"}
+    assert spans["write_auto_tsv"]["cat"] == "write"
+    main_span = spans["ganflu.main"]
+    for name in ("annotate", "genbank", "write_auto_tsv"):
+        assert main_span["ts"] <= spans[name]["ts"]
+        assert spans[name]["ts"] + spans[name]["dur"] <= main_span["ts"] + main_span["dur"] + 1
+    assert spans["miniprot_scan.IBV"]["tid"] != main_span["tid"]
+    thread_names = {event["tid"]: event["args"]["name"] for event in events if event["name"] == "thread_name"}
+    assert thread_names[spans["miniprot_scan.IBV"]["tid"]] == "scan"
+    assert [stage["stage"] for stage in timer.as_list()] == ["annotate/genbank", "annotate"]
+
+
+def test_stage_profiler_adds_cpu_and_memory_to_trace_spans():
+    tracer = TraceRecorder()
+    profiler = StageProfiler(tracer=tracer)
+    try:
+        with profiler.stage("classify"):
+            pass
+    finally:
+        profiler.close()
+
+    (event,) = [event for event in tracer.as_dict()["traceEvents"] if event["ph"] == "X"]
+    assert event["name"] == "classify"
+    assert {"stage", "wall_seconds", "cpu_seconds", "peak_memory_bytes"} <= set(event["args"])
+
+
+def test_stage_timer_span_without_tracer_is_a_no_op():
+    timer = StageTimer()
+
+    with timer.span("write_auto_tsv"):
+        pass
+
+    assert timer.as_list() == []
@@ -0,0 +1,145 @@
+import sqlite3
+
+from ganflu.scripts import auto_mode, gff3togbk, results_db
+
+
+def write_toml(path):
+    path.write_text(
+        "\n".join(
+            [
+                "[segments]",
+                'HA = {id = 4, file = "HA.fa", description = "{organism} segment 4 hemagglutinin (HA) gene, complete cds"}',
+                'NA = {id = 6, file = "NA.fa", description = "{organism} segment 6 neuraminidase (NA) gene, complete cds"}',
+                "",
+                "[serotype]",
+                'HA = {segment = "HA", prefix = "H"}',
+                'NA = {segment = "NA", prefix = "N"}',
+                "",
+                "[genes]",
+                'HA = {product = "hemagglutinin", has_intron = false, ribosomal_slippage = false}',
+                'NA = {product = "neuraminidase", has_intron = false, ribosomal_slippage = false}',
+                "",
+                "[annotations]",
+                'molecule_type = "cRNA"',
+                'organism = "Influenza A virus ({isolate}({subtype}))"',
+                'taxonomy = ["Viruses"]',
+                'data_file_division = "VRL"',
+                'topology = "linear"',
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+
+
+def cds_line(parent_id, seqid, product, identity):
+    return (
+        f"{seqid}\tminiprot\tCDS\t1\t9\t.\t+\t0\t"
+        f"Parent={parent_id};Rank=1;Identity={identity:.4f};Target={product} 1 3"
+    )
+
+
+def annotate(tmp_path):
+    fasta = tmp_path / "sample.fa"
+    gff3 = tmp_path / "sample.gff3"
+    toml = tmp_path / "IAV.toml"
+    fasta.write_text(">ha\natgaaataa\n>na\nATGAAATGA\n", encoding="utf-8")
+    gff3.write_text(
+        "\n".join(
+            [
+                "##gff-version 3",
+                cds_line("MP1", "ha", "HA_H5", 0.95),
+                cds_line("MP2", "na", "NA_N1", 0.90),
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    write_toml(toml)
+    records = gff3togbk.main(
+        [
+            "-i", str(fasta),
+            "-g", str(gff3),
+            "--toml", str(toml),
+            "-o", str(tmp_path / "sample.gbk"),
+            "--isolate", "A/test/1/2026",
+        ]
+    )
+    return fasta, records
+
+
+def test_build_feature_rows_records_segment_subtype_and_hash(tmp_path):
+    _, records = annotate(tmp_path)
+
+    rows = results_db.build_feature_rows(records, target="IAV", segment_keys=["HA", "NA"])
+
+    by_segment = {row["segment"]: row for row in rows}
+    assert sorted(by_segment) == ["HA", "NA"]
+    assert by_segment["HA"]["subtype"] == "H5"
+    assert by_segment["NA"]["subtype"] == "N1"
+    assert by_segment["HA"]["gene"] == "HA"
+    assert by_segment["HA"]["contig_hash"] == results_db.sequence_hash("ATGAAATAA")
+    assert by_segment["HA"]["translation"] == "MK"
+
+
+def test_write_run_appends_runs_and_supports_cross_run_queries(tmp_path):
+    fasta, records = annotate(tmp_path)
+    db_path = tmp_path / "results" / "ganflu.sqlite"
+    feature_rows = results_db.build_feature_rows(records, target="IAV", segment_keys=["HA", "NA"])
+    contigs_by_id = {record.id: record for record in records}
+    calls = [
+        auto_mode.AutoCall(
+            contig_id=record.id,
+            length=len(record.seq),
+            call="accept",
+            target="IAV",
+            segment=segment,
+            status="complete",
+            qc_result="pass",
+        )
+        for record, segment in zip(records, ["HA", "NA"])
+    ]
+
+    first = results_db.write_run(
+        str(db_path),
+        mode="auto",
+        target="IAV",
+        input_path=str(fasta),
+        output_stem=str(tmp_path / "sample"),
+        summary={"contig_count": 2},
+        call_rows=results_db.build_call_rows(calls, contigs_by_id, feature_rows),
+        feature_rows=feature_rows,
+        stage_timings=[{"stage": "miniprot", "wall_seconds": 0.5}],
+    )
+    second = results_db.write_run(
+        str(db_path),
+        mode="fixed",
+        target="IAV",
+        input_path=str(fasta),
+        output_stem=str(tmp_path / "sample"),
+        feature_rows=feature_rows,
+    )
+
+    assert second == first + 1
+    connection = sqlite3.connect(db_path)
+    try:
+        subtype_counts = connection.execute(
+            "SELECT subtype, COUNT(DISTINCT run_id) FROM features "
+            "WHERE segment = 'HA' GROUP BY subtype"
+        ).fetchall()
+        call_subtypes = connection.execute(
+            "SELECT segment, subtype FROM calls ORDER BY segment"
+        ).fetchall()
+        timings = connection.execute(
+            "SELECT stage, wall_seconds FROM stage_timings WHERE run_id = ?", (first,)
+        ).fetchall()
+        indexes = {
+            row[0]
+            for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        }
+    finally:
+        connection.close()
+    assert subtype_counts == [("H5", 2)]
+    assert call_subtypes == [("HA", "H5"), ("NA", "N1")]
+    assert timings == [("miniprot", 0.5)]
+    assert {"features_contig_hash_idx", "calls_subtype_idx"} <= indexes
@@ -0,0 +1,296 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ganflu import ganflu as ganflu_cli
+from ganflu import serve, web_helpers
+from ganflu.scripts import fixed_mode
+
+
+@pytest.fixture
+def job_server(tmp_path):
+    service = serve.AnnotationService(
+        arg_parser=ganflu_cli._build_parser(),
+        jobs_dir=str(tmp_path / "jobs"),
+        targets=["IAV"],
+    )
+    server = serve.bind_job_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield service, ganflu_cli.get_server_url(server)
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.shutdown()
+
+
+def request_json(url, payload=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_serve_runs_jobs_with_preloaded_reference(job_server, monkeypatch):
+    service, url = job_server
+    seen = {}
+
+    def fake_run_fixed(args, output_stem, work_dir, logger, timer=None, reference=None):
+        seen["reference"] = reference
+        seen["isolate"] = args.isolate
+        with open(f"{output_stem}.gbk", "w", encoding="utf-8") as handle:
+            handle.write("LOCUS       fake\n")
+        return {"gbk": f"{output_stem}.gbk"}
+
+    monkeypatch.setattr(fixed_mode, "run_fixed", fake_run_fixed)
+
+    status, job = request_json(
+        f"{url}jobs?wait=1",
+        {"fasta": ">c1\nATG\n", "target": "IAV", "name": "sample 1"},
+    )
+
+    assert status == 200
+    assert job["status"] == "done"
+    assert job["outputs"] == {"gbk": "sample_1.gbk"}
+    assert "sample_1.input.fasta" in job["files"]
+    assert seen["reference"] is service.references["IAV"]
+    assert seen["isolate"] == "sample_1"
+    with urllib.request.urlopen(f"{url}jobs/{job['job_id']}/files/sample_1.gbk", timeout=30) as response:
+        assert response.read() == b"LOCUS       fake\n"
+    status, polled = request_json(f"{url}jobs/{job['job_id']}")
+    assert status == 200
+    assert polled["status"] == "done"
+
+
+def test_serve_rejects_bad_jobs(job_server):
+    _, url = job_server
+
+    assert request_json(f"{url}jobs", {"fasta": ">c1\nATG\n", "target": "XYZ"})[0] == 400
+    assert request_json(f"{url}jobs", {"fasta": ">c1\nATG\n", "target": "IAV", "threads": 4})[0] == 400
+    assert request_json(f"{url}jobs", {"fasta": "ATG", "target": "IAV"})[0] == 400
+    assert request_json(f"{url}jobs/missing")[0] == 404
+    with urllib.request.urlopen(f"{url}health", timeout=30) as response:
+        assert json.loads(response.read())["targets"] == ["IAV"]
+
+
+def test_serve_rejects_undecodable_bodies_and_panels_outside_the_db(job_server):
+    service, url = job_server
+    request = urllib.request.Request(
+        f"{url}jobs", data=b">c1\n\xff\xfe\n", headers={"Content-Type": "text/plain"}
+    )
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        urllib.request.urlopen(request, timeout=30)
+    assert exc_info.value.code == 400
+
+    for panel in ("/etc/passwd", "../ganflu.py", "IAV/missing.faa"):
+        status, payload = request_json(
+            f"{url}jobs", {"fasta": ">c1\nATG\n", "target": "IAV", "subtype_panel": panel}
+        )
+        assert status == 400
+        assert "reference data directory" in payload["error"]
+    panel = service.resolve_subtype_panel("IAV/prot/IAV_proteome_consensus.faa")
+    assert panel == os.path.join(service.db_root, "IAV", "prot", "IAV_proteome_consensus.faa")
+
+
+def test_serve_job_log_includes_root_logger_output(job_server, monkeypatch, caplog):
+    service, url = job_server
+    caplog.set_level(logging.INFO)
+
+    def fake_run_fixed(args, output_stem, work_dir, logger, timer=None, reference=None):
+        logger.info("job logger line")
+        logging.getLogger().info("root logger line")
+        return {}
+
+    monkeypatch.setattr(fixed_mode, "run_fixed", fake_run_fixed)
+    status, job = request_json(f"{url}jobs?wait=1", {"fasta": ">c1\nATG\n", "target": "IAV", "name": "s"})
+
+    assert status == 200
+    log_path = os.path.join(job["result_dir"], "s.log")
+    with open(log_path, encoding="utf-8") as handle:
+        log_text = handle.read()
+    assert log_text.count("job logger line") == 1
+    assert log_text.count("root logger line") == 1
+    root_handlers = logging.getLogger().handlers
+    assert log_path not in [getattr(handler, "baseFilename", None) for handler in root_handlers]
+
+
+def test_serve_deletes_expired_and_excess_jobs(job_server, monkeypatch):
+    service, url = job_server
+    monkeypatch.setattr(fixed_mode, "run_fixed", lambda *args, **kwargs: {})
+    jobs = [
+        request_json(f"{url}jobs?wait=1", {"fasta": ">c1\nATG\n", "target": "IAV"})[1]
+        for _ in range(3)
+    ]
+    orphan = os.path.join(service.jobs_dir, "0" * 32)
+    os.makedirs(orphan)
+    service.max_jobs = 2
+
+    service.prune_jobs()
+
+    assert service.get(jobs[0]["job_id"]) is None
+    assert not os.path.exists(jobs[0]["result_dir"])
+    assert all(service.get(job["job_id"]) for job in jobs[1:])
+    assert os.path.isdir(orphan)
+
+    removed = service.prune_jobs(now=time.time() + service.job_ttl + 1)
+
+    assert sorted(removed) == sorted([job["result_dir"] for job in jobs[1:]] + [orphan])
+    assert service.jobs == {}
+    assert not os.listdir(service.jobs_dir)
+
+
+def test_cli_accepts_serve_command(monkeypatch):
+    monkeypatch.setattr(
+        "sys.argv",
+        ["ganflu", "serve", "--port", "0", "--workers", "3", "--targets", "IAV,IBV"],
+    )
+    args = ganflu_cli._get_args()
+
+    assert args.command == ganflu_cli.SERVE_COMMAND
+    assert args.workers == 3
+    assert args.targets == "IAV,IBV"
+
+
+FAKE_MINIPROT = """#!{python}
+import sys
+print("##gff-version 3")
+print("#ARGS " + " ".join(sys.argv[1:-2]))
+"""
+
+
+@pytest.fixture
+def fake_miniprot(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "miniprot"
+    script.write_text(FAKE_MINIPROT.format(python=sys.executable), encoding="utf-8")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    return script
+
+
+def test_native_scan_service_splits_threads_across_targets(fake_miniprot, tmp_path):
+    service = serve.NativeScanService(targets=["IAV", "IBV"], threads=8, work_dir=str(tmp_path))
+
+    assert service.health()["backend"] == "native"
+    gff3 = service.scan(b">c1\nATG\n", {"targets": "IAV,IBV", "max_secondary_alignments": "5"})
+
+    assert sorted(gff3) == ["IAV", "IBV"]
+    assert "-P MPIA --gff -J 15 -t 4 -N 5 --outs=0.1 -p 0.1" in gff3["IAV"]
+    assert "-P MPIB" in gff3["IBV"]
+    assert "-P MP --gff -J 15 -t 8" in service.scan(b">c1\nATG\n", {"targets": "IAV", "prefix": "MP"})["IAV"]
+    with pytest.raises(ValueError, match="not loaded"):
+        service.scan(b">c1\nATG\n", {"targets": "ICV"})
+    with pytest.raises(ValueError, match="Unsupported scan parameter"):
+        service.scan(b">c1\nATG\n", {"threads": "2"})
+    with pytest.raises(ValueError, match="FASTA"):
+        service.scan(b"ATG", {"targets": "IAV"})
+
+
+WEB_FASTA = ">hit\nATGAAATAA\n>nohit\nATGAAATAA\n"
+WEB_GFF3 = (
+    "##gff-version 3\n"
+    "hit\tminiprot\tmRNA\t1\t9\t1\t+\t.\tID=MP000001;Rank=1;Identity=0.9500;Positive=0.9500;Target=PB2 1 3\n"
+    "hit\tminiprot\tCDS\t1\t9\t.\t+\t0\tParent=MP000001;Identity=0.9500;Target=PB2 1 3\n"
+)
+WEB_HIT_SETTINGS = {"minIdentity": 0.9, "minAaCoverage": 0.001, "minScore": 0.001, "completeAaCoverage": 0.001}
+
+
+def test_native_backend_annotates_with_the_web_helpers(fake_miniprot, tmp_path):
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    service = serve.NativeScanService(targets=["IAV"], threads=2, work_dir=str(work_dir))
+    request = {
+        "target": "IAV",
+        "fasta": WEB_FASTA,
+        "gff3": {"IAV": WEB_GFF3},
+        "isolate": "A/Test/1/2026",
+        "output_stem": "sample",
+        "hit_settings": WEB_HIT_SETTINGS,
+    }
+
+    fixed = service.annotate(request)
+    auto = service.annotate({**request, "target": "auto"})
+
+    pyodide_result = json.loads(
+        web_helpers.run_ganflu_web(
+            WEB_FASTA, WEB_GFF3, "IAV", "A/Test/1/2026", "sample", False, json.dumps(WEB_HIT_SETTINGS)
+        )
+    )
+    assert sorted(fixed["outputs"]) == sorted(pyodide_result["outputs"])
+    for name in ("sample.gff3", "sample.cds.fna", "sample.faa", "sample.hits.tsv"):
+        assert fixed["outputs"][name] == pyodide_result["outputs"][name]
+    assert fixed["summary"]["annotated_contigs"] == 1
+    assert "INFO - CDS nucleotide FASTA output:" in fixed["log"]
+    assert "sample.IAV.gbk" in auto["outputs"]
+    assert auto["summary"]["mode"] == "auto"
+    assert list(work_dir.iterdir()) == []
+
+    strict = service.annotate({**request, "hit_settings": {"minIdentity": 0.99}})
+    assert "No segment-compatible miniprot hits" in strict["error"]["message"]
+    assert "outputs" not in strict
+    with pytest.raises(ValueError, match="FASTA"):
+        service.annotate({**request, "fasta": "ATG"})
+    with pytest.raises(ValueError, match="no scan for target IBV"):
+        service.annotate({**request, "target": "IBV"})
+    with pytest.raises(ValueError, match="Unsupported annotate parameter"):
+        service.annotate({**request, "threads": 2})
+
+
+def test_gui_server_exposes_native_scan_api(fake_miniprot, tmp_path):
+    service = serve.NativeScanService(targets=["IAV"], threads=2, work_dir=str(tmp_path))
+    server = ganflu_cli.bind_gui_server(
+        "127.0.0.1", 0, ganflu_cli.get_webapp_dir(), port_fallback=False, scan_service=service
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = ganflu_cli.get_server_url(server)
+    try:
+        with urllib.request.urlopen(f"{url}api/health", timeout=30) as response:
+            assert json.loads(response.read())["threads"] == 2
+        request = urllib.request.Request(
+            f"{url}api/scan?targets=IAV&prefix=MP", data=b">c1\nATG\n", method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            assert "-t 2" in json.loads(response.read())["gff3"]["IAV"]
+        annotate_request = {"target": "IAV", "fasta": WEB_FASTA, "gff3": {"IAV": WEB_GFF3}}
+        status, result = request_json(
+            f"{url}api/annotate", {**annotate_request, "hit_settings": WEB_HIT_SETTINGS}
+        )
+        assert status == 200
+        assert ">ganflu_PB2" in result["outputs"]["ganflu.faa"]
+        status, result = request_json(f"{url}api/annotate", {**annotate_request, "gff3": {"IAV": ""}})
+        assert status == 500
+        assert result["error"]["message"] == "Miniprot GFF3 output is empty."
+        request = urllib.request.Request(f"{url}api/annotate", data=b"\xff", method="POST")
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(request, timeout=30)
+        assert excinfo.value.code == 400
+        with urllib.request.urlopen(f"{url}index.html", timeout=30) as response:
+            assert response.status == 200
+        assert request_json(f"{url}api/missing")[0] == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_cli_gui_backend_selection(monkeypatch):
+    args = ganflu_cli._get_gui_args(["--backend", "wasm", "--threads", "6"])
+    assert args.threads == 6
+    assert ganflu_cli.create_native_scan_service(args) is None
+
+    monkeypatch.setattr(ganflu_cli.shutil, "which", lambda name: None)
+    assert ganflu_cli.create_native_scan_service(ganflu_cli._get_gui_args([])) is None
+    with pytest.raises(RuntimeError, match="miniprot was not found"):
+        ganflu_cli.create_native_scan_service(ganflu_cli._get_gui_args(["--backend", "native"]))
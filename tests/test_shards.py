@@ -0,0 +1,183 @@
+import csv
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from Bio import SeqIO
+
+from ganflu import ganflu as ganflu_cli
+from ganflu.launchers import miniprot
+from ganflu.scripts import fixed_mode, shards
+
+
+INPUT_DIR = Path(__file__).parent / "test_inputs" / "ICV"
+INPUT_FASTA = INPUT_DIR / "Ann_Arbor.fna"
+MINIPROT_GFF3 = INPUT_DIR / "Ann_Arbor_test.gff3"
+
+
+class FakeMiniprot:
+    """Replays the recorded Ann Arbor alignments for the contigs of the input."""
+
+    def __init__(self, input=None, output=None, **kwargs):
+        self.input = input
+        self.output = output
+
+    def run_piped_commands(self):
+        contig_ids = {record.id for record in SeqIO.parse(self.input, "fasta")}
+        with (
+            open(MINIPROT_GFF3, encoding="utf-8") as source,
+            open(self.output, "w", encoding="utf-8") as output,
+        ):
+            for line in source:
+                fields = line.rstrip("\n").split("\t")
+                if line.startswith("##PAF"):
+                    keep = fields[6] in contig_ids
+                elif line.startswith("#"):
+                    keep = True
+                else:
+                    keep = fields[0] in contig_ids
+                if keep:
+                    output.write(line)
+        return 0
+
+
+def run_cli(monkeypatch, argv):
+    monkeypatch.setattr(sys, "argv", ["ganflu", *argv])
+    assert ganflu_cli.main() == 0
+
+
+def test_shard_parse_and_validation():
+    assert shards.Shard.parse("3/16") == shards.Shard(3, 16)
+    assert str(shards.Shard.parse(" 1 / 1 ")) == "1/1"
+    for value in ("0/4", "5/4", "1/0", "1-4", "a/b"):
+        with pytest.raises(ValueError):
+            shards.Shard.parse(value)
+
+
+def test_shards_partition_records_deterministically(tmp_path):
+    record_ids = [f"contig_{number}" for number in range(200)]
+
+    assignments = [shards.shard_index(record_id, 8) for record_id in record_ids]
+
+    assert assignments == [shards.shard_index(record_id, 8) for record_id in record_ids]
+    assert set(assignments) == set(range(1, 9))
+    for record_id, index in zip(record_ids, assignments):
+        assert [i for i in range(1, 9) if shards.Shard(i, 8).contains(record_id)] == [index]
+
+    kept = []
+    for index in (1, 2, 3):
+        output = tmp_path / f"shard{index}.fasta"
+        count, total = shards.write_shard_fasta(str(INPUT_FASTA), str(output), shards.Shard(index, 3))
+        assert total == 7
+        assert count == len(list(SeqIO.parse(output, "fasta")))
+        kept.extend(record.id for record in SeqIO.parse(output, "fasta"))
+    assert sorted(kept) == sorted(record.id for record in SeqIO.parse(INPUT_FASTA, "fasta"))
+
+
+def test_cli_rejects_malformed_shard(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["ganflu", "-i", "input.fa", "-t", "ICV", "--shard", "4/3"])
+    with pytest.raises(SystemExit):
+        ganflu_cli._get_args()
+    assert "between 1 and N" in capsys.readouterr().err
+
+
+def read_tsv(path):
+    with open(path, encoding="utf-8", newline="") as handle:
+        return list(csv.DictReader(handle, delimiter="\t"))
+
+
+def test_merged_fixed_shards_match_a_single_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(fixed_mode, "MiniprotCommandLine", FakeMiniprot)
+    common = ["-i", str(INPUT_FASTA), "-t", "ICV", "--isolate", "C/Ann_Arbor/1/1950"]
+    run_cli(monkeypatch, [*common, "-o", str(tmp_path / "single" / "Ann_Arbor")])
+    for index in (1, 2, 3):
+        shard_stem = tmp_path / f"shard{index}" / "Ann_Arbor"
+        run_cli(monkeypatch, [*common, "-o", str(shard_stem), "--shard", f"{index}/3"])
+    manifests = [json.loads((tmp_path / f"shard{i}" / "Ann_Arbor.shard.json").read_text()) for i in (1, 2, 3)]
+    assert sum(manifest["input_contigs"] for manifest in manifests) == 7
+    assert {manifest["total_contigs"] for manifest in manifests} == {7}
+
+    run_cli(
+        monkeypatch,
+        [
+            "merge",
+            "-i",
+            str(INPUT_FASTA),
+            "-o",
+            str(tmp_path / "merged" / "Ann_Arbor"),
+            "--isolate",
+            "C/Ann_Arbor/1/1950",
+            *(str(tmp_path / f"shard{index}" / "Ann_Arbor") for index in (1, 2, 3)),
+        ],
+    )
+
+    for suffix in (".gbk", ".cds.fna", ".faa"):
+        assert (tmp_path / "merged" / f"Ann_Arbor{suffix}").read_text() == (
+            tmp_path / "single" / f"Ann_Arbor{suffix}"
+        ).read_text()
+
+
+def test_merged_auto_shards_match_a_single_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(miniprot, "MiniprotCommandLine", FakeMiniprot)
+    common = [
+        "-i",
+        str(INPUT_FASTA),
+        "-t",
+        "auto",
+        "--auto-targets",
+        "ICV",
+        "--auto-write-rejected",
+        "--isolate",
+        "C/Ann_Arbor/1/1950",
+    ]
+    run_cli(monkeypatch, [*common, "-o", str(tmp_path / "single" / "AA")])
+    # With seven contigs, eight shards leave at least one shard empty.
+    shard_stems = [str(tmp_path / f"shard{index}" / "AA") for index in range(1, 9)]
+    for index, stem in enumerate(shard_stems, start=1):
+        run_cli(monkeypatch, [*common, "-o", stem, "--shard", f"{index}/8"])
+    assert any(
+        json.loads(Path(shards.shard_manifest_path(stem)).read_text())["input_contigs"] == 0
+        for stem in shard_stems
+    )
+
+    merged = tmp_path / "merged" / "AA"
+    run_cli(
+        monkeypatch,
+        [
+            "merge",
+            "-i",
+            str(INPUT_FASTA),
+            "-o",
+            str(merged),
+            "--isolate",
+            "C/Ann_Arbor/1/1950",
+            *(shards.shard_manifest_path(stem) for stem in reversed(shard_stems)),
+        ],
+    )
+
+    single = tmp_path / "single" / "AA"
+    for suffix in (".ICV.gbk", ".ICV.cds.fna", ".ICV.faa"):
+        assert Path(f"{merged}{suffix}").read_text() == Path(f"{single}{suffix}").read_text()
+    assert read_tsv(f"{merged}.auto.tsv") == read_tsv(f"{single}.auto.tsv")
+    rejected = Path(f"{merged}.auto.rejected.fasta").read_text()
+    assert rejected == Path(f"{single}.auto.rejected.fasta").read_text()
+    merged_summary = json.loads(Path(f"{merged}.auto.summary.json").read_text())
+    single_summary = json.loads(Path(f"{single}.auto.summary.json").read_text())
+    for key in ("counts", "by_target", "by_qc_result", "targets_scanned", "thresholds"):
+        assert merged_summary[key] == single_summary[key]
+
+
+def test_merge_rejects_incomplete_shard_sets(tmp_path):
+    stems = []
+    for index, contigs in ((1, 3), (3, 2)):
+        stem = str(tmp_path / f"shard{index}")
+        shards.write_shard_manifest(
+            stem, shards.Shard(index, 3), input_fasta=str(INPUT_FASTA), target="ICV", contigs=contigs, total=7
+        )
+        stems.append(stem)
+
+    with pytest.raises(ValueError, match="Expected shards 1..3"):
+        shards.read_shard_manifests(stems)
+    with pytest.raises(FileNotFoundError):
+        shards.read_shard_manifests([str(tmp_path / "missing")])
@@ -0,0 +1,142 @@
+import gzip
+import http.client
+import threading
+
+import pytest
+
+from ganflu import ganflu as ganflu_cli
+from ganflu import static_server
+
+
+WASM_BYTES = bytes(range(256)) * 8
+
+
+@pytest.fixture
+def web_server(tmp_path):
+    web_dir = tmp_path / "web"
+    (web_dir / "vendor" / "pyodide").mkdir(parents=True)
+    (web_dir / "js").mkdir()
+    (web_dir / "index.html").write_text("<html>ganflu</html>\n", encoding="utf-8")
+    script = "export const x = 1;\n" * 100
+    (web_dir / "js" / "app.js").write_text(script, encoding="utf-8")
+    (web_dir / "js" / "app.js.gz").write_bytes(gzip.compress(script.encode("utf-8"), mtime=0))
+    (web_dir / "vendor" / "pyodide" / "pyodide.asm.wasm").write_bytes(WASM_BYTES)
+    (web_dir / "_headers").write_text(
+        "/js/*\n  Cache-Control: no-cache\n  X-Ganflu-Test: js\n",
+        encoding="utf-8",
+    )
+    server = ganflu_cli.bind_gui_server("127.0.0.1", 0, web_dir, port_fallback=False)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def fetch(port, path, headers=None, method="GET"):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        connection.request(method, path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.headers, response.read()
+    finally:
+        connection.close()
+
+
+def test_gui_server_serves_precompressed_sibling(web_server):
+    status, headers, body = fetch(web_server, "/js/app.js", {"Accept-Encoding": "gzip, br;q=0"})
+
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert headers["Vary"] == "Accept-Encoding"
+    assert headers["Content-Type"] == "text/javascript"
+    assert gzip.decompress(body).startswith(b"export const x = 1;")
+
+    status, headers, body = fetch(web_server, "/js/app.js")
+    assert status == 200
+    assert headers["Content-Encoding"] is None
+    assert headers["Vary"] == "Accept-Encoding"
+    assert body.startswith(b"export const x = 1;")
+
+
+def test_gui_server_revalidates_with_etag(web_server):
+    status, headers, _ = fetch(web_server, "/index.html")
+    assert status == 200
+    assert headers["Cache-Control"] == static_server.REVALIDATE_CACHE_CONTROL
+    etag = headers["ETag"]
+
+    status, headers, body = fetch(web_server, "/", {"If-None-Match": etag})
+    assert status == 304
+    assert headers["ETag"] == etag
+    assert body == b""
+
+    status, _, _ = fetch(web_server, "/index.html", {"If-None-Match": '"other"'})
+    assert status == 200
+
+
+def test_gui_server_serves_byte_ranges(web_server):
+    status, headers, body = fetch(web_server, "/vendor/pyodide/pyodide.asm.wasm", {"Range": "bytes=10-19"})
+    assert status == 206
+    assert headers["Content-Range"] == f"bytes 10-19/{len(WASM_BYTES)}"
+    assert headers["Content-Type"] == "application/wasm"
+    assert body == WASM_BYTES[10:20]
+
+    status, headers, body = fetch(web_server, "/vendor/pyodide/pyodide.asm.wasm", {"Range": "bytes=-4"})
+    assert status == 206
+    assert body == WASM_BYTES[-4:]
+
+    status, headers, _ = fetch(web_server, "/vendor/pyodide/pyodide.asm.wasm", {"Range": f"bytes={len(WASM_BYTES)}-"})
+    assert status == 416
+    assert headers["Content-Range"] == f"bytes */{len(WASM_BYTES)}"
+
+    status, _, body = fetch(
+        web_server,
+        "/vendor/pyodide/pyodide.asm.wasm",
+        {"Range": "bytes=0-3", "If-Range": '"stale"'},
+    )
+    assert status == 200
+    assert body == WASM_BYTES
+
+
+def test_gui_server_cache_control_rules(web_server):
+    _, headers, _ = fetch(web_server, "/vendor/pyodide/pyodide.asm.wasm", method="HEAD")
+    assert headers["Cache-Control"] == static_server.IMMUTABLE_CACHE_CONTROL
+    assert headers["Accept-Ranges"] == "bytes"
+
+    _, headers, _ = fetch(web_server, "/js/app.js", method="HEAD")
+    assert headers["Cache-Control"] == "no-cache"
+    assert headers["X-Ganflu-Test"] == "js"
+
+
+def test_gui_server_returns_404_for_missing_files(web_server):
+    status, _, _ = fetch(web_server, "/missing.js")
+    assert status == 404
+
+
+def test_parse_byte_range():
+    assert static_server.parse_byte_range("bytes=0-", 10) == (0, 9)
+    assert static_server.parse_byte_range("bytes=5-100", 10) == (5, 9)
+    assert static_server.parse_byte_range("bytes=-3", 10) == (7, 9)
+    assert static_server.parse_byte_range("bytes=0-1,4-5", 10) is None
+    assert static_server.parse_byte_range("items=0-1", 10) is None
+    with pytest.raises(static_server.RangeNotSatisfiable):
+        static_server.parse_byte_range("bytes=10-", 10)
+
+
+def test_parse_headers_file_supports_splats_and_removal(tmp_path):
+    path = tmp_path / "_headers"
+    path.write_text(
+        "# comment\n/*\n  X-Frame-Options: DENY\n/wasm/:name/*\n  ! X-Frame-Options\n",
+        encoding="utf-8",
+    )
+    rules = static_server.parse_headers_file(path)
+
+    headers = {}
+    static_server.apply_header_rules(rules, "/index.html", headers)
+    assert headers == {"x-frame-options": ("X-Frame-Options", "DENY")}
+
+    headers = {}
+    static_server.apply_header_rules(rules, "/wasm/miniprot/dist/miniprot.wasm", headers)
+    assert headers == {}
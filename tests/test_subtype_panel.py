@@ -0,0 +1,179 @@
+import logging
+
+from Bio import SeqIO
+
+from ganflu.launchers import miniprot
+from ganflu.scripts import gff3togbk, subtype_panel
+
+
+def mrna_line(parent_id, seqid, product, identity, *, target_end=30):
+    return (
+        f"{seqid}\tminiprot\tmRNA\t1\t90\t100\t+\t.\t"
+        f"ID={parent_id};Rank=1;Identity={identity:.4f};Positive={identity:.4f};"
+        f"Target={product} 1 {target_end}"
+    )
+
+
+def cds_line(parent_id, seqid, product, identity):
+    return (
+        f"{seqid}\tminiprot\tCDS\t1\t9\t.\t+\t0\t"
+        f"Parent={parent_id};Rank=1;Identity={identity:.4f};Target={product} 1 3"
+    )
+
+
+def test_select_subtype_calls_keeps_best_panel_hit_per_antigen_contig(tmp_path):
+    panel_gff3 = tmp_path / "panel.gff3"
+    panel_gff3.write_text(
+        "\n".join(
+            [
+                "##gff-version 3",
+                mrna_line("MP1", "contig_ha", "HA_H1_A-California-07-2009", 0.91),
+                mrna_line("MP2", "contig_ha", "HA_H5_A-goose-Guangdong-1-1996", 0.97),
+                mrna_line("MP3", "contig_ha", "NA_N1_A-goose-Guangdong-1-1996", 0.99),
+                mrna_line("MP4", "contig_na", "NA_N9_A-Anhui-1-2013", 0.95),
+                mrna_line("MP5", "contig_pb2", "HA_H3_A-Perth-16-2009", 0.99),
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+
+    calls = subtype_panel.select_subtype_calls(
+        panel_gff3,
+        {"contig_ha": "HA", "contig_na": "NA"},
+    )
+
+    assert sorted(calls) == ["contig_ha", "contig_na"]
+    assert calls["contig_ha"].antigen == "HA"
+    assert calls["contig_ha"].subtype == "H5"
+    assert calls["contig_ha"].panel_product == "HA_H5_A-goose-Guangdong-1-1996"
+    assert calls["contig_na"].subtype == "N9"
+
+
+def test_run_subtype_search_uses_the_configured_miniprot_and_threads(tmp_path, monkeypatch):
+    launched = []
+
+    class FakeMiniprot:
+        def __init__(self, **kwargs):
+            launched.append(kwargs)
+            self.output = kwargs["output"]
+
+        def run_piped_commands(self):
+            with open(self.output, "w", encoding="utf-8") as handle:
+                handle.write(mrna_line("MP1", "contig_ha", "HA_H5_A-goose-Guangdong-1-1996", 0.97) + "\n")
+
+    monkeypatch.setattr(miniprot, "MiniprotCommandLine", FakeMiniprot)
+    fasta = tmp_path / "input.fa"
+    fasta.write_text(">contig_ha\n" + "ATG" * 30 + "\n>contig_pb2\n" + "ATG" * 30 + "\n", encoding="utf-8")
+    panel = tmp_path / "panel.faa"
+    panel.write_text(">HA_H5_A-goose-Guangdong-1-1996\n" + "M" * 30 + "\n", encoding="utf-8")
+
+    calls = subtype_panel.run_subtype_search(
+        input_fasta=str(fasta),
+        antigen_contigs={"contig_ha": "HA"},
+        panel_faa=str(panel),
+        work_dir=str(tmp_path),
+        stem="sample",
+        logger=logging.getLogger("test"),
+        miniprot_bin="/opt/miniprot/bin/miniprot",
+        threads=6,
+    )
+
+    assert calls["contig_ha"].subtype == "H5"
+    assert len(launched) == 1
+    assert launched[0]["miniprot_bin"] == "/opt/miniprot/bin/miniprot"
+    assert launched[0]["threads"] == 6
+
+
+def test_antigen_contigs_from_segments_uses_serotype_segments():
+    config = {"serotype": {"HA": {"segment": "HA", "prefix": "H"}, "NA": {"segment": "NA", "prefix": "N"}}}
+
+    antigen_contigs = subtype_panel.antigen_contigs_from_segments(
+        {"c1": "HA", "c2": "PB2", "c3": "NA"},
+        config,
+    )
+
+    assert antigen_contigs == {"c1": "HA", "c3": "NA"}
+
+
+def test_resolve_subtype_panel_prefers_override(tmp_path):
+    config = {"metadata": {"subtype_panel_faa": "prot/panel.faa"}}
+
+    assert subtype_panel.resolve_subtype_panel(str(tmp_path), {}) is None
+    assert subtype_panel.resolve_subtype_panel(str(tmp_path), config) == str(tmp_path / "prot" / "panel.faa")
+    assert subtype_panel.resolve_subtype_panel(str(tmp_path), config, "other.faa").endswith("other.faa")
+
+
+def test_gff3togbk_subtype_calls_feed_notes_and_serotype(tmp_path):
+    fasta = tmp_path / "sample.fa"
+    gff3 = tmp_path / "sample.gff3"
+    toml = tmp_path / "IAV.toml"
+    subtype_tsv = tmp_path / "sample.subtype.tsv"
+    output = tmp_path / "sample.gbk"
+
+    fasta.write_text(">ha\nATGAAATAA\n>na\nATGAAATAA\n", encoding="utf-8")
+    gff3.write_text(
+        "\n".join(
+            [
+                "##gff-version 3",
+                cds_line("MP1", "ha", "HA_H1", 0.80),
+                cds_line("MP2", "na", "NA_N1", 0.90),
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    toml.write_text(
+        "\n".join(
+            [
+                "[segments]",
+                'HA = {id = 4, file = "HA.fa", description = "{organism} segment 4 hemagglutinin (HA) gene, complete cds"}',
+                'NA = {id = 6, file = "NA.fa", description = "{organism} segment 6 neuraminidase (NA) gene, complete cds"}',
+                "",
+                "[serotype]",
+                'HA = {segment = "HA", prefix = "H"}',
+                'NA = {segment = "NA", prefix = "N"}',
+                "",
+                "[genes]",
+                'HA = {product = "hemagglutinin", has_intron = false, ribosomal_slippage = false}',
+                'NA = {product = "neuraminidase", has_intron = false, ribosomal_slippage = false}',
+                "",
+                "[annotations]",
+                'molecule_type = "cRNA"',
+                'organism = "Influenza A virus ({isolate}({subtype}))"',
+                'taxonomy = ["Viruses"]',
+                'data_file_division = "VRL"',
+                'topology = "linear"',
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    subtype_panel.write_subtype_tsv(
+        {
+            "ha": subtype_panel.SubtypeCall("ha", "HA", "H5", 0.97, 1.0, "HA_H5_A-goose-Guangdong-1-1996"),
+        },
+        str(subtype_tsv),
+    )
+
+    gff3togbk.main(
+        [
+            "-i", str(fasta),
+            "-g", str(gff3),
+            "--toml", str(toml),
+            "-o", str(output),
+            "--isolate", "A/test/1/2026",
+            "--subtype-calls", str(subtype_tsv),
+        ]
+    )
+
+    records = {
+        record.features[0].qualifiers["gene"][0]: record
+        for record in SeqIO.parse(output, "genbank")
+    }
+    ha_notes = records["HA"].features[0].qualifiers["note"]
+    na_notes = records["NA"].features[0].qualifiers["note"]
+    assert ha_notes.count("subtype: H5") == 1
+    assert "subtype: H1" not in ha_notes
+    assert "subtype: N1" in na_notes
+    assert "H5N1" in output.read_text(encoding="utf-8")
@@ -0,0 +1,88 @@
+import csv
+import random
+
+import pytest
+from Bio import SeqIO
+from Bio.Seq import Seq
+
+from ganflu.scripts import auto_mode, synthetic
+
+
+def test_write_synthetic_is_deterministic_and_matches_auto_tsv_layout(tmp_path):
+    first = synthetic.write_synthetic(60, tmp_path / "first.fasta", seed=7)
+    synthetic.write_synthetic(60, tmp_path / "second.fasta", seed=7)
+
+    assert (tmp_path / "first.fasta").read_text() == (tmp_path / "second.fasta").read_text()
+    assert (tmp_path / "first.truth.tsv").read_text() == (tmp_path / "second.truth.tsv").read_text()
+    with open(tmp_path / "first.truth.tsv", encoding="utf-8", newline="") as handle:
+        reader = csv.DictReader(handle, delimiter="\t")
+        rows = list(reader)
+    assert reader.fieldnames == auto_mode.TSV_COLUMNS
+    records = list(SeqIO.parse(str(tmp_path / "first.fasta"), "fasta"))
+    assert [row["contig_id"] for row in rows] == [record.id for record in records]
+    assert [int(row["length"]) for row in rows] == [len(record.seq) for record in records]
+    assert records[0].id == "syn000001"
+    assert len(first) == 60
+    for row in rows:
+        kind = row["notes"].split(";")[0].removeprefix("synthetic:")
+        assert row["call"] == synthetic.KIND_TRUTH[kind]["call"]
+        if kind != "background":
+            assert row["target"] in synthetic.DEFAULT_TARGET_WEIGHTS
+
+    different = synthetic.SyntheticGenerator(seed=8).generate(60)
+    assert [str(contig.record.seq) for contig in different] != [str(contig.record.seq) for contig in first]
+
+
+def test_generator_respects_targets_and_kinds():
+    contigs = synthetic.SyntheticGenerator(seed=3, targets=["IBV"], kinds=["truncated"]).generate(20)
+
+    assert {contig.truth["target"] for contig in contigs} == {"IBV"}
+    assert {contig.truth["status"] for contig in contigs} == {"partial"}
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError, match="duplicated"):
+        synthetic.SyntheticGenerator(kinds=["duplicated"])
+
+
+def test_reverse_translate_and_synonymous_changes_keep_the_protein():
+    rng = random.Random(0)
+    protein = "MKAILVVLLYTFATANA"
+
+    cds = synthetic.reverse_translate(protein, rng)
+    mutated = synthetic.mutate_synonymous("GG" + cds + "AA", 2, 2 + len(cds), rng, rate=1.0)
+
+    assert str(Seq(cds).translate()) == protein + "*"
+    assert str(Seq(mutated[2:2 + len(cds)]).translate()) == protein + "*"
+    assert mutated[2:2 + len(cds)] != cds
+
+
+def test_sample_sources_cover_every_sample_segment():
+    for target, (_, segments) in synthetic.SAMPLE_SEGMENTS.items():
+        sources = synthetic.load_sample_sources(target)
+
+        assert sorted(source[4] for source in sources) == sorted(segments)
+        for _, sequence, start, end, _ in sources:
+            assert sequence[start:start + 3] == "ATG"
+            assert (end - start) // 3 > 200
+
+
+def test_compare_with_truth_counts_matches_and_flag_subsets():
+    truth = [
+        {"contig_id": "a", "call": "accept", "target": "IAV", "flags": "frameshift"},
+        {"contig_id": "b", "call": "reject", "target": "-", "flags": ""},
+        {"contig_id": "c", "call": "accept", "target": "IBV", "flags": "internal_stop;nonfunctional"},
+    ]
+    observed = [
+        {"contig_id": "a", "call": "accept", "target": "IAV", "flags": "frameshift;low_identity"},
+        {"contig_id": "b", "call": "accept", "target": "IAV", "flags": "-"},
+        {"contig_id": "c", "call": "accept", "target": "IBV", "flags": "internal_stop"},
+    ]
+
+    counts = synthetic.compare_with_truth(truth, observed, columns=("call", "target", "flags"))
+
+    assert counts == {
+        "call": {"checked": 3, "matched": 2},
+        "target": {"checked": 3, "matched": 2},
+        "flags": {"checked": 2, "matched": 1},
+    }
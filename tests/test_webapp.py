@@ -1,4 +1,8 @@
+import gzip
+import hashlib
 import json
+import logging
+import os
 import re
 import sys
 import subprocess
@@ -6,7 +10,10 @@ import zipfile
 from importlib.util import module_from_spec, spec_from_file_location
 from pathlib import Path
 
+import pytest
+
 import ganflu
+from ganflu import web_helpers
 from ganflu.scripts import gff3togbk
 
 
@@ -14,15 +21,6 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 WEB_ROOT = REPO_ROOT / "ganflu" / "web"
 
 
-def load_python_helpers_namespace():
-    helper_text = (WEB_ROOT / "js" / "app" / "python-helpers.js").read_text(encoding="utf-8")
-    match = re.search(r"export const PYTHON_HELPERS = `\n(.*)\n`;\n?\Z", helper_text, re.S)
-    assert match is not None
-    namespace = {}
-    exec(match.group(1), namespace)
-    return namespace
-
-
 def load_cloudflare_pages_module():
     module_path = REPO_ROOT / "tools" / "prepare_cloudflare_pages.py"
     spec = spec_from_file_location("prepare_cloudflare_pages", module_path)
@@ -33,6 +31,16 @@ def load_cloudflare_pages_module():
     return module
 
 
+def load_prepare_browser_wheel_module():
+    module_path = REPO_ROOT / "tools" / "prepare_browser_wheel.py"
+    spec = spec_from_file_location("prepare_browser_wheel", module_path)
+    assert spec is not None
+    assert spec.loader is not None
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
 def test_gff3togbk_accepts_raw_args_without_sys_argv(monkeypatch):
     monkeypatch.setattr(sys, "argv", ["gff3togbk"])
     args = gff3togbk.parse_arguments(
@@ -61,17 +69,24 @@ def test_webapp_assets_are_packaged_for_static_serving():
         WEB_ROOT / "open-source-notices.html",
         WEB_ROOT / "js" / "app.js",
         WEB_ROOT / "js" / "app" / "pyodide.js",
-        WEB_ROOT / "js" / "app" / "python-helpers.js",
+        WEB_ROOT / "js" / "app" / "pyodide-worker.js",
+        WEB_ROOT / "js" / "app" / "miniprot-worker.js",
+        WEB_ROOT / "js" / "app" / "worker-rpc.js",
+        WEB_ROOT / "js" / "app" / "batch.js",
+        WEB_ROOT / "js" / "app" / "native-backend.js",
+        WEB_ROOT / "js" / "app" / "result-cache.js",
+        WEB_ROOT / "js" / "app" / "fasta-stream.js",
         WEB_ROOT / "samples" / "IAV_PR8.fasta",
         WEB_ROOT / "samples" / "IBV_B_Victoria_2_1987.fa",
         WEB_ROOT / "samples" / "ICV_Ann_Arbor_1_1950.fna",
         WEB_ROOT / "samples" / "IDV_swine_Oklahoma_1334_2011.fna",
-        WEB_ROOT / "vendor" / "pyodide" / "v0.29.0" / "full" / "pyodide.js",
+        WEB_ROOT / "vendor" / "pyodide" / "v0.29.0" / "full" / "pyodide.mjs",
         WEB_ROOT / "vendor" / "pyodide" / "v0.29.0" / "full" / "pyodide.asm.wasm",
         WEB_ROOT / "vendor" / "pyodide" / "v0.29.0" / "full" / "python_stdlib.zip",
         WEB_ROOT / "vendor" / "pyodide-wheels" / "numpy-2.2.5-cp313-cp313-pyodide_2025_0_wasm32.whl",
         WEB_ROOT / "vendor" / "pyodide-wheels" / "biopython-1.85-cp313-cp313-pyodide_2025_0_wasm32.whl",
         WEB_ROOT / "wasm" / "miniprot" / "miniprot-ganflu.js",
+        WEB_ROOT / "ganflu-db" / "IAV.zip",
     ]
     missing = [str(path.relative_to(REPO_ROOT)) for path in required if not path.exists()]
     assert not missing
@@ -104,11 +119,21 @@ def test_webapp_assets_are_packaged_for_static_serving():
     assert 'id="min-identity"' in index_html
     assert 'id="min-identity" type="number" min="0" max="1" step="0.01" value="0.70"' in index_html
     assert 'id="max-secondary-alignments"' in index_html
+    assert 'id="cancel-button"' in index_html
+    assert "vendor/pyodide/v0.29.0/full/pyodide.js" not in index_html
     app_js = (WEB_ROOT / "js" / "app.js").read_text(encoding="utf-8")
     headers_text = (WEB_ROOT / "_headers").read_text(encoding="utf-8")
     miniprot_js = (WEB_ROOT / "js" / "app" / "miniprot.js").read_text(encoding="utf-8")
-    helpers_js = (WEB_ROOT / "js" / "app" / "python-helpers.js").read_text(encoding="utf-8")
+    helpers_py = (REPO_ROOT / "ganflu" / "web_helpers.py").read_text(encoding="utf-8")
+    pyodide_worker_js = (WEB_ROOT / "js" / "app" / "pyodide-worker.js").read_text(encoding="utf-8")
+    miniprot_worker_js = (WEB_ROOT / "js" / "app" / "miniprot-worker.js").read_text(encoding="utf-8")
     assert "runAutoGff3ToOutputs" in app_js
+    assert "nativeBackend.detect()" in app_js
+    assert "nativeBackend.annotate(" in app_js
+    assert "runNativeMiniprotScans" in app_js
+    assert "scanWithCache" in app_js
+    assert "annotateWithCache" in app_js
+    assert "RESULT_CACHE_NAMESPACE = `${GANFLU_WHEEL_NAME}:${ASSET_MANIFEST_VERSION}`" in app_js
     assert "renderRunSummary" in app_js
     assert "createZipBlob" in app_js
     assert "downloadResultsZip" in app_js
@@ -134,19 +159,207 @@ def test_webapp_assets_are_packaged_for_static_serving():
     assert "D/swine/Oklahoma/1334/2011" in app_js
     assert "./samples/IAV_PR8.fasta" in app_js
     assert "renderTabs" not in app_js
-    assert "GANFLU_HIT_SETTINGS_JSON" in app_js
+    assert "GANFLU_HIT_SETTINGS_JSON" in pyodide_worker_js
+    assert "runPython" not in app_js
+    assert "isCancelledError" in app_js
+    assert "serveWorkerMethods" in pyodide_worker_js
+    assert "pyodide.FS.writeFile(path, bytes)" in pyodide_worker_js
+    assert "run_ganflu_auto_web_files(" in pyodide_worker_js
+    assert "from ganflu import web_helpers" in pyodide_worker_js
+    assert "pyodide.unpackArchive(archive, 'zip'" in pyodide_worker_js
+    assert "ensureTargetData(pyodide, Object.keys(gff3ByTarget)" in pyodide_worker_js
+    assert "prefetchTargetData();" in app_js
+    assert "PYTHON_HELPERS" not in pyodide_worker_js
+    assert "_loadSnapshot" not in pyodide_worker_js
+    assert "withTransfer(gff3Bytes, [gff3Bytes.buffer])" in miniprot_worker_js
+    assert "await readFastaStream(file" in app_js
+    assert "file.arrayBuffer()" not in app_js
+    fasta_stream_js = (WEB_ROOT / "js" / "app" / "fasta-stream.js").read_text(encoding="utf-8")
+    assert "file.stream().getReader()" in fasta_stream_js
+    assert "Input FASTA contains duplicate record IDs" in fasta_stream_js
+    assert '<input id="fasta-file" type="file" multiple' in index_html
+    assert 'id="batch-queue"' in index_html
+    assert "runBatchPipeline" in app_js
+    assert "mergeTsvTables(tsvTables)" in app_js
+    assert "createGanfluMiniprot" in miniprot_worker_js
     assert "maxSecondaryAlignments" in app_js
     assert "elements.outputStem.value = makeSafeStem(file.name)" in app_js
     assert "bestN = 100" in miniprot_js
     assert "outputScoreRatio = 0.1" in miniprot_js
     assert "secondaryToPrimaryRatio = 0.1" in miniprot_js
+    assert "navigator?.hardwareConcurrency" in miniprot_js
+    assert "getMiniprotPoolSize(AUTO_TARGETS.length)" in app_js
+    assert "Promise.all(AUTO_TARGETS.map(scanTarget))" in app_js
     assert "/js/*" in headers_text
     assert "/samples/*" in headers_text
     assert "Cache-Control: public, max-age=0, must-revalidate" in headers_text
-    assert "run_ganflu_auto_web" in helpers_js
-    assert "_normalize_hit_settings" in helpers_js
-    assert "_build_genbank_feature_data" in helpers_js
-    assert 'f"{stem}.summary.json"' in helpers_js
+    assert "run_ganflu_auto_web" in helpers_py
+    assert "_normalize_hit_settings" in helpers_py
+    assert "_build_genbank_feature_data" in helpers_py
+    assert 'f"{stem}.summary.json"' in helpers_py
+    assert (WEB_ROOT / "sw.js").exists()
+    assert "registerAssetCache();" in app_js
+    assert "/sw.js" in headers_text
+
+
+def write_pyodide_runtime(module, web_root):
+    runtime_dir = web_root / module.PYODIDE_RUNTIME_PATH
+    runtime_dir.mkdir(parents=True, exist_ok=True)
+    for name in module.PYODIDE_RUNTIME_FILES:
+        (runtime_dir / name).write_bytes(name.encode("utf-8"))
+
+
+def test_asset_manifest_hashes_versioned_runtime_assets(tmp_path, monkeypatch):
+    module = load_prepare_browser_wheel_module()
+    web_root = tmp_path / "web"
+    write_pyodide_runtime(module, web_root)
+    (web_root / "wasm" / "miniprot" / "dist").mkdir(parents=True)
+    (web_root / "js").mkdir()
+    (web_root / "ganflu-db").mkdir()
+    (web_root / "ganflu-0.1.0-py3-none-any.whl").write_bytes(b"wheel")
+    (web_root / "ganflu-db" / "IAV.zip").write_bytes(b"PK")
+    (web_root / "vendor" / "pyodide" / "v0.29.0" / "full" / "pyodide.asm.wasm").write_bytes(b"wasm")
+    (web_root / "wasm" / "miniprot" / "dist" / "miniprot-ganflu.wasm").write_bytes(b"miniprot")
+    (web_root / "js" / "app.js").write_text("console.log('app');\n", encoding="utf-8")
+
+    manifest = module.write_asset_manifest(web_root)
+
+    assert sorted(manifest["assets"]) == [
+        "ganflu-0.1.0-py3-none-any.whl",
+        "ganflu-db/IAV.zip",
+        "vendor/pyodide/v0.29.0/full/pyodide-lock.json",
+        "vendor/pyodide/v0.29.0/full/pyodide.asm.js",
+        "vendor/pyodide/v0.29.0/full/pyodide.asm.wasm",
+        "vendor/pyodide/v0.29.0/full/pyodide.mjs",
+        "vendor/pyodide/v0.29.0/full/python_stdlib.zip",
+        "wasm/miniprot/dist/miniprot-ganflu.wasm",
+    ]
+    assert manifest["assets"]["ganflu-0.1.0-py3-none-any.whl"] == hashlib.sha256(b"wheel").hexdigest()[:16]
+    assert json.loads((web_root / "asset-manifest.json").read_text(encoding="utf-8")) == manifest
+
+    (web_root / "ganflu-0.1.0-py3-none-any.whl").write_bytes(b"wheel v2")
+    updated = module.build_asset_manifest(web_root)
+    assert updated["version"] != manifest["version"]
+    assert updated["assets"]["ganflu-0.1.0-py3-none-any.whl"] != manifest["assets"]["ganflu-0.1.0-py3-none-any.whl"]
+    assert (
+        updated["assets"]["wasm/miniprot/dist/miniprot-ganflu.wasm"]
+        == manifest["assets"]["wasm/miniprot/dist/miniprot-ganflu.wasm"]
+    )
+
+    config_path = tmp_path / "config.js"
+    config_path.write_text((WEB_ROOT / "js" / "config.js").read_text(encoding="utf-8"), encoding="utf-8")
+    monkeypatch.setattr(module, "CONFIG_PATH", config_path)
+    module.update_config("ganflu-0.1.0-py3-none-any.whl", updated["version"])
+    assert f'ASSET_MANIFEST_VERSION = "{updated["version"]}";' in config_path.read_text(encoding="utf-8")
+
+    # The Service Worker must serve every manifest path from its cache.
+    sw_js = (WEB_ROOT / "sw.js").read_text(encoding="utf-8")
+    precached = re.search(r"const PRECACHED_PATH_RE = /(.+)/;", sw_js).group(1).replace("\\/", "/")
+    assert all(re.match(precached, path) for path in manifest["assets"])
+
+    (web_root / "vendor" / "pyodide" / "v0.29.0" / "full" / "pyodide.asm.wasm").unlink()
+    with pytest.raises(FileNotFoundError, match="pyodide.asm.wasm"):
+        module.write_asset_manifest(web_root)
+    assert json.loads((web_root / "asset-manifest.json").read_text(encoding="utf-8")) == manifest
+
+
+def test_committed_asset_manifest_matches_the_web_assets():
+    # Rebuild with tools/prepare_browser_wheel.py when this fails; an empty
+    # version would leave the Service Worker unregistered.
+    module = load_prepare_browser_wheel_module()
+    committed = json.loads((WEB_ROOT / "asset-manifest.json").read_text(encoding="utf-8"))
+    config_js = (WEB_ROOT / "js" / "config.js").read_text(encoding="utf-8")
+
+    assert committed == module.build_asset_manifest(WEB_ROOT)
+    assert committed["version"]
+    assert f'ASSET_MANIFEST_VERSION = "{committed["version"]}";' in config_js
+
+
+def test_committed_asset_manifest_precaches_the_pyodide_runtime():
+    module = load_prepare_browser_wheel_module()
+    committed = json.loads((WEB_ROOT / "asset-manifest.json").read_text(encoding="utf-8"))
+
+    for name in module.PYODIDE_RUNTIME_FILES:
+        assert f"vendor/pyodide/v0.29.0/full/{name}" in committed["assets"]
+
+
+def test_precompress_assets_writes_smaller_gzip_siblings(tmp_path, monkeypatch):
+    module = load_prepare_browser_wheel_module()
+    monkeypatch.setattr(module, "brotli", None)
+    web_root = tmp_path / "web"
+    write_pyodide_runtime(module, web_root)
+    wasm_path = web_root / "vendor" / "pyodide" / "v0.29.0" / "full" / "pyodide.asm.wasm"
+    wasm_path.write_bytes(b"\0asm" * 1024)
+    (web_root / "tiny.js").write_text("1;\n", encoding="utf-8")
+    (web_root / "random.json").write_bytes(os.urandom(4096))
+
+    written = module.precompress_assets(web_root)
+
+    assert written == [wasm_path.with_name("pyodide.asm.wasm.gz")]
+    assert gzip.decompress(written[0].read_bytes()) == wasm_path.read_bytes()
+    assert not (web_root / "tiny.js.gz").exists()
+    assert not (web_root / "random.json.gz").exists()
+    assert module.precompress_assets(web_root) == []
+
+    (web_root / "ganflu-0.1.0-py3-none-any.whl").write_bytes(b"wheel")
+    assert "vendor/pyodide/v0.29.0/full/pyodide.asm.wasm.gz" not in module.build_asset_manifest(web_root)["assets"]
+
+
+def test_browser_wheel_build_refuses_bytecode_from_another_python(monkeypatch, capsys):
+    module = load_prepare_browser_wheel_module()
+    monkeypatch.setattr(module, "PYODIDE_PYTHON_VERSION", (2, 7))
+
+    with pytest.raises(RuntimeError, match="--no-bytecode"):
+        module.check_bytecode_python()
+    assert module.main([]) == 1
+    assert "must be compiled by Python 2.7" in capsys.readouterr().err
+    module.check_bytecode_python((2, 7))
+
+
+def test_committed_browser_wheel_ships_pyodide_bytecode():
+    wheel_path = WEB_ROOT / f"ganflu-{ganflu.__version__}-py3-none-any.whl"
+    with zipfile.ZipFile(wheel_path) as zf:
+        names = set(zf.namelist())
+    sources = {name for name in names if name.endswith(".py")}
+    assert sources
+    for name in sources:
+        directory, _, module_file = name.rpartition("/")
+        assert f"{directory}/__pycache__/{module_file[:-3]}.cpython-313.pyc" in names
+
+
+def test_add_wheel_bytecode_adds_unchecked_hash_pyc_to_record(tmp_path):
+    module = load_prepare_browser_wheel_module()
+    wheel_path = tmp_path / "demo-1.0-py3-none-any.whl"
+    with zipfile.ZipFile(wheel_path, "w") as zf:
+        zf.writestr("demo/__init__.py", "VALUE = 42\n")
+        zf.writestr("demo/data.txt", "not python\n")
+        zf.writestr("demo-1.0.dist-info/RECORD", "demo/__init__.py,sha256=x,11\ndemo-1.0.dist-info/RECORD,,\n")
+
+    assert module.add_wheel_bytecode(wheel_path) == 1
+
+    pyc_name = f"demo/__pycache__/__init__.{sys.implementation.cache_tag}.pyc"
+    with zipfile.ZipFile(wheel_path) as zf:
+        pyc = zf.read(pyc_name)
+        record = zf.read("demo-1.0.dist-info/RECORD").decode("utf-8").splitlines()
+        assert zf.read("demo/data.txt") == b"not python\n"
+    assert int.from_bytes(pyc[4:8], "little") == 0b01
+    assert record[0] == "demo/__init__.py,sha256=x,11"
+    assert record[1].startswith(f"{pyc_name},sha256=")
+    assert record[1].endswith(f",{len(pyc)}")
+    assert record[-1] == "demo-1.0.dist-info/RECORD,,"
+
+    # Unchecked-hash bytecode is used as is, even when the source changes.
+    site_dir = tmp_path / "site"
+    with zipfile.ZipFile(wheel_path) as zf:
+        zf.extractall(site_dir)
+    (site_dir / "demo" / "__init__.py").write_text("VALUE = 0\n", encoding="utf-8")
+    sys.path.insert(0, str(site_dir))
+    try:
+        demo = __import__("demo")
+        assert demo.VALUE == 42
+    finally:
+        sys.path.remove(str(site_dir))
+        sys.modules.pop("demo", None)
 
 
 def test_local_index_keeps_cloudflare_analytics_deploy_only():
@@ -191,6 +404,90 @@ def test_cloudflare_bundle_copies_required_static_assets(tmp_path):
     assert sorted(path.name for path in output_root.glob("ganflu-*.whl")) == [match.group(1)]
 
 
+def write_fingerprint_fixture(root):
+    for relative in (
+        "js/app",
+        "vendor/fonts",
+        "vendor/pyodide/v0.29.0/full",
+        "vendor/pyodide-wheels",
+        "wasm/miniprot/dist",
+        "ganflu-db",
+    ):
+        (root / relative).mkdir(parents=True)
+    (root / "js" / "config.js").write_text((WEB_ROOT / "js" / "config.js").read_text(encoding="utf-8"), encoding="utf-8")
+    (root / "js" / "app.js").write_text("import './app/miniprot-worker.js';\n", encoding="utf-8")
+    (root / "js" / "app" / "miniprot-worker.js").write_text(
+        "import { createGanfluMiniprot } from '../../wasm/miniprot/miniprot-ganflu.js';\n",
+        encoding="utf-8",
+    )
+    (root / "index.html").write_text(
+        "<style>src: url('./vendor/fonts/a.woff2');</style>\n"
+        '<script type="module" src="./js/app.js?v=1"></script>\n',
+        encoding="utf-8",
+    )
+    (root / "vendor" / "fonts" / "a.woff2").write_bytes(b"font")
+    (root / "vendor" / "pyodide" / "v0.29.0" / "full" / "pyodide.mjs").write_text("export {};\n", encoding="utf-8")
+    (root / "vendor" / "pyodide-wheels" / "six-1.17.0-py2.py3-none-any.whl").write_bytes(b"six")
+    (root / "wasm" / "miniprot" / "miniprot-ganflu.js").write_text("export {};\n", encoding="utf-8")
+    (root / "wasm" / "miniprot" / "dist" / "miniprot-ganflu.wasm").write_bytes(b"\0asm")
+    (root / "ganflu-0.1.0-py3-none-any.whl").write_bytes(b"wheel")
+    (root / "ganflu-db" / "IAV.zip").write_bytes(b"PK")
+    (root / "asset-manifest.json").write_text("{}", encoding="utf-8")
+    (root / "_headers").write_text("/js/*\n  Cache-Control: public, max-age=0, must-revalidate\n", encoding="utf-8")
+
+
+def test_cloudflare_fingerprinting_rewrites_references(tmp_path):
+    module = load_cloudflare_pages_module()
+    root = tmp_path / "bundle"
+    write_fingerprint_fixture(root)
+
+    renamed = module.fingerprint_bundle(root)
+
+    assert set(renamed) == {"ganflu-0.1.0-py3-none-any.whl", *module.FINGERPRINT_DIRS}
+    for hashed in renamed.values():
+        assert (root / hashed).exists()
+    assert not (root / "js").exists()
+    assert not (root / "asset-manifest.json").exists()
+    js_dir = root / renamed["js"]
+    config_text = (js_dir / "config.js").read_text(encoding="utf-8")
+    assert f'GANFLU_WHEEL_NAME = "{renamed["ganflu-0.1.0-py3-none-any.whl"]}";' in config_text
+    assert 'ASSET_MANIFEST_VERSION = "";' in config_text
+    assert f'PYODIDE_INDEX_URL = "./{renamed["vendor/pyodide/v0.29.0/full"]}/";' in config_text
+    assert f'GANFLU_DB_ARCHIVE_DIR = "./{renamed["ganflu-db"]}/";' in config_text
+    assert f'"./{renamed["vendor/pyodide-wheels"]}/six-1.17.0-py2.py3-none-any.whl"' in config_text
+    worker_js = (js_dir / "app" / "miniprot-worker.js").read_text(encoding="utf-8")
+    assert f"'../../{renamed['wasm/miniprot']}/miniprot-ganflu.js'" in worker_js
+    index_html = (root / "index.html").read_text(encoding="utf-8")
+    assert f"url('./{renamed['vendor/fonts']}/a.woff2')" in index_html
+    assert f'src="./{renamed["js"]}/app.js?v=1"' in index_html
+    headers_text = (root / "_headers").read_text(encoding="utf-8")
+    assert f"/{renamed['js']}/*\n  Cache-Control: public, max-age=31536000, immutable" in headers_text
+    assert "/js/*\n  Cache-Control: public, max-age=0, must-revalidate" in headers_text
+
+    other_root = tmp_path / "bundle-changed"
+    write_fingerprint_fixture(other_root)
+    (other_root / "wasm" / "miniprot" / "dist" / "miniprot-ganflu.wasm").write_bytes(b"\0asm v2")
+    changed = module.fingerprint_bundle(other_root)
+    assert changed["wasm/miniprot"] != renamed["wasm/miniprot"]
+    assert changed["vendor/fonts"] == renamed["vendor/fonts"]
+    # The js directory embeds the new miniprot path, so its hash changes too.
+    assert changed["js"] != renamed["js"]
+
+
+def test_cloudflare_asset_size_report_flags_budget(tmp_path):
+    module = load_cloudflare_pages_module()
+    (tmp_path / "big.wasm").write_bytes(b"0" * 2048)
+    (tmp_path / "big.wasm.gz").write_bytes(b"0" * 100)
+    (tmp_path / "small.js").write_bytes(b"1")
+
+    report = module.report_asset_sizes(tmp_path, max_bytes=1024)
+
+    assert [item["path"] for item in report] == ["big.wasm", "small.js"]
+    assert report[0] == {"path": "big.wasm", "bytes": 2048, "compressed_bytes": 100, "over_budget": True}
+    assert report[1]["compressed_bytes"] is None
+    assert report[1]["over_budget"] is False
+
+
 def test_cloudflare_bundle_includes_default_analytics_and_allows_opt_out(tmp_path):
     module = load_cloudflare_pages_module()
 
@@ -240,7 +537,6 @@ def test_wrangler_points_at_cloudflare_pages_bundle():
 
 
 def test_single_target_web_helper_skips_no_hit_contigs():
-    helpers = load_python_helpers_namespace()
     fasta = ">hit\nATGAAATAA\n>nohit\nATGAAATAA\n"
     gff3 = "\n".join(
         [
@@ -264,7 +560,7 @@ def test_single_target_web_helper_skips_no_hit_contigs():
     )
 
     result = json.loads(
-        helpers["run_ganflu_web"](fasta, gff3, "IAV", "sample", "sample", False, hit_settings)
+        web_helpers.run_ganflu_web(fasta, gff3, "IAV", "sample", "sample", False, hit_settings)
     )
 
     assert "error" not in result
@@ -316,7 +612,7 @@ def test_single_target_web_helper_skips_no_hit_contigs():
     assert "sample.log" in result["outputs"]
 
     strict_result = json.loads(
-        helpers["run_ganflu_web"](
+        web_helpers.run_ganflu_web(
             fasta,
             gff3,
             "IAV",
@@ -330,8 +626,78 @@ def test_single_target_web_helper_skips_no_hit_contigs():
     assert "No segment-compatible miniprot hits" in strict_result["error"]["message"]
 
 
+def test_web_file_helper_returns_output_paths(tmp_path):
+    fasta_path = tmp_path / "input.fasta"
+    gff3_path = tmp_path / "scan.gff3"
+    fasta_path.write_bytes(b">hit\nATGAAATAA\n")
+    gff3_path.write_bytes(
+        b"##gff-version 3\n"
+        b"hit\tminiprot\tmRNA\t1\t9\t1\t+\t.\tID=MP000001;Rank=1;Identity=0.9500;Positive=0.9500;Target=PB2 1 3\n"
+        b"hit\tminiprot\tCDS\t1\t9\t.\t+\t0\tParent=MP000001;Identity=0.9500;Target=PB2 1 3\n"
+    )
+    hit_settings = json.dumps(
+        {"minIdentity": 0.9, "minAaCoverage": 0.001, "minScore": 0.001, "completeAaCoverage": 0.001}
+    )
+
+    result = json.loads(
+        web_helpers.run_ganflu_web_files(
+            str(fasta_path), str(gff3_path), "IAV", "sample", "sample", False, hit_settings
+        )
+    )
+
+    assert "outputs" not in result
+    assert sorted(result["output_paths"]) == [
+        "sample.cds.fna",
+        "sample.faa",
+        "sample.gbk",
+        "sample.gff3",
+        "sample.hits.tsv",
+        "sample.log",
+        "sample.summary.json",
+    ]
+    assert all(Path(path).is_file() for path in result["output_paths"].values())
+    summary = json.loads(Path(result["output_paths"]["sample.summary.json"]).read_text(encoding="utf-8"))
+    assert summary["annotated_contigs"] == 1
+
+    empty_path = tmp_path / "empty.gff3"
+    empty_path.write_bytes(b"\n  \n")
+    empty_result = json.loads(
+        web_helpers.run_ganflu_web_files(
+            str(fasta_path), str(empty_path), "IAV", "sample", "sample", False, hit_settings
+        )
+    )
+    assert empty_result["error"]["message"] == "Miniprot GFF3 output is empty."
+
+
+def test_web_helpers_capture_the_run_log_without_root_handlers(monkeypatch):
+    # Pyodide starts with a bare root logger: no handlers and the WARNING level.
+    root_logger = logging.getLogger()
+    monkeypatch.setattr(root_logger, "handlers", [])
+    monkeypatch.setattr(root_logger, "level", logging.WARNING)
+    fasta = ">hit\nATGAAATAA\n"
+    gff3 = (
+        "##gff-version 3\n"
+        "hit\tminiprot\tmRNA\t1\t9\t1\t+\t.\tID=MP000001;Rank=1;Identity=0.9500;Positive=0.9500;Target=PB2 1 3\n"
+        "hit\tminiprot\tCDS\t1\t9\t.\t+\t0\tParent=MP000001;Identity=0.9500;Target=PB2 1 3\n"
+    )
+    hit_settings = json.dumps(
+        {"minIdentity": 0.9, "minAaCoverage": 0.001, "minScore": 0.001, "completeAaCoverage": 0.001}
+    )
+
+    single = json.loads(web_helpers.run_ganflu_web(fasta, gff3, "IAV", "sample", "sample", False, hit_settings))
+    auto = json.loads(
+        web_helpers.run_ganflu_auto_web(fasta, json.dumps({"IAV": gff3}), "sample", "sample", False, hit_settings)
+    )
+
+    for log_text in (single["outputs"]["sample.log"], auto["outputs"]["sample.auto.log"]):
+        assert "INFO - CDS nucleotide FASTA output:" in log_text
+        assert "INFO - Amino acid FASTA output:" in log_text
+    assert single["summary"]["run_log"]["messages"]
+    assert root_logger.handlers == []
+    assert root_logger.level == logging.WARNING
+
+
 def test_web_summary_displays_missing_stop_on_feature_not_contig():
-    helpers = load_python_helpers_namespace()
     fasta = ">hit\nATGAAAAAA\n"
     gff3 = "\n".join(
         [
@@ -345,7 +711,7 @@ def test_web_summary_displays_missing_stop_on_feature_not_contig():
     )
 
     result = json.loads(
-        helpers["run_ganflu_web"](fasta, gff3, "IAV", "sample", "sample", False, hit_settings)
+        web_helpers.run_ganflu_web(fasta, gff3, "IAV", "sample", "sample", False, hit_settings)
     )
 
     summary = json.loads(result["outputs"]["sample.summary.json"])
@@ -356,7 +722,6 @@ def test_web_summary_displays_missing_stop_on_feature_not_contig():
 
 
 def test_web_summary_does_not_mark_nonterminal_feature_fragment_missing_stop():
-    helpers = load_python_helpers_namespace()
     fasta = ">hit\nATGAAA\n"
     gff3 = "\n".join(
         [
@@ -371,7 +736,7 @@ def test_web_summary_does_not_mark_nonterminal_feature_fragment_missing_stop():
     )
 
     result = json.loads(
-        helpers["run_ganflu_web"](fasta, gff3, "IAV", "sample", "sample", False, hit_settings)
+        web_helpers.run_ganflu_web(fasta, gff3, "IAV", "sample", "sample", False, hit_settings)
     )
 
     summary = json.loads(result["outputs"]["sample.summary.json"])
@@ -383,7 +748,6 @@ def test_web_summary_does_not_mark_nonterminal_feature_fragment_missing_stop():
 
 
 def test_auto_web_helper_summary_downloads_and_features():
-    helpers = load_python_helpers_namespace()
     fasta = ">hit\nATGAAATAA\n>nohit\nATGAAATAA\n"
     gff3 = "\n".join(
         [
@@ -403,7 +767,7 @@ def test_auto_web_helper_summary_downloads_and_features():
     )
 
     result = json.loads(
-        helpers["run_ganflu_auto_web"](
+        web_helpers.run_ganflu_auto_web(
             fasta,
             json.dumps({"IAV": gff3}),
             "sample",
@@ -444,15 +808,89 @@ def test_auto_web_helper_summary_downloads_and_features():
     assert hit_contig["features"][0]["sequences"]["aa"] == "MK"
 
 
-def test_browser_wheel_contains_ganflu_db_without_web_assets():
+def test_browser_wheel_is_slim_and_ships_reference_data_per_target():
     wheel_path = WEB_ROOT / f"ganflu-{ganflu.__version__}-py3-none-any.whl"
     assert wheel_path.exists()
     with zipfile.ZipFile(wheel_path) as zf:
         names = set(zf.namelist())
-    assert "ganflu/db/IAV/IAV.toml" in names
+    assert "ganflu/web_helpers.py" in names
     assert "ganflu/scripts/auto_mode.py" in names
-    assert "ganflu/db/IDV/prot/IDV_proteome_consensus.faa" in names
-    assert not any(name.startswith("ganflu/web/") for name in names)
+    assert "ganflu/scripts/gff3togbk.py" in names
+    assert not any(name.startswith(("ganflu/db/", "ganflu/web/", "ganflu/launchers/")) for name in names)
+    assert "ganflu/ganflu.py" not in names
+    assert "ganflu/serve.py" not in names
+    for target in ("IAV", "IBV", "ICV", "IDV"):
+        with zipfile.ZipFile(WEB_ROOT / "ganflu-db" / f"{target}.zip") as zf:
+            names = set(zf.namelist())
+        assert f"db/{target}/{target}.toml" in names
+        assert f"db/{target}/prot/{target}_proteome_consensus.faa" in names
+
+
+def test_committed_browser_wheel_matches_the_source_tree():
+    # Rebuild with `python3.13 tools/prepare_browser_wheel.py` when this fails.
+    module = load_prepare_browser_wheel_module()
+    wheel_path = WEB_ROOT / f"ganflu-{ganflu.__version__}-py3-none-any.whl"
+    with zipfile.ZipFile(wheel_path) as zf:
+        sources = {name: zf.read(name) for name in zf.namelist() if name.endswith(".py")}
+
+    assert {module._wheel_module_name(name) for name in sources} == module.browser_module_closure()
+    stale = [name for name, data in sources.items() if (REPO_ROOT / name).read_bytes() != data]
+    assert not stale
+
+
+def test_web_helpers_import_without_sqlite3():
+    # Pyodide unvendors sqlite3 and the web app does not load it.
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            "sys.modules['sqlite3'] = None\n"
+            "sys.modules['_sqlite3'] = None\n"
+            "import ganflu.web_helpers\n",
+        ],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    assert "ganflu.scripts.results_db" not in load_prepare_browser_wheel_module().browser_module_closure()
+
+
+def test_browser_module_closure_skips_function_level_imports(tmp_path):
+    module = load_prepare_browser_wheel_module()
+    package_root = tmp_path / "ganflu"
+    (package_root / "scripts").mkdir(parents=True)
+    (package_root / "launchers").mkdir()
+    (package_root / "__init__.py").write_text("", encoding="utf-8")
+    (package_root / "scripts" / "__init__.py").write_text("", encoding="utf-8")
+    (package_root / "launchers" / "__init__.py").write_text("", encoding="utf-8")
+    (package_root / "launchers" / "miniprot.py").write_text("", encoding="utf-8")
+    (package_root / "serve.py").write_text("", encoding="utf-8")
+    (package_root / "web_helpers.py").write_text(
+        "import json\nfrom ganflu.scripts import core\n", encoding="utf-8"
+    )
+    (package_root / "scripts" / "core.py").write_text(
+        "from . import util\n"
+        "try:\n    from .optional import thing\nexcept ImportError:\n    thing = None\n"
+        "def run():\n    from ganflu.launchers.miniprot import Miniprot\n",
+        encoding="utf-8",
+    )
+    (package_root / "scripts" / "util.py").write_text("", encoding="utf-8")
+    (package_root / "scripts" / "optional.py").write_text("", encoding="utf-8")
+
+    modules = module.browser_module_closure(("ganflu.web_helpers",), package_root)
+
+    assert modules == {
+        "ganflu",
+        "ganflu.web_helpers",
+        "ganflu.scripts",
+        "ganflu.scripts.core",
+        "ganflu.scripts.util",
+        "ganflu.scripts.optional",
+    }
 
 
 def test_normal_wheel_contains_webapp_assets(tmp_path):
@@ -468,6 +906,7 @@ def test_normal_wheel_contains_webapp_assets(tmp_path):
         names = set(zf.namelist())
     assert "ganflu/web/index.html" in names
     assert f"ganflu/web/ganflu-{ganflu.__version__}-py3-none-any.whl" in names
+    assert "ganflu/web/ganflu-db/IAV.zip" in names
     assert "ganflu/web/wasm/miniprot/miniprot-ganflu.js" in names
     assert "ganflu/web/samples/IAV_PR8.fasta" in names
     assert "ganflu/web/samples/IDV_swine_Oklahoma_1334_2011.fna" in names
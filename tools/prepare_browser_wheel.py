@@ -1,23 +1,78 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
+import ast
+import base64
+import gzip
+import hashlib
+import json
 import re
 import os
+import py_compile
 import shutil
 import subprocess
 import sys
 import tempfile
+import zipfile
 from pathlib import Path
 
+try:
+    import brotli
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    brotli = None
+
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 WEB_ROOT = REPO_ROOT / "ganflu" / "web"
-INIT_PATH = REPO_ROOT / "ganflu" / "__init__.py"
+PACKAGE_ROOT = REPO_ROOT / "ganflu"
+INIT_PATH = PACKAGE_ROOT / "__init__.py"
 CONFIG_PATH = WEB_ROOT / "js" / "config.js"
 BROWSER_WHEEL_BUILD_ENV = "GANFLU_BUILDING_BROWSER_WHEEL"
 
 VERSION_RE = re.compile(r'^__version__ = ["\']([^"\']+)["\']', re.MULTILINE)
 WHEEL_NAME_RE = re.compile(r'^(export const GANFLU_WHEEL_NAME\s*=\s*")[^"]+(";\s*)$', re.MULTILINE)
+MANIFEST_VERSION_RE = re.compile(
+    r'^(export const ASSET_MANIFEST_VERSION\s*=\s*")[^"]*(";\s*)$', re.MULTILINE
+)
+
+# Large, versioned runtime assets precached by sw.js. App JS/HTML stay on
+# normal HTTP revalidation so UI fixes ship without a manifest rebuild.
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+ASSET_MANIFEST_GLOBS = (
+    "ganflu-*.whl",
+    "ganflu-db/*.zip",
+    "vendor/pyodide/*/full/*",
+    "vendor/pyodide-wheels/*.whl",
+    "wasm/miniprot/*.js",
+    "wasm/miniprot/dist/*",
+)
+ASSET_HASH_LENGTH = 16
+# Pyodide runtime files every start fetches. The manifest refuses to build
+# without them, so a partial checkout cannot drop them from the precache.
+PYODIDE_RUNTIME_PATH = "vendor/pyodide/v0.29.0/full"
+PYODIDE_RUNTIME_FILES = (
+    "pyodide.mjs",
+    "pyodide.asm.js",
+    "pyodide.asm.wasm",
+    "pyodide-lock.json",
+    "python_stdlib.zip",
+)
+# .br/.gz siblings are served by `ganflu gui` when the client accepts them.
+PRECOMPRESSED_SUFFIXES = (".br", ".gz")
+PRECOMPRESS_SOURCE_SUFFIXES = {".css", ".html", ".js", ".json", ".mjs", ".svg", ".wasm", ".zip"}
+PRECOMPRESS_MIN_BYTES = 1024
+# Bytecode is only valid for the interpreter that wrote it, so the browser
+# wheel can only be built with .pyc files on Pyodide's Python.
+PYODIDE_PYTHON_VERSION = (3, 13)
+# Fixed entry timestamp, so rebuilt zips only change when their content does.
+FIXED_ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+# The same for the entries bdist_wheel writes (1980-01-01T00:00:00Z).
+SOURCE_DATE_EPOCH = "315532800"
+# The browser wheel keeps only the modules these import at module level.
+BROWSER_ENTRY_MODULES = ("ganflu.web_helpers",)
+# Per-target reference data, unpacked into the installed package on demand.
+DB_ARCHIVE_DIR = WEB_ROOT / "ganflu-db"
 
 
 def read_version() -> str:
@@ -31,20 +86,273 @@ def expected_wheel_name() -> str:
     return f"ganflu-{read_version()}-py3-none-any.whl"
 
 
-def update_config(wheel_name: str) -> None:
-    text = CONFIG_PATH.read_text(encoding="utf-8")
-    updated, replacements = WHEEL_NAME_RE.subn(
-        lambda match: f"{match.group(1)}{wheel_name}{match.group(2)}",
+def _replace_config_constant(text: str, pattern: re.Pattern[str], value: str, name: str) -> str:
+    updated, replacements = pattern.subn(
+        lambda match: f"{match.group(1)}{value}{match.group(2)}",
         text,
         count=1,
     )
     if replacements != 1:
-        raise RuntimeError(f"Could not update GANFLU_WHEEL_NAME in {CONFIG_PATH}")
+        raise RuntimeError(f"Could not update {name} in {CONFIG_PATH}")
+    return updated
+
+
+def update_config(wheel_name: str, manifest_version: str | None = None) -> None:
+    text = CONFIG_PATH.read_text(encoding="utf-8")
+    updated = _replace_config_constant(text, WHEEL_NAME_RE, wheel_name, "GANFLU_WHEEL_NAME")
+    if manifest_version is not None:
+        updated = _replace_config_constant(
+            updated, MANIFEST_VERSION_RE, manifest_version, "ASSET_MANIFEST_VERSION"
+        )
     if updated != text:
         CONFIG_PATH.write_text(updated, encoding="utf-8")
 
 
-def prepare_browser_wheel() -> Path:
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_asset_manifest(web_root: Path = WEB_ROOT) -> dict:
+    """Map precached asset paths to content hashes; version hashes the whole map."""
+    required = [f"{PYODIDE_RUNTIME_PATH}/{name}" for name in PYODIDE_RUNTIME_FILES]
+    missing = [path for path in required if not (web_root / path).is_file()]
+    if missing:
+        raise FileNotFoundError(f"Pyodide runtime files are missing from {web_root}: {', '.join(missing)}")
+    assets = {}
+    for pattern in ASSET_MANIFEST_GLOBS:
+        for path in sorted(web_root.glob(pattern)):
+            if path.is_file() and path.suffix not in PRECOMPRESSED_SUFFIXES:
+                assets[path.relative_to(web_root).as_posix()] = _file_sha256(path)[:ASSET_HASH_LENGTH]
+    assets = dict(sorted(assets.items()))
+    listing = "".join(f"{path} {content_hash}\n" for path, content_hash in assets.items())
+    version = hashlib.sha256(listing.encode("utf-8")).hexdigest()[:ASSET_HASH_LENGTH]
+    return {"version": version, "assets": assets}
+
+
+def write_asset_manifest(web_root: Path = WEB_ROOT) -> dict:
+    manifest = build_asset_manifest(web_root)
+    manifest_path = web_root / ASSET_MANIFEST_NAME
+    manifest_path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def _write_if_smaller(path: Path, data: bytes, source_size: int) -> bool:
+    if len(data) >= source_size:
+        if path.exists():
+            path.unlink()
+        return False
+    path.write_bytes(data)
+    return True
+
+
+def precompress_assets(web_root: Path = WEB_ROOT) -> list[Path]:
+    """Write .gz (and .br when brotli is installed) siblings for text and wasm assets."""
+    written = []
+    for path in sorted(web_root.rglob("*")):
+        if not path.is_file() or path.suffix not in PRECOMPRESS_SOURCE_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        if len(data) < PRECOMPRESS_MIN_BYTES:
+            continue
+        variants = [(path.with_name(path.name + ".gz"), lambda raw: gzip.compress(raw, 9, mtime=0))]
+        if brotli is not None:
+            variants.append((path.with_name(path.name + ".br"), lambda raw: brotli.compress(raw, quality=11)))
+        for variant_path, compress in variants:
+            if variant_path.exists() and variant_path.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+                continue
+            if _write_if_smaller(variant_path, compress(data), len(data)):
+                written.append(variant_path)
+    return written
+
+
+def _record_hash(data: bytes) -> str:
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=")
+    return f"sha256={digest.decode('ascii')}"
+
+
+def _module_file(module: str, package_root: Path = PACKAGE_ROOT) -> Path | None:
+    parts = module.split(".")[1:]
+    candidates = [package_root.joinpath(*parts, "__init__.py")]
+    if parts:
+        candidates.append(package_root.joinpath(*parts[:-1], f"{parts[-1]}.py"))
+    return next((candidate for candidate in candidates if candidate.is_file()), None)
+
+
+def _module_level_imports(node: ast.AST):
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            continue
+        if isinstance(child, (ast.Import, ast.ImportFrom)):
+            yield child
+        yield from _module_level_imports(child)
+
+
+def browser_module_closure(
+    entry_modules: tuple[str, ...] = BROWSER_ENTRY_MODULES,
+    package_root: Path = PACKAGE_ROOT,
+) -> set[str]:
+    """Return the ganflu modules imported, directly or not, by the entry modules.
+
+    Only imports that run at import time count; imports inside functions are
+    how native-only code (e.g. the miniprot launcher) stays out of the wheel.
+    """
+    package = package_root.name
+    modules = set()
+    pending = list(entry_modules)
+    while pending:
+        module = pending.pop()
+        if module in modules or module.split(".")[0] != package:
+            continue
+        path = _module_file(module, package_root)
+        if path is None:
+            continue
+        modules.add(module)
+        pending.extend(".".join(module.split(".")[:depth]) for depth in range(1, module.count(".") + 1))
+        is_package = path.name == "__init__.py"
+        for node in _module_level_imports(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+                continue
+            base = node.module or ""
+            if node.level:
+                anchor = module.split(".")
+                anchor = anchor[: len(anchor) - node.level + (1 if is_package else 0)]
+                base = ".".join([*anchor, base] if base else anchor)
+            pending.append(base)
+            pending.extend(f"{base}.{alias.name}" for alias in node.names)
+    return modules
+
+
+def _wheel_module_name(name: str) -> str | None:
+    if not name.endswith(".py"):
+        return None
+    parts = name[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _rewrite_wheel(wheel_path: Path, keep=lambda name: True, extra: list[tuple[str, bytes]] = ()) -> list[str]:
+    """Rewrite a wheel in place, dropping entries and adding files; RECORD follows.
+
+    Returns the names of the dropped entries.
+    """
+    with zipfile.ZipFile(wheel_path) as wheel:
+        entries = [(info, wheel.read(info)) for info in wheel.infolist()]
+    record_name = next(info.filename for info, _ in entries if info.filename.endswith(".dist-info/RECORD"))
+    dropped = [
+        info.filename for info, _ in entries
+        if info.filename != record_name and not info.filename.endswith("/") and not keep(info.filename)
+    ]
+    dropped_names = set(dropped)
+    record_lines = []
+    with zipfile.ZipFile(wheel_path, "w", zipfile.ZIP_DEFLATED) as wheel:
+        for info, data in entries:
+            if info.filename == record_name:
+                record_lines = [
+                    line for line in data.decode("utf-8").splitlines()
+                    if line.split(",", 1)[0] not in dropped_names and not line.startswith(f"{record_name},")
+                ]
+            elif info.filename not in dropped_names:
+                wheel.writestr(info, data)
+        for name, data in extra:
+            info = zipfile.ZipInfo(name, date_time=FIXED_ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            wheel.writestr(info, data)
+            record_lines.append(f"{name},{_record_hash(data)},{len(data)}")
+        record_lines.append(f"{record_name},,")
+        wheel.writestr(record_name, "\n".join(record_lines) + "\n")
+    return dropped
+
+
+def slim_browser_wheel(wheel_path: Path, modules: set[str]) -> list[str]:
+    """Drop modules the web path does not import and the packaged reference data."""
+    def keep(name: str) -> bool:
+        if name.startswith("ganflu/db/"):
+            return False
+        module = _wheel_module_name(name)
+        return module is None or module in modules
+
+    return _rewrite_wheel(wheel_path, keep)
+
+
+def add_wheel_bytecode(wheel_path: Path) -> int:
+    """Add unchecked-hash .pyc files for every module in the wheel.
+
+    Unchecked-hash bytecode is used without looking at the source, so Pyodide
+    imports ganflu (including ``ganflu.web_helpers``) without compiling it.
+    The wheel is rewritten in place and its RECORD is extended.
+    """
+    with zipfile.ZipFile(wheel_path) as wheel:
+        sources = [(name, wheel.read(name)) for name in wheel.namelist() if name.endswith(".py")]
+    compiled = []
+    with tempfile.TemporaryDirectory(prefix="ganflu-wheel-bytecode-") as tmpdir:
+        for name, data in sources:
+            source_path = Path(tmpdir) / name
+            source_path.parent.mkdir(parents=True, exist_ok=True)
+            source_path.write_bytes(data)
+            directory, _, module_file = name.rpartition("/")
+            pyc_name = f"{module_file[:-3]}.{sys.implementation.cache_tag}.pyc"
+            pyc_path = "/".join(part for part in (directory, "__pycache__", pyc_name) if part)
+            py_compile.compile(
+                str(source_path),
+                cfile=str(Path(tmpdir) / pyc_path),
+                dfile=name,
+                doraise=True,
+                invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+            )
+            compiled.append((pyc_path, (Path(tmpdir) / pyc_path).read_bytes()))
+    _rewrite_wheel(wheel_path, extra=compiled)
+    return len(compiled)
+
+
+def write_db_archives(package_root: Path = PACKAGE_ROOT, output_dir: Path = DB_ARCHIVE_DIR) -> dict[str, Path]:
+    """Zip each ``db/<target>`` so the browser can unpack it into the package."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for old_archive in output_dir.glob("*.zip"):
+        old_archive.unlink()
+    archives = {}
+    for target_dir in sorted(path for path in (package_root / "db").iterdir() if path.is_dir()):
+        files = sorted(path for path in target_dir.rglob("*") if path.is_file() and "__pycache__" not in path.parts)
+        if not files:
+            continue
+        archive_path = output_dir / f"{target_dir.name}.zip"
+        with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for path in files:
+                info = zipfile.ZipInfo(path.relative_to(package_root).as_posix(), date_time=FIXED_ZIP_DATE)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                archive.writestr(info, path.read_bytes())
+        archives[target_dir.name] = archive_path
+    return archives
+
+
+def browser_component_sizes(wheel_path: Path, archives: dict[str, Path]) -> list[tuple[str, int]]:
+    components = [(wheel_path.name, wheel_path.stat().st_size)]
+    components.extend((f"db/{target}", path.stat().st_size) for target, path in sorted(archives.items()))
+    return components
+
+
+def check_bytecode_python(version: tuple[int, ...] | None = None) -> None:
+    version = tuple(version or sys.version_info[:2])
+    if version != PYODIDE_PYTHON_VERSION:
+        raise RuntimeError(
+            "Browser wheel bytecode must be compiled by Python "
+            f"{'.'.join(map(str, PYODIDE_PYTHON_VERSION))} (the Python in Pyodide), "
+            f"this is {'.'.join(map(str, version))}. Run this script with that Python, "
+            "or pass --no-bytecode for a development build."
+        )
+
+
+def prepare_browser_wheel(bytecode: bool = True) -> Path:
+    """Build the slim browser wheel and the per-target reference archives."""
+    if bytecode:
+        check_bytecode_python()
     WEB_ROOT.mkdir(parents=True, exist_ok=True)
     wheel_name = expected_wheel_name()
     build_dir = REPO_ROOT / "build"
@@ -55,6 +363,7 @@ def prepare_browser_wheel() -> Path:
         dist_dir.mkdir()
         env = os.environ.copy()
         env[BROWSER_WHEEL_BUILD_ENV] = "1"
+        env["SOURCE_DATE_EPOCH"] = SOURCE_DATE_EPOCH
         subprocess.run(
             [sys.executable, "setup.py", "bdist_wheel", "--dist-dir", str(dist_dir)],
             cwd=REPO_ROOT,
@@ -67,15 +376,49 @@ def prepare_browser_wheel() -> Path:
             raise FileNotFoundError(f"Expected {wheel_name}; built wheels: {available or 'none'}")
         for old_wheel in WEB_ROOT.glob("ganflu-*.whl"):
             old_wheel.unlink()
+        dropped = slim_browser_wheel(wheel_path, browser_module_closure())
+        print(f"Left {len(dropped)} file(s) not needed in the browser out of {wheel_name}")
+        if bytecode:
+            count = add_wheel_bytecode(wheel_path)
+            print(f"Added bytecode for {count} module(s) to {wheel_name}")
         target_path = WEB_ROOT / wheel_name
         shutil.copy2(wheel_path, target_path)
-    update_config(wheel_name)
+    write_db_archives()
+    manifest = write_asset_manifest()
+    update_config(wheel_name, manifest["version"])
     return target_path
 
 
-def main() -> int:
-    target_path = prepare_browser_wheel()
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Build the ganflu browser wheel and refresh the web asset manifest."
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Also write .gz/.br siblings of web assets for `ganflu gui` to serve.",
+    )
+    parser.add_argument(
+        "--no-bytecode",
+        dest="bytecode",
+        action="store_false",
+        help="Do not add .pyc files to the wheel, so it can be built without Python 3.13.",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        target_path = prepare_browser_wheel(bytecode=args.bytecode)
+    except RuntimeError as error:
+        print(f"prepare_browser_wheel: error: {error}", file=sys.stderr)
+        return 1
     print(f"Prepared browser wheel: {target_path.relative_to(REPO_ROOT)}")
+    archives = {path.stem: path for path in sorted(DB_ARCHIVE_DIR.glob("*.zip"))}
+    for name, size in browser_component_sizes(target_path, archives):
+        print(f"  {name:<32} {size / 1024:>8.1f} KiB")
+    print("Install times are logged to the browser console when the app loads each component.")
+    if args.precompress:
+        written = precompress_assets()
+        print(f"Wrote {len(written)} precompressed asset(s)")
     return 0
 
 
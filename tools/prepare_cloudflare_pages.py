@@ -2,9 +2,12 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import os
+import re
 import shutil
+import sys
 from html import escape
 from importlib.util import module_from_spec, spec_from_file_location
 from pathlib import Path
@@ -25,6 +28,28 @@ SCRIPT_SRC_ANALYTICS = (
 CONNECT_SRC_BASE = "connect-src 'self';"
 CONNECT_SRC_ANALYTICS = "connect-src 'self' https://cloudflareinsights.com;"
 
+# Directories renamed to <dir>.<hash> when fingerprinting. Files inside keep
+# their names, so relative imports within a directory and wheel filenames
+# (parsed by micropip) keep working. A directory is hashed after references
+# inside it are rewritten, which is why "js" comes last.
+FINGERPRINT_DIRS = (
+    "vendor/fonts",
+    "vendor/pyodide/v0.29.0/full",
+    "vendor/pyodide-wheels",
+    "wasm/miniprot",
+    "ganflu-db",
+    "js",
+)
+# The ganflu wheel sits in the web root, so it is moved to wheels.<hash>/.
+FINGERPRINT_WHEEL_DIR = "wheels"
+FINGERPRINT_HASH_LENGTH = 12
+# Only first-party files carry references to fingerprinted paths.
+REFERENCE_GLOBS = ("*.html", "js/**/*.js")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Cloudflare Pages rejects deployments with files larger than 25 MiB.
+MAX_ASSET_BYTES = 25 * 1024 * 1024
+SIZE_REPORT_MIN_BYTES = 64 * 1024
+
 
 def _load_prepare_browser_wheel_module():
     module_path = REPO_ROOT / "tools" / "prepare_browser_wheel.py"
@@ -71,10 +96,122 @@ def _render_analytics_notice() -> str:
     )
 
 
+def _tree_sha256(root: Path, file_sha256) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(root.rglob("*")):
+        if path.is_file():
+            digest.update(f"{path.relative_to(root).as_posix()} {file_sha256(path)}\n".encode("utf-8"))
+    return digest.hexdigest()[:FINGERPRINT_HASH_LENGTH]
+
+
+def _rewrite_references(output_root: Path, old_path: str, new_path: str) -> int:
+    # Match the path only where a URL or import specifier starts or continues,
+    # e.g. './vendor/fonts/', '../../wasm/miniprot/' or url('./vendor/...').
+    pattern = re.compile(rf"(?<=[\"'(/]){re.escape(old_path)}/")
+    rewritten = 0
+    for reference_glob in REFERENCE_GLOBS:
+        for path in sorted(output_root.glob(reference_glob)):
+            text = path.read_text(encoding="utf-8")
+            updated, count = pattern.subn(f"{new_path}/", text)
+            if count:
+                path.write_text(updated, encoding="utf-8")
+                rewritten += count
+    return rewritten
+
+
+def fingerprint_bundle(output_root: Path) -> dict[str, str]:
+    """Move static assets under content-hashed paths and rewrite references.
+
+    Returns a map of original to fingerprinted paths, relative to the bundle
+    root. The Service Worker precache is disabled because hashed URLs are
+    cached immutably by the browser instead.
+    """
+    browser_wheel = _load_prepare_browser_wheel_module()
+    output_root = Path(output_root)
+    config_path = output_root / "js" / "config.js"
+    config_text = config_path.read_text(encoding="utf-8")
+    renamed = {}
+
+    wheel_match = browser_wheel.WHEEL_NAME_RE.search(config_text)
+    if wheel_match is None:
+        raise RuntimeError(f"Could not find GANFLU_WHEEL_NAME in {config_path}")
+    wheel_name = config_text[wheel_match.end(1):wheel_match.start(2)]
+    wheel_path = output_root / wheel_name
+    if not wheel_path.is_file():
+        raise RuntimeError(f"Browser wheel {wheel_name} is missing from {output_root}")
+    wheel_hash = browser_wheel._file_sha256(wheel_path)[:FINGERPRINT_HASH_LENGTH]
+    hashed_wheel = f"{FINGERPRINT_WHEEL_DIR}.{wheel_hash}/{wheel_name}"
+    (output_root / hashed_wheel).parent.mkdir()
+    wheel_path.rename(output_root / hashed_wheel)
+    renamed[wheel_name] = hashed_wheel
+    config_text = browser_wheel._replace_config_constant(
+        config_text, browser_wheel.WHEEL_NAME_RE, hashed_wheel, "GANFLU_WHEEL_NAME"
+    )
+    config_text = browser_wheel._replace_config_constant(
+        config_text, browser_wheel.MANIFEST_VERSION_RE, "", "ASSET_MANIFEST_VERSION"
+    )
+    config_path.write_text(config_text, encoding="utf-8")
+    manifest_path = output_root / browser_wheel.ASSET_MANIFEST_NAME
+    if manifest_path.exists():
+        manifest_path.unlink()
+
+    for relative_dir in FINGERPRINT_DIRS:
+        source = output_root / relative_dir
+        if not source.is_dir():
+            raise RuntimeError(f"Expected asset directory not found while fingerprinting: {relative_dir}")
+        hashed_dir = f"{relative_dir}.{_tree_sha256(source, browser_wheel._file_sha256)}"
+        if not _rewrite_references(output_root, relative_dir, hashed_dir):
+            raise RuntimeError(f"No references to {relative_dir}/ found while fingerprinting")
+        source.rename(output_root / hashed_dir)
+        renamed[relative_dir] = hashed_dir
+
+    headers_path = output_root / "_headers"
+    rules = "".join(
+        f"\n/{Path(hashed).parent.as_posix() if hashed.endswith('.whl') else hashed}/*\n"
+        f"  Cache-Control: {IMMUTABLE_CACHE_CONTROL}\n"
+        for hashed in renamed.values()
+    )
+    with headers_path.open("a", encoding="utf-8") as handle:
+        handle.write(rules)
+    return renamed
+
+
+def report_asset_sizes(output_root: Path, max_bytes: int = MAX_ASSET_BYTES) -> list[dict]:
+    """List assets by size with their smallest precompressed variant, largest first."""
+    output_root = Path(output_root)
+    report = []
+    for path in output_root.rglob("*"):
+        if not path.is_file() or path.suffix in {".br", ".gz"}:
+            continue
+        size = path.stat().st_size
+        variants = [
+            sibling.stat().st_size
+            for sibling in (path.with_name(path.name + ".br"), path.with_name(path.name + ".gz"))
+            if sibling.is_file()
+        ]
+        report.append(
+            {
+                "path": path.relative_to(output_root).as_posix(),
+                "bytes": size,
+                "compressed_bytes": min(variants) if variants else None,
+                "over_budget": size > max_bytes,
+            }
+        )
+    return sorted(report, key=lambda item: (-item["bytes"], item["path"]))
+
+
+def _format_size(size: int | None) -> str:
+    if size is None:
+        return "-"
+    return f"{size / (1024 * 1024):.2f} MiB" if size >= 1024 * 1024 else f"{size / 1024:.1f} KiB"
+
+
 def build_cloudflare_pages_bundle(
     *,
     output_root: Path = DEFAULT_OUTPUT_ROOT,
     analytics_token: str | None = DEFAULT_ANALYTICS_TOKEN,
+    fingerprint: bool = False,
+    precompress: bool = False,
 ) -> Path:
     output_root = Path(output_root)
     if output_root.exists():
@@ -99,6 +236,10 @@ def build_cloudflare_pages_bundle(
         _render_analytics_notice() if token else "",
     )
     index_path.write_text(index_html, encoding="utf-8")
+    if fingerprint:
+        fingerprint_bundle(output_root)
+    if precompress:
+        _load_prepare_browser_wheel_module().precompress_assets(output_root)
     return output_root
 
 
@@ -107,6 +248,8 @@ def prepare_cloudflare_pages(
     output_root: Path = DEFAULT_OUTPUT_ROOT,
     analytics_token: str | None = None,
     analytics_enabled: bool = True,
+    fingerprint: bool = True,
+    precompress: bool = True,
 ) -> Path:
     prepare_browser_wheel_module = _load_prepare_browser_wheel_module()
     prepare_browser_wheel_module.prepare_browser_wheel()
@@ -114,7 +257,12 @@ def prepare_cloudflare_pages(
     token = None
     if analytics_enabled:
         token = analytics_token or os.environ.get(ANALYTICS_TOKEN_ENV) or DEFAULT_ANALYTICS_TOKEN
-    return build_cloudflare_pages_bundle(output_root=output_root, analytics_token=token)
+    return build_cloudflare_pages_bundle(
+        output_root=output_root,
+        analytics_token=token,
+        fingerprint=fingerprint,
+        precompress=precompress,
+    )
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -143,14 +291,49 @@ def main(argv: list[str] | None = None) -> int:
         action="store_true",
         help="Do not inject Cloudflare Web Analytics or the hosted analytics notice.",
     )
+    parser.add_argument(
+        "--no-fingerprint",
+        action="store_true",
+        help="Keep unhashed asset paths (no immutable caching for runtime assets).",
+    )
+    parser.add_argument(
+        "--no-precompress",
+        action="store_true",
+        help="Do not write .br/.gz variants of text and WebAssembly assets.",
+    )
+    parser.add_argument(
+        "--max-asset-mib",
+        type=float,
+        default=MAX_ASSET_BYTES / (1024 * 1024),
+        help="Per-file size budget in MiB; exceeding it fails the build (default: 25, the Pages limit).",
+    )
     args = parser.parse_args(argv)
 
     output_root = prepare_cloudflare_pages(
         output_root=args.output_root,
         analytics_token=args.analytics_token,
         analytics_enabled=not args.no_analytics,
+        fingerprint=not args.no_fingerprint,
+        precompress=not args.no_precompress,
     )
     print(f"Prepared Cloudflare Pages bundle: {output_root.relative_to(REPO_ROOT)}")
+
+    report = report_asset_sizes(output_root, int(args.max_asset_mib * 1024 * 1024))
+    print(f"{'size':>12} {'compressed':>12}  asset")
+    for item in report:
+        if item["bytes"] < SIZE_REPORT_MIN_BYTES and not item["over_budget"]:
+            continue
+        marker = "  OVER BUDGET" if item["over_budget"] else ""
+        print(
+            f"{_format_size(item['bytes']):>12} {_format_size(item['compressed_bytes']):>12}  "
+            f"{item['path']}{marker}"
+        )
+    total = sum(item["bytes"] for item in report)
+    print(f"{_format_size(total):>12} total in {len(report)} files")
+    over_budget = [item["path"] for item in report if item["over_budget"]]
+    if over_budget:
+        print(f"{len(over_budget)} asset(s) exceed the {args.max_asset_mib:g} MiB budget", file=sys.stderr)
+        return 1
     return 0
 
 